@@ -1,10 +1,27 @@
 import { NextResponse } from 'next/server'
+import { createClient } from '@/lib/supabase/server'
+import { timingSafeEqual } from 'crypto'
+import {
+  parsePageSize, encodeCursor, decodeCursor, keysetFilter, slicePage, encodeSortCursor, decodeSortCursor,
+  sortKeysetFilter
+} from '@/lib/pagination'
+import { getCatalog, catalogCache } from '@/lib/catalog-cache'
+import { scheduleSnapshot } from '@/lib/catalog-publisher'
+import { getImageVariant } from '@/lib/image-derivatives'
+import { SPEC_FACETS, SPEC_RANGE_FIELDS } from '@/lib/motorcycle-specs'
+
+// Columns the catalog grid renders, plus created_at for the cursor
+const PRODUCT_LIST_SELECT = `id, name, brand, model, year, price, status, description, specifications,
+  category_id, subcategory_id, created_at,
+  categories (id, name, slug),
+  subcategories (id, name, slug),
+  product_images (id, image_url, is_primary, display_order, width, height, blurhash)`
 
 // Helper function to handle CORS
 function handleCORS(response) {
   response.headers.set('Access-Control-Allow-Origin', process.env.CORS_ORIGINS || '*')
   response.headers.set('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
-  response.headers.set('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+  response.headers.set('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Catalog-Webhook-Secret')
   response.headers.set('Access-Control-Allow-Credentials', 'true')
   return response
 }
@@ -14,6 +31,306 @@ export async function OPTIONS() {
   return handleCORS(new NextResponse(null, { status: 200 }))
 }
 
+// dealership_id from the query string, or looked up from ?slug=
+async function resolveDealershipId(supabase, searchParams) {
+  if (searchParams.get('dealership_id')) {
+    return { dealershipId: searchParams.get('dealership_id') }
+  }
+  if (!searchParams.get('slug')) {
+    return { errorResponse: NextResponse.json({ error: 'dealership_id or slug is required' }, { status: 400 }) }
+  }
+  const { data: dealership } = await supabase
+    .from('dealerships')
+    .select('id')
+    .eq('slug', searchParams.get('slug'))
+    .eq('is_active', true)
+    .maybeSingle()
+  if (!dealership) {
+    return { errorResponse: NextResponse.json({ error: 'Dealership not found' }, { status: 404 }) }
+  }
+  return { dealershipId: dealership.id }
+}
+
+// GET /api/products?dealership_id=<uuid>|slug=<slug>&limit=24&cursor=<next_cursor>
+// Optional filters: category_id, subcategory_id, status
+async function listProducts(request) {
+  const { searchParams } = new URL(request.url)
+  const supabase = await createClient()
+  const limit = parsePageSize(searchParams.get('limit'))
+
+  const { dealershipId, errorResponse } = await resolveDealershipId(supabase, searchParams)
+  if (errorResponse) return errorResponse
+
+  let query = supabase
+    .from('products')
+    .select(PRODUCT_LIST_SELECT)
+    .eq('dealership_id', dealershipId)
+
+  for (const column of ['category_id', 'subcategory_id', 'status']) {
+    if (searchParams.get(column)) query = query.eq(column, searchParams.get(column))
+  }
+
+  if (searchParams.get('cursor')) {
+    const cursor = decodeCursor(searchParams.get('cursor'))
+    if (!cursor) {
+      return NextResponse.json({ error: 'Invalid cursor' }, { status: 400 })
+    }
+    // The redundant bound lets Postgres start the index range at the cursor
+    // instead of walking the tenant's newest rows and filtering them out
+    query = query.lte('created_at', cursor.createdAt).or(keysetFilter(cursor))
+  }
+
+  // One extra row tells us whether there is a next page without a count(*)
+  const { data, error } = await query
+    .order('created_at', { ascending: false })
+    .order('id', { ascending: false })
+    .limit(limit + 1)
+
+  if (error) throw error
+
+  const page = data.slice(0, limit)
+  return NextResponse.json({
+    data: page,
+    next_cursor: data.length > limit ? encodeCursor(page[page.length - 1]) : null,
+    limit
+  })
+}
+
+// GET /api/products/specs?dealership_id=<uuid>|slug=<slug>&sort=power_hp&order=desc&min_weight_kg=100&max_weight_kg=150
+// Range filters (min_<field>, max_<field>) and sort over the SPEC_RANGE_FIELDS parsed into product_spec_values
+// (supabase-spec-values.sql), each served by its (dealership_id, <field>, product_id) index.
+// Products without a value for the sort field are left out. limit/cursor page like /api/products.
+async function listProductsBySpecs(request) {
+  const { searchParams } = new URL(request.url)
+  const sort = searchParams.get('sort') || 'price'
+  if (!(sort in SPEC_RANGE_FIELDS)) {
+    return NextResponse.json(
+      { error: `sort must be one of ${Object.keys(SPEC_RANGE_FIELDS).join(', ')}` }, { status: 400 }
+    )
+  }
+  const ascending = searchParams.get('order') !== 'desc'
+  const supabase = await createClient()
+  const limit = parsePageSize(searchParams.get('limit'))
+
+  const { dealershipId, errorResponse } = await resolveDealershipId(supabase, searchParams)
+  if (errorResponse) return errorResponse
+
+  let query = supabase
+    .from('product_spec_values')
+    .select(`product_id, ${Object.keys(SPEC_RANGE_FIELDS).join(', ')}, product:products (${PRODUCT_LIST_SELECT})`)
+    .eq('dealership_id', dealershipId)
+    .not(sort, 'is', null)
+
+  for (const field of Object.keys(SPEC_RANGE_FIELDS)) {
+    for (const [bound, operator] of [['min', 'gte'], ['max', 'lte']]) {
+      const raw = searchParams.get(`${bound}_${field}`)
+      if (raw === null || raw.trim() === '') continue
+      const value = Number(raw)
+      if (!Number.isFinite(value)) {
+        return NextResponse.json({ error: `${bound}_${field} must be a number` }, { status: 400 })
+      }
+      query = query[operator](field, value)
+    }
+  }
+
+  if (searchParams.get('cursor')) {
+    const cursor = decodeSortCursor(searchParams.get('cursor'))
+    if (!cursor) {
+      return NextResponse.json({ error: 'Invalid cursor' }, { status: 400 })
+    }
+    query = query[ascending ? 'gte' : 'lte'](sort, cursor.value).or(sortKeysetFilter(sort, ascending, cursor, 'product_id'))
+  }
+
+  const { data, error } = await query
+    .order(sort, { ascending })
+    .order('product_id', { ascending })
+    .limit(limit + 1)
+
+  if (error) throw error
+
+  const page = data.slice(0, limit)
+  const last = page[page.length - 1]
+  return NextResponse.json({
+    data: page.filter((row) => row.product).map(({ product, product_id, ...specs }) => ({ ...product, specs })),
+    next_cursor: data.length > limit ? encodeSortCursor(last[sort], last.product_id) : null,
+    limit,
+    sort,
+    order: ascending ? 'asc' : 'desc'
+  })
+}
+
+// GET /api/search?dealership_id=<uuid>|slug=<slug>&q=<text>&limit=24&offset=0
+// Optional filters: category_id, subcategory_id. Ranked by the search_products RPC (supabase-search.sql).
+async function searchProducts(request) {
+  const { searchParams } = new URL(request.url)
+  const query = (searchParams.get('q') || '').trim().slice(0, 100)
+  if (!query) {
+    return NextResponse.json({ error: 'q is required' }, { status: 400 })
+  }
+  const supabase = await createClient()
+  const { dealershipId, errorResponse } = await resolveDealershipId(supabase, searchParams)
+  if (errorResponse) return errorResponse
+
+  const limit = parsePageSize(searchParams.get('limit'))
+  const offset = Math.max(parseInt(searchParams.get('offset') || '0', 10) || 0, 0)
+  const { data: ranked, error } = await supabase.rpc('search_products', {
+    p_dealership_id: dealershipId,
+    p_query: query,
+    p_category_id: searchParams.get('category_id') || null,
+    p_subcategory_id: searchParams.get('subcategory_id') || null,
+    p_limit: limit,
+    p_offset: offset
+  })
+  if (error) throw error
+  if (!ranked.length) {
+    return NextResponse.json({ data: [], total: 0, limit, offset })
+  }
+
+  // Card fields for just this page of ids, returned in rank order
+  const { data: products, error: productsError } = await supabase
+    .from('products')
+    .select(PRODUCT_LIST_SELECT)
+    .in('id', ranked.map((row) => row.id))
+  if (productsError) throw productsError
+
+  const byId = new Map(products.map((product) => [product.id, product]))
+  return NextResponse.json({
+    data: ranked.filter((row) => byId.has(row.id)).map((row) => ({ ...byId.get(row.id), rank: row.rank })),
+    total: Number(ranked[0].total_count),
+    limit,
+    offset
+  })
+}
+
+// GET /api/facets?dealership_id=<uuid>|slug=<slug>&enfriamiento=Refrigerado por aire&cilindrada=125&cilindrada=150
+// Spec filters are the SPEC_FACETS keys, repeated for several values: values of one spec are OR'ed,
+// different specs AND'ed. Optional filters: category_id, subcategory_id; limit/offset.
+// Returns the page, the total and, per spec, how many products each value has under the other
+// filters (filter_products_by_specs RPC, supabase-spec-filters.sql).
+async function filterProducts(request) {
+  const { searchParams } = new URL(request.url)
+  const supabase = await createClient()
+  const { dealershipId, errorResponse } = await resolveDealershipId(supabase, searchParams)
+  if (errorResponse) return errorResponse
+
+  const filters = {}
+  for (const facet of Object.keys(SPEC_FACETS)) {
+    const values = searchParams.getAll(facet).map((value) => value.trim().slice(0, 100)).filter(Boolean)
+    if (values.length) filters[facet] = values.slice(0, 20)
+  }
+  const limit = parsePageSize(searchParams.get('limit'))
+  const offset = Math.max(parseInt(searchParams.get('offset') || '0', 10) || 0, 0)
+  const { data: result, error } = await supabase.rpc('filter_products_by_specs', {
+    p_dealership_id: dealershipId,
+    p_filters: filters,
+    p_category_id: searchParams.get('category_id') || null,
+    p_subcategory_id: searchParams.get('subcategory_id') || null,
+    p_limit: limit,
+    p_offset: offset
+  })
+  if (error) throw error
+  if (!result.ids.length) {
+    return NextResponse.json({ data: [], total: result.total, facets: result.facets, filters, limit, offset })
+  }
+
+  // Card fields for just this page of ids, newest first
+  const { data: products, error: productsError } = await supabase
+    .from('products')
+    .select(PRODUCT_LIST_SELECT)
+    .in('id', result.ids)
+  if (productsError) throw productsError
+
+  const byId = new Map(products.map((product) => [product.id, product]))
+  return NextResponse.json({
+    data: result.ids.filter((id) => byId.has(id)).map((id) => byId.get(id)),
+    total: result.total,
+    facets: result.facets,
+    filters,
+    limit,
+    offset
+  })
+}
+
+// GET /api/catalog/<slug>: dealership, settings, products, categories and employees in one cached payload.
+// With ?limit=N only the first N products are included plus a next_cursor; ?cursor=... then returns
+// just { products, next_cursor } from the same cached snapshot.
+async function getCatalogRoute(request, slug) {
+  const { searchParams } = new URL(request.url)
+  const { payload, hit } = await getCatalog(slug)
+  if (!payload) {
+    return NextResponse.json({ error: 'Dealership not found' }, { status: 404 })
+  }
+
+  const headers = { 'X-Cache': hit ? 'HIT' : 'MISS' }
+  if (!searchParams.get('limit') && !searchParams.get('cursor')) {
+    return NextResponse.json(payload, { headers })
+  }
+
+  let cursor = null
+  if (searchParams.get('cursor')) {
+    cursor = decodeCursor(searchParams.get('cursor'))
+    if (!cursor) {
+      return NextResponse.json({ error: 'Invalid cursor' }, { status: 400 })
+    }
+  }
+  const page = slicePage(payload.products, cursor, parsePageSize(searchParams.get('limit')))
+  if (cursor) {
+    return NextResponse.json({ products: page.data, next_cursor: page.next_cursor }, { headers })
+  }
+  return NextResponse.json({ ...payload, products: page.data, next_cursor: page.next_cursor }, { headers })
+}
+
+function hasWebhookSecret(request) {
+  const expected = process.env.CATALOG_WEBHOOK_SECRET
+  const received = request.headers.get('x-catalog-webhook-secret')
+  if (!expected || !received || expected.length !== received.length) return false
+  return timingSafeEqual(Buffer.from(expected), Buffer.from(received))
+}
+
+// POST /api/catalog/invalidate { dealership_id }: called by the database triggers in
+// supabase-catalog-cache.sql (webhook secret) or by a signed-in admin of that dealership
+async function invalidateCatalogRoute(request) {
+  const body = await request.json().catch(() => ({}))
+  const dealershipId = body.dealership_id
+  if (!dealershipId) {
+    return NextResponse.json({ error: 'dealership_id is required' }, { status: 400 })
+  }
+
+  if (!hasWebhookSecret(request)) {
+    const supabase = await createClient()
+    const { data: { user } } = await supabase.auth.getUser()
+    if (!user) {
+      return NextResponse.json({ error: 'Unauthorized' }, { status: 401 })
+    }
+    const { data: userRow } = await supabase
+      .from('users')
+      .select('dealership_id')
+      .eq('id', user.id)
+      .maybeSingle()
+    if (userRow?.dealership_id !== dealershipId) {
+      return NextResponse.json({ error: 'Forbidden' }, { status: 403 })
+    }
+  }
+
+  const removed = catalogCache.invalidateDealership(dealershipId)
+  // Republish the Storage snapshot /catalogo/<slug> reads first (lib/catalog-publisher.js)
+  scheduleSnapshot(dealershipId)
+  return NextResponse.json({ invalidated: removed, stats: catalogCache.stats, snapshot_scheduled: true })
+}
+
+// GET /api/images/<thumb|card|detail>/<bucket>/<object path>: resized, disk-cached variant
+// (AVIF/WebP/JPEG by Accept), revalidated by ETag
+async function imageVariantRoute(request, variant, segments) {
+  const result = await getImageVariant(variant, segments, {
+    accept: request.headers.get('accept') || '',
+    ifNoneMatch: request.headers.get('if-none-match'),
+  })
+  if (result.error) {
+    return NextResponse.json({ error: result.error }, { status: result.status })
+  }
+  return new NextResponse(result.body || null, { status: result.status, headers: result.headers })
+}
+
 // Route handler function
 async function handleRoute(request, { params }) {
   const { path = [] } = params
@@ -38,6 +355,34 @@ async function handleRoute(request, { params }) {
       }))
     }
 
+    if (route === '/products' && method === 'GET') {
+      return handleCORS(await listProducts(request))
+    }
+
+    if (route === '/products/specs' && method === 'GET') {
+      return handleCORS(await listProductsBySpecs(request))
+    }
+
+    if (route === '/search' && method === 'GET') {
+      return handleCORS(await searchProducts(request))
+    }
+
+    if (route === '/facets' && method === 'GET') {
+      return handleCORS(await filterProducts(request))
+    }
+
+    if (route === '/catalog/invalidate' && method === 'POST') {
+      return handleCORS(await invalidateCatalogRoute(request))
+    }
+
+    if (path[0] === 'images' && path.length >= 4 && method === 'GET') {
+      return handleCORS(await imageVariantRoute(request, path[1], path.slice(2)))
+    }
+
+    if (path[0] === 'catalog' && path.length === 2 && method === 'GET') {
+      return handleCORS(await getCatalogRoute(request, path[1]))
+    }
+
     // Route not found
     return handleCORS(NextResponse.json(
       { error: `Route ${route} not found` }, 
@@ -2,7 +2,6 @@
 
 import { useState, useEffect, useMemo } from 'react'
 import { useParams } from 'next/navigation'
-import { createClient } from '@/lib/supabase/client'
 import { Button } from '@/components/ui/button'
 import { Input } from '@/components/ui/input'
 import { Badge } from '@/components/ui/badge'
@@ -16,7 +15,10 @@ import { CartDrawer } from '@/components/cart-drawer'
 import { ModeToggle } from '@/components/mode-toggle'
 import { ProductGridSkeleton } from '@/components/skeletons/product-skeleton'
 import { MotorcycleSpecsBadge } from '@/components/products/MotorcycleTechnicalSheet'
-import Fuse from 'fuse.js'
+import { productImageProps } from '@/lib/images'
+import { fetchCatalogSnapshot } from '@/lib/catalog-snapshot'
+import { applyChange, newestFirst, byName, byDisplayOrder } from '@/lib/realtime'
+import { useDealershipChanges } from '@/hooks/use-dealership-changes'
 
 export default function CatalogoPage() {
   const params = useParams()
@@ -30,7 +32,7 @@ export default function CatalogoPage() {
   const [selectedCategory, setSelectedCategory] = useState('')
   const [selectedSubcategory, setSelectedSubcategory] = useState('')
   const [searchTerm, setSearchTerm] = useState('')
-  const supabase = createClient()
+  const [searchResults, setSearchResults] = useState(null)
   const { toast } = useToast()
   const { addItem, setDealershipInfo } = useCartStore()
 
@@ -42,66 +44,21 @@ export default function CatalogoPage() {
 
   const fetchDealershipData = async () => {
     try {
-      // Fetch dealership
-      const { data: dealershipData, error: dealershipError } = await supabase
-        .from('dealerships')
-        .select('*')
-        .eq('slug', slug)
-        .eq('is_active', true)
-        .single()
-
-      if (dealershipError) throw dealershipError
-      setDealership(dealershipData)
-
-      // Fetch settings
-      const { data: settingsData } = await supabase
-        .from('site_settings')
-        .select('*')
-        .eq('dealership_id', dealershipData.id)
-        .single()
-
-      setSettings(settingsData)
-      
-      // Set dealership info in cart store
-      setDealershipInfo({
-        name: dealershipData.name,
-        main_whatsapp: settingsData?.main_whatsapp || dealershipData.phone,
-        phone: dealershipData.phone,
-      })
-
-      // Fetch products with images
-      const { data: productsData } = await supabase
-        .from('products')
-        .select(`*,
-          categories (id, name, slug),
-          subcategories (id, name, slug),
-          product_images (id, image_url, is_primary, display_order)
-        `)
-        .eq('dealership_id', dealershipData.id)
-        .order('created_at', { ascending: false })
-
-      setProducts(productsData || [])
-
-      // Fetch categories
-      const { data: categoriesData } = await supabase
-        .from('categories')
-        .select(`*,
-          subcategories (*)
-        `)
-        .eq('dealership_id', dealershipData.id)
-        .order('name')
-
-      setCategories(categoriesData || [])
-
-      // Fetch employees
-      const { data: employeesData } = await supabase
-        .from('employees')
-        .select('*')
-        .eq('dealership_id', dealershipData.id)
-        .eq('is_active', true)
-        .order('display_order')
-
-      setEmployees(employeesData || [])
+      // The published snapshot comes straight from Storage/CDN, whole inventory included
+      const snapshot = await fetchCatalogSnapshot(slug)
+      if (snapshot) {
+        showCatalog(snapshot)
+        return
+      }
+
+      // No snapshot: whole catalog (first page of products) in one cached request
+      const response = await fetch(`/api/catalog/${encodeURIComponent(slug)}?limit=24`)
+      if (!response.ok) throw new Error(`Catalog request failed: ${response.status}`)
+      const catalog = await response.json()
+      showCatalog(catalog)
+
+      // The rest of the inventory streams in after the page renders
+      loadRemainingProducts(catalog.next_cursor)
     } catch (error) {
       console.error('Error fetching data:', error)
       toast({
@@ -114,6 +71,71 @@ export default function CatalogoPage() {
     }
   }
 
+  const showCatalog = (catalog) => {
+    setDealership(catalog.dealership)
+    setSettings(catalog.settings)
+
+    // Set dealership info in cart store
+    setDealershipInfo({
+      name: catalog.dealership.name,
+      main_whatsapp: catalog.settings?.main_whatsapp || catalog.dealership.phone,
+      phone: catalog.dealership.phone,
+    })
+
+    setProducts(catalog.products || [])
+    setCategories(catalog.categories || [])
+    setEmployees(catalog.employees || [])
+  }
+
+  // Row as the catalog query embeds it (id, name, slug of the category and subcategory)
+  const withCatalogEmbeds = (record, previous) => {
+    const category = categories.find((cat) => cat.id === record.category_id)
+    const subcategory = category?.subcategories?.find((sub) => sub.id === record.subcategory_id)
+    const pick = (row) => (row ? { id: row.id, name: row.name, slug: row.slug } : null)
+    return { ...record, categories: pick(category), subcategories: pick(subcategory), product_images: previous?.product_images || [] }
+  }
+
+  // Edits made after the snapshot or cached catalog was built arrive as deltas (RLS: only rows the
+  // public catalog may show)
+  useDealershipChanges(dealership?.id, ['products', 'product_images', 'categories', 'employees', 'site_settings'], (change) => {
+    if (change.table === 'products') {
+      setProducts((rows) => applyChange(rows, change, { decorate: withCatalogEmbeds, compare: newestFirst }))
+    } else if (change.table === 'product_images') {
+      setProducts((rows) => rows.map((product) => {
+        if (change.new?.product_id && product.id !== change.new.product_id) return product
+        const images = applyChange(product.product_images || [], change)
+        return images === product.product_images ? product : { ...product, product_images: images }
+      }))
+    } else if (change.table === 'categories') {
+      setCategories((rows) => applyChange(rows, change, {
+        compare: byName,
+        decorate: (record, previous) => ({ ...record, subcategories: previous?.subcategories || [] }),
+      }))
+    } else if (change.table === 'employees') {
+      // Inactive employees aren't listed on the catalog
+      const hidden = change.eventType !== 'DELETE' && !change.new.is_active
+      setEmployees((rows) => applyChange(rows, hidden ? { eventType: 'DELETE', old: change.new } : change,
+        { compare: byDisplayOrder }))
+    } else if (change.eventType !== 'DELETE') {
+      setSettings(change.new)
+    }
+  })
+
+  const loadRemainingProducts = async (cursor) => {
+    try {
+      while (cursor) {
+        const params = new URLSearchParams({ limit: '100', cursor })
+        const response = await fetch(`/api/catalog/${encodeURIComponent(slug)}?${params}`)
+        if (!response.ok) throw new Error(`Products request failed: ${response.status}`)
+        const page = await response.json()
+        setProducts((current) => [...current, ...(page.products || [])])
+        cursor = page.next_cursor
+      }
+    } catch (error) {
+      console.error('Error fetching products:', error)
+    }
+  }
+
   const handleAddToCart = (product) => {
     addItem(product)
     toast({
@@ -122,25 +144,39 @@ export default function CatalogoPage() {
     })
   }
 
-  // Fuzzy search configuration
-  const fuse = useMemo(() => {
-    if (!products.length) return null
-    
-    return new Fuse(products, {
-      keys: ['name', 'brand', 'model', 'description'],
-      threshold: 0.4,
-      includeScore: true,
-    })
-  }, [products])
+  // Server-side ranked search (debounced), so it doesn't wait for the whole inventory
+  useEffect(() => {
+    if (!searchTerm.trim() || !dealership) {
+      setSearchResults(null)
+      return
+    }
+    const controller = new AbortController()
+    const timer = setTimeout(async () => {
+      try {
+        const params = new URLSearchParams({ dealership_id: dealership.id, q: searchTerm.trim(), limit: '100' })
+        if (selectedCategory) params.set('category_id', selectedCategory)
+        if (selectedSubcategory) params.set('subcategory_id', selectedSubcategory)
+        const response = await fetch(`/api/search?${params}`, { signal: controller.signal })
+        if (!response.ok) throw new Error(`Search request failed: ${response.status}`)
+        const { data } = await response.json()
+        setSearchResults(data || [])
+      } catch (error) {
+        if (error.name !== 'AbortError') console.error('Error searching products:', error)
+      }
+    }, 250)
+    return () => {
+      clearTimeout(timer)
+      controller.abort()
+    }
+  }, [searchTerm, selectedCategory, selectedSubcategory, dealership])
 
-  // Filtered products with fuzzy search
+  // Filtered products with search results
   const filteredProducts = useMemo(() => {
     let result = products
 
-    // Apply fuzzy search
-    if (searchTerm && fuse) {
-      const searchResults = fuse.search(searchTerm)
-      result = searchResults.map(({ item }) => item)
+    // Apply search (results are already ranked)
+    if (searchTerm && searchResults) {
+      result = searchResults
     }
 
     // Apply category filter
@@ -154,7 +190,7 @@ export default function CatalogoPage() {
     }
 
     return result
-  }, [products, searchTerm, selectedCategory, selectedSubcategory, fuse])
+  }, [products, searchTerm, searchResults, selectedCategory, selectedSubcategory])
 
   // Get filtered subcategories based on selected category
   const filteredSubcategories = useMemo(() => {
@@ -367,9 +403,10 @@ export default function CatalogoPage() {
                       <div className="relative aspect-square bg-muted animate-fadeIn">
                         {primaryImage ? (
                           <Image
-                            src={primaryImage.image_url || "/placeholder.svg"}
+                            {...productImageProps(primaryImage, 'card')}
                             alt={product.name}
                             fill
+                            sizes="(min-width: 1024px) 25vw, (min-width: 768px) 33vw, 100vw"
                             className="object-cover group-hover:scale-105 transition-transform duration-300"
                           />
                         ) : (
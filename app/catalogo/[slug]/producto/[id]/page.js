@@ -18,6 +18,7 @@ import { CartDrawer } from '@/components/cart-drawer'
 import { ModeToggle } from '@/components/mode-toggle'
 import { ProductDetailSkeleton } from '@/components/skeletons/product-skeleton'
 import useEmblaCarousel from 'embla-carousel-react'
+import { productImageProps } from '@/lib/images'
 import { MotorcycleTechnicalSheet } from '@/components/products/MotorcycleTechnicalSheet'
 import {
   Breadcrumb,
@@ -93,7 +94,7 @@ export default function ProductDetailPage() {
           *,
           categories (id, name),
           subcategories (id, name),
-          product_images (id, image_url, is_primary, display_order)
+          product_images (id, image_url, is_primary, display_order, width, height, blurhash)
         `)
         .eq('id', id)
         .eq('dealership_id', dealershipData.id)
@@ -116,7 +117,7 @@ export default function ProductDetailPage() {
             *,
             categories (id, name),
             subcategories (id, name),
-            product_images (image_url, is_primary)
+            product_images (image_url, is_primary, blurhash)
           `)
           .eq('category_id', productData.category_id)
           .eq('dealership_id', dealershipData.id)
@@ -264,10 +265,10 @@ export default function ProductDetailPage() {
                 >
                   <div className="relative w-full aspect-square md:aspect-auto md:max-h-[600px] bg-muted">
                     <Image
-                      src={images[selectedImageIndex]?.image_url || '/placeholder.svg'}
+                      {...productImageProps(images[selectedImageIndex], 'detail')}
                       alt={`${product.name} - ${selectedImageIndex + 1}`}
-                      width={600}
-                      height={600}
+                      width={images[selectedImageIndex]?.width || 600}
+                      height={images[selectedImageIndex]?.height || 600}
                       className="object-cover w-full h-full group-hover:scale-105 transition-transform duration-300"
                       priority
                     />
@@ -296,7 +297,7 @@ export default function ProductDetailPage() {
                         }`}
                       >
                         <Image
-                          src={image.image_url || "/placeholder.svg"}
+                          {...productImageProps(image, 'thumb')}
                           alt={`${product.name} thumbnail ${index + 1}`}
                           fill
                           className="object-cover"
@@ -318,10 +319,10 @@ export default function ProductDetailPage() {
             <DialogContent className="max-w-4xl w-full p-0 bg-black/95 border-0">
               <div className="relative w-full aspect-square flex items-center justify-center">
                 <Image
-                  src={images[selectedImageIndex]?.image_url || '/placeholder.svg'}
+                  {...productImageProps(images[selectedImageIndex], 'detail')}
                   alt={`${product.name} - ${selectedImageIndex + 1}`}
-                  width={1000}
-                  height={1000}
+                  width={images[selectedImageIndex]?.width || 1000}
+                  height={images[selectedImageIndex]?.height || 1000}
                   className="object-contain w-full h-full max-h-[90vh]"
                 />
 
@@ -502,7 +503,7 @@ export default function ProductDetailPage() {
                       <div className="relative aspect-square bg-muted overflow-hidden">
                         {primaryImage?.image_url ? (
                           <Image
-                            src={primaryImage.image_url || "/placeholder.svg"}
+                            {...productImageProps(primaryImage, 'card')}
                             alt={relatedProduct.name}
                             fill
                             className="object-cover group-hover:scale-105 transition-transform duration-300"
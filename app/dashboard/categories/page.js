@@ -33,6 +33,8 @@ import {
 } from '@/components/ui/table'
 import { Badge } from '@/components/ui/badge'
 import { useToast } from '@/hooks/use-toast'
+import { useDealershipChanges } from '@/hooks/use-dealership-changes'
+import { applyChange, newestFirst } from '@/lib/realtime'
 import { Plus, Pencil, Trash2, Loader2, Grid3x3, Search } from 'lucide-react'
 import {
   AlertDialog,
@@ -78,6 +80,37 @@ export default function CategoriesPage() {
     }
   }, [dealership])
 
+  const applyCategoryChange = (change) => {
+    setCategories((rows) => applyChange(rows, change, { compare: newestFirst }))
+    if (change.eventType === 'DELETE') {
+      // ON DELETE CASCADE: the subcategories go with their category
+      setSubcategories((rows) => {
+        const kept = rows.filter((subcategory) => subcategory.category_id !== change.old.id)
+        return kept.length === rows.length ? rows : kept
+      })
+    } else {
+      // Renaming a category renames the `categories (name)` embed of its subcategories
+      setSubcategories((rows) => rows.map((subcategory) =>
+        subcategory.category_id === change.new.id ? { ...subcategory, categories: { name: change.new.name } } : subcategory))
+    }
+  }
+
+  const applySubcategoryChange = (change) => {
+    setSubcategories((rows) => applyChange(rows, change, {
+      compare: newestFirst,
+      decorate: (record) => ({
+        ...record,
+        categories: { name: categories.find((category) => category.id === record.category_id)?.name },
+      }),
+    }))
+  }
+
+  // Changes from this page, other tabs or other admins arrive as deltas instead of refetching both lists
+  useDealershipChanges(dealership?.id, ['categories', 'subcategories'], (change) => {
+    if (change.table === 'categories') applyCategoryChange(change)
+    else applySubcategoryChange(change)
+  })
+
   const fetchCategories = async () => {
     try {
       const { data, error } = await supabase
@@ -131,23 +164,29 @@ export default function CategoriesPage() {
       }
 
       if (editingCategory) {
-        const { error } = await supabase
+        const { data, error } = await supabase
           .from('categories')
           .update(categoryData)
           .eq('id', editingCategory.id)
+          .select()
+          .single()
 
         if (error) throw error
+        applyCategoryChange({ eventType: 'UPDATE', new: data })
 
         toast({
           title: 'Éxito',
           description: 'Categoría actualizada correctamente',
         })
       } else {
-        const { error } = await supabase
+        const { data, error } = await supabase
           .from('categories')
           .insert([categoryData])
+          .select()
+          .single()
 
         if (error) throw error
+        applyCategoryChange({ eventType: 'INSERT', new: data })
 
         toast({
           title: 'Éxito',
@@ -155,7 +194,6 @@ export default function CategoriesPage() {
         })
       }
 
-      fetchCategories()
       setDialogOpen(false)
       resetForm()
     } catch (error) {
@@ -182,23 +220,29 @@ export default function CategoriesPage() {
       }
 
       if (editingSubcategory) {
-        const { error } = await supabase
+        const { data, error } = await supabase
           .from('subcategories')
           .update(subcategoryData)
           .eq('id', editingSubcategory.id)
+          .select()
+          .single()
 
         if (error) throw error
+        applySubcategoryChange({ eventType: 'UPDATE', new: data })
 
         toast({
           title: 'Éxito',
           description: 'Subcategoría actualizada correctamente',
         })
       } else {
-        const { error } = await supabase
+        const { data, error } = await supabase
           .from('subcategories')
           .insert([subcategoryData])
+          .select()
+          .single()
 
         if (error) throw error
+        applySubcategoryChange({ eventType: 'INSERT', new: data })
 
         toast({
           title: 'Éxito',
@@ -206,7 +250,6 @@ export default function CategoriesPage() {
         })
       }
 
-      fetchSubcategories()
       setSubDialogOpen(false)
       resetSubForm()
     } catch (error) {
@@ -228,8 +271,7 @@ export default function CategoriesPage() {
           .eq('id', deleteTarget.id)
 
         if (error) throw error
-        fetchCategories()
-        fetchSubcategories()
+        applyCategoryChange({ eventType: 'DELETE', old: { id: deleteTarget.id } })
       } else {
         const { error } = await supabase
           .from('subcategories')
@@ -237,7 +279,7 @@ export default function CategoriesPage() {
           .eq('id', deleteTarget.id)
 
         if (error) throw error
-        fetchSubcategories()
+        applySubcategoryChange({ eventType: 'DELETE', old: { id: deleteTarget.id } })
       }
 
       toast({
@@ -23,6 +23,8 @@ import {
   DialogFooter,
 } from '@/components/ui/dialog'
 import { useToast } from '@/hooks/use-toast'
+import { useDealershipChanges } from '@/hooks/use-dealership-changes'
+import { applyChange, byDisplayOrder } from '@/lib/realtime'
 import { Plus, Pencil, Trash2, Loader2, Users, Upload, X } from 'lucide-react'
 import {
   AlertDialog,
@@ -66,6 +68,13 @@ export default function EmployeesPage() {
     }
   }, [dealership])
 
+  const applyEmployeeChange = (change) => {
+    setEmployees((rows) => applyChange(rows, change, { compare: byDisplayOrder }))
+  }
+
+  // Edits from other tabs or admins arrive as deltas; the list is only fetched once
+  useDealershipChanges(dealership?.id, ['employees'], applyEmployeeChange)
+
   const fetchEmployees = async () => {
     try {
       const { data, error } = await supabase
@@ -158,23 +167,29 @@ export default function EmployeesPage() {
       }
 
       if (editingEmployee) {
-        const { error } = await supabase
+        const { data, error } = await supabase
           .from('employees')
           .update(employeeData)
           .eq('id', editingEmployee.id)
+          .select()
+          .single()
 
         if (error) throw error
+        applyEmployeeChange({ eventType: 'UPDATE', new: data })
 
         toast({
           title: 'Éxito',
           description: 'Empleado actualizado correctamente',
         })
       } else {
-        const { error } = await supabase
+        const { data, error } = await supabase
           .from('employees')
           .insert([employeeData])
+          .select()
+          .single()
 
         if (error) throw error
+        applyEmployeeChange({ eventType: 'INSERT', new: data })
 
         toast({
           title: 'Éxito',
@@ -182,7 +197,6 @@ export default function EmployeesPage() {
         })
       }
 
-      fetchEmployees()
       setDialogOpen(false)
       resetForm()
     } catch (error) {
@@ -210,7 +224,7 @@ export default function EmployeesPage() {
         title: 'Éxito',
         description: 'Empleado eliminado correctamente',
       })
-      fetchEmployees()
+      applyEmployeeChange({ eventType: 'DELETE', old: { id: deleteTarget } })
     } catch (error) {
       toast({
         title: 'Error',
@@ -3,6 +3,7 @@
 import { useEffect, useState } from 'react'
 import { useDealership } from '@/contexts/DealershipContext'
 import { createClient } from '@/lib/supabase/client'
+import { imageVariantUrl } from '@/lib/images'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card'
 import { Badge } from '@/components/ui/badge'
 import { Button } from '@/components/ui/button'
@@ -50,49 +51,23 @@ export default function DashboardPage() {
 
   const fetchDashboardStats = async () => {
     try {
-      // Fetch products
-      const { data: products } = await supabase
-        .from('products')
-        .select('*, product_images(image_url, is_primary)')
-        .eq('dealership_id', dealership.id)
-
-      const totalProducts = products?.length || 0
-      const availableProducts = products?.filter(p => p.status === 'available').length || 0
-      const soldProducts = products?.filter(p => p.status === 'sold').length || 0
-      const inventoryValue = products?.reduce((sum, p) => sum + (p.price || 0), 0) || 0
-      const recentProducts = products?.slice(0, 5) || []
-
-      // Fetch categories
-      const { data: categories } = await supabase
-        .from('categories')
-        .select('*')
-        .eq('dealership_id', dealership.id)
-
-      // Fetch subcategories
-      const { data: subcategories } = await supabase
-        .from('subcategories')
-        .select('*')
-        .eq('dealership_id', dealership.id)
-
-      // Fetch employees
-      const { data: employees } = await supabase
-        .from('employees')
-        .select('*')
-        .eq('dealership_id', dealership.id)
-
-      const totalEmployees = employees?.length || 0
-      const activeEmployees = employees?.filter(e => e.is_active).length || 0
+      // Counters kept by triggers (supabase-dashboard-stats.sql): one small response
+      // whatever the size of the inventory
+      const { data, error } = await supabase.rpc('get_dashboard_stats', {
+        p_dealership_id: dealership.id,
+      })
+      if (error) throw error
 
       setStats({
-        totalProducts,
-        availableProducts,
-        soldProducts,
-        totalCategories: categories?.length || 0,
-        totalSubcategories: subcategories?.length || 0,
-        totalEmployees,
-        activeEmployees,
-        recentProducts,
-        inventoryValue,
+        totalProducts: data?.total_products || 0,
+        availableProducts: data?.available_products || 0,
+        soldProducts: data?.sold_products || 0,
+        totalCategories: data?.total_categories || 0,
+        totalSubcategories: data?.total_subcategories || 0,
+        totalEmployees: data?.total_employees || 0,
+        activeEmployees: data?.active_employees || 0,
+        recentProducts: data?.recent_products || [],
+        inventoryValue: Number(data?.inventory_value) || 0,
         lowStockProducts: 0,
       })
     } catch (error) {
@@ -312,7 +287,7 @@ export default function DashboardPage() {
                       <div className="relative w-12 h-12 rounded-md overflow-hidden bg-muted flex-shrink-0">
                         {primaryImage ? (
                           <img
-                            src={primaryImage.image_url}
+                            src={imageVariantUrl(primaryImage.image_url, 'thumb')}
                             alt={product.name}
                             className="object-cover w-full h-full"
                           />
@@ -1,6 +1,6 @@
 'use client'
 
-import { useState, useEffect, useMemo } from 'react'
+import { useState, useEffect, useMemo, useRef } from 'react'
 import { useDealership } from '@/contexts/DealershipContext'
 import { createClient } from '@/lib/supabase/client'
 import { Button } from '@/components/ui/button'
@@ -65,7 +65,11 @@ import {
 import Image from 'next/image'
 import { MotorcycleSpecsForm } from '@/components/products/MotorcycleSpecsForm'
 import { MOTORCYCLE_SPECS_TEMPLATE } from '@/lib/motorcycle-specs'
-import Fuse from 'fuse.js'
+import { uploadProductImages } from '@/lib/image-upload'
+import { applyChange, newestFirst, byName } from '@/lib/realtime'
+import { useDealershipChanges } from '@/hooks/use-dealership-changes'
+
+const PRODUCTS_PAGE_SIZE = 50
 
 export default function ProductsPage() {
   const { dealership, loading: dealershipLoading } = useDealership()
@@ -74,6 +78,9 @@ export default function ProductsPage() {
   const [subcategories, setSubcategories] = useState([])
   const [filteredSubcategories, setFilteredSubcategories] = useState([])
   const [loading, setLoading] = useState(true)
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const listRequest = useRef(0)
   const [dialogOpen, setDialogOpen] = useState(false)
   const [editingProduct, setEditingProduct] = useState(null)
   const [deleteAlertOpen, setDeleteAlertOpen] = useState(false)
@@ -90,6 +97,7 @@ export default function ProductsPage() {
   const [filterCategory, setFilterCategory] = useState('')
   const [filterSubcategory, setFilterSubcategory] = useState('')
   const [filterSubcategoriesOptions, setFilterSubcategoriesOptions] = useState([])
+  const [searchResults, setSearchResults] = useState(null)
 
   const [formData, setFormData] = useState({
     name: '',
@@ -103,23 +111,13 @@ export default function ProductsPage() {
     status: 'available',
   })
 
-  // Fuse.js para búsqueda fuzzy
-  const fuse = useMemo(() => {
-    return new Fuse(products, {
-      keys: ['name', 'model', 'brand'],
-      threshold: 0.4,
-      ignoreLocation: true,
-    })
-  }, [products])
-
   // Productos filtrados
   const filteredProducts = useMemo(() => {
     let result = products
 
-    // Filtro por búsqueda fuzzy
-    if (searchQuery.trim()) {
-      const searchResults = fuse.search(searchQuery)
-      result = searchResults.map(r => r.item)
+    // Búsqueda en el servidor (ya viene ordenada por relevancia)
+    if (searchQuery.trim() && searchResults) {
+      result = searchResults
     }
 
     // Filtro por categoría
@@ -133,7 +131,7 @@ export default function ProductsPage() {
     }
 
     return result
-  }, [products, searchQuery, filterCategory, filterSubcategory, fuse])
+  }, [products, searchQuery, searchResults, filterCategory, filterSubcategory])
 
   // Verificar si hay filtros activos
   const hasActiveFilters = searchQuery || filterCategory || filterSubcategory
@@ -161,10 +159,42 @@ export default function ProductsPage() {
     if (dealership?.id) {
       fetchCategories()
       fetchSubcategories()
-      fetchProducts()
     }
   }, [dealership])
 
+  // The category filters are applied by /api/products, so changing them reloads the first page
+  useEffect(() => {
+    if (dealership?.id) {
+      fetchProducts()
+    }
+  }, [dealership, filterCategory, filterSubcategory])
+
+  // Server-side ranked search (debounced) over the whole inventory, not just the pages loaded so far
+  useEffect(() => {
+    if (!searchQuery.trim() || !dealership?.id) {
+      setSearchResults(null)
+      return
+    }
+    const controller = new AbortController()
+    const timer = setTimeout(async () => {
+      try {
+        const params = new URLSearchParams({ dealership_id: dealership.id, q: searchQuery.trim(), limit: '100' })
+        if (filterCategory) params.set('category_id', filterCategory)
+        if (filterSubcategory) params.set('subcategory_id', filterSubcategory)
+        const response = await fetch(`/api/search?${params}`, { signal: controller.signal })
+        if (!response.ok) throw new Error(`Search request failed: ${response.status}`)
+        const { data } = await response.json()
+        setSearchResults(data || [])
+      } catch (error) {
+        if (error.name !== 'AbortError') console.error('Error searching products:', error)
+      }
+    }, 250)
+    return () => {
+      clearTimeout(timer)
+      controller.abort()
+    }
+  }, [searchQuery, filterCategory, filterSubcategory, dealership])
+
   useEffect(() => {
     if (formData.category_id) {
       const filtered = subcategories.filter(
@@ -176,6 +206,50 @@ export default function ProductsPage() {
     }
   }, [formData.category_id, subcategories])
 
+  // Row as fetchProducts() selects it: realtime and write responses only carry the products columns
+  const withProductEmbeds = (record, previous) => ({
+    ...record,
+    categories: categories.find((category) => category.id === record.category_id) || null,
+    subcategories: subcategories.find((subcategory) => subcategory.id === record.subcategory_id) || null,
+    product_images: previous?.product_images || [],
+  })
+
+  const applyProductChange = (change) => {
+    setProducts((rows) => applyChange(rows, change, { decorate: withProductEmbeds, compare: newestFirst }))
+    // Search results keep their rank order and only pick up edits to the products they already show
+    setSearchResults((rows) => (rows && (change.eventType === 'DELETE' || rows.some((row) => row.id === change.new.id))
+      ? applyChange(rows, change, { decorate: withProductEmbeds })
+      : rows))
+  }
+
+  const withImageChange = (rows, change) => {
+    const productId = change.new?.product_id
+    const image = ({ id, image_url, is_primary }) => ({ id, image_url, is_primary })
+    let changed = false
+    const next = rows.map((product) => {
+      // A DELETE only carries the image id, so every product is checked
+      if (productId && product.id !== productId) return product
+      const images = applyChange(product.product_images || [], change, { decorate: image })
+      if (images === product.product_images) return product
+      changed = true
+      return { ...product, product_images: images }
+    })
+    return changed ? next : rows
+  }
+
+  const applyImageChange = (change) => {
+    setProducts((rows) => withImageChange(rows, change))
+    setSearchResults((rows) => rows && withImageChange(rows, change))
+  }
+
+  // Changes made here, in other tabs or by other admins arrive as deltas; nothing is refetched
+  useDealershipChanges(dealership?.id, ['products', 'product_images', 'categories', 'subcategories'], (change) => {
+    if (change.table === 'products') applyProductChange(change)
+    else if (change.table === 'product_images') applyImageChange(change)
+    else if (change.table === 'categories') setCategories((rows) => applyChange(rows, change, { compare: byName }))
+    else setSubcategories((rows) => applyChange(rows, change, { compare: byName }))
+  })
+
   const fetchCategories = async () => {
     try {
       const { data, error } = await supabase
@@ -206,21 +280,27 @@ export default function ProductsPage() {
     }
   }
 
-  const fetchProducts = async () => {
+  // One keyset page of GET /api/products (newest first); without a cursor the list starts over
+  const fetchProducts = async (cursor = null) => {
+    const request = ++listRequest.current
     try {
-      const { data, error } = await supabase
-        .from('products')
-        .select(`
-          *,
-          categories (name),
-          subcategories (name),
-          product_images (id, image_url, is_primary)
-        `)
-        .eq('dealership_id', dealership.id)
-        .order('created_at', { ascending: false })
-
-      if (error) throw error
-      setProducts(data || [])
+      const params = new URLSearchParams({ dealership_id: dealership.id, limit: String(PRODUCTS_PAGE_SIZE) })
+      if (filterCategory) params.set('category_id', filterCategory)
+      if (filterSubcategory) params.set('subcategory_id', filterSubcategory)
+      if (cursor) params.set('cursor', cursor)
+      const response = await fetch(`/api/products?${params}`)
+      if (!response.ok) throw new Error(`Products request failed: ${response.status}`)
+      const page = await response.json()
+
+      // A filter changed while this page was loading
+      if (request !== listRequest.current) return
+      // Rows that arrived through realtime before their page did aren't listed twice
+      setProducts((current) => {
+        if (!cursor) return page.data
+        const loaded = new Set(current.map((product) => product.id))
+        return [...current, ...page.data.filter((product) => !loaded.has(product.id))]
+      })
+      setNextCursor(page.next_cursor)
     } catch (error) {
       console.error('Error fetching products:', error)
       toast({
@@ -233,6 +313,12 @@ export default function ProductsPage() {
     }
   }
 
+  const loadMoreProducts = async () => {
+    setLoadingMore(true)
+    await fetchProducts(nextCursor)
+    setLoadingMore(false)
+  }
+
   const handleImageSelect = (e) => {
     const files = Array.from(e.target.files)
     setImageFiles((prev) => [...prev, ...files])
@@ -252,6 +338,7 @@ export default function ProductsPage() {
       if (error) throw error
 
       setExistingImages((prev) => prev.filter((img) => img.id !== imageId))
+      applyImageChange({ eventType: 'DELETE', old: { id: imageId } })
       toast({
         title: 'Éxito',
         description: 'Imagen eliminada',
@@ -266,58 +353,50 @@ export default function ProductsPage() {
   }
 
   const uploadImages = async (productId) => {
-    const uploadedUrls = []
-
-    for (let i = 0; i < imageFiles.length; i++) {
-      const file = imageFiles[i]
-      const fileExt = file.name.split('.').pop()
-      const fileName = `${dealership.id}/${productId}/${Date.now()}-${i}.${fileExt}`
-
-      try {
-        const { data, error: uploadError } = await supabase.storage
-          .from('motorcycles')
-          .upload(fileName, file, {
-            cacheControl: '3600',
-            upsert: false,
-          })
-
-        if (uploadError) throw uploadError
-
-        const { data: { publicUrl } } = supabase.storage
-          .from('motorcycles')
-          .getPublicUrl(fileName)
+    // Resized in the browser and uploaded a few at a time; a failed photo doesn't block the others
+    const { uploaded, failed } = await uploadProductImages({
+      supabase,
+      files: imageFiles,
+      dealershipId: dealership.id,
+      productId,
+    })
 
-        uploadedUrls.push(publicUrl)
-      } catch (error) {
-        console.error('Error uploading image:', error)
-        toast({
-          title: 'Error',
-          description: `Error subiendo imagen ${file.name}`,
-          variant: 'destructive',
-        })
-      }
+    failed.forEach(({ name, error }) => console.error(`Error uploading image ${name}:`, error))
+    if (failed.length > 0) {
+      toast({
+        title: 'Error',
+        description: `Error subiendo ${failed.length === 1 ? 'la imagen' : `${failed.length} imágenes`}: ${failed.map((f) => f.name).join(', ')}`,
+        variant: 'destructive',
+      })
     }
 
     // Save image URLs to database
-    if (uploadedUrls.length > 0) {
-      const imageRecords = uploadedUrls.map((url, index) => ({
+    if (uploaded.length > 0) {
+      const imageRecords = uploaded.map((image, index) => ({
         product_id: productId,
         dealership_id: dealership.id,
-        image_url: url,
+        image_url: image.url,
+        width: image.width,
+        height: image.height,
+        blurhash: image.blurhash,
         is_primary: existingImages.length === 0 && index === 0,
         display_order: existingImages.length + index,
       }))
 
-      const { error: insertError } = await supabase
+      const { data: savedImages, error: insertError } = await supabase
         .from('product_images')
         .insert(imageRecords)
+        .select('id, product_id, image_url, is_primary')
 
       if (insertError) {
         console.error('Error saving image records:', insertError)
       }
+      for (const image of savedImages || []) {
+        applyImageChange({ eventType: 'INSERT', new: image })
+      }
     }
 
-    return uploadedUrls
+    return uploaded.map((image) => image.url)
   }
 
   const handleSubmit = async (e) => {
@@ -345,13 +424,16 @@ export default function ProductsPage() {
       let productId
 
       if (editingProduct) {
-        const { error } = await supabase
+        const { data, error } = await supabase
           .from('products')
           .update(productData)
           .eq('id', editingProduct.id)
+          .select()
+          .single()
 
         if (error) throw error
         productId = editingProduct.id
+        applyProductChange({ eventType: 'UPDATE', new: data })
 
         toast({
           title: 'Éxito',
@@ -366,6 +448,7 @@ export default function ProductsPage() {
 
         if (error) throw error
         productId = data.id
+        applyProductChange({ eventType: 'INSERT', new: data })
 
         toast({
           title: 'Éxito',
@@ -378,7 +461,6 @@ export default function ProductsPage() {
         await uploadImages(productId)
       }
 
-      fetchProducts()
       setDialogOpen(false)
       resetForm()
     } catch (error) {
@@ -406,7 +488,7 @@ export default function ProductsPage() {
         title: 'Éxito',
         description: 'Producto eliminado correctamente',
       })
-      fetchProducts()
+      applyProductChange({ eventType: 'DELETE', old: { id: deleteTarget } })
     } catch (error) {
       toast({
         title: 'Error',
@@ -760,7 +842,7 @@ export default function ProductsPage() {
       <Card>
         <CardContent className="p-4">
           <div className="flex flex-col sm:flex-row gap-3 items-start sm:items-center">
-            {/* Búsqueda Fuzzy */}
+            {/* Búsqueda */}
             <div className="relative flex-1 w-full sm:max-w-xs">
               <Search className="absolute left-3 top-1/2 -translate-y-1/2 h-4 w-4 text-muted-foreground" />
               <Input
@@ -816,7 +898,8 @@ export default function ProductsPage() {
           {/* Contador de resultados */}
           {hasActiveFilters && (
             <p className="text-sm text-muted-foreground mt-3">
-              Mostrando {filteredProducts.length} de {products.length} productos
+              Mostrando {filteredProducts.length} {filteredProducts.length === 1 ? 'producto' : 'productos'}
+              {!searchResults && nextCursor ? ' (hay más por cargar)' : ''}
             </p>
           )}
         </CardContent>
@@ -1008,6 +1091,15 @@ export default function ProductsPage() {
                   )
                 })}
               </div>
+
+              {!searchResults && nextCursor && (
+                <div className="flex justify-center mt-6">
+                  <Button variant="outline" onClick={loadMoreProducts} disabled={loadingMore}>
+                    {loadingMore && <Loader2 className="mr-2 h-4 w-4 animate-spin" />}
+                    Cargar más productos
+                  </Button>
+                </div>
+              )}
             </>
           )}
         </CardContent>
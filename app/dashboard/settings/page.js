@@ -16,6 +16,7 @@ import {
 } from '@/components/ui/card'
 import { Tabs, TabsContent, TabsList, TabsTrigger } from '@/components/ui/tabs'
 import { useToast } from '@/hooks/use-toast'
+import { useDealershipChanges } from '@/hooks/use-dealership-changes'
 import { Loader2, Upload, X, Save } from 'lucide-react'
 import Image from 'next/image'
 
@@ -54,6 +55,39 @@ export default function SettingsPage() {
     }
   }, [dealership])
 
+  const settingsForm = (data) => ({
+    hero_title: data.hero_title || '',
+    hero_subtitle: data.hero_subtitle || '',
+    footer_text: data.footer_text || '',
+    footer_address: data.footer_address || '',
+    footer_phone: data.footer_phone || '',
+    footer_email: data.footer_email || '',
+    facebook_url: data.facebook_url || '',
+    instagram_url: data.instagram_url || '',
+    twitter_url: data.twitter_url || '',
+    tiktok_url: data.tiktok_url || '',
+    youtube_url: data.youtube_url || '',
+    main_whatsapp: data.main_whatsapp || '',
+    primary_color: data.primary_color || '#000000',
+    secondary_color: data.secondary_color || '#666666',
+  })
+
+  const showSettings = (data) => {
+    setSettings(data)
+    setFormData(settingsForm(data))
+    setLogoPreview(data.logo_url || '')
+    setHeroPreview(data.hero_image_url || '')
+  }
+
+  // Saved from another tab or by another admin: refresh the form unless it has unsaved edits
+  useDealershipChanges(dealership?.id, ['site_settings'], (change) => {
+    if (change.eventType === 'DELETE') return
+    const unsaved = logoFile || heroFile ||
+      (settings && JSON.stringify(formData) !== JSON.stringify(settingsForm(settings)))
+    if (unsaved) setSettings(change.new)
+    else showSettings(change.new)
+  })
+
   const fetchSettings = async () => {
     try {
       const { data, error } = await supabase
@@ -64,27 +98,7 @@ export default function SettingsPage() {
 
       if (error && error.code !== 'PGRST116') throw error
 
-      if (data) {
-        setSettings(data)
-        setFormData({
-          hero_title: data.hero_title || '',
-          hero_subtitle: data.hero_subtitle || '',
-          footer_text: data.footer_text || '',
-          footer_address: data.footer_address || '',
-          footer_phone: data.footer_phone || '',
-          footer_email: data.footer_email || '',
-          facebook_url: data.facebook_url || '',
-          instagram_url: data.instagram_url || '',
-          twitter_url: data.twitter_url || '',
-          tiktok_url: data.tiktok_url || '',
-          youtube_url: data.youtube_url || '',
-          main_whatsapp: data.main_whatsapp || '',
-          primary_color: data.primary_color || '#000000',
-          secondary_color: data.secondary_color || '#666666',
-        })
-        setLogoPreview(data.logo_url || '')
-        setHeroPreview(data.hero_image_url || '')
-      }
+      if (data) showSettings(data)
     } catch (error) {
       console.error('Error fetching settings:', error)
     } finally {
@@ -167,27 +181,18 @@ export default function SettingsPage() {
         ...formData,
       }
 
-      if (settings) {
-        const { error } = await supabase
-          .from('site_settings')
-          .update(settingsData)
-          .eq('id', settings.id)
-
-        if (error) throw error
-      } else {
-        const { error } = await supabase
-          .from('site_settings')
-          .insert([settingsData])
+      const { data, error } = settings
+        ? await supabase.from('site_settings').update(settingsData).eq('id', settings.id).select().single()
+        : await supabase.from('site_settings').insert([settingsData]).select().single()
 
-        if (error) throw error
-      }
+      if (error) throw error
+      showSettings(data)
 
       toast({
         title: 'Éxito',
         description: 'Configuración guardada correctamente',
       })
 
-      fetchSettings()
       setLogoFile(null)
       setHeroFile(null)
     } catch (error) {
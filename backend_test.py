@@ -7,10 +7,54 @@ Tests Supabase integration, authentication, multi-tenancy, and CRUD operations
 import os
 import sys
 import json
+import re
+import argparse
+import threading
+import time
+import random
+import sqlite3
+import statistics
 import requests
 import asyncio
+from collections import defaultdict
+from contextlib import closing, contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from urllib.parse import urlsplit, parse_qsl
+import io
 import uuid
+import base64
+import gzip
+import zlib
+import hashlib
+import math
+import tracemalloc
+import shutil
+import subprocess
+import tempfile
+import queue
+import socket
+import ssl
+import struct
+
+try:
+    import httpx
+except ImportError:
+    # Async requests fall back to running the sync transport in worker threads
+    httpx = None
+
+try:
+    import psycopg2
+except ImportError:
+    # Only the --explain harness talks to Postgres directly
+    psycopg2 = None
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:
+    # Only --benchmark-upload draws and resizes photos
+    Image = ImageDraw = None
 
 # Add the app directory to Python path
 sys.path.append('/app')
@@ -21,14 +65,2177 @@ try:
     load_dotenv('/app/.env')
 except ImportError:
     # If python-dotenv is not available, manually load .env
-    with open('/app/.env', 'r') as f:
+    # (missing is fine for --local runs, which need no project credentials)
+    if os.path.exists('/app/.env'):
+        with open('/app/.env', 'r') as f:
+            for line in f:
+                if line.strip() and not line.startswith('#'):
+                    key, value = line.strip().split('=', 1)
+                    os.environ[key] = value
+
+class Histogram:
+    """Log-linear (HDR-style) histogram of non-negative integer values.
+    
+    Values below 64 are exact; above that each power of two is split into
+    64 linear sub-buckets, giving ~1.5% relative precision in constant memory.
+    """
+    
+    SUB_BUCKETS = 64
+    
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+    
+    @classmethod
+    def _index(cls, value):
+        if value < cls.SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - 7
+        return (shift + 1) * cls.SUB_BUCKETS + (value >> shift) - cls.SUB_BUCKETS
+    
+    @classmethod
+    def _bucket_value(cls, index):
+        """Midpoint of the value range a bucket index covers"""
+        if index < cls.SUB_BUCKETS:
+            return index
+        shift = index // cls.SUB_BUCKETS - 1
+        mantissa = index % cls.SUB_BUCKETS + cls.SUB_BUCKETS
+        low = mantissa << shift
+        high = ((mantissa + 1) << shift) - 1
+        return (low + high) // 2
+    
+    def record(self, value, count=1):
+        value = max(0, int(value))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+    
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+    
+    def percentile(self, pct):
+        if not self.count:
+            return 0
+        target = max(1, -(-self.count * pct // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(max(self._bucket_value(index), self.min), self.max)
+        return self.max
+    
+    def to_dict(self, scale=1.0, digits=3):
+        """Summary plus raw buckets; ``scale`` converts recorded units for display"""
+        def scaled(value):
+            return round(value * scale, digits)
+        return {
+            'count': self.count,
+            'min': scaled(self.min or 0),
+            'max': scaled(self.max),
+            'mean': scaled(self.total / self.count) if self.count else 0,
+            'p50': scaled(self.percentile(50)),
+            'p90': scaled(self.percentile(90)),
+            'p95': scaled(self.percentile(95)),
+            'p99': scaled(self.percentile(99)),
+            'p999': scaled(self.percentile(99.9)),
+            'buckets': [[index, self.counts[index]] for index in sorted(self.counts)]
+        }
+    
+    @classmethod
+    def from_dict(cls, data, scale=1.0):
+        """Rebuild a histogram written by to_dict (same ``scale``)"""
+        histogram = cls()
+        for index, count in data.get('buckets', []):
+            histogram.counts[index] = count
+        histogram.count = data.get('count', 0)
+        histogram.total = int(round(data.get('mean', 0) / scale * histogram.count))
+        histogram.min = int(round(data.get('min', 0) / scale)) if histogram.count else None
+        histogram.max = int(round(data.get('max', 0) / scale))
+        return histogram
+
+
+# PostgREST filter operators; their operand is replaced by '*' in endpoint templates
+POSTGREST_OPERATORS = (
+    'eq', 'neq', 'gt', 'gte', 'lt', 'lte', 'in', 'is', 'like', 'ilike',
+    'cs', 'cd', 'ov', 'fts', 'plfts', 'phfts', 'wfts', 'not'
+)
+# Query params that shape the response rather than identify a row
+TEMPLATE_KEEP_PARAMS = ('select', 'order', 'grant_type', 'on_conflict', 'columns')
+UUID_PATTERN = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
+
+
+def wire_bytes(response):
+    """Body bytes as received, before gzip/brotli decoding (requests or httpx response)"""
+    downloaded = getattr(response, 'num_bytes_downloaded', None)
+    if downloaded is None and getattr(response, 'raw', None) is not None:
+        try:
+            downloaded = response.raw.tell()
+        except (AttributeError, OSError, ValueError):
+            downloaded = None
+    if not downloaded:
+        downloaded = int(response.headers.get('Content-Length') or len(response.content))
+    return downloaded
+
+
+def endpoint_template(url):
+    """Collapse a request URL into its endpoint template.
+    
+    ``https://x.supabase.co/rest/v1/products?dealership_id=eq.d111...`` becomes
+    ``rest/v1/products?dealership_id=eq.*``; tenant slugs and ids in paths become ``*``.
+    """
+    parts = urlsplit(url)
+    segments = parts.path.strip('/').split('/') if parts.path.strip('/') else []
+    if segments[:2] == ['storage', 'v1']:
+        # Object keys and TUS upload ids are per file; keep the operation and bucket
+        keep = 5 if segments[2:4] == ['object', 'public'] else 4
+        segments = segments[:keep] + (['*'] if len(segments) > keep else [])
+    elif segments[:2] == ['api', 'images']:
+        # /api/images/<variant>/<bucket>/<object path>
+        segments = segments[:4] + (['*'] if len(segments) > 4 else [])
+    templated = []
+    for position, segment in enumerate(segments):
+        previous = segments[position - 1] if position else ''
+        if UUID_PATTERN.match(segment) or segment.isdigit() or previous in ('catalogo', 'producto'):
+            templated.append('*')
+        else:
+            templated.append(segment)
+    params = []
+    for key, value in parse_qsl(parts.query, keep_blank_values=True):
+        if key in TEMPLATE_KEEP_PARAMS:
+            params.append(f"{key}={value}")
+        else:
+            operator = value.split('.', 1)[0]
+            params.append(f"{key}={operator}.*" if operator in POSTGREST_OPERATORS and '.' in value else f"{key}=*")
+    path = '/'.join(templated)
+    return f"{path}?{'&'.join(params)}" if params else path
+
+
+class LatencyRecorder:
+    """Per-endpoint latency and payload histograms for every transport request"""
+    
+    # Timing phases, recorded in microseconds; connect/tls only where the client exposes them.
+    # No client reports name resolution on its own: it is part of connect (httpcore's connect_tcp).
+    PHASES = ('total', 'ttfb', 'connect', 'tls')
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+        # Optional ResultSink; every request is also streamed to it as a sample
+        self.sink = None
+    
+    def _entry(self, key):
+        entry = self.endpoints.get(key)
+        if entry is None:
+            entry = {
+                'phases': {phase: Histogram() for phase in self.PHASES},
+                'bytes': Histogram(),
+                'bytes_total': 0,
+                'errors': 0
+            }
+            self.endpoints[key] = entry
+        return entry
+    
+    def record(self, method, url, timings, bytes_received=0, error=False):
+        """Record one request; ``timings`` maps phase name to seconds"""
+        key = f"{method} {endpoint_template(url)}"
+        micros = {phase: int(seconds * 1_000_000) for phase, seconds in timings.items() if seconds is not None}
+        self.add(key, micros, bytes_received, error)
+        if self.sink is not None:
+            self.sink.write('sample', {'endpoint': key, 'us': micros, 'bytes': bytes_received, 'error': error})
+    
+    def add(self, key, micros, bytes_received=0, error=False):
+        """Record one request under an endpoint template; ``micros`` maps phase name to microseconds"""
+        with self._lock:
+            entry = self._entry(key)
+            for phase, value in micros.items():
+                entry['phases'][phase].record(value)
+            entry['bytes'].record(bytes_received)
+            entry['bytes_total'] += bytes_received
+            if error:
+                entry['errors'] += 1
+    
+    def to_dict(self):
+        """Histograms per endpoint template, latencies in milliseconds"""
+        with self._lock:
+            return {
+                key: {
+                    'latency_ms': {
+                        phase: histogram.to_dict(scale=0.001)
+                        for phase, histogram in entry['phases'].items() if histogram.count
+                    },
+                    'bytes': entry['bytes'].to_dict(),
+                    'bytes_total': entry['bytes_total'],
+                    'errors': entry['errors']
+                }
+                for key, entry in sorted(self.endpoints.items())
+            }
+
+
+RESULTS_PATH = '/app/backend_test_results.json'
+RESULTS_STREAM_PATH = '/app/backend_test_results.ndjson'
+
+# Checks that exercise Next.js code (app/api, app/catalogo, lib/catalog-*.js, lib/image-derivatives.js).
+# Under --local without --app-url, local_supabase.py answers these routes with Python copies of
+# that code, and their results are labelled STAND_IN_LABEL
+APP_CODE_CHECKS = (
+    'API Root Endpoint', 'API Health', 'Public Landing Page', 'Catalog Cache', 'Catalog Load',
+    'Catalog Snapshot - Read', 'Catalog Snapshot - Republish', 'Catalog Snapshot - Unpublish',
+    'Catalog Snapshot Benchmark', 'Snapshot Publish', 'Snapshot Verify', 'Pagination', 'Search',
+    'Spec Facet', 'Spec Range', 'Payload', 'Image Variant', 'Image Format Negotiation', 'Image Derivatives',
+    'Soak'
+)
+STAND_IN_LABEL = 'stand-in, not app code'
+
+
+class ResultSink:
+    """Append-only NDJSON log of a run, written as it happens.
+    
+    One record per test result, request sample, soak window and report
+    section (``.gz`` paths are gzip-compressed). Test results are flushed
+    immediately and samples at most once per ``flush_interval``, so a
+    crashed or interrupted run keeps (nearly) everything and
+    ``summarize_stream`` can rebuild the results document from the file.
+    """
+    
+    flush_interval = 1.0
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = (gzip.open(path, 'wt', encoding='utf-8') if path.endswith('.gz')
+                      else open(path, 'w', encoding='utf-8'))
+        self._flushed = time.monotonic()
+        self.records = 0
+    
+    def write(self, kind, record, flush=False):
+        line = json.dumps({'type': kind, 'ts': round(time.time(), 3), **record}, default=str, separators=(',', ':'))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + '\n')
+            self.records += 1
+            now = time.monotonic()
+            if flush or now - self._flushed >= self.flush_interval:
+                self._file.flush()
+                self._flushed = now
+    
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_stream(path):
+    """Records of a result stream; a line or gzip block torn by a crash ends the iteration"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    return
+        except (EOFError, OSError, zlib.error):
+            return
+
+
+def results_document(test_results, sections, complete=True):
+    """The backend_test_results.json document"""
+    passed_tests = len([t for t in test_results if t['success']])
+    return {
+        'summary': {
+            'total_tests': len(test_results),
+            'passed_tests': passed_tests,
+            'failed_tests': len(test_results) - passed_tests,
+            'success_rate': (passed_tests / len(test_results)) * 100 if test_results else 0.0,
+            'complete': complete
+        },
+        'test_results': test_results,
+        **sections,
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+def summarize_stream(path):
+    """Rebuild the results document from a result stream in one pass.
+    
+    Samples are folded into per-endpoint histograms as they are read, so
+    memory depends on the number of tests and endpoints, not on how many
+    requests the run made.
+    """
+    recorder = LatencyRecorder()
+    tests = []
+    sections = {}
+    windows = {}
+    complete = False
+    for record in read_stream(path):
+        kind = record.pop('type')
+        record.pop('ts', None)
+        if kind == 'sample':
+            recorder.add(record['endpoint'], record['us'], record['bytes'], record['error'])
+        elif kind == 'test':
+            tests.append((record.pop('order'), record))
+        elif kind == 'window':
+            windows.setdefault(record.pop('name'), []).append(record)
+        elif kind == 'section':
+            sections[record['name']] = record['data']
+        elif kind == 'end':
+            complete = not record.get('interrupted')
+    # Runs that died before writing their sections still keep their windows
+    for name, rows in windows.items():
+        sections.setdefault(name, {'windows': rows, 'interrupted': True})
+    sections['latency'] = recorder.to_dict()
+    test_results = [result for _, result in sorted(tests, key=lambda pair: pair[0])]
+    return results_document(test_results, sections, complete)
+
+
+def print_summary(document):
+    summary = document['summary']
+    if document.get('app_routes', {}).get('served_by') == STAND_IN_LABEL:
+        print(f"⚠️  App route checks ran against local_supabase.py ({STAND_IN_LABEL}); use --app-url to test the app")
+    print(f"Total Tests: {summary['total_tests']}")
+    print(f"✅ Passed: {summary['passed_tests']}")
+    print(f"❌ Failed: {summary['failed_tests']}")
+    print(f"Success Rate: {summary['success_rate']:.1f}%")
+    
+    if summary['failed_tests'] > 0:
+        print("\n❌ FAILED TESTS:")
+        for test in document['test_results']:
+            if not test['success']:
+                print(f"  • {test['test']}: {test['message']}")
+    
+    print("\n✅ PASSED TESTS:")
+    for test in document['test_results']:
+        if test['success']:
+            print(f"  • {test['test']}: {test['message']}")
+
+
+class BaselineStore:
+    """Rolling window of per-endpoint latency / payload stats from previous runs (SQLite)"""
+    
+    def __init__(self, path='/app/backend_test_baseline.sqlite', window=10):
+        self.path = path
+        self.window = window
+        with closing(self._connect()) as db, db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, created_at TEXT NOT NULL, label TEXT)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS endpoint_stats ("
+                " run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,"
+                " endpoint TEXT NOT NULL, requests INTEGER, p50_ms REAL, p95_ms REAL, p99_ms REAL, bytes_mean REAL,"
+                " PRIMARY KEY (run_id, endpoint))"
+            )
+    
+    def _connect(self):
+        db = sqlite3.connect(self.path)
+        db.execute("PRAGMA foreign_keys = ON")
+        return db
+    
+    def record_run(self, endpoint_stats, label=None):
+        """Store one run and drop runs that fall out of the window"""
+        with closing(self._connect()) as db, db:
+            run_id = db.execute(
+                "INSERT INTO runs (created_at, label) VALUES (?, ?)",
+                (datetime.now().isoformat(), label)
+            ).lastrowid
+            db.executemany(
+                "INSERT INTO endpoint_stats VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (run_id, endpoint, stats['requests'], stats['p50_ms'], stats['p95_ms'],
+                     stats['p99_ms'], stats['bytes_mean'])
+                    for endpoint, stats in endpoint_stats.items()
+                ]
+            )
+            db.execute(
+                "DELETE FROM runs WHERE id NOT IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)",
+                (self.window,)
+            )
+        return run_id
+    
+    def baseline(self):
+        """Median of each endpoint's stats over the stored window"""
+        with closing(self._connect()) as db, db:
+            rows = db.execute(
+                "SELECT endpoint, p50_ms, p95_ms, p99_ms, bytes_mean FROM endpoint_stats ORDER BY run_id"
+            ).fetchall()
+        grouped = {}
+        for endpoint, p50, p95, p99, bytes_mean in rows:
+            grouped.setdefault(endpoint, []).append((p50, p95, p99, bytes_mean))
+        return {
+            endpoint: {
+                'runs': len(samples),
+                'p50_ms': statistics.median(sample[0] for sample in samples),
+                'p95_ms': statistics.median(sample[1] for sample in samples),
+                'p99_ms': statistics.median(sample[2] for sample in samples),
+                'bytes_mean': statistics.median(sample[3] for sample in samples)
+            }
+            for endpoint, samples in grouped.items()
+        }
+
+
+def compare_to_baseline(current, baseline, threshold=0.2, min_delta_ms=5.0):
+    """Diff current endpoint stats against a baseline.
+    
+    An endpoint regresses when its p95 grows by more than ``threshold``
+    (relative) and by more than ``min_delta_ms`` (absolute noise floor).
+    """
+    diff = {}
+    for endpoint, stats in sorted(current.items()):
+        reference = baseline.get(endpoint)
+        if reference is None:
+            diff[endpoint] = {'status': 'new', 'p95_ms': stats['p95_ms'], 'bytes_mean': stats['bytes_mean']}
+            continue
+        delta_ms = stats['p95_ms'] - reference['p95_ms']
+        change = delta_ms / reference['p95_ms'] if reference['p95_ms'] else 0.0
+        bytes_change = (
+            (stats['bytes_mean'] - reference['bytes_mean']) / reference['bytes_mean']
+            if reference['bytes_mean'] else 0.0
+        )
+        regressed = change > threshold and delta_ms > min_delta_ms
+        diff[endpoint] = {
+            'status': 'regressed' if regressed else 'ok',
+            'p95_ms': stats['p95_ms'],
+            'baseline_p95_ms': round(reference['p95_ms'], 3),
+            'p95_change': round(change, 4),
+            'bytes_mean': stats['bytes_mean'],
+            'baseline_bytes_mean': round(reference['bytes_mean'], 1),
+            'bytes_change': round(bytes_change, 4),
+            'baseline_runs': reference['runs']
+        }
+    return diff
+
+
+# Tables the isolation stress test writes, with the column every update stamps
+# with the writer's dealership id (so a cross-tenant write shows up afterwards)
+STRESS_TABLES = {'products': 'description', 'categories': 'description', 'employees': 'position'}
+# Relative weights of the operations each stress worker picks from
+STRESS_OPERATIONS = {
+    'create': 4, 'update': 3, 'delete': 2,
+    'foreign_update': 1, 'foreign_delete': 1, 'spoofed_insert': 1, 'private_read': 1
+}
+# Tables with UNIQUE(dealership_id, slug)
+STRESS_SLUG_TABLES = ('products', 'categories')
+
+
+# Traffic a soak run mixes by default: public catalog views, dashboard home
+# views and product insert/update/delete cycles (--soak-mix)
+SOAK_MIX = {'catalog': 6, 'dashboard': 3, 'write': 1}
+# Observed RSS growth below this is allocator / GC noise, whatever the slope extrapolates to
+SOAK_MIN_RSS_GROWTH_MB = 8
+# /proc/<pid>/status fields sampled per soak window, in kB (Threads is a count)
+PROC_STATUS_FIELDS = ('VmRSS', 'VmHWM', 'RssAnon', 'VmData', 'Threads')
+
+
+def read_proc_status(pid):
+    """Memory counters of a process from /proc/<pid>/status plus its open file descriptors"""
+    sample = {}
+    with open(f"/proc/{pid}/status") as f:
         for line in f:
-            if line.strip() and not line.startswith('#'):
-                key, value = line.strip().split('=', 1)
-                os.environ[key] = value
+            key, _, value = line.partition(':')
+            if key in PROC_STATUS_FIELDS:
+                sample[key] = int(value.split()[0])
+    try:
+        sample['fds'] = len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        # Another user's process: memory is readable, descriptors are not
+        pass
+    return sample
+
+
+def _proc_cmdline(pid):
+    with open(f"/proc/{pid}/cmdline", 'rb') as f:
+        return f.read().replace(b'\0', b' ').decode(errors='replace').strip()
+
+
+def node_heap_limit_mb(pid):
+    """--max-old-space-size of a Node process, from its command line or NODE_OPTIONS"""
+    sources = [_proc_cmdline(pid)]
+    try:
+        with open(f"/proc/{pid}/environ", 'rb') as f:
+            sources += [entry.decode(errors='replace') for entry in f.read().split(b'\0')
+                        if entry.startswith(b'NODE_OPTIONS=')]
+    except OSError:
+        pass
+    for source in sources:
+        match = re.search(r'--max-old-space-size=(\d+)', source)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def find_next_server():
+    """Pid of the local Next.js server process, or None.
+    
+    ``next dev`` / ``next start`` fork the process that actually serves
+    requests, which renames itself ``next-server``; prefer that one.
+    """
+    candidates = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            cmdline = _proc_cmdline(entry)
+        except OSError:
+            continue
+        if cmdline.startswith('next-server'):
+            candidates.append((0, int(entry)))
+        elif 'node' in cmdline and re.search(r'next(\.js)? (dev|start)', cmdline):
+            candidates.append((1, int(entry)))
+    return min(candidates)[1] if candidates else None
+
+
+def ssr_cookie_header(supabase_url, session, chunk_size=3180):
+    """Cookie header carrying a session the way @supabase/ssr stores it for the Next.js server.
+    
+    One ``sb-<project ref>-auth-token`` cookie holding ``base64-`` + the
+    base64url session JSON, split into ``.0``, ``.1``... chunks when long.
+    """
+    name = f"sb-{urlsplit(supabase_url).hostname.split('.')[0]}-auth-token"
+    value = 'base64-' + base64.urlsafe_b64encode(json.dumps({
+        'access_token': session['access_token'],
+        'token_type': 'bearer',
+        'expires_in': max(0, int(session['expires_at'] - time.time())),
+        'expires_at': int(session['expires_at']),
+        'refresh_token': session.get('refresh_token'),
+        'user': {'id': session.get('user_id')}
+    }, separators=(',', ':')).encode()).decode().rstrip('=')
+    if len(value) <= chunk_size:
+        return f"{name}={value}"
+    return '; '.join(f"{name}.{index}={value[start:start + chunk_size]}"
+                     for index, start in enumerate(range(0, len(value), chunk_size)))
+
+
+def drift_summary(series, window_s):
+    """Drift of a per-window series: first vs. last third (medians) and the fitted slope per hour"""
+    values = [value for value in series if value is not None]
+    if len(values) < 3:
+        return {'windows': len(values), 'first': None, 'last': None, 'drift': None, 'slope_per_hour': None}
+    third = len(values) // 3
+    first, last = statistics.median(values[:third]), statistics.median(values[-third:])
+    slope, _ = statistics.linear_regression(range(len(values)), values)
+    return {
+        'windows': len(values),
+        'first': round(first, 2),
+        'last': round(last, 2),
+        'drift': round(last / first - 1, 3) if first else None,
+        'slope_per_hour': round(slope * 3600 / window_s, 2)
+    }
+
+
+# Queries fetchCatalog() (lib/catalog-cache.js) runs for /api/catalog/<slug> on a cache miss.
+# Before that route the browser issued them on every page view, so the benchmarks use them as
+# the uncached baseline. The first one resolves the dealership id the rest are filtered by.
+CATALOG_READ_PATTERN = [
+    ('dealership_by_slug', "dealerships?select=*&slug=eq.{slug}&is_active=eq.true"),
+    ('site_settings', "site_settings?select=*&dealership_id=eq.{dealership_id}"),
+    ('products', "products?select=*,categories(id,name,slug),subcategories(id,name,slug),"
+                 "product_images(id,image_url,is_primary,display_order,blurhash)"
+                 "&dealership_id=eq.{dealership_id}&order=created_at.desc"),
+    ('categories', "categories?select=*,subcategories(*)&dealership_id=eq.{dealership_id}&order=name.asc"),
+    ('employees', "employees?select=*&dealership_id=eq.{dealership_id}&is_active=eq.true&order=display_order.asc"),
+]
+
+
+# Requests of one /catalogo/<slug> page view, in order: the page itself, then the published
+# snapshot from Storage (pointer + document) or, when there is none, the first page of
+# /api/catalog/<slug>
+CATALOG_PAGE_VIEW = ('html', 'snapshot_pointer', 'snapshot_document', 'api_catalog')
+CATALOG_FIRST_PAGE = 24
+
+
+# What the dashboard home used to download just to count rows and sum prices;
+# get_dashboard_stats (supabase-dashboard-stats.sql) now answers in one call
+DASHBOARD_FETCH_ALL = [
+    ('products', "products?select=*,product_images(image_url,is_primary)&dealership_id=eq.{dealership_id}"),
+    ('categories', "categories?select=*&dealership_id=eq.{dealership_id}"),
+    ('subcategories', "subcategories?select=*&dealership_id=eq.{dealership_id}"),
+    ('employees', "employees?select=*&dealership_id=eq.{dealership_id}"),
+]
+DASHBOARD_COUNTERS = ('total_products', 'available_products', 'sold_products', 'reserved_products', 'inventory_value',
+                      'total_categories', 'total_subcategories', 'total_employees', 'active_employees')
+
+
+# The requests each page makes for its data: (page, name, service, path, spec), where service is
+# 'api' (Next.js route), 'rest' (PostgREST table) or 'rpc' (PostgREST function, POSTed with the
+# dealership id). spec is what the page renders of the response body: a field maps to True
+# (rendered whole), an int (only that many leading characters are visible, e.g. a line-clamped
+# description) or a nested spec for embeds / JSONB objects / sections of the body.
+# Dashboard requests are made as the tenant's admin, so they only run for tenants with a test user.
+PAYLOAD_SHAPES = [
+    # One /api/catalog/<slug> response (a published snapshot has the same sections). The grid
+    # clamps the description to two lines and the badge only reads two motor specs; search runs
+    # server-side (/api/search), so nothing reads the rest
+    ('catalogo', 'catalog', 'api', f"catalog/{{slug}}?limit={CATALOG_FIRST_PAGE}", {
+        'dealership': {'id': True, 'name': True, 'phone': True},
+        'settings': {field: True for field in (
+            'logo_url', 'hero_image_url', 'hero_title', 'hero_subtitle', 'main_whatsapp', 'footer_text',
+            'footer_address', 'footer_phone', 'footer_email',
+            'facebook_url', 'instagram_url', 'twitter_url', 'youtube_url', 'tiktok_url'
+        )},
+        'products': {'id': True, 'name': True, 'brand': True, 'model': True, 'year': True, 'price': True,
+                     'status': True, 'category_id': True, 'subcategory_id': True, 'created_at': True,
+                     'description': 160, 'specifications': {'motor': {'motor': True, 'potencia_maxima': True}},
+                     'categories': {'name': True}, 'subcategories': {'name': True},
+                     'product_images': {'image_url': True, 'is_primary': True, 'blurhash': True}},
+        'categories': {'id': True, 'name': True, 'subcategories': {'id': True, 'name': True}},
+        'employees': {'id': True, 'full_name': True, 'photo_url': True, 'position': True, 'whatsapp': True},
+        'next_cursor': True,
+    }),
+    # fetchProducts() in app/dashboard/products/page.js: the table plus the edit dialog, which
+    # needs the whole description and specifications
+    ('dashboard/products', 'dashboard_products', 'api', "products?dealership_id={dealership_id}&limit=50", {
+        'data': {'id': True, 'name': True, 'brand': True, 'model': True, 'year': True, 'price': True,
+                 'status': True, 'category_id': True, 'subcategory_id': True, 'created_at': True,
+                 'description': True, 'specifications': True,
+                 'categories': {'name': True}, 'subcategories': {'name': True},
+                 'product_images': {'id': True, 'image_url': True, 'is_primary': True}},
+        'next_cursor': True,
+    }),
+    ('dashboard/products', 'dashboard_categories', 'rest', "categories?select=*&dealership_id=eq.{dealership_id}&order=name",
+     {'id': True, 'name': True}),
+    ('dashboard/products', 'dashboard_subcategories', 'rest',
+     "subcategories?select=*&dealership_id=eq.{dealership_id}&order=name",
+     {'id': True, 'name': True, 'category_id': True}),
+    # fetchDashboardStats() in app/dashboard/page.js
+    ('dashboard', 'dashboard_stats', 'rpc', "get_dashboard_stats", {
+        **{counter: True for counter in DASHBOARD_COUNTERS if counter != 'reserved_products'},
+        'recent_products': {'id': True, 'name': True, 'price': True, 'status': True,
+                            'product_images': {'image_url': True, 'is_primary': True}},
+    }),
+]
+
+
+
+def dashboard_stats_from_rows(products, categories, subcategories, employees):
+    """The counters the old fetchDashboardStats() computed in the browser"""
+    return {
+        'total_products': len(products),
+        'available_products': sum(1 for row in products if row['status'] == 'available'),
+        'sold_products': sum(1 for row in products if row['status'] == 'sold'),
+        'reserved_products': sum(1 for row in products if row['status'] == 'reserved'),
+        'inventory_value': round(sum(float(row['price'] or 0) for row in products), 2),
+        'total_categories': len(categories),
+        'total_subcategories': len(subcategories),
+        'total_employees': len(employees),
+        'active_employees': sum(1 for row in employees if row['is_active']),
+    }
+
+
+def rendered_projection(value, spec):
+    """Reduce a response section to the parts a page renders (see PAYLOAD_SHAPES)"""
+    if isinstance(value, list):
+        return [rendered_projection(item, spec) for item in value]
+    if spec is True or value is None:
+        return value
+    if isinstance(spec, int):
+        return value[:spec] if isinstance(value, str) else value
+    if not isinstance(value, dict):
+        return value
+    return {key: rendered_projection(value[key], sub) for key, sub in spec.items() if key in value}
+
+
+def json_size(value):
+    """Bytes of a value serialized the way PostgREST sends it (compact UTF-8)"""
+    return len(json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+
+
+def field_waste(value, kept, spec, prefix=''):
+    """Unrendered bytes per field path (``products.specifications``), summed over every row.
+    
+    Embedded rows and the sections of an object body are broken down by field;
+    a JSONB object inside a row counts as one field.
+    """
+    waste = {}
+    if isinstance(value, list):
+        for item, item_kept in zip(value, kept):
+            for key, size in field_waste(item, item_kept, spec, prefix).items():
+                waste[key] = waste.get(key, 0) + size
+        return waste
+    if not isinstance(value, dict) or not isinstance(spec, dict):
+        return waste
+    for key, item in value.items():
+        path = prefix + key
+        if key not in kept:
+            waste[path] = json_size(item) + len(key) + 3
+        elif isinstance(spec[key], dict) and (isinstance(item, list) or (isinstance(item, dict) and not prefix)):
+            for sub_path, size in field_waste(item, kept[key], spec[key], path + '.').items():
+                waste[sub_path] = waste.get(sub_path, 0) + size
+        elif json_size(item) > json_size(kept[key]):
+            waste[path] = json_size(item) - json_size(kept[key])
+    return waste
+
+
+# Searches a visitor would type: brand, brand + model, a typo, a prefix, an accessory, a description word
+SEARCH_BENCHMARK_QUERIES = ['yamaha', 'ninja 650', 'yamha', 'kawa', 'casco', 'carretera']
+
+# Spec facets of /api/facets and their path in products.specifications (lib/motorcycle-specs.js)
+SPEC_FACETS = {
+    'cilindrada': ('cilindrada',),
+    'motor': ('motor', 'motor'),
+    'enfriamiento': ('motor', 'enfriamiento'),
+    'sistema_combustible': ('motor', 'sistema_combustible'),
+    'transmision': ('transmision', 'tipo'),
+    'unidad_final': ('transmision', 'unidad_final'),
+}
+
+# Filter sets a buyer would click through: none, one spec, OR within a spec, several specs
+FACET_BENCHMARK_FILTERS = [
+    {},
+    {'enfriamiento': ['Refrigerado por aire']},
+    {'cilindrada': ['125', '150'], 'sistema_combustible': ['Carburador']},
+    {'enfriamiento': ['Refrigerado por líquido'], 'transmision': ['Manual'], 'unidad_final': ['Cadena', 'Correa']},
+    {'cilindrada': ['1000'], 'motor': ['Tetracilíndrico en línea, 4 tiempos']},
+]
+
+
+def spec_value(specifications, path):
+    """The value at ``path`` inside a specifications document, or None"""
+    value = specifications
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def facet_filter(products, filters, page_size=24):
+    """Client-side reference for /api/facets: (total, first page ids, per-facet value counts)"""
+    def matches(product, skip=None):
+        return all(spec_value(product['specifications'], SPEC_FACETS[facet]) in values
+                   for facet, values in filters.items() if facet != skip)
+    
+    selected = sorted((product for product in products if matches(product)),
+                      key=lambda product: (product['created_at'], product['id']), reverse=True)
+    facets = {}
+    for facet, path in SPEC_FACETS.items():
+        counts = {}
+        for product in selected if facet not in filters else (p for p in products if matches(p, facet)):
+            value = spec_value(product['specifications'], path)
+            if value not in (None, ''):
+                counts[str(value)] = counts.get(str(value), 0) + 1
+        if counts:
+            facets[facet] = counts
+    return len(selected), [product['id'] for product in selected[:page_size]], facets
+
+
+# Numeric columns of product_spec_values (supabase-spec-values.sql, SPEC_RANGE_FIELDS in lib/motorcycle-specs.js)
+SPEC_RANGE_FIELDS = ('cc', 'power_hp', 'torque_nm', 'weight_kg', 'fuel_capacity_l', 'price')
+
+# Free-text spec -> (path, [(unit pattern, factor to the fixed unit)], exclusive upper bound)
+SPEC_UNIT_RULES = {
+    'power_hp': (('motor', 'potencia_maxima'), [(r'\d\s*kw', '1.341'), (r'\d\s*(cv|ps)\b', '0.9863')], 10000),
+    'torque_nm': (('motor', 'torque_maximo'), [(r'\d\s*kg', '9.80665'), (r'\d\s*(lb|ft)', '1.35582')], 10000),
+    'weight_kg': (('dimension', 'peso'), [(r'\d\s*lb', '0.45359')], 10000),
+    'fuel_capacity_l': (('chasis', 'capacidad_combustible'), [(r'\d\s*gal', '3.78541')], 1000),
+}
+
+# /api/products/specs queries a buyer would run: sort by power, under 150 kg, 10-20 HP by price, big bikes
+SPEC_RANGE_BENCHMARK_QUERIES = [
+    {'sort': 'power_hp', 'order': 'desc'},
+    {'sort': 'price', 'max_weight_kg': '150'},
+    {'sort': 'price', 'min_power_hp': '10', 'max_power_hp': '20'},
+    {'sort': 'cc', 'order': 'desc', 'min_cc': '400', 'max_fuel_capacity_l': '15'},
+]
+
+# Spec sheets in other units and how parse_spec_values() must normalize them
+SPEC_PARSE_FIXTURES = [
+    ({'cilindrada': '149', 'motor': {'potencia_maxima': '11.3 kW @ 8000 rpm', 'torque_maximo': '1.4 kgf·m'},
+      'dimension': {'peso': '298 lbs'}, 'chasis': {'capacidad_combustible': '3,5 gal'}},
+     {'cc': 149, 'power_hp': 15.2, 'torque_nm': 13.7, 'weight_kg': 135.2, 'fuel_capacity_l': 13.2}),
+    ({'motor': {'motor': 'Monocilíndrico 124.5cc, 4 tiempos', 'potencia_maxima': '15 CV',
+                'torque_maximo': '10 lb-ft'}, 'dimension': {'peso': '118,5 kg'}},
+     {'cc': 125, 'power_hp': 14.8, 'torque_nm': 13.6, 'weight_kg': 118.5, 'fuel_capacity_l': None}),
+    ({'cilindrada': 'N/D', 'motor': {'potencia_maxima': 'Consultar'}, 'chasis': {'capacidad_combustible': '12 litros'}},
+     {'cc': None, 'power_hp': None, 'torque_nm': None, 'weight_kg': None, 'fuel_capacity_l': 12.0}),
+]
+
+
+def spec_number(text):
+    """First number of a free-text spec ('12,5 litros' -> 12.5), as a Decimal"""
+    match = re.search(r'(\d+(?:[.,]\d+)?)', text) if isinstance(text, str) else None
+    return Decimal(match.group(1).replace(',', '.')) if match else None
+
+
+def parse_spec_values(specifications):
+    """Client-side reference for parse_spec_values() of supabase-spec-values.sql"""
+    specs = specifications if isinstance(specifications, dict) else {}
+    
+    def text(path):
+        value = spec_value(specs, path)
+        return value if isinstance(value, str) else None
+    
+    def bounded(value, maximum):
+        # numeric round() goes half away from zero
+        return value.quantize(Decimal('0.1'), rounding=ROUND_HALF_UP) if value is not None and 0 < value < maximum \
+            else None
+    
+    cc = spec_number(text(('cilindrada',)))
+    engine = re.search(r'(\d+(?:[.,]\d+)?)\s*cc', text(('motor', 'motor')) or '', flags=re.I)
+    if cc is None and engine:
+        cc = spec_number(engine.group(1))
+    cc = bounded(cc, 10000)
+    values = {'cc': int(cc.quantize(Decimal('1'), rounding=ROUND_HALF_UP)) if cc is not None else None}
+    for field, (path, rules, maximum) in SPEC_UNIT_RULES.items():
+        raw, number = text(path), spec_number(text(path))
+        factor = next((Decimal(factor) for pattern, factor in rules if re.search(pattern, raw, flags=re.I)), None) \
+            if number is not None else None
+        value = bounded(number * factor if factor is not None else number, maximum)
+        values[field] = float(value) if value is not None else None
+    return values
+
+
+def spec_range_filter(products, query):
+    """Client-side reference for /api/products/specs: every matching product id, in the API's order"""
+    sort, descending = query.get('sort', 'price'), query.get('order') == 'desc'
+    bounds = [(field, float(query[f'min_{field}']) if f'min_{field}' in query else None,
+               float(query[f'max_{field}']) if f'max_{field}' in query else None) for field in SPEC_RANGE_FIELDS]
+    selected = []
+    for product in products:
+        values = dict(parse_spec_values(product.get('specifications')), price=product.get('price'))
+        if values[sort] is None:
+            continue
+        if all((low is None or (values[field] is not None and values[field] >= low))
+               and (high is None or (values[field] is not None and values[field] <= high))
+               for field, low, high in bounds):
+            selected.append((values[sort], product['id']))
+    selected.sort(reverse=descending)
+    return [product_id for _, product_id in selected]
+
+
+
+# Published catalog snapshots (lib/catalog-snapshot.js / lib/catalog-publisher.js)
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_BUCKET = 'site-assets'
+SNAPSHOT_KEPT_VERSIONS = 3
+SNAPSHOT_PRODUCTS_SELECT = ("*,categories(id,name,slug),subcategories(id,name,slug),"
+                            "product_images(id,image_url,is_primary,display_order,width,height,blurhash)")
+SNAPSHOT_SECTIONS = ('products', 'categories', 'employees')
+
+
+def catalog_snapshot(payload):
+    """toSnapshot(): the fetchCatalog() payload with one image per product"""
+    def primary(images):
+        return sorted(images or [], key=lambda image: (not image.get('is_primary'), image.get('display_order') or 0))[:1]
+    return {
+        'format': SNAPSHOT_FORMAT,
+        'dealership': payload['dealership'],
+        'settings': payload['settings'],
+        'categories': payload['categories'],
+        'products': [dict(product, product_images=primary(product.get('product_images')))
+                     for product in payload['products']],
+        'employees': payload['employees']
+    }
+
+
+def diff_catalog_snapshots(old, new):
+    """What changed between two snapshots: added/removed/changed ids per section, and the single objects"""
+    diff = {
+        'dealership_changed': old.get('dealership') != new.get('dealership'),
+        'settings_changed': old.get('settings') != new.get('settings')
+    }
+    for section in SNAPSHOT_SECTIONS:
+        before = {row['id']: row for row in old.get(section) or []}
+        after = {row['id']: row for row in new.get(section) or []}
+        diff[section] = {
+            'added': sorted(set(after) - set(before)),
+            'removed': sorted(set(before) - set(after)),
+            'changed': sorted(key for key in set(before) & set(after) if before[key] != after[key])
+        }
+    diff['identical'] = not diff['dealership_changed'] and not diff['settings_changed'] and not any(
+        ids for section in SNAPSHOT_SECTIONS for ids in diff[section].values()
+    )
+    return diff
+
+
+
+def read_snapshot_file(path):
+    """A snapshot document saved with --build-snapshot or downloaded from Storage (.json or .json.gz)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return json.loads(gzip.decompress(data) if data[:2] == b'\x1f\x8b' else data)
+
+# The catalog's previous client-side search, timed in Node against the same products
+FUSE_BENCHMARK_JS = """
+const Fuse = require('fuse.js')
+const { products, queries } = JSON.parse(require('fs').readFileSync(0, 'utf8'))
+let started = process.hrtime.bigint()
+const fuse = new Fuse(products, { keys: ['name', 'brand', 'model', 'description'], threshold: 0.4, includeScore: true })
+const buildMs = Number(process.hrtime.bigint() - started) / 1e6
+const results = {}
+for (const query of queries) {
+  started = process.hrtime.bigint()
+  const hits = fuse.search(query)
+  results[query] = { ms: Number(process.hrtime.bigint() - started) / 1e6, total: hits.length }
+}
+console.log(JSON.stringify({ build_ms: buildMs, queries: results }))
+"""
+
+
+# SQL equivalents of the queries the app sends through PostgREST (embeds become
+# their own lookups), for EXPLAIN (ANALYZE, BUFFERS) against the real planner
+EXPLAIN_SHAPES = [
+    ('dealership_by_slug', "SELECT * FROM public.dealerships WHERE slug = %(slug)s AND is_active = true"),
+    ('site_settings', "SELECT * FROM public.site_settings WHERE dealership_id = %(dealership_id)s"),
+    ('products_all', "SELECT * FROM public.products WHERE dealership_id = %(dealership_id)s "
+                     "ORDER BY created_at DESC, id DESC"),
+    ('products_first_page', "SELECT * FROM public.products WHERE dealership_id = %(dealership_id)s "
+                            "ORDER BY created_at DESC, id DESC LIMIT 25"),
+    ('products_keyset_page', "SELECT * FROM public.products WHERE dealership_id = %(dealership_id)s "
+                             "AND created_at <= %(cursor_created_at)s AND (created_at < %(cursor_created_at)s "
+                             "OR (created_at = %(cursor_created_at)s AND id < %(cursor_id)s)) "
+                             "ORDER BY created_at DESC, id DESC LIMIT 101"),
+    ('products_by_category', "SELECT * FROM public.products WHERE dealership_id = %(dealership_id)s "
+                             "AND category_id = %(category_id)s ORDER BY created_at DESC, id DESC LIMIT 25"),
+    ('products_by_spec', "SELECT * FROM public.products WHERE dealership_id = %(dealership_id)s "
+                         "AND specifications @> %(spec_filter)s::jsonb ORDER BY created_at DESC, id DESC LIMIT 25"),
+    ('products_by_power', "SELECT * FROM public.product_spec_values WHERE dealership_id = %(dealership_id)s "
+                          "AND power_hp IS NOT NULL ORDER BY power_hp DESC, product_id DESC LIMIT 25"),
+    ('products_by_weight_range', "SELECT * FROM public.product_spec_values WHERE dealership_id = %(dealership_id)s "
+                                 "AND weight_kg BETWEEN 100 AND 150 ORDER BY weight_kg, product_id LIMIT 25"),
+    ('product_images_embed', "SELECT * FROM public.product_images WHERE product_id = ANY(%(product_ids)s::uuid[]) "
+                             "ORDER BY product_id, display_order"),
+    ('categories', "SELECT * FROM public.categories WHERE dealership_id = %(dealership_id)s ORDER BY name"),
+    ('subcategories_embed', "SELECT * FROM public.subcategories WHERE category_id = ANY(%(category_ids)s::uuid[])"),
+    ('employees_active', "SELECT * FROM public.employees WHERE dealership_id = %(dealership_id)s "
+                         "AND is_active = true ORDER BY display_order"),
+]
+
+
+def plan_nodes(node, path=()):
+    """Yield (path of node types, node) for every node of an EXPLAIN (FORMAT JSON) plan"""
+    label = node['Node Type'] + (f" using {node['Index Name']}" if node.get('Index Name') else '') \
+        + (f" on {node['Relation Name']}" if node.get('Relation Name') else '')
+    yield path + (label,), node
+    for child in node.get('Plans', []):
+        yield from plan_nodes(child, path + (label,))
+
+
+def plan_issues(plan, min_rows=1000):
+    """Seq Scan and Sort nodes of a plan, with the rows each touched and whether that is over ``min_rows``"""
+    issues = []
+    for _, node in plan_nodes(plan):
+        loops = node.get('Actual Loops', 1)
+        if node['Node Type'] == 'Seq Scan':
+            rows = (node.get('Actual Rows', 0) + node.get('Rows Removed by Filter', 0)) * loops
+            issues.append({'node': f"Seq Scan on {node['Relation Name']}", 'rows': rows, 'fail': rows >= min_rows})
+        elif node['Node Type'] in ('Sort', 'Incremental Sort'):
+            # A top-N sort only outputs LIMIT rows; what it had to read is what matters
+            rows = sum(child.get('Actual Rows', 0) * child.get('Actual Loops', 1) for child in node.get('Plans', []))
+            issues.append({
+                'node': f"{node['Node Type']} by {', '.join(node.get('Sort Key', []))}",
+                'rows': rows,
+                'fail': rows >= min_rows
+            })
+    return issues
+
+
+# Migrations that define RLS policies, in the order they are applied
+RLS_POLICY_FILES = ['supabase-schema.sql', 'supabase-rls-optimizations.sql']
+RLS_PROFILE_TABLES = ['products', 'categories', 'employees']
+RLS_POLICY_STATEMENT = re.compile(
+    r'(CREATE|DROP)\s+POLICY\s+(?:IF\s+EXISTS\s+)?"([^"]+)"\s+ON\s+(?:public\.)?(\w+)([^;]*);',
+    re.IGNORECASE
+)
+# Per-request functions; Postgres only caches their result (as an initPlan) when wrapped in a scalar subquery
+RLS_AUTH_CALL = re.compile(r'\b(auth\.(?:uid|jwt|role)|(?:public\.)?get_user_dealership_id)\s*\(\s*\)', re.IGNORECASE)
+RLS_WRAPPED_CALL = re.compile(
+    r'\(\s*SELECT\s+(auth\.(?:uid|jwt|role)|(?:public\.)?get_user_dealership_id)\s*\(\s*\)(?:\s+AS\s+\w+)?\s*\)',
+    re.IGNORECASE
+)
+RLS_USERS_SUBQUERY = re.compile(r'\bIN\s*\(\s*SELECT\b[^()]*\bFROM\s+(?:public\.)?users\b', re.IGNORECASE)
+
+
+def parse_policies(sources):
+    """Effective policies after applying (file name, SQL) sources in order: {(table, name): policy}"""
+    policies = {}
+    for source, sql in sources:
+        sql = re.sub(r'--[^\n]*', '', sql)
+        for action, name, table, body in RLS_POLICY_STATEMENT.findall(sql):
+            if action.upper() == 'DROP':
+                policies.pop((table, name), None)
+                continue
+            command = re.search(r'\bFOR\s+(\w+)', body, re.IGNORECASE)
+            policies[(table, name)] = {
+                'table': table,
+                'name': name,
+                'command': command.group(1).upper() if command else 'ALL',
+                'expression': ' '.join(body.split()),
+                'source': source
+            }
+    return policies
+
+
+def policy_lint_issues(expression):
+    """Reasons a policy expression is re-evaluated per row instead of once per statement"""
+    wrapped = [call.lower() for call in RLS_WRAPPED_CALL.findall(expression)]
+    bare = [call.lower() for call in RLS_AUTH_CALL.findall(expression)]
+    for call in wrapped:
+        bare.remove(call)
+    issues = [f"{call}() is not wrapped as (select {call}())" for call in dict.fromkeys(bare)]
+    if RLS_USERS_SUBQUERY.search(expression):
+        issues.append("tenant check is an IN (SELECT ... FROM users) subquery; "
+                      "use dealership_id = (select get_user_dealership_id())")
+    return issues
+
+
+class TransportConfig:
+    """Connection pool and timeout settings for the tester's HTTP transport"""
+    
+    def __init__(self, pool_size=None, per_host=None, timeout=None, page_timeout=None, http2=None):
+        # Max requests in flight across every host
+        self.pool_size = pool_size or int(os.getenv('BACKEND_TEST_POOL_SIZE', '100'))
+        # Max keep-alive connections held open to a single host
+        self.per_host = per_host or int(os.getenv('BACKEND_TEST_POOL_PER_HOST', '20'))
+        self.timeout = timeout or float(os.getenv('BACKEND_TEST_TIMEOUT', '10'))
+        # Server-rendered pages are slower than REST calls
+        self.page_timeout = page_timeout or float(os.getenv('BACKEND_TEST_PAGE_TIMEOUT', '15'))
+        if http2 is None:
+            http2 = os.getenv('BACKEND_TEST_HTTP2', '').lower() in ('1', 'true', 'yes')
+        self.http2 = http2
+
+
+class PooledTransport:
+    """HTTP transport with a separate keep-alive pool per host.
+    
+    Exposes the subset of the requests.Session API the checks use
+    (headers, get/post/patch/delete/request), plus an async ``arequest``
+    backed by httpx when it is installed.
+    """
+    
+    def __init__(self, config=None):
+        self.config = config or TransportConfig()
+        # Same defaults as a plain requests.Session (Accept-Encoding, Accept, ...) so
+        # responses come back compressed like the baseline session's
+        self.headers = requests.utils.default_headers()
+        self._sessions = {}
+        self._async_clients = {}
+        self._async_slots = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.config.pool_size)
+        self.recorder = LatencyRecorder()
+    
+    def _session_for(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                # Shared defaults; per-call headers still override them
+                session.headers = self.headers
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self.config.per_host
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[host] = session
+            return session
+    
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.config.timeout)
+        with self._slots:
+            started = time.perf_counter()
+            try:
+                response = self._session_for(url).request(method, url, **kwargs)
+            except Exception:
+                self.recorder.record(method, url, {'total': time.perf_counter() - started}, error=True)
+                raise
+            # requests reads the body eagerly, so this includes the download
+            self.recorder.record(
+                method, url,
+                {'total': time.perf_counter() - started, 'ttfb': response.elapsed.total_seconds()},
+                bytes_received=wire_bytes(response),
+                error=response.status_code >= 500
+            )
+            return response
+    
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+    
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+    
+    def patch(self, url, **kwargs):
+        return self.request('PATCH', url, **kwargs)
+    
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+    
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+    
+    def _async_client_for(self, url):
+        parts = urlsplit(url)
+        client = self._async_clients.get(parts.netloc)
+        if client is None:
+            client = httpx.AsyncClient(
+                base_url=f"{parts.scheme}://{parts.netloc}",
+                headers=dict(self.headers),
+                http2=self.config.http2,
+                timeout=self.config.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.config.per_host,
+                    max_keepalive_connections=self.config.per_host
+                )
+            )
+            self._async_clients[parts.netloc] = client
+        return client
+    
+    async def arequest(self, method, url, **kwargs):
+        """Async request; must be awaited from a single event loop until aclose()"""
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.config.pool_size)
+        async with self._async_slots:
+            if httpx is None:
+                return await asyncio.to_thread(self.request, method, url, **kwargs)
+            
+            # httpcore trace events give the connection phases requests can't see
+            marks = {}
+            
+            async def trace(event, info):
+                marks[event] = time.perf_counter()
+            
+            def phase(name):
+                start, end = marks.get(f"{name}.started"), marks.get(f"{name}.complete")
+                return end - start if start is not None and end is not None else None
+            
+            extensions = dict(kwargs.pop('extensions', None) or {}, trace=trace)
+            started = time.perf_counter()
+            try:
+                response = await self._async_client_for(url).request(method, url, extensions=extensions, **kwargs)
+            except Exception:
+                self.recorder.record(method, url, {'total': time.perf_counter() - started}, error=True)
+                raise
+            headers_done = (
+                marks.get('http11.receive_response_headers.complete')
+                or marks.get('http2.receive_response_headers.complete')
+            )
+            self.recorder.record(
+                method, url,
+                {
+                    'total': time.perf_counter() - started,
+                    'ttfb': headers_done - started if headers_done else None,
+                    'connect': phase('connection.connect_tcp'),
+                    'tls': phase('connection.start_tls')
+                },
+                bytes_received=wire_bytes(response),
+                error=response.status_code >= 500
+            )
+            return response
+    
+    async def aclose(self):
+        for client in self._async_clients.values():
+            await client.aclose()
+        self._async_clients = {}
+        self._async_slots = None
+    
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+
+
+# Same tree create_default_categories_for_dealership() seeds (supabase-categories-automation.sql)
+DEFAULT_CATEGORY_TREE = [
+    ('Motos', 'motos', 'Motocicletas y vehículos de dos ruedas', [
+        ('Clásicas', 'clasicas'), ('Scooters', 'scooters'), ('Doble Propósito', 'doble-proposito'),
+        ('Deportivas', 'deportivas'), ('ATV-UTV', 'atv-utv'), ('Eléctricas', 'electricas'),
+    ]),
+    ('Accesorios', 'accesorios', 'Accesorios y equipamiento para motociclistas', [
+        ('Cascos', 'cascos'), ('Guantes', 'guantes'), ('Chaquetas', 'chaquetas'), ('Maletas', 'maletas'),
+    ]),
+    ('Repuestos', 'repuestos', 'Repuestos y partes para motocicletas', [
+        ('Motor', 'motor'), ('Frenos', 'frenos'), ('Suspensión', 'suspension'), ('Eléctrico', 'electrico'),
+    ]),
+]
+
+SYNTHETIC_BRANDS = {
+    'Honda': ['CB', 'CBR', 'XR', 'Wave', 'PCX'],
+    'Yamaha': ['YBR', 'FZ', 'MT', 'XTZ', 'NMAX'],
+    'Suzuki': ['GN', 'GSX', 'DR', 'Burgman'],
+    'Kawasaki': ['Ninja', 'Z', 'KLR', 'Versys'],
+    'Bera': ['BR', 'Cobra', 'SBR', 'Runner'],
+    'Empire Keeway': ['Horse', 'Arsen', 'Speed', 'RKV'],
+}
+SYNTHETIC_DISPLACEMENTS = [110, 125, 150, 200, 250, 300, 400, 500, 650, 800, 1000]
+SYNTHETIC_ACCESSORIES = ['Casco integral', 'Guantes de cuero', 'Chaqueta con protecciones', 'Maleta trasera',
+                         'Kit de arrastre', 'Pastillas de freno', 'Batería 12V', 'Amortiguador trasero']
+SYNTHETIC_POSITIONS = ['Vendedor', 'Gerente de ventas', 'Asesor de repuestos', 'Mecánico', 'Recepción']
+
+
+def synthetic_specifications(rng, cc):
+    """Spec sheet in the MOTORCYCLE_SPECS_TEMPLATE shape (lib/motorcycle-specs.js)"""
+    hp = round(cc * rng.uniform(0.08, 0.16), 1)
+    rpm = rng.choice([7000, 7500, 8000, 8500, 9000, 10500])
+    weight = int(90 + cc * rng.uniform(0.09, 0.14))
+    cylinders = 'Monocilíndrico' if cc <= 400 else rng.choice(['Bicilíndrico en paralelo', 'Tetracilíndrico en línea'])
+    return {
+        'cilindrada': str(cc),
+        'motor': {
+            'motor': f"{cylinders}, 4 tiempos",
+            'potencia_maxima': f"{hp} HP @ {rpm} rpm",
+            'torque_maximo': f"{round(hp * rng.uniform(0.8, 1.1), 1)} Nm @ {rpm - 1500} rpm",
+            'diametro_carrera': f"{round(rng.uniform(50, 80), 1)} x {round(rng.uniform(45, 70), 1)} mm",
+            'relacion_compresion': f"{round(rng.uniform(9.0, 12.5), 1)}:1",
+            'sistema_combustible': 'Carburador' if cc < 200 and rng.random() < 0.6 else 'Inyección electrónica',
+            'enfriamiento': 'Refrigerado por aire' if cc < 250 else rng.choice(['Refrigerado por líquido', 'Aire/aceite'])
+        },
+        'transmision': {
+            'tipo': 'Automática (CVT)' if cc <= 150 and rng.random() < 0.3 else 'Manual',
+            'embrague': 'Húmedo multidisco',
+            'transmision': f"{rng.choice([4, 5, 6])} velocidades",
+            'unidad_final': rng.choice(['Cadena', 'Correa', 'Cardán'])
+        },
+        'chasis': {
+            'suspension_delantera': rng.choice(['Telescópica hidráulica', 'Horquilla invertida']),
+            'suspension_trasera': rng.choice(['Basculante con amortiguador', 'Monoshock']),
+            'frenos_delantero': f"Disco {rng.choice([220, 240, 276, 300])}mm",
+            'frenos_trasero': rng.choice(['Tambor 110mm', 'Disco 220mm']),
+            'cauchos_delantero': rng.choice(['2.75-18', '90/90-17', '110/70-17']),
+            'cauchos_trasero': rng.choice(['3.00-17', '130/70-17', '150/60-17']),
+            'capacidad_combustible': f"{rng.randint(8, 20)} litros",
+            'color': ', '.join(rng.sample(['Negro', 'Rojo', 'Azul', 'Blanco', 'Gris', 'Verde'], 3))
+        },
+        'electrico': {
+            'encendido': rng.choice(['CDI', 'ECU', 'TCI']),
+            'bujias': rng.choice(['NGK CR7E', 'NGK CPR8E', 'NGK D8EA']),
+            'faro': rng.choice(['LED', 'Halógeno']),
+            'luz_freno': 'LED',
+            'luces_cruce': rng.choice(['LED', 'Halógeno'])
+        },
+        'dimension': {
+            'tamano_caja': 'N/A',
+            'longitud': f"{rng.randint(1850, 2200)} mm",
+            'ancho': f"{rng.randint(700, 850)} mm",
+            'altura': f"{rng.randint(1000, 1250)} mm",
+            'distancia_ejes': f"{rng.randint(1200, 1500)} mm",
+            'capacidad_carga': f"{rng.choice([120, 150, 180])} kg",
+            'peso': f"{weight} kg"
+        },
+        'garantia': {
+            'tiempo': rng.choice(['1 año o 10,000 km', '2 años o 20,000 km', '6 meses'])
+        }
+    }
+
+
+# Mirrors lib/image-upload.js
+UPLOAD_WIDTHS = [480, 1024, 1600]
+UPLOAD_CONCURRENCY = 3
+RESUMABLE_THRESHOLD = 6 * 1024 * 1024
+TUS_CHUNK_SIZE = 6 * 1024 * 1024
+
+
+def synthetic_photo(rng, noise, blend=0.37):
+    """A phone-sized JPEG (~8 MB at 4000x3000): coloured shapes under sensor-like noise"""
+    shapes = Image.new('RGB', (160, 120))
+    draw = ImageDraw.Draw(shapes)
+    for _ in range(60):
+        x, y, radius = rng.randint(0, 160), rng.randint(0, 120), rng.randint(5, 50)
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius),
+                     fill=tuple(rng.randint(0, 255) for _ in range(3)))
+    photo = Image.blend(shapes.resize(noise.size, Image.BICUBIC), noise, blend)
+    output = io.BytesIO()
+    photo.save(output, 'JPEG', quality=95)
+    return output.getvalue()
+
+
+def resize_photo(data, widths=UPLOAD_WIDTHS, quality=80):
+    """[(width, WebP bytes)] for each width, never upscaling, like resizeImage() in the dashboard"""
+    photo = Image.open(io.BytesIO(data))
+    largest = min(max(widths), photo.width)
+    # Let the JPEG decoder downscale by a power of two while decoding when it can
+    photo.draft('RGB', (largest, round(photo.height * largest / photo.width)))
+    photo = photo.convert('RGB')
+    variants = []
+    # Largest first; each smaller size is resampled from the previous one
+    for width in sorted({min(width, photo.width) for width in widths}, reverse=True):
+        photo = photo.resize((width, round(photo.height * width / photo.width)), Image.LANCZOS)
+        output = io.BytesIO()
+        photo.save(output, 'WEBP', quality=quality)
+        variants.append((width, output.getvalue()))
+    return variants[::-1]
+
+
+# Mirrors lib/images.js and lib/image-derivatives.js
+IMAGE_VARIANTS = {'thumb': 160, 'card': 480, 'detail': 1200}
+VARIANT_CACHE_CONTROL = 'public, max-age=86400, stale-while-revalidate=604800'
+# IMAGE_SOURCE_RECHECK_SECONDS default: how long the route trusts a source's ETag
+IMAGE_SOURCE_RECHECK_S = 60
+BLURHASH_SIZE = 32
+BLURHASH_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+
+def _base83(value, length):
+    return ''.join(BLURHASH_ALPHABET[value // 83 ** (length - position - 1) % 83] for position in range(length))
+
+
+def _srgb_to_linear(value):
+    value /= 255
+    return value / 12.92 if value <= 0.04045 else ((value + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value):
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def blurhash_encode(image, x_components=4, y_components=3):
+    """BlurHash of a Pillow image, computed on a BLURHASH_SIZE-wide copy like the dashboard does"""
+    width = BLURHASH_SIZE
+    height = max(1, round(BLURHASH_SIZE * image.height / image.width))
+    pixels = [tuple(_srgb_to_linear(channel) for channel in pixel)
+              for pixel in image.convert('RGB').resize((width, height), Image.BILINEAR).getdata()]
+    cos_x = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(x_components)]
+    cos_y = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(y_components)]
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            scale = (1 if i == j == 0 else 2) / (width * height)
+            total = [0.0, 0.0, 0.0]
+            for y in range(height):
+                for x in range(width):
+                    basis = cos_x[i][x] * cos_y[j][y]
+                    pixel = pixels[y * width + x]
+                    for channel in range(3):
+                        total[channel] += basis * pixel[channel]
+            factors.append([value * scale for value in total])
+    dc, ac = factors[0], factors[1:]
+    
+    encoded = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+    maximum = max(abs(value) for factor in ac for value in factor)
+    quantised_maximum = max(0, min(82, int(maximum * 166 - 0.5)))
+    maximum = (quantised_maximum + 1) / 166
+    encoded += _base83(quantised_maximum, 1)
+    red, green, blue = (_linear_to_srgb(value) for value in dc)
+    encoded += _base83((red << 16) + (green << 8) + blue, 4)
+    for factor in ac:
+        quantised = [
+            max(0, min(18, int(math.copysign(abs(value / maximum) ** 0.5, value) * 9 + 9.5)))
+            for value in factor
+        ]
+        encoded += _base83(quantised[0] * 19 * 19 + quantised[1] * 19 + quantised[2], 2)
+    return encoded
+
+
+class TokenCache:
+    """Supabase Auth sessions per user, shared by every worker thread and task.
+    
+    Access tokens are reused until ``refresh_margin`` seconds before they
+    expire, then renewed with grant_type=refresh_token; a password login only
+    happens when there is no usable session at all. Optionally persisted to a
+    JSON file so consecutive runs skip the login too.
+    """
+    
+    def __init__(self, tester, refresh_margin=60, path=None):
+        self.tester = tester
+        self.refresh_margin = refresh_margin
+        self.path = path
+        self._lock = threading.Lock()
+        self._user_locks = {}
+        self._sessions = {}
+        self.stats = {'hits': 0, 'logins': 0, 'refreshes': 0}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self._sessions = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Ignoring unreadable token cache {path}: {e}")
+    
+    def _key(self, email):
+        # Sessions are only valid for the project that issued them
+        return f"{self.tester.supabase_url}|{email.lower()}"
+    
+    def _user_lock(self, key):
+        with self._lock:
+            return self._user_locks.setdefault(key, threading.Lock())
+    
+    def _grant(self, grant_type, payload):
+        response = self.tester.session.post(
+            f"{self.tester.supabase_url}/auth/v1/token?grant_type={grant_type}",
+            headers={'apikey': self.tester.supabase_anon_key, 'Content-Type': 'application/json'},
+            json=payload
+        )
+        if response.status_code != 200 or 'access_token' not in response.json():
+            return None
+        return response.json()
+    
+    def _store(self, key, auth_response):
+        expires_at = auth_response.get('expires_at') or time.time() + auth_response.get('expires_in', 3600)
+        session = {
+            'access_token': auth_response['access_token'],
+            'refresh_token': auth_response.get('refresh_token'),
+            'expires_at': expires_at,
+            'user_id': (auth_response.get('user') or {}).get('id')
+        }
+        with self._lock:
+            self._sessions[key] = session
+            # Under the lock, so the newest snapshot is the one left on disk
+            self._persist(self._sessions)
+        return session
+    
+    def _persist(self, snapshot):
+        if self.path:
+            # Unique temp file, so another process sharing the cache can't clobber it mid-write
+            descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix='.tmp')
+            try:
+                with os.fdopen(descriptor, 'w') as f:
+                    json.dump(snapshot, f)
+                os.chmod(temporary, 0o600)
+                os.replace(temporary, self.path)
+            except BaseException:
+                os.remove(temporary)
+                raise
+    
+    def seed(self, email, auth_response):
+        """Cache a session obtained elsewhere (e.g. by the authentication test)"""
+        return self._store(self._key(email), auth_response)
+    
+    def session_for(self, email, password):
+        """Cached session dict for a user, refreshing or logging in when needed"""
+        key = self._key(email)
+        with self._user_lock(key):
+            session = self._sessions.get(key)
+            if session and session['expires_at'] - self.refresh_margin > time.time():
+                with self._lock:
+                    self.stats['hits'] += 1
+                return session
+            if session and session.get('refresh_token'):
+                refreshed = self._grant('refresh_token', {'refresh_token': session['refresh_token']})
+                if refreshed:
+                    with self._lock:
+                        self.stats['refreshes'] += 1
+                    return self._store(key, refreshed)
+            logged_in = self._grant('password', {'email': email, 'password': password})
+            if not logged_in:
+                raise RuntimeError(f"Password login failed for {email}")
+            with self._lock:
+                self.stats['logins'] += 1
+            return self._store(key, logged_in)
+    
+    def access_token(self, email, password):
+        return self.session_for(email, password)['access_token']
+    
+    async def aaccess_token(self, email, password):
+        """Async variant for load/soak tasks; the per-user lock still dedupes logins"""
+        return await asyncio.to_thread(self.access_token, email, password)
+    
+    def expire(self, email):
+        """Force the next lookup to refresh (used to exercise the refresh path)"""
+        key = self._key(email)
+        with self._lock:
+            if key in self._sessions:
+                self._sessions[key]['expires_at'] = 0
+    
+    def forget(self, email):
+        """Drop a user's session, e.g. after the account was deleted"""
+        key = self._key(email)
+        with self._lock:
+            removed = self._sessions.pop(key, None)
+            snapshot = dict(self._sessions)
+        if removed:
+            self._persist(snapshot)
+
+
+class BulkCrudError(RuntimeError):
+    """A bulk PostgREST call returned an unexpected status"""
+    
+    def __init__(self, message, status_code=None, body=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
+
+class BulkCrud:
+    """Batched PostgREST CRUD: one request per operation, whatever the row count.
+    
+    Rows are created with a single array POST, read back and updated by
+    ``id=in.(...)``, and removed with one filtered DELETE. Created ids are
+    tracked per table so ``cleanup()`` can undo everything in reverse order.
+    """
+    
+    def __init__(self, session, supabase_url, api_key, token=None, chunk_size=500):
+        self.session = session
+        self.rest_url = f"{supabase_url}/rest/v1"
+        self.headers = {
+            'apikey': api_key,
+            'Authorization': f'Bearer {token or api_key}',
+            'Content-Type': 'application/json'
+        }
+        self.chunk_size = chunk_size
+        self.created = []
+    
+    def _call(self, method, path, expected, prefer=None, **kwargs):
+        headers = dict(self.headers)
+        if prefer:
+            headers['Prefer'] = prefer
+        response = self.session.request(method, f"{self.rest_url}/{path}", headers=headers, **kwargs)
+        if response.status_code != expected:
+            raise BulkCrudError(
+                f"{method} {path.split('?')[0]} returned {response.status_code}",
+                response.status_code,
+                response.text[:500]
+            )
+        return response
+    
+    @staticmethod
+    def _id_filter(ids):
+        return f"id=in.({','.join(ids)})"
+    
+    def create(self, table, rows, select='*'):
+        """Insert rows with array POSTs of ``chunk_size``; returns the created rows"""
+        created = []
+        for start in range(0, len(rows), self.chunk_size):
+            response = self._call(
+                'POST', f"{table}?select={select}", 201,
+                prefer='return=representation',
+                json=rows[start:start + self.chunk_size]
+            )
+            created.extend(response.json())
+        if created and 'id' in created[0]:
+            self.created.append((table, [row['id'] for row in created]))
+        return created
+    
+    def read(self, table, ids, select='*'):
+        """Fetch only the given rows"""
+        return self._call('GET', f"{table}?select={select}&{self._id_filter(ids)}", 200).json()
+    
+    def update(self, table, ids, changes):
+        """Apply the same change to every row in one PATCH; returns the updated ids"""
+        response = self._call(
+            'PATCH', f"{table}?select=id&{self._id_filter(ids)}", 200,
+            prefer='return=representation',
+            json=changes
+        )
+        return [row['id'] for row in response.json()]
+    
+    def delete(self, table, ids):
+        """Remove rows in one filtered DELETE; returns the deleted ids"""
+        response = self._call(
+            'DELETE', f"{table}?select=id&{self._id_filter(ids)}", 200,
+            prefer='return=representation'
+        )
+        deleted = [row['id'] for row in response.json()]
+        self.created = [
+            (created_table, [row_id for row_id in row_ids if row_id not in deleted])
+            for created_table, row_ids in self.created
+        ]
+        return deleted
+    
+    def cleanup(self):
+        """Delete everything this engine created and has not deleted yet, newest first"""
+        pending = [(table, ids) for table, ids in reversed(self.created) if ids]
+        for table, ids in pending:
+            try:
+                self.delete(table, ids)
+            except BulkCrudError as e:
+                print(f"Cleanup of {table} failed: {e}")
+        self.created = []
+
+
+class LinkSimulator:
+    """A phone uplink shared by every request: one round trip per request, bodies share the bandwidth"""
+    
+    def __init__(self, mbps, rtt_ms):
+        self.bytes_per_second = mbps * 1_000_000 / 8
+        self.rtt = rtt_ms / 1000
+        self._lock = threading.Lock()
+        self._free_at = 0.0
+    
+    @classmethod
+    def parse(cls, spec):
+        """'MBPS:RTT_MS' (e.g. '20:80'), or None for 'none' / ''"""
+        if not spec or spec == 'none':
+            return None
+        mbps, _, rtt_ms = spec.partition(':')
+        return cls(float(mbps), float(rtt_ms or 0))
+    
+    def round_trip(self):
+        time.sleep(self.rtt)
+    
+    def transmit(self, size):
+        with self._lock:
+            start = max(time.perf_counter(), self._free_at)
+            self._free_at = done = start + size / self.bytes_per_second
+        time.sleep(max(0.0, done - time.perf_counter()))
+
+
+class ThrottledBody:
+    """Request body streamed through a LinkSimulator, counting the bytes that actually left.
+    
+    ``drop_after`` raises mid-body, like a phone losing signal, to exercise resumption.
+    """
+    
+    def __init__(self, data, link=None, drop_after=None):
+        self.data = memoryview(data)
+        self.link = link
+        self.drop_after = drop_after
+        self.sent = 0
+    
+    def __len__(self):
+        return len(self.data)
+    
+    def __iter__(self):
+        while True:
+            chunk = self.read(64 * 1024)
+            if not chunk:
+                return
+            yield chunk
+    
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = len(self.data)
+        chunk = self.data[self.sent:self.sent + size]
+        if self.drop_after is not None and self.sent + len(chunk) > self.drop_after:
+            raise ConnectionResetError("Simulated dropped connection")
+        if self.link and chunk:
+            self.link.transmit(len(chunk))
+        self.sent += len(chunk)
+        return bytes(chunk)
+
+
+class StorageUploadError(RuntimeError):
+    """A Supabase Storage upload that did not complete"""
+
+
+class StorageUploader:
+    """Python twin of lib/image-upload.js: uploads to a Storage bucket, switching to
+    TUS (resumable, 6 MB chunks) above RESUMABLE_THRESHOLD, and counts what was sent.
+    """
+    
+    retry_delays = (0.2, 0.5, 1.0)
+    
+    def __init__(self, session, supabase_url, headers, bucket='motorcycles', link=None):
+        self.session = session
+        self.storage_url = f"{supabase_url}/storage/v1"
+        self.headers = {key: value for key, value in headers.items() if key.lower() != 'content-type'}
+        self.bucket = bucket
+        self.link = link
+        self.paths = []
+        self._lock = threading.Lock()
+        self.stats = {'bytes_sent': 0, 'requests': 0}
+    
+    def _send(self, method, url, data=None, headers=None, drop_after=None):
+        body = ThrottledBody(data, self.link, drop_after) if data is not None else None
+        if self.link:
+            self.link.round_trip()
+        try:
+            return self.session.request(method, url, data=body, headers={**self.headers, **(headers or {})})
+        finally:
+            with self._lock:
+                self.stats['requests'] += 1
+                self.stats['bytes_sent'] += body.sent if body else 0
+    
+    def upload(self, path, data, content_type, resumable=None, drop_after=None, upsert=False):
+        """Store one object; ``resumable`` defaults to the size threshold"""
+        if resumable is None:
+            resumable = len(data) > RESUMABLE_THRESHOLD
+        if resumable:
+            self.upload_resumable(path, data, content_type, drop_after=drop_after, upsert=upsert)
+        else:
+            response = self._send('POST', f"{self.storage_url}/object/{self.bucket}/{path}", data,
+                                  {'Content-Type': content_type, 'cache-control': '31536000',
+                                   'x-upsert': 'true' if upsert else 'false'})
+            if response.status_code != 200:
+                raise StorageUploadError(f"upload of {path} returned {response.status_code}: {response.text[:200]}")
+        with self._lock:
+            self.paths.append(path)
+    
+    def upload_resumable(self, path, data, content_type, drop_after=None, upsert=False):
+        tus = {'Tus-Resumable': '1.0.0'}
+        metadata = ','.join(
+            f"{key} {base64.b64encode(value.encode()).decode()}"
+            for key, value in (('bucketName', self.bucket), ('objectName', path),
+                               ('contentType', content_type), ('cacheControl', '31536000'))
+        )
+        response = self._send('POST', f"{self.storage_url}/upload/resumable", headers={
+            **tus, 'Upload-Length': str(len(data)), 'Upload-Metadata': metadata,
+            'x-upsert': 'true' if upsert else 'false'
+        })
+        if response.status_code != 201:
+            raise StorageUploadError(f"TUS create for {path} returned {response.status_code}: {response.text[:200]}")
+        upload_url = response.headers['Location']
+        offset, failures = 0, 0
+        while offset < len(data):
+            try:
+                chunk = data[offset:offset + TUS_CHUNK_SIZE]
+                response = self._send(
+                    'PATCH', upload_url, chunk,
+                    {**tus, 'Upload-Offset': str(offset), 'Content-Type': 'application/offset+octet-stream'},
+                    drop_after=drop_after - offset if drop_after is not None and drop_after > offset else None
+                )
+                drop_after = None
+                if response.status_code != 204:
+                    raise StorageUploadError(f"TUS chunk at {offset} returned {response.status_code}")
+                offset = int(response.headers['Upload-Offset'])
+            except (requests.ConnectionError, StorageUploadError):
+                drop_after = None
+                if failures == len(self.retry_delays):
+                    raise
+                time.sleep(self.retry_delays[failures])
+                failures += 1
+                # Resume from whatever the server kept
+                head = self._send('HEAD', upload_url, headers=tus)
+                if head.status_code != 200:
+                    raise StorageUploadError(f"TUS upload {path} expired ({head.status_code})")
+                offset = int(head.headers['Upload-Offset'])
+    
+    def remove(self):
+        """Delete every object this uploader stored"""
+        for start in range(0, len(self.paths), 100):
+            self.session.request('DELETE', f"{self.storage_url}/object/{self.bucket}",
+                                 headers={**self.headers, 'Content-Type': 'application/json'},
+                                 json={'prefixes': self.paths[start:start + 100]})
+        self.paths = []
+
+
+def apply_change(rows, change, key=None, reverse=False):
+    """Python twin of applyChange() in lib/realtime.js: ``rows`` after one postgres_changes event.
+    
+    ``key``/``reverse`` keep the list in its query order, like the ``compare`` option.
+    """
+    if change['type'] == 'DELETE':
+        return [row for row in rows if row['id'] != change['old_record']['id']]
+    record = change['record']
+    previous = next((row for row in rows if row['id'] == record['id']), None)
+    merged = dict(previous or {}, **record)
+    if key is None:
+        return [merged if row is previous else row for row in rows] if previous else rows + [merged]
+    rest = [row for row in rows if row is not previous]
+    at = next((index for index, row in enumerate(rest)
+               if (key(merged) > key(row) if reverse else key(merged) < key(row))), len(rest))
+    return rest[:at] + [merged] + rest[at:]
+
+
+class RealtimeError(RuntimeError):
+    pass
+
+
+class RealtimeClient:
+    """Python twin of the realtime-js socket: one websocket with Phoenix channels (serializer 1.0.0).
+    
+    postgres_changes messages are timestamped on arrival by a reader thread and
+    queued, so latencies don't include the time the caller takes to read them.
+    """
+    
+    heartbeat_interval = 25.0
+    
+    def __init__(self, supabase_url, apikey, timeout=10.0):
+        parts = urlsplit(supabase_url)
+        secure = parts.scheme == 'https'
+        sock = socket.create_connection((parts.hostname, parts.port or (443 if secure else 80)), timeout=timeout)
+        if secure:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=parts.hostname)
+        key = base64.b64encode(os.urandom(16)).decode()
+        sock.sendall((
+            f"GET {parts.path.rstrip('/')}/realtime/v1/websocket?apikey={apikey}&vsn=1.0.0 HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode())
+        self.stream = sock.makefile('rb')
+        status = self.stream.readline().decode('latin-1')
+        headers = {}
+        for line in iter(self.stream.readline, b'\r\n'):
+            if not line:
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        accept = base64.b64encode(hashlib.sha1((key + '258EAFA5-E914-47DA-95CA-C5AB0DC85B11').encode()).digest())
+        if ' 101 ' not in status or headers.get('sec-websocket-accept') != accept.decode():
+            sock.close()
+            raise RealtimeError(f"Realtime websocket upgrade failed: {status.strip()}")
+        sock.settimeout(None)
+        self.socket = sock
+        self.timeout = timeout
+        self._send_lock = threading.Lock()
+        self._ref_lock = threading.Lock()
+        self._ref = 0
+        self._replies = defaultdict(queue.Queue)
+        self.changes = queue.Queue()
+        self.stats = {'messages': 0, 'bytes': 0}
+        self._closed = threading.Event()
+        threading.Thread(target=self._read, daemon=True).start()
+        threading.Thread(target=self._heartbeat, daemon=True).start()
+    
+    def _send(self, message):
+        payload = json.dumps(message).encode()
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('>BB', 0x81, 0x80 | length)
+        elif length < 65536:
+            header = struct.pack('>BBH', 0x81, 0x80 | 126, length)
+        else:
+            header = struct.pack('>BBQ', 0x81, 0x80 | 127, length)
+        # Client frames are masked (RFC 6455)
+        mask = os.urandom(4)
+        key = (mask * (length // 4 + 1))[:length]
+        masked = (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+        with self._send_lock:
+            self.socket.sendall(header + mask + masked)
+    
+    def _push(self, topic, event, payload, join_ref=None):
+        """Send one message; its phx_reply can be read from the returned queue"""
+        with self._ref_lock:
+            self._ref += 1
+            ref = str(self._ref)
+        self._send({'topic': topic, 'event': event, 'payload': payload, 'ref': ref, 'join_ref': join_ref or ref})
+        return self._replies[ref]
+    
+    def _read_frame(self):
+        header = self.stream.read(2)
+        if len(header) < 2:
+            return None
+        length = header[1] & 0x7F
+        if length == 126:
+            length, = struct.unpack('>H', self.stream.read(2))
+        elif length == 127:
+            length, = struct.unpack('>Q', self.stream.read(8))
+        return header[0] & 0x0F, self.stream.read(length)
+    
+    def _read(self):
+        try:
+            while not self._closed.is_set():
+                frame = self._read_frame()
+                if frame is None or frame[0] == 0x8:
+                    break
+                opcode, payload = frame
+                if opcode != 0x1:
+                    continue
+                received = time.perf_counter()
+                message = json.loads(payload)
+                self.stats['messages'] += 1
+                self.stats['bytes'] += len(payload)
+                if message['event'] == 'phx_reply':
+                    self._replies[message['ref']].put(message['payload'])
+                elif message['event'] == 'postgres_changes':
+                    self.changes.put((received, len(payload), message['payload']['data']))
+                elif message['event'] == 'system':
+                    self._replies[f"system:{message['topic']}"].put(message['payload'])
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._closed.set()
+    
+    def _heartbeat(self):
+        # Realtime drops sockets that stay silent for about a minute
+        while not self._closed.wait(self.heartbeat_interval):
+            try:
+                self._push('phoenix', 'heartbeat', {})
+            except OSError:
+                return
+    
+    def subscribe(self, channel, tables, access_token, event='*', filter=None):
+        """Join ``realtime:<channel>`` for postgres_changes on ``tables``, returning once it is live"""
+        topic = f"realtime:{channel}"
+        bindings = [{'event': event, 'schema': 'public', 'table': table, **({'filter': filter} if filter else {})}
+                    for table in tables]
+        replies = self._push(topic, 'phx_join', {
+            'config': {'broadcast': {'ack': False, 'self': False}, 'presence': {'key': ''},
+                       'postgres_changes': bindings, 'private': False},
+            'access_token': access_token
+        })
+        try:
+            reply = replies.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RealtimeError(f"No reply joining {topic}")
+        if reply['status'] != 'ok':
+            raise RealtimeError(f"Joining {topic} failed: {reply['response']}")
+        # Changes only flow once Realtime has attached the channel to the replication stream
+        try:
+            system = self._replies[f"system:{topic}"].get(timeout=self.timeout)
+        except queue.Empty:
+            raise RealtimeError(f"{topic} joined but never subscribed to PostgreSQL")
+        if system.get('status') != 'ok':
+            raise RealtimeError(f"Subscribing {topic} to PostgreSQL failed: {system.get('message')}")
+        return reply['response']
+    
+    def wait_for(self, predicate, timeout=None):
+        """The first queued change (arrival time, bytes, data) that satisfies ``predicate``; None on timeout.
+        Changes that don't match are dropped."""
+        deadline = time.perf_counter() + (self.timeout if timeout is None else timeout)
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return None
+            try:
+                change = self.changes.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if predicate(change[2]):
+                return change
+    
+    def drain(self):
+        """Every change queued so far"""
+        drained = []
+        while True:
+            try:
+                drained.append(self.changes.get_nowait())
+            except queue.Empty:
+                return drained
+    
+    def close(self):
+        self._closed.set()
+        try:
+            with self._send_lock:
+                self.socket.sendall(struct.pack('>BB', 0x88, 0x80) + os.urandom(4))
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.socket.close()
+
+
+class SyntheticDataGenerator:
+    """Creates (and removes) scale-test tenants through PostgREST bulk inserts.
+    
+    Every synthetic row hangs off a synthetic dealership, so teardown is a
+    single filtered DELETE on dealerships that cascades to the rest.
+    """
+    
+    def __init__(self, tester, chunk_size=500, seed=None):
+        self.tester = tester
+        self.rng = random.Random(seed)
+        self.crud = BulkCrud(
+            tester.session, tester.supabase_url, tester.supabase_service_key, chunk_size=chunk_size
+        )
+    
+    def _insert(self, table, rows, select='id'):
+        """Array-insert ``rows`` in chunks, returning the created rows' ``select`` columns"""
+        return self.crud.create(table, rows, select=select)
+    
+    def _category_tree(self, dealership_ids):
+        """{dealership_id: {category_slug: (category_id, [subcategory ids])}}, seeding missing trees"""
+        id_list = ','.join(dealership_ids)
+        categories = self.crud._call(
+            'GET',
+            f"categories?select=id,slug,dealership_id,subcategories(id)&dealership_id=in.({id_list})",
+            200
+        ).json()
+        trees = {dealership_id: {} for dealership_id in dealership_ids}
+        for category in categories:
+            trees[category['dealership_id']][category['slug']] = (
+                category['id'], [sub['id'] for sub in category.get('subcategories') or []]
+            )
+        
+        # The automation trigger may not be installed; seed the default tree ourselves
+        missing = [dealership_id for dealership_id, tree in trees.items() if not tree]
+        if missing:
+            categories = self._insert('categories', [
+                {'dealership_id': dealership_id, 'name': name, 'slug': slug, 'description': description}
+                for dealership_id in missing
+                for name, slug, description, _ in DEFAULT_CATEGORY_TREE
+            ], select='id,slug,dealership_id')
+            subcategory_rows = []
+            for category in categories:
+                children = next(subs for _, slug, _, subs in DEFAULT_CATEGORY_TREE if slug == category['slug'])
+                subcategory_rows.extend(
+                    {'dealership_id': category['dealership_id'], 'category_id': category['id'],
+                     'name': name, 'slug': slug, 'description': name}
+                    for name, slug in children
+                )
+            subcategories = self._insert('subcategories', subcategory_rows, select='id,category_id')
+            for category in categories:
+                trees[category['dealership_id']][category['slug']] = (
+                    category['id'], [sub['id'] for sub in subcategories if sub['category_id'] == category['id']]
+                )
+        return trees
+    
+    def _product_rows(self, dealership_id, tree, count, run_tag):
+        rows = []
+        for index in range(count):
+            is_motorcycle = self.rng.random() < 0.8 or 'accesorios' not in tree
+            category_slug = 'motos' if is_motorcycle else self.rng.choice(['accesorios', 'repuestos'])
+            category_id, subcategory_ids = tree.get(category_slug, (None, []))
+            year = self.rng.randint(2019, 2025)
+            if is_motorcycle:
+                brand = self.rng.choice(list(SYNTHETIC_BRANDS))
+                cc = self.rng.choice(SYNTHETIC_DISPLACEMENTS)
+                model = f"{self.rng.choice(SYNTHETIC_BRANDS[brand])} {cc}"
+                name = f"{brand} {model}"
+                specifications = synthetic_specifications(self.rng, cc)
+                price = round(cc * self.rng.uniform(12, 25) + self.rng.uniform(500, 2000), 2)
+                description = (
+                    f"{name} {year}, {specifications['motor']['motor'].lower()}, "
+                    f"{specifications['motor']['potencia_maxima']}. Ideal para "
+                    f"{self.rng.choice(['ciudad', 'carretera', 'trabajo', 'aventura'])}."
+                )
+            else:
+                brand = self.rng.choice(['Genérico', 'LS2', 'Alpinestars', 'NGK', 'Motul'])
+                model = f"Ref {self.rng.randint(100, 999)}"
+                name = f"{self.rng.choice(SYNTHETIC_ACCESSORIES)} {brand}"
+                specifications = None
+                price = round(self.rng.uniform(10, 400), 2)
+                description = f"{name}, compatible con la mayoría de modelos."
+            rows.append({
+                'dealership_id': dealership_id,
+                'category_id': category_id,
+                'subcategory_id': self.rng.choice(subcategory_ids) if subcategory_ids else None,
+                'name': name,
+                'slug': f"{run_tag}-{index}",
+                'brand': brand,
+                'model': model,
+                'year': year,
+                'price': price,
+                'description': description,
+                'status': self.rng.choices(['available', 'sold', 'reserved'], weights=[80, 15, 5])[0],
+                'specifications': specifications
+            })
+        return rows
+    
+    def _create_admin(self, dealership):
+        """A GoTrue user linked to ``dealership`` as its admin, like the seeded tenants"""
+        email = f"admin@{dealership['slug']}.example.com"
+        password = uuid.uuid4().hex
+        response = self.tester.session.post(
+            f"{self.tester.supabase_url}/auth/v1/admin/users",
+            headers=self.crud.headers,
+            json={'email': email, 'password': password, 'email_confirm': True}
+        )
+        if response.status_code not in (200, 201):
+            raise BulkCrudError(f"POST auth/v1/admin/users returned {response.status_code}",
+                                response.status_code, response.text[:500])
+        user_id = response.json()['id']
+        admin = {'id': user_id, 'email': email, 'password': password,
+                 'dealership_id': dealership['id'], 'dealership_slug': dealership['slug']}
+        # Recorded before the users row so a failed insert still removes the auth user
+        self.admins.append(admin)
+        self._insert('users', [{'id': user_id, 'dealership_id': dealership['id'], 'role': 'admin',
+                                'full_name': f"Admin {dealership['slug']}"}])
+        return admin
+    
+    def generate(self, dealerships=3, products_per_dealership=1000, employees_per_dealership=8,
+                 images_per_product=3, admins=False):
+        """Create the dataset and return a manifest that teardown() can reverse.
+        
+        With ``admins`` every dealership also gets a login (manifest['admins']),
+        for measuring queries as the authenticated role.
+        """
+        run_tag = f"synthetic-{uuid.uuid4().hex[:8]}"
+        started = time.perf_counter()
+        print(f"\n=== GENERATING SYNTHETIC DATA ({run_tag}) ===")
+        
+        created_dealerships = self._insert('dealerships', [
+            {
+                'slug': f"{run_tag}-{index}",
+                'name': f"Concesionario Sintético {index + 1}",
+                'email': f"{run_tag}-{index}@example.com",
+                'phone': f"+58 414 {self.rng.randint(100, 999)} {self.rng.randint(1000, 9999)}",
+                'address': f"Av. Principal {self.rng.randint(1, 300)}, San Cristóbal",
+                'is_active': True
+            }
+            for index in range(dealerships)
+        ], select='id,slug')
+        manifest = {
+            'run_tag': run_tag,
+            'dealership_ids': [d['id'] for d in created_dealerships],
+            'dealership_slugs': [d['slug'] for d in created_dealerships],
+            'counts': {}
+        }
+        self.admins = manifest['admins'] = []
+        
+        try:
+            if admins:
+                for dealership in created_dealerships:
+                    self._create_admin(dealership)
+            trees = self._category_tree(manifest['dealership_ids'])
+            self._insert('site_settings', [
+                {'dealership_id': dealership['id'], 'hero_title': f"Bienvenido a {dealership['slug']}",
+                 'hero_subtitle': 'Inventario sintético para pruebas de escala',
+                 'main_whatsapp': '+58 414 000 0000'}
+                for dealership in created_dealerships
+            ])
+            
+            product_total = image_total = employee_total = 0
+            for dealership in created_dealerships:
+                dealership_id = dealership['id']
+                products = self._insert(
+                    'products',
+                    self._product_rows(dealership_id, trees[dealership_id], products_per_dealership, dealership['slug'])
+                )
+                product_total += len(products)
+                
+                image_rows = [
+                    {
+                        'product_id': product['id'],
+                        'dealership_id': dealership_id,
+                        'image_url': f"{self.tester.supabase_url}/storage/v1/object/public/motorcycles/"
+                                     f"{dealership_id}/{product['id']}-{position}.jpg",
+                        'is_primary': position == 0,
+                        'display_order': position
+                    }
+                    for product in products
+                    for position in range(images_per_product)
+                ]
+                image_total += len(self._insert('product_images', image_rows))
+                
+                employee_total += len(self._insert('employees', [
+                    {
+                        'dealership_id': dealership_id,
+                        'full_name': f"Empleado {index + 1} {dealership['slug'][-4:]}",
+                        'position': self.rng.choice(SYNTHETIC_POSITIONS),
+                        'phone': f"+58 414 {self.rng.randint(100, 999)} {self.rng.randint(1000, 9999)}",
+                        'whatsapp': f"+58 414 {self.rng.randint(100, 999)} {self.rng.randint(1000, 9999)}",
+                        'email': f"empleado{index}@{dealership['slug']}.example.com",
+                        'display_order': index,
+                        'is_active': self.rng.random() < 0.9
+                    }
+                    for index in range(employees_per_dealership)
+                ]))
+                print(f"  {dealership['slug']}: {len(products)} products, {len(image_rows)} images")
+        except Exception:
+            # Never leave a half-built dataset behind
+            self.teardown(manifest)
+            raise
+        
+        manifest['counts'] = {
+            'dealerships': len(created_dealerships),
+            'products': product_total,
+            'product_images': image_total,
+            'employees': employee_total
+        }
+        manifest['elapsed_s'] = round(time.perf_counter() - started, 2)
+        print(f"Created {manifest['counts']} in {manifest['elapsed_s']}s")
+        return manifest
+    
+    def teardown(self, manifest):
+        """Delete every synthetic dealership and admin login; FK cascades remove the rest"""
+        ok = True
+        for admin in manifest.get('admins', []):
+            self.tester.tokens.forget(admin['email'])
+            response = self.tester.session.delete(
+                f"{self.tester.supabase_url}/auth/v1/admin/users/{admin['id']}", headers=self.crud.headers
+            )
+            if response.status_code not in (200, 204, 404):
+                print(f"Teardown error: deleting {admin['email']} returned {response.status_code}")
+                ok = False
+        if not manifest.get('dealership_ids'):
+            return ok
+        try:
+            self.crud.delete('dealerships', manifest['dealership_ids'])
+        except BulkCrudError as e:
+            print(f"Teardown error: {e} {e.body}")
+            ok = False
+        print(f"Teardown of {manifest['run_tag']}: {'ok' if ok else 'failed'}")
+        return ok
+
 
 class MotoDealer_Backend_Tester:
-    def __init__(self):
+    def __init__(self, workers=None, transport_config=None):
         # Load environment variables
         self.base_url = os.getenv('NEXT_PUBLIC_BASE_URL', 'https://bike-showroom-4.preview.emergentagent.com')
         self.api_url = f"{self.base_url}/api"
@@ -52,16 +2259,161 @@ class MotoDealer_Backend_Tester:
             }
         ]
         
-        self.session = requests.Session()
+        # Number of test groups / tenant loops allowed in flight at once
+        self.workers = workers or int(os.getenv('BACKEND_TEST_WORKERS', '8'))
+        # The one thread pool every parallel step shares, so --workers caps the total
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='backend-test')
+        # Tests that write the same table take its lock (see writing())
+        self._table_locks = defaultdict(threading.Lock)
+        # Rows each entity CRUD test creates in its single bulk request
+        self.crud_batch_size = int(os.getenv('BACKEND_TEST_CRUD_BATCH', '5'))
+        
+        # Supabase REST, Supabase Auth and the Next.js app each get their own pool
+        self.transport_config = transport_config or TransportConfig()
+        # Never let parallel groups queue behind a smaller per-host pool
+        self.transport_config.per_host = max(self.transport_config.per_host, self.workers)
+        self.session = PooledTransport(self.transport_config)
         self.session.headers.update({
             'Content-Type': 'application/json',
             'User-Agent': 'MotoDealer-Backend-Tester/1.0'
         })
         
+        # Set by use_local_supabase() when running against the in-process stand-in
+        self.local_supabase = None
+        # True when that stand-in also answers the Next.js routes (no --app-url)
+        self.app_stand_in = False
+        # Shared auth sessions so load/soak modes don't turn into a login storm
+        self.tokens = TokenCache(self, path=os.getenv('BACKEND_TEST_TOKEN_CACHE') or None)
+        
         self.test_results = []
+        # Optional ResultSink (see use_result_sink); the summary is derived from it
+        self.sink = None
+        # Extra report sections (load, latency, ...) written next to the summary
+        self.report_sections = {}
+        # Optional BaselineStore; when set, generate_summary runs the regression gate
+        self.baseline_store = None
+        self.regression_threshold = 0.2
+        self.regression_min_delta_ms = 5.0
+        self.record_baseline = True
+        self.regressions = []
+        # Ordering key of each result, so parallel runs report in sequential order
+        self._result_order = []
+        self._results_lock = threading.Lock()
+        self._slot = threading.local()
+        
+    def use_local_supabase(self, app_url=None, port=0):
+        """Point the suite at a fresh in-process Supabase stand-in (no network needed).
+        
+        With ``app_url`` the app routes are tested on that Next.js server, which
+        must have been started with ``local_supabase.py --print-env`` for the
+        same port and LOCAL_SUPABASE_JWT_SECRET; otherwise the stand-in's Python
+        copies answer them and those results are labelled STAND_IN_LABEL.
+        """
+        from local_supabase import LocalSupabase
+        
+        started = time.perf_counter()
+        self.local_supabase = LocalSupabase(port=port, app_url=app_url).start()
+        self.app_stand_in = app_url is None
+        self.supabase_url = self.local_supabase.url
+        self.base_url = self.local_supabase.app_url or self.local_supabase.url
+        self.api_url = f"{self.base_url}/api"
+        self.supabase_anon_key = self.local_supabase.anon_key
+        self.supabase_service_key = self.local_supabase.service_key
+        os.environ.update({**self.local_supabase.app_env(), 'NEXT_PUBLIC_BASE_URL': self.base_url})
+        self.report_sections['app_routes'] = {
+            'served_by': STAND_IN_LABEL if self.app_stand_in else self.base_url,
+            'checks': list(APP_CODE_CHECKS)
+        }
+        print(f"🧪 Local Supabase stand-in at {self.supabase_url} "
+              f"(started in {(time.perf_counter() - started) * 1000:.0f}ms)")
+        print(f"   App routes: {self.base_url}" if not self.app_stand_in else
+              "   App routes: Python copies in local_supabase.py (stand-in, not app code; use --app-url to test the app)")
+        return self.local_supabase
+    
+    def use_result_sink(self, path):
+        """Stream tests, request samples and report sections to ``path`` as NDJSON while running"""
+        self.sink = ResultSink(path)
+        self.session.recorder.sink = self.sink
+        self.sink.write('run', {'argv': sys.argv[1:], 'started': datetime.now().isoformat()}, flush=True)
+        return self.sink
+    
+    def _next_order_key(self):
+        """Reserve the next ordering key in the current thread's slot"""
+        key = getattr(self._slot, 'key', ())
+        seq = getattr(self._slot, 'seq', 0)
+        self._slot.seq = seq + 1
+        return key + (seq,)
+    
+    def run_parallel(self, tasks):
+        """Run (callable, args) tasks concurrently on the worker pool.
+        
+        Each task logs under its own ordering slot, so the final report keeps
+        the order a sequential run would have produced.
+        """
+        base = self._next_order_key()
+        
+        def run_task(index, func, args):
+            # May run inline on a pool thread that is mid-task (see run_on_pool); restore its slot after
+            saved = getattr(self._slot, 'key', None), getattr(self._slot, 'seq', 0)
+            self._slot.key = base + (index,)
+            self._slot.seq = 0
+            try:
+                return func(*args)
+            finally:
+                if saved[0] is None:
+                    del self._slot.key
+                else:
+                    self._slot.key = saved[0]
+                self._slot.seq = saved[1]
+        
+        return self.run_on_pool([
+            lambda index=index, func=func, args=args: run_task(index, func, args)
+            for index, (func, args) in enumerate(tasks)
+        ])
+    
+    def run_on_pool(self, calls):
+        """Run zero-argument callables on the shared pool; their results, in order.
+        
+        A caller that is itself a pool thread (a parallel test that runs its own
+        steps in parallel) runs the calls no thread has picked up yet, so nesting
+        never waits on a queue it is holding up.
+        """
+        futures = [self.pool.submit(call) for call in calls]
+        return [call() if future.cancel() else future.result() for call, future in zip(calls, futures)]
+    
+    def run_lanes(self, items, lanes, worker):
+        """worker(item) for every item, ``lanes`` at a time on the shared pool; exceptions per item"""
+        pending = list(enumerate(items))
+        outcomes = [None] * len(items)
+        lock = threading.Lock()
         
+        def lane():
+            while True:
+                with lock:
+                    if not pending:
+                        return
+                    index, item = pending.pop(0)
+                try:
+                    worker(item)
+                except Exception as e:
+                    outcomes[index] = e
+        
+        if lanes > self.workers:
+            print(f"  {lanes} lanes requested, capped at --workers {self.workers}")
+        self.run_on_pool([lane] * max(1, min(lanes, self.workers, len(items))))
+        return outcomes
+    
+    @contextmanager
+    def writing(self, table):
+        """Hold ``table`` while a test writes it, so tests running in parallel don't interleave writes"""
+        with self._table_locks[table]:
+            yield
+    
     def log_test(self, test_name, success, message, details=None):
-        """Log test results"""
+        """Log test results (thread-safe)"""
+        if self.app_stand_in and test_name.startswith(APP_CODE_CHECKS):
+            message = f"{message} [{STAND_IN_LABEL}]"
+            details = {**(details or {}), 'served_by': STAND_IN_LABEL}
         result = {
             'test': test_name,
             'success': success,
@@ -69,11 +2421,22 @@ class MotoDealer_Backend_Tester:
             'timestamp': datetime.now().isoformat(),
             'details': details or {}
         }
-        self.test_results.append(result)
-        status = "✅ PASS" if success else "❌ FAIL"
-        print(f"{status} - {test_name}: {message}")
-        if details and not success:
-            print(f"   Details: {details}")
+        order_key = self._next_order_key()
+        with self._results_lock:
+            self.test_results.append(result)
+            self._result_order.append(order_key)
+            if self.sink is not None:
+                self.sink.write('test', {**result, 'order': list(order_key)}, flush=True)
+            status = "✅ PASS" if success else "❌ FAIL"
+            print(f"{status} - {test_name}: {message}")
+            if details and not success:
+                print(f"   Details: {details}")
+    
+    def ordered_results(self):
+        """Test results in the order a sequential run would have logged them"""
+        with self._results_lock:
+            pairs = sorted(zip(self._result_order, self.test_results), key=lambda pair: pair[0])
+        return [result for _, result in pairs]
     
     def test_environment_variables(self):
         """Test 1: Verify environment variables are present"""
@@ -115,7 +2478,7 @@ class MotoDealer_Backend_Tester:
         
         try:
             # Test root endpoint
-            response = self.session.get(f"{self.api_url}/", timeout=10)
+            response = self.session.get(f"{self.api_url}/")
             if response.status_code == 200:
                 data = response.json()
                 if data.get('message') == "MotoDealer SaaS API":
@@ -141,7 +2504,7 @@ class MotoDealer_Backend_Tester:
                 )
                 
             # Test health endpoint
-            response = self.session.get(f"{self.api_url}/health", timeout=10)
+            response = self.session.get(f"{self.api_url}/health")
             if response.status_code == 200:
                 data = response.json()
                 if data.get('status') == "healthy":
@@ -189,8 +2552,7 @@ class MotoDealer_Backend_Tester:
             # Test connection by querying dealerships table
             response = self.session.get(
                 f"{self.supabase_url}/rest/v1/dealerships?select=id,slug,name,is_active&is_active=eq.true",
-                headers=headers,
-                timeout=10
+                headers=headers
             )
             
             if response.status_code == 200:
@@ -229,64 +2591,116 @@ class MotoDealer_Backend_Tester:
         """Test 4: Test Supabase authentication with test users"""
         print("\n=== TESTING SUPABASE AUTHENTICATION ===")
         
-        for user in self.test_users:
-            try:
-                # Attempt to authenticate using Supabase Auth API
-                auth_data = {
-                    'email': user['email'],
-                    'password': user['password']
-                }
-                
-                headers = {
-                    'apikey': self.supabase_anon_key,
-                    'Content-Type': 'application/json'
-                }
-                
-                response = self.session.post(
-                    f"{self.supabase_url}/auth/v1/token?grant_type=password",
-                    headers=headers,
-                    json=auth_data,
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    auth_response = response.json()
-                    if 'access_token' in auth_response:
-                        self.log_test(
-                            f"Authentication - {user['email']}",
-                            True,
-                            "Successfully authenticated with Supabase",
-                            {
-                                'user_id': auth_response.get('user', {}).get('id'),
-                                'email': auth_response.get('user', {}).get('email')
-                            }
-                        )
-                        
-                        # Test getting user dealership info
-                        self.test_user_dealership_info(auth_response['access_token'], user)
-                        
-                    else:
-                        self.log_test(
-                            f"Authentication - {user['email']}",
-                            False,
-                            "Authentication response missing access_token",
-                            auth_response
-                        )
+        self.run_parallel([(self.authenticate_user, (user,)) for user in self.test_users])
+    
+    def authenticate_user(self, user):
+        """Authenticate one test user and check its dealership link"""
+        try:
+            # Attempt to authenticate using Supabase Auth API
+            auth_data = {
+                'email': user['email'],
+                'password': user['password']
+            }
+            
+            headers = {
+                'apikey': self.supabase_anon_key,
+                'Content-Type': 'application/json'
+            }
+            
+            response = self.session.post(
+                f"{self.supabase_url}/auth/v1/token?grant_type=password",
+                headers=headers,
+                json=auth_data
+            )
+            
+            if response.status_code == 200:
+                auth_response = response.json()
+                if 'access_token' in auth_response:
+                    self.log_test(
+                        f"Authentication - {user['email']}",
+                        True,
+                        "Successfully authenticated with Supabase",
+                        {
+                            'user_id': auth_response.get('user', {}).get('id'),
+                            'email': auth_response.get('user', {}).get('email')
+                        }
+                    )
+                    
+                    self.tokens.seed(user['email'], auth_response)
+                    
+                    # Test getting user dealership info
+                    self.test_user_dealership_info(auth_response['access_token'], user)
+                    
+                    # Test renewing the cached session without a password login
+                    self.test_token_refresh(user)
+                    
                 else:
                     self.log_test(
                         f"Authentication - {user['email']}",
                         False,
-                        f"Authentication failed with status {response.status_code}",
-                        {'status_code': response.status_code, 'response': response.text}
+                        "Authentication response missing access_token",
+                        auth_response
                     )
-                    
-            except Exception as e:
+            else:
+                self.log_test(
+                    f"Authentication - {user['email']}",
+                    False,
+                    f"Authentication failed with status {response.status_code}",
+                    {'status_code': response.status_code, 'response': response.text}
+                )
+                
+        except Exception as e:
+            self.log_test(
+                f"Authentication - {user['email']}",
+                False,
+                f"Authentication error: {str(e)}",
+                {'error': str(e)}
+            )
+    
+    def user_headers(self, user):
+        """Headers authenticated as a test user, using the shared token cache"""
+        access_token = self.tokens.access_token(user['email'], user['password'])
+        return {
+            'apikey': self.supabase_anon_key,
+            'Authorization': f'Bearer {access_token}',
+            'Content-Type': 'application/json'
+        }
+    
+    def user_cookies(self, user):
+        """Cookie header with the user's cached session, for pages and routes served by Next.js"""
+        return ssr_cookie_header(self.supabase_url, self.tokens.session_for(user['email'], user['password']))
+    
+    def test_token_refresh(self, user):
+        """Test that an expiring cached session is renewed with grant_type=refresh_token"""
+        try:
+            logins_before = self.tokens.stats['logins']
+            refreshes_before = self.tokens.stats['refreshes']
+            self.tokens.expire(user['email'])
+            response = self.session.get(f"{self.supabase_url}/auth/v1/user", headers=self.user_headers(user))
+            
+            refreshed = self.tokens.stats['refreshes'] > refreshes_before
+            no_login = self.tokens.stats['logins'] == logins_before
+            if response.status_code == 200 and refreshed and no_login:
                 self.log_test(
-                    f"Authentication - {user['email']}",
+                    f"Token Refresh - {user['email']}",
+                    True,
+                    "Cached session renewed with refresh token, no password login",
+                    {'user_id': response.json().get('id')}
+                )
+            else:
+                self.log_test(
+                    f"Token Refresh - {user['email']}",
                     False,
-                    f"Authentication error: {str(e)}",
-                    {'error': str(e)}
+                    "Cached session was not renewed through the refresh grant",
+                    {'status_code': response.status_code, 'refreshed': refreshed, 'password_login': not no_login}
                 )
+        except Exception as e:
+            self.log_test(
+                f"Token Refresh - {user['email']}",
+                False,
+                f"Error refreshing cached session: {str(e)}",
+                {'error': str(e)}
+            )
     
     def test_user_dealership_info(self, access_token, user):
         """Test getting user dealership information (multi-tenancy)"""
@@ -300,8 +2714,7 @@ class MotoDealer_Backend_Tester:
             # Get user info with dealership
             response = self.session.get(
                 f"{self.supabase_url}/rest/v1/users?select=*,dealerships(*)",
-                headers=headers,
-                timeout=10
+                headers=headers
             )
             
             if response.status_code == 200:
@@ -345,635 +2758,3336 @@ class MotoDealer_Backend_Tester:
                 
         except Exception as e:
             self.log_test(
-                f"Multi-tenancy - {user['email']}",
-                False,
-                f"Error getting user dealership info: {str(e)}",
-                {'error': str(e)}
+                f"Multi-tenancy - {user['email']}",
+                False,
+                f"Error getting user dealership info: {str(e)}",
+                {'error': str(e)}
+            )
+    
+    def test_crud_operations(self):
+        """Test 5: Test CRUD operations using service role key"""
+        print("\n=== TESTING CRUD OPERATIONS ===")
+        
+        # Use service role key for admin operations
+        headers = {
+            'apikey': self.supabase_service_key,
+            'Authorization': f'Bearer {self.supabase_service_key}',
+            'Content-Type': 'application/json',
+            'Prefer': 'return=representation'
+        }
+        
+        test_dealership_id = self.test_users[0]['dealership_id']
+        
+        # Each entity test works on its own rows, so they can run side by side
+        self.run_parallel([
+            (self.test_categories_crud, (test_dealership_id,)),
+            (self.test_subcategories_crud, (test_dealership_id,)),
+            (self.test_products_crud, (test_dealership_id,)),
+            (self.test_employees_crud, (test_dealership_id,)),
+            (self.test_site_settings_crud, (headers, test_dealership_id)),
+        ])
+    
+    def new_crud(self):
+        """BulkCrud engine authenticated with the service role key"""
+        return BulkCrud(self.session, self.supabase_url, self.supabase_service_key)
+    
+    def run_bulk_crud(self, label, crud, table, rows, changes):
+        """Create, read back, update and delete a batch of rows, one request per step"""
+        try:
+            created = crud.create(table, rows)
+        except BulkCrudError as e:
+            self.log_test(
+                f"{label} CREATE",
+                False,
+                f"Failed to create {table}, status {e.status_code}",
+                {'status_code': e.status_code, 'response': e.body}
+            )
+            return None
+        
+        ids = [row['id'] for row in created]
+        self.log_test(
+            f"{label} CREATE",
+            len(ids) == len(rows),
+            f"Created {len(ids)}/{len(rows)} test rows in one request",
+            {'ids': ids}
+        )
+        
+        try:
+            # READ only the rows we created, not the whole tenant table
+            found = {row['id'] for row in crud.read(table, ids, select='id')}
+            self.log_test(
+                f"{label} READ",
+                found == set(ids),
+                f"Read back {len(found)}/{len(ids)} created rows by id",
+                {'missing': sorted(set(ids) - found)}
+            )
+            
+            updated = crud.update(table, ids, changes)
+            self.log_test(
+                f"{label} UPDATE",
+                set(updated) == set(ids),
+                f"Updated {len(updated)}/{len(ids)} rows in one request",
+                {'changes': changes}
+            )
+        except BulkCrudError as e:
+            self.log_test(
+                f"{label} CRUD",
+                False,
+                f"Error in {table} CRUD: {str(e)}",
+                {'status_code': e.status_code, 'response': e.body}
+            )
+        finally:
+            try:
+                deleted = crud.delete(table, ids)
+                self.log_test(
+                    f"{label} DELETE",
+                    set(deleted) == set(ids),
+                    f"Deleted {len(deleted)}/{len(ids)} rows with one filtered DELETE",
+                    {'ids': ids}
+                )
+            except BulkCrudError as e:
+                self.log_test(
+                    f"{label} DELETE",
+                    False,
+                    f"Failed to delete {table}, status {e.status_code}",
+                    {'status_code': e.status_code, 'response': e.body}
+                )
+        return ids
+    
+    def test_categories_crud(self, dealership_id):
+        """Test Categories CRUD operations"""
+        tag = uuid.uuid4().hex[:6]
+        self.run_bulk_crud(
+            "Categories",
+            self.new_crud(),
+            'categories',
+            [
+                {
+                    'dealership_id': dealership_id,
+                    'name': f'Motos Test {index}',
+                    'slug': f'motos-test-{tag}-{index}',
+                    'description': 'Categoría de prueba para motos'
+                }
+                for index in range(self.crud_batch_size)
+            ],
+            {'description': 'Categoría actualizada de prueba'}
+        )
+    
+    def test_subcategories_crud(self, dealership_id):
+        """Test Subcategories CRUD operations"""
+        tag = uuid.uuid4().hex[:6]
+        crud = self.new_crud()
+        try:
+            # First create a category for the subcategories
+            parent_category = crud.create('categories', [{
+                'dealership_id': dealership_id,
+                'name': 'Motos Parent',
+                'slug': f'motos-parent-{tag}',
+                'description': 'Categoría padre para subcategorías'
+            }])[0]
+        except BulkCrudError as e:
+            self.log_test(
+                "Subcategories CRUD",
+                False,
+                "Failed to create parent category for subcategory test",
+                {'status_code': e.status_code, 'response': e.body}
+            )
+            return
+        
+        try:
+            self.run_bulk_crud(
+                "Subcategories",
+                crud,
+                'subcategories',
+                [
+                    {
+                        'dealership_id': dealership_id,
+                        'category_id': parent_category['id'],
+                        'name': f'Clásicas Test {index}',
+                        'slug': f'clasicas-test-{tag}-{index}',
+                        'description': 'Subcategoría de prueba'
+                    }
+                    for index in range(self.crud_batch_size)
+                ],
+                {'description': 'Subcategoría actualizada de prueba'}
+            )
+        finally:
+            crud.cleanup()
+    
+    def test_products_crud(self, dealership_id):
+        """Test Products CRUD operations"""
+        tag = uuid.uuid4().hex[:6]
+        self.run_bulk_crud(
+            "Products",
+            self.new_crud(),
+            'products',
+            [
+                {
+                    'dealership_id': dealership_id,
+                    'name': f'Honda CBR 500 Test {index}',
+                    'slug': f'honda-cbr-500-test-{tag}-{index}',
+                    'brand': 'Honda',
+                    'model': 'CBR 500',
+                    'year': 2024,
+                    'price': 15000.00,
+                    'description': 'Moto deportiva de prueba',
+                    'status': 'available'
+                }
+                for index in range(self.crud_batch_size)
+            ],
+            {'status': 'reserved'}
+        )
+    
+    def test_employees_crud(self, dealership_id):
+        """Test Employees CRUD operations"""
+        self.run_bulk_crud(
+            "Employees",
+            self.new_crud(),
+            'employees',
+            [
+                {
+                    'dealership_id': dealership_id,
+                    'full_name': f'Juan Pérez Test {index}',
+                    'position': 'Vendedor',
+                    'phone': '+58 414 123 4567',
+                    'whatsapp': '+58 414 123 4567',
+                    'email': f'juan.test{index}@motostachira.com',
+                    'is_active': True
+                }
+                for index in range(self.crud_batch_size)
+            ],
+            {'position': 'Gerente de ventas'}
+        )
+    
+    def test_site_settings_crud(self, headers, dealership_id):
+        """Test Site Settings CRUD operations"""
+        # Other tests write this table too; one at a time
+        with self.writing('site_settings'):
+            try:
+                # READ existing site settings
+                response = self.session.get(
+                    f"{self.supabase_url}/rest/v1/site_settings?dealership_id=eq.{dealership_id}",
+                    headers=headers
+                )
+                
+                if response.status_code == 200:
+                    settings = response.json()
+                    
+                    if settings and len(settings) > 0:
+                        # UPDATE existing settings
+                        settings_id = settings[0]['id']
+                        update_data = {
+                            'hero_title': 'Título de prueba actualizado',
+                            'hero_subtitle': 'Subtítulo de prueba',
+                            'main_whatsapp': '+58 414 999 8888'
+                        }
+                        
+                        response = self.session.patch(
+                            f"{self.supabase_url}/rest/v1/site_settings?id=eq.{settings_id}",
+                            headers=headers,
+                            json=update_data
+                        )
+                        
+                        # 200 with a body under Prefer: return=representation, 204 without it
+                        if response.status_code in (200, 204):
+                            self.log_test(
+                                "Site Settings UPDATE",
+                                True,
+                                "Successfully updated site settings",
+                                {'settings_id': settings_id}
+                            )
+                        else:
+                            self.log_test(
+                                "Site Settings UPDATE",
+                                False,
+                                f"Failed to update settings, status {response.status_code}",
+                                {'status_code': response.status_code}
+                            )
+                    else:
+                        # CREATE new settings if none exist
+                        settings_data = {
+                            'dealership_id': dealership_id,
+                            'hero_title': 'Título de prueba',
+                            'hero_subtitle': 'Subtítulo de prueba',
+                            'footer_text': 'Footer de prueba',
+                            'main_whatsapp': '+58 414 999 8888'
+                        }
+                        
+                        response = self.session.post(
+                            f"{self.supabase_url}/rest/v1/site_settings",
+                            headers=headers,
+                            json=settings_data
+                        )
+                        
+                        if response.status_code == 201:
+                            self.log_test(
+                                "Site Settings CREATE",
+                                True,
+                                "Successfully created site settings",
+                                {'dealership_id': dealership_id}
+                            )
+                        else:
+                            self.log_test(
+                                "Site Settings CREATE",
+                                False,
+                                f"Failed to create settings, status {response.status_code}",
+                                {'status_code': response.status_code}
+                            )
+                    
+                    self.log_test(
+                        "Site Settings READ",
+                        True,
+                        f"Successfully retrieved site settings",
+                        {'settings_count': len(settings)}
+                    )
+                else:
+                    self.log_test(
+                        "Site Settings READ",
+                        False,
+                        f"Failed to read site settings, status {response.status_code}",
+                        {'status_code': response.status_code}
+                    )
+                    
+            except Exception as e:
+                self.log_test(
+                    "Site Settings CRUD",
+                    False,
+                    f"Error in site settings CRUD: {str(e)}",
+                    {'error': str(e)}
+                )
+    
+    def test_public_landing_page(self):
+        """Test 6: Test public landing page access"""
+        print("\n=== TESTING PUBLIC LANDING PAGE ===")
+        
+        self.run_parallel([(self.check_landing_page, (user,)) for user in self.test_users])
+    
+    def check_landing_page(self, user):
+        """Fetch one tenant's public catalog page"""
+        try:
+            # Test public catalog page
+            catalog_url = f"{self.base_url}/catalogo/{user['dealership_slug']}"
+            response = self.session.get(catalog_url, timeout=self.transport_config.page_timeout)
+            
+            if response.status_code == 200:
+                # Check if page contains expected content
+                content = response.text
+                if 'MotoDealer' in content or user['dealership_slug'] in content:
+                    self.log_test(
+                        f"Public Landing Page - {user['dealership_slug']}",
+                        True,
+                        "Landing page loads successfully",
+                        {'url': catalog_url, 'status_code': response.status_code}
+                    )
+                else:
+                    self.log_test(
+                        f"Public Landing Page - {user['dealership_slug']}",
+                        False,
+                        "Landing page loads but missing expected content",
+                        {'url': catalog_url, 'content_length': len(content)}
+                    )
+            else:
+                self.log_test(
+                    f"Public Landing Page - {user['dealership_slug']}",
+                    False,
+                    f"Landing page returned status {response.status_code}",
+                    {'url': catalog_url, 'status_code': response.status_code}
+                )
+                
+        except Exception as e:
+            self.log_test(
+                f"Public Landing Page - {user['dealership_slug']}",
+                False,
+                f"Error accessing landing page: {str(e)}",
+                {'error': str(e), 'url': catalog_url}
+            )
+
+    def test_catalog_cache(self):
+        """Test /api/catalog/<slug>: cache hits beat the five direct queries and writes invalidate"""
+        print("\n=== TESTING CATALOG CACHE ===")
+        
+        # Last tenant first: the CRUD tests write to the first one concurrently
+        responses = [self._check_catalog_cache_hits(user) for user in reversed(self.test_users)]
+        # Writes go to the last tenant for the same reason
+        if responses and responses[0] is not None:
+            self._check_catalog_cache_invalidation(self.test_users[-1], responses[0].json())
+    
+    def _check_catalog_cache_hits(self, user, samples=7, attempts=3):
+        """Median cache-hit latency of one tenant vs. the five queries; the last hit's response"""
+        slug = user['dealership_slug']
+        catalog_url = f"{self.api_url}/catalog/{slug}"
+        try:
+            
+            def direct_queries():
+                dealerships = self.session.get(
+                    f"{self.supabase_url}/rest/v1/" + CATALOG_READ_PATTERN[0][1].format(slug=slug),
+                    headers=self.anon_headers()
+                ).json()
+                for _, template in CATALOG_READ_PATTERN[1:]:
+                    self.session.get(
+                        f"{self.supabase_url}/rest/v1/" + template.format(dealership_id=dealerships[0]['id']),
+                        headers=self.anon_headers()
+                    )
+            
+            for _ in range(attempts):
+                # Warm the entry, then time hits against what the browser used to do. The two
+                # alternate so both see the same load from the tests running concurrently.
+                self.session.get(catalog_url)
+                hits, direct, cache_states = [], [], []
+                for _ in range(samples):
+                    started = time.perf_counter()
+                    response = self.session.get(catalog_url)
+                    hits.append((time.perf_counter() - started) * 1000)
+                    cache_states.append(response.headers.get('X-Cache'))
+                    started = time.perf_counter()
+                    direct_queries()
+                    direct.append((time.perf_counter() - started) * 1000)
+                # A concurrent write (the CRUD tests) invalidates mid-series; measure again
+                if all(state == 'HIT' for state in cache_states):
+                    break
+            
+            details = {
+                'hit_ms': round(statistics.median(hits), 2),
+                'direct_queries_ms': round(statistics.median(direct), 2),
+                'cache_states': cache_states
+            }
+            if response.status_code != 200 or not all(state == 'HIT' for state in cache_states):
+                self.log_test(
+                    f"Catalog Cache Hit - {slug}",
+                    False,
+                    f"Repeated catalog reads were not served from cache (status {response.status_code})",
+                    details
+                )
+            elif details['hit_ms'] >= details['direct_queries_ms']:
+                self.log_test(
+                    f"Catalog Cache Hit - {slug}",
+                    False,
+                    f"Cache hit {details['hit_ms']}ms is no faster than {details['direct_queries_ms']}ms "
+                    f"for the five queries",
+                    details
+                )
+            else:
+                self.log_test(
+                    f"Catalog Cache Hit - {slug}",
+                    True,
+                    f"Cache hit {details['hit_ms']}ms vs {details['direct_queries_ms']}ms for the five queries",
+                    details
+                )
+            return response
+        except Exception as e:
+            self.log_test(f"Catalog Cache Hit - {slug}", False, f"Error reading cached catalog: {str(e)}",
+                          {'error': str(e), 'url': catalog_url})
+            return None
+    
+    def _check_catalog_cache_invalidation(self, user, catalog):
+        """A write must make the next read fresh (invalidation may arrive asynchronously)"""
+        # Other tests write this table too; one at a time
+        with self.writing('site_settings'):
+            slug = user['dealership_slug']
+            catalog_url = f"{self.api_url}/catalog/{slug}"
+            settings_url = f"{self.supabase_url}/rest/v1/site_settings?dealership_id=eq.{user['dealership_id']}"
+            headers = self.service_headers()
+            original = catalog.get('settings') or {}
+            marker = f"Cache test {uuid.uuid4().hex[:8]}"
+            try:
+                update = self.session.patch(settings_url, headers=headers, json={'hero_title': marker})
+                if update.status_code not in (200, 204):
+                    self.log_test(f"Catalog Cache Invalidation - {slug}", False,
+                                  f"Could not update site_settings (status {update.status_code})",
+                                  {'status_code': update.status_code})
+                    return
+                written = time.perf_counter()
+                fresh = False
+                while time.perf_counter() - written < 5:
+                    catalog = self.session.get(catalog_url).json()
+                    if (catalog.get('settings') or {}).get('hero_title') == marker:
+                        fresh = True
+                        break
+                    time.sleep(0.05)
+                delay_ms = round((time.perf_counter() - written) * 1000, 2)
+                if fresh:
+                    self.log_test(
+                        f"Catalog Cache Invalidation - {slug}",
+                        True,
+                        f"site_settings write visible through the cache after {delay_ms}ms",
+                        {'invalidation_ms': delay_ms}
+                    )
+                else:
+                    self.log_test(
+                        f"Catalog Cache Invalidation - {slug}",
+                        False,
+                        "Cached catalog still stale 5s after a write (are the supabase-catalog-cache.sql triggers set up?)",
+                        {'invalidation_ms': delay_ms}
+                    )
+            except Exception as e:
+                self.log_test(f"Catalog Cache Invalidation - {slug}", False,
+                              f"Error checking invalidation: {str(e)}", {'error': str(e)})
+            finally:
+                self.session.patch(settings_url, headers=headers, json={'hero_title': original.get('hero_title')})
+    
+    def anon_headers(self):
+        """Headers for public (anon role) Supabase REST reads"""
+        return {
+            'apikey': self.supabase_anon_key,
+            'Authorization': f'Bearer {self.supabase_anon_key}',
+            'Content-Type': 'application/json'
+        }
+    
+    def service_headers(self):
+        """Headers for service_role reads (bypasses RLS; rows still filtered by tenant)"""
+        return {
+            'apikey': self.supabase_service_key,
+            'Authorization': f'Bearer {self.supabase_service_key}',
+            'Content-Type': 'application/json'
+        }
+    
+    def list_active_dealerships(self):
+        """Slugs of every active tenant, falling back to the seeded test users"""
+        try:
+            response = self.session.get(
+                f"{self.supabase_url}/rest/v1/dealerships?select=slug&is_active=eq.true",
+                headers=self.anon_headers()
+            )
+            if response.status_code == 200 and response.json():
+                return [d['slug'] for d in response.json()]
+        except Exception as e:
+            print(f"Could not list dealerships, using test users: {e}")
+        return [user['dealership_slug'] for user in self.test_users]
+    
+    async def _timed_request(self, stats, name, method, url, headers, expected=(200,), json=None):
+        """One request recorded under ``name``; the response when its status is expected, else None"""
+        started = time.perf_counter()
+        try:
+            response = await self.session.arequest(method, url, headers=headers, json=json)
+            if response.status_code not in expected:
+                response = None
+        except Exception:
+            response = None
+        stats[name]['latencies'].record((time.perf_counter() - started) * 1_000_000)
+        stats[name]['requests'] += 1
+        if response is None:
+            stats[name]['errors'] += 1
+        return response
+    
+    async def _timed_call(self, stats, name, method, path, headers, expected=(200,), json=None):
+        """One PostgREST request recorded under ``name``; the parsed body (or True) on success, else None"""
+        response = await self._timed_request(
+            stats, name, method, f"{self.supabase_url}/rest/v1/{path}", headers, expected, json
+        )
+        if response is None:
+            return None
+        return response.json() if response.content else True
+    
+    async def _catalog_page_view(self, stats, slug, snapshot=True):
+        """Replay one /catalogo/<slug> page view: the page, then its snapshot or the cached catalog route.
+        
+        With ``snapshot=False`` the catalog always comes from /api/catalog, so
+        every view reaches the Next.js server (Storage serves the snapshot).
+        """
+        started = time.perf_counter()
+        ok = await self._timed_request(stats, 'html', 'GET', f"{self.base_url}/catalogo/{slug}", {}) is not None
+        loaded = False
+        if snapshot:
+            public = f"{self.supabase_url}/storage/v1/object/public/{SNAPSHOT_BUCKET}"
+            # 400/404 just means nothing is published yet
+            pointer = await self._timed_request(
+                stats, 'snapshot_pointer', 'GET', f"{public}/catalog/{slug}.json", {}, (200, 400, 404)
+            )
+            if pointer is not None and pointer.status_code == 200:
+                loaded = await self._timed_request(
+                    stats, 'snapshot_document', 'GET', f"{public}/{pointer.json()['path']}", {}
+                ) is not None
+        if not loaded:
+            loaded = await self._timed_request(
+                stats, 'api_catalog', 'GET', f"{self.api_url}/catalog/{slug}?limit={CATALOG_FIRST_PAGE}",
+                self.anon_headers()
+            ) is not None
+        stats['page_view']['latencies'].record((time.perf_counter() - started) * 1_000_000)
+        stats['page_view']['requests'] += 1
+        if not (ok and loaded):
+            stats['page_view']['errors'] += 1
+    
+    async def _catalog_query_chain(self, stats, slug):
+        """Replay the CATALOG_READ_PATTERN queries one after another, each timed on its own"""
+        headers = self.anon_headers()
+        started = time.perf_counter()
+        name, template = CATALOG_READ_PATTERN[0]
+        dealerships = await self._timed_call(stats, name, 'GET', template.format(slug=slug), headers)
+        if dealerships:
+            dealership_id = dealerships[0]['id']
+            for name, template in CATALOG_READ_PATTERN[1:]:
+                await self._timed_call(stats, name, 'GET', template.format(dealership_id=dealership_id), headers)
+        stats['query_chain']['latencies'].record((time.perf_counter() - started) * 1_000_000)
+        stats['query_chain']['requests'] += 1
+        if not dealerships:
+            stats['query_chain']['errors'] += 1
+    
+    async def _run_catalog_load(self, slugs, rate, concurrency, duration, replay='page'):
+        if replay == 'queries':
+            names, replay_one = [name for name, _ in CATALOG_READ_PATTERN] + ['query_chain'], self._catalog_query_chain
+        else:
+            names, replay_one = list(CATALOG_PAGE_VIEW) + ['page_view'], self._catalog_page_view
+        stats = {name: {'latencies': Histogram(), 'requests': 0, 'errors': 0} for name in names}
+        slots = asyncio.Semaphore(concurrency)
+        
+        async def view(slug):
+            async with slots:
+                await replay_one(stats, slug)
+        
+        # Open-loop schedule: page views start at a fixed rate regardless of response times
+        tasks = []
+        started = time.perf_counter()
+        total_views = int(rate * duration)
+        for index in range(total_views):
+            delay = started + index / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(view(slugs[index % len(slugs)])))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+        await self.session.aclose()
+        return stats, elapsed
+    
+    def run_load_test(self, rate=5.0, concurrency=20, duration=30.0, max_error_rate=0.01, replay='page'):
+        """Replay public catalog traffic across all tenants at a fixed rate.
+        
+        ``replay='page'`` replays what /catalogo/<slug> loads today (page,
+        snapshot or /api/catalog); ``replay='queries'`` replays the five
+        CATALOG_READ_PATTERN queries, with p50/p95/p99 per query.
+        """
+        print("\n=== CATALOG LOAD TEST ===")
+        slugs = self.list_active_dealerships()
+        print(f"Tenants: {', '.join(slugs)} | replay={replay} rate={rate}/s concurrency={concurrency} "
+              f"duration={duration}s")
+        
+        stats, elapsed = asyncio.run(self._run_catalog_load(slugs, rate, concurrency, duration, replay))
+        
+        report = {
+            'tenants': slugs,
+            'replay': replay,
+            'rate': rate,
+            'concurrency': concurrency,
+            'duration_s': round(elapsed, 2),
+            'queries': {}
+        }
+        print(f"\n{'request':<20}{'reqs':>7}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'err%':>7}")
+        for name, entry in stats.items():
+            requests_made = entry['requests']
+            if not requests_made and name not in ('page_view', 'query_chain'):
+                # Snapshot document or /api/catalog, depending on what is published
+                continue
+            error_rate = entry['errors'] / requests_made if requests_made else 0.0
+            row = {
+                'requests': requests_made,
+                'throughput_rps': round(requests_made / elapsed, 2) if elapsed else 0.0,
+                'p50_ms': round(entry['latencies'].percentile(50) / 1000, 2),
+                'p95_ms': round(entry['latencies'].percentile(95) / 1000, 2),
+                'p99_ms': round(entry['latencies'].percentile(99) / 1000, 2),
+                'error_rate': round(error_rate, 4)
+            }
+            report['queries'][name] = row
+            print(f"{name:<20}{requests_made:>7}{row['throughput_rps']:>8}{row['p50_ms']:>9}"
+                  f"{row['p95_ms']:>9}{row['p99_ms']:>9}{error_rate * 100:>6.1f}%")
+            self.log_test(
+                f"Catalog Load - {name}",
+                requests_made > 0 and error_rate <= max_error_rate,
+                f"p95 {row['p95_ms']}ms, {row['throughput_rps']} req/s, {error_rate * 100:.1f}% errors",
+                row
+            )
+        self.report_sections['load'] = report
+        return report
+    
+    async def _soak_dashboard_view(self, stats, user):
+        """Open the dashboard as the tenant's admin: the page and product list from Next.js, then the stats RPC"""
+        headers = await asyncio.to_thread(self.user_headers, user)
+        # Next.js reads the session from cookies (middleware.js, lib/supabase/server.js)
+        cookies = {'Cookie': await asyncio.to_thread(self.user_cookies, user)}
+        started = time.perf_counter()
+        page = await self._timed_request(stats, 'dashboard_html', 'GET', f"{self.base_url}/dashboard", cookies)
+        products = await self._timed_request(
+            stats, 'dashboard_products', 'GET',
+            f"{self.api_url}/products?dealership_id={user['dealership_id']}&limit={CATALOG_FIRST_PAGE}", cookies
+        )
+        body = await self._timed_call(stats, 'dashboard_stats', 'POST', 'rpc/get_dashboard_stats', headers,
+                                      json={'p_dealership_id': user['dealership_id']})
+        stats['dashboard_view']['latencies'].record((time.perf_counter() - started) * 1_000_000)
+        stats['dashboard_view']['requests'] += 1
+        if page is None or products is None or not isinstance(body, dict):
+            stats['dashboard_view']['errors'] += 1
+    
+    async def _soak_write_cycle(self, stats, user, tag):
+        """Insert, update and delete one product as the tenant's admin.
+        
+        The dashboard writes straight to PostgREST; each write reaches Next.js
+        through the catalog invalidation webhook (supabase-catalog-cache.sql).
+        """
+        headers = await asyncio.to_thread(self.user_headers, user)
+        started = time.perf_counter()
+        suffix = uuid.uuid4().hex[:12]
+        created = await self._timed_call(
+            stats, 'product_insert', 'POST', 'products?select=id',
+            {**headers, 'Prefer': 'return=representation'}, (201,),
+            {'dealership_id': user['dealership_id'], 'name': f"Soak {suffix}", 'slug': f"{tag}-{suffix}",
+             'brand': 'Soak', 'model': suffix, 'year': 2024, 'price': 1000, 'status': 'available'}
+        )
+        ok = bool(created)
+        if ok:
+            product = f"products?id=eq.{created[0]['id']}"
+            ok = await self._timed_call(stats, 'product_update', 'PATCH', product, headers, (200, 204),
+                                        {'price': 1500}) is not None
+            ok = await self._timed_call(stats, 'product_delete', 'DELETE', product, headers, (200, 204)) is not None \
+                and ok
+        stats['write_cycle']['latencies'].record((time.perf_counter() - started) * 1_000_000)
+        stats['write_cycle']['requests'] += 1
+        if not ok:
+            stats['write_cycle']['errors'] += 1
+    
+    def _soak_resources(self, pid):
+        """/proc samples of the app server (when known) and of this process"""
+        sample = {'tester': read_proc_status('self')}
+        if pid:
+            try:
+                sample['server'] = read_proc_status(pid)
+            except OSError:
+                # The server exited (or was OOM-killed) mid-run
+                sample['server'] = None
+        return sample
+    
+    async def _run_soak(self, slugs, mix, rate, concurrency, duration, window_s, pid, tag, finish_window):
+        """Open-loop mixed traffic; each operation counts toward the window it was started in"""
+        slots = asyncio.Semaphore(concurrency)
+        rng = random.Random()
+        kinds, weights = zip(*mix.items())
+        
+        def new_window(index):
+            return {
+                'index': index,
+                'stats': defaultdict(lambda: {'latencies': Histogram(), 'requests': 0, 'errors': 0}),
+                'inflight': 0, 'max_inflight': 0, 'closed': False, 'resources': None
+            }
+        
+        open_windows = [new_window(0)]
+        
+        def close(window):
+            window['closed'] = True
+            window['resources'] = self._soak_resources(pid)
+        
+        def finish_ready():
+            # A window is reported once it has ended and its slowest operation has returned
+            while open_windows and open_windows[0]['closed'] and not open_windows[0]['inflight']:
+                finish_window(open_windows.pop(0))
+        
+        async def operation(window, kind, index):
+            try:
+                async with slots:
+                    if kind == 'catalog':
+                        # Skip the Storage snapshot so every view reaches the Next.js server
+                        await self._catalog_page_view(window['stats'], slugs[index % len(slugs)], snapshot=False)
+                    elif kind == 'dashboard':
+                        await self._soak_dashboard_view(window['stats'], self.test_users[index % len(self.test_users)])
+                    else:
+                        await self._soak_write_cycle(window['stats'], self.test_users[index % len(self.test_users)], tag)
+            finally:
+                window['inflight'] -= 1
+                finish_ready()
+        
+        tasks = set()
+        started = time.perf_counter()
+        index = 0
+        while True:
+            elapsed = time.perf_counter() - started
+            if elapsed >= duration:
+                break
+            current = open_windows[-1]
+            boundary = (current['index'] + 1) * window_s
+            if elapsed >= boundary:
+                close(current)
+                open_windows.append(new_window(current['index'] + 1))
+                finish_ready()
+                continue
+            delay = index / rate - elapsed
+            if delay > 0:
+                await asyncio.sleep(min(delay, boundary - elapsed))
+                continue
+            current['inflight'] += 1
+            current['max_inflight'] = max(current['max_inflight'], current['inflight'])
+            task = asyncio.create_task(operation(current, rng.choices(kinds, weights)[0], index))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            index += 1
+        close(open_windows[-1])
+        await asyncio.gather(*tasks)
+        finish_ready()
+        await self.session.aclose()
+    
+    def run_soak_test(self, duration=3600.0, rate=5.0, window=60.0, mix=None, concurrency=20, pid=None,
+                      max_error_rate=0.01, max_drift=0.5, max_rss_growth_mb=32.0):
+        """Hours of mixed catalog / dashboard / write traffic, reported per window to expose drift"""
+        print("\n=== SOAK TEST ===")
+        mix = mix or SOAK_MIX
+        slugs = self.list_active_dealerships()
+        if pid is None and not self.local_supabase:
+            pid = find_next_server()
+        # In --local mode the stand-in serves from this process, so its memory is the tester's
+        server_label = f"Next.js server (pid {pid})" if pid else ('local stand-in (this process)'
+                                                                   if self.local_supabase else None)
+        heap_limit_mb = None
+        if pid:
+            try:
+                heap_limit_mb = node_heap_limit_mb(pid)
+            except OSError:
+                pass
+        print(f"Mix: {', '.join(f'{kind}={weight}' for kind, weight in mix.items())} | rate={rate}/s "
+              f"concurrency={concurrency} duration={duration:.0f}s window={window:.0f}s")
+        print(f"Sampling: {server_label or 'no local server found (use --soak-pid)'}"
+              + (f", --max-old-space-size={heap_limit_mb}" if heap_limit_mb else ''))
+        
+        tag = f"soak-{uuid.uuid4().hex[:8]}"
+        report = {'mix': mix, 'rate': rate, 'concurrency': concurrency, 'duration_s': duration,
+                  'window_s': window, 'server': server_label, 'heap_limit_mb': heap_limit_mb, 'windows': []}
+        views = {name: kind for kind, name in (('catalog', 'page_view'), ('dashboard', 'dashboard_view'),
+                                               ('write', 'write_cycle')) if mix.get(kind)}
+        
+        def memory_of(resources):
+            sample = resources.get('server') if pid else resources.get('tester')
+            return sample or {}
+        
+        def finish_window(entry):
+            row = {'window': entry['index'], 'started_s': round(entry['index'] * window, 1),
+                   'max_inflight': entry['max_inflight'], 'ops': {}, 'resources': entry['resources']}
+            for name, stats in sorted(entry['stats'].items()):
+                requests_made = stats['requests']
+                row['ops'][name] = {
+                    'requests': requests_made,
+                    'p50_ms': round(stats['latencies'].percentile(50) / 1000, 2),
+                    'p95_ms': round(stats['latencies'].percentile(95) / 1000, 2),
+                    'p99_ms': round(stats['latencies'].percentile(99) / 1000, 2),
+                    'error_rate': round(stats['errors'] / requests_made, 4) if requests_made else 0.0
+                }
+            report['windows'].append(row)
+            if self.sink is not None:
+                self.sink.write('window', {'name': 'soak', **row}, flush=True)
+            memory = memory_of(entry['resources'])
+            done = sum(row['ops'].get(name, {}).get('requests', 0) for name in views)
+            errors = sum(entry['stats'][name]['errors'] for name in views if name in entry['stats'])
+            print(f"{row['window']:>4}{row['started_s'] / 60:>8.1f}{done:>7}"
+                  f"{(100 * errors / done if done else 0):>6.1f}%"
+                  + ''.join(f"{row['ops'].get(name, {}).get('p95_ms', '-'):>14}" for name in views)
+                  + f"{memory.get('VmRSS', 0) / 1024:>9.1f}{memory.get('RssAnon', 0) / 1024:>9.1f}"
+                  + f"{memory.get('fds', '-'):>6}{row['max_inflight']:>7}")
+        
+        print(f"\n{'win':>4}{'min':>8}{'views':>7}{'err%':>7}" + ''.join(f"{kind + ' p95':>14}" for kind in views.values())
+              + f"{'RSS MB':>9}{'anon MB':>9}{'fds':>6}{'queue':>7}")
+        try:
+            asyncio.run(self._run_soak(slugs, mix, rate, concurrency, duration, window, pid, tag, finish_window))
+        finally:
+            # Write cycles delete what they insert; this catches the ones interrupted midway
+            self.session.delete(f"{self.supabase_url}/rest/v1/products?slug=like.{tag}-*",
+                                headers=self.service_headers())
+        
+        # The first window includes JIT warm-up and cold caches
+        windows = report['windows'][1:] if len(report['windows']) >= 4 else report['windows']
+        report['drift'] = {}
+        for name in sorted({name for row in windows for name in row['ops']}):
+            series = [row['ops'][name]['p95_ms'] if name in row['ops'] else None for row in windows]
+            requests_made = sum(row['ops'][name]['requests'] for row in windows if name in row['ops'])
+            errors = sum(round(row['ops'][name]['error_rate'] * row['ops'][name]['requests'])
+                         for row in windows if name in row['ops'])
+            report['drift'][name] = {
+                'p95_ms': drift_summary(series, window),
+                'requests': requests_made,
+                'error_rate': round(errors / requests_made, 4) if requests_made else 0.0,
+                'error_rate_last_third': drift_summary(
+                    [row['ops'][name]['error_rate'] if name in row['ops'] else None for row in windows], window
+                )['last']
+            }
+        
+        for name in views:
+            drift = report['drift'].get(name)
+            if not drift:
+                self.log_test(f"Soak Drift - {name}", False, "No requests completed", {})
+                continue
+            latency = drift['p95_ms']
+            problems = []
+            if drift['error_rate'] > max_error_rate:
+                problems.append(f"{drift['error_rate'] * 100:.1f}% errors")
+            # Same noise floor as the regression gate: a few ms on a fast query is not drift
+            if latency['drift'] is not None and latency['drift'] > max_drift and \
+                    latency['last'] - latency['first'] >= self.regression_min_delta_ms:
+                problems.append(f"p95 drifted {latency['drift'] * 100:+.0f}%")
+            self.log_test(
+                f"Soak Drift - {name}",
+                not problems,
+                (f"p95 {latency['first']}ms -> {latency['last']}ms ({latency['slope_per_hour']:+}ms/h), "
+                 if latency['drift'] is not None else f"too few windows for drift ({latency['windows']}), ")
+                + f"{drift['error_rate'] * 100:.2f}% errors over {drift['requests']} requests"
+                + (f" | {'; '.join(problems)}" if problems else ''),
+                drift
             )
-    
-    def test_crud_operations(self):
-        """Test 5: Test CRUD operations using service role key"""
-        print("\n=== TESTING CRUD OPERATIONS ===")
         
-        # Use service role key for admin operations
-        headers = {
-            'apikey': self.supabase_service_key,
-            'Authorization': f'Bearer {self.supabase_service_key}',
-            'Content-Type': 'application/json',
-            'Prefer': 'return=representation'
+        if server_label:
+            samples = [memory_of(row['resources']) for row in windows if row['resources']]
+            exited = any(not sample for sample in samples)
+            rss = drift_summary([sample['VmRSS'] / 1024 if sample else None for sample in samples], window)
+            anon = drift_summary([sample['RssAnon'] / 1024 if sample.get('RssAnon') else None
+                                  for sample in samples], window)
+            fds = drift_summary([sample.get('fds') if sample else None for sample in samples], window)
+            memory = {'rss_mb': rss, 'anon_mb': anon, 'fds': fds, 'exited': exited, 'heap_limit_mb': heap_limit_mb}
+            # RssAnon approximates the V8 heap plus native allocations; project when it reaches the cap
+            if heap_limit_mb and anon['slope_per_hour'] and anon['slope_per_hour'] > 0:
+                memory['hours_to_heap_limit'] = round((heap_limit_mb - anon['last']) / anon['slope_per_hour'], 1)
+            report['memory'] = memory
+            growing = rss['slope_per_hour'] is not None and rss['slope_per_hour'] > max_rss_growth_mb and \
+                rss['last'] - rss['first'] >= SOAK_MIN_RSS_GROWTH_MB
+            self.log_test(
+                f"Soak Memory - {server_label}",
+                not exited and not growing,
+                "Server process disappeared during the run" if exited
+                else f"RSS {rss['first']} -> {rss['last']} MB ({rss['slope_per_hour']:+} MB/h), "
+                     f"fds {fds['first']} -> {fds['last']}"
+                     + (f", heap cap reached in ~{memory['hours_to_heap_limit']}h"
+                        if memory.get('hours_to_heap_limit') is not None else '')
+                if rss['slope_per_hour'] is not None else f"too few windows for drift ({rss['windows']})",
+                memory
+            )
+        self.report_sections['soak'] = report
+        return report
+    
+    def _measure_payload(self, response, spec):
+        """Size one real response body against the part of it the page renders"""
+        body = response.json()
+        needed = rendered_projection(body, spec)
+        if isinstance(body, list):
+            rows = len(body)
+        else:
+            # Paged routes wrap their rows; anything else is one object
+            listed = body.get('data', body.get('products')) if isinstance(body, dict) else None
+            rows = len(listed) if isinstance(listed, list) else 1
+        size = len(response.content)
+        needed_bytes = json_size(needed)
+        return {
+            'rows': rows,
+            'bytes': size,
+            'wire_bytes': wire_bytes(response),
+            'needed_bytes': needed_bytes,
+            'wasted_bytes': max(0, size - needed_bytes),
+            'wasted_pct': round(100 * max(0, size - needed_bytes) / size, 1) if size else 0.0,
+            'field_waste': dict(sorted(field_waste(body, needed, spec).items(), key=lambda item: -item[1]))
         }
+    
+    def _payload_request(self, service, path, user):
+        """Make one PAYLOAD_SHAPES request, as the tenant's admin when ``user`` is given"""
+        if service == 'api':
+            headers = {'Cookie': self.user_cookies(user)} if user else self.anon_headers()
+            response = self.session.get(f"{self.api_url}/{path}", headers=headers)
+        elif service == 'rpc':
+            response = self.session.post(f"{self.supabase_url}/rest/v1/rpc/{path}", headers=self.user_headers(user),
+                                         json={'p_dealership_id': user['dealership_id']})
+        else:
+            response = self.session.get(f"{self.supabase_url}/rest/v1/{path}", headers=self.user_headers(user))
+        if response.status_code != 200 or response.content in (b'', b'null'):
+            raise RuntimeError(f"{path.split('?')[0]} returned HTTP {response.status_code} with no data")
+        return response
+    
+    def analyze_tenant_payload(self, slug):
+        """Make one tenant's page requests the way the pages do and measure each response's over-fetch.
         
-        test_dealership_id = self.test_users[0]['dealership_id']
+        The dashboard requests need the tenant's admin, so they are skipped for
+        tenants without a test user.
+        """
+        admin = next((user for user in self.test_users if user['dealership_slug'] == slug), None)
+        shapes = {}
+        for page, name, service, path, spec in PAYLOAD_SHAPES:
+            dashboard = page.startswith('dashboard')
+            if dashboard and admin is None:
+                continue
+            path = path.format(slug=slug, dealership_id=admin['dealership_id'] if admin else None)
+            entry = self._measure_payload(self._payload_request(service, path, admin if dashboard else None), spec)
+            entry['page'] = page
+            shapes[name] = entry
+        return shapes
+    
+    def analyze_payloads(self, max_overfetch=None):
+        """Report response bytes vs. rendered bytes for each page request, per tenant.
         
-        # Test Categories CRUD
-        self.test_categories_crud(headers, test_dealership_id)
+        With ``max_overfetch`` (a 0-1 share) a query whose wasted share of the
+        response exceeds it fails; otherwise the results are informational.
+        """
+        print("\n=== PAYLOAD / OVER-FETCH ANALYSIS ===")
+        slugs = self.list_active_dealerships()
         
-        # Test Subcategories CRUD
-        self.test_subcategories_crud(headers, test_dealership_id)
+        def analyze(slug):
+            # run_parallel re-raises, so a tenant that can't be measured is logged here instead
+            try:
+                return self.analyze_tenant_payload(slug)
+            except Exception as e:
+                self.log_test(f"Payload Analysis - {slug}", False, f"Error measuring payloads: {e}",
+                              {'error': str(e)})
+                return None
         
-        # Test Products CRUD
-        self.test_products_crud(headers, test_dealership_id)
+        results = dict(zip(slugs, self.run_parallel([(analyze, (slug,)) for slug in slugs])))
         
-        # Test Employees CRUD
-        self.test_employees_crud(headers, test_dealership_id)
+        report = {'tenants': {}, 'pages': {}}
+        for slug, shapes in results.items():
+            if shapes is None:
+                continue
+            report['tenants'][slug] = shapes
+            print(f"\n{slug}")
+            print(f"  {'request':<26}{'rows':>7}{'bytes':>11}{'needed':>11}{'wasted':>8}{'wire':>10}  top fields")
+            for name, entry in shapes.items():
+                top = ', '.join(f"{key} {size // 1024}KB" if size >= 1024 else f"{key} {size}B"
+                                for key, size in list(entry['field_waste'].items())[:3])
+                print(f"  {name:<26}{entry['rows']:>7}{entry['bytes']:>11}{entry['needed_bytes']:>11}"
+                      f"{entry['wasted_pct']:>7}%{entry['wire_bytes']:>10}  {top}")
+                totals = report['pages'].setdefault(entry['page'], {'bytes': 0, 'needed_bytes': 0, 'wasted_bytes': 0})
+                for key in totals:
+                    totals[key] += entry[key]
+                over = max_overfetch is not None and entry['wasted_bytes'] > max_overfetch * entry['bytes']
+                self.log_test(
+                    f"Payload - {slug} - {name}",
+                    not over,
+                    f"{entry['bytes']} bytes for {entry['rows']} rows, {entry['wasted_pct']}% not rendered",
+                    {key: entry[key] for key in ('rows', 'bytes', 'wire_bytes', 'needed_bytes', 'wasted_bytes',
+                                                 'field_waste')}
+                )
         
-        # Test Site Settings CRUD
-        self.test_site_settings_crud(headers, test_dealership_id)
+        for page, totals in report['pages'].items():
+            share = 100 * totals['wasted_bytes'] / totals['bytes'] if totals['bytes'] else 0.0
+            print(f"\n{page}: {totals['bytes']} bytes fetched across tenants, {totals['wasted_bytes']} "
+                  f"({share:.1f}%) never rendered")
+        self.report_sections['payload'] = report
+        return report
     
-    def test_categories_crud(self, headers, dealership_id):
-        """Test Categories CRUD operations"""
+    def _measure_fetch(self, url, headers, repeat=3):
+        """Median latency of a GET + JSON decode, and the peak memory of decoding the body"""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = self.session.get(url, headers=headers, timeout=self.session.config.page_timeout)
+            body = response.json()
+            timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url.split('?')[0]} returned HTTP {response.status_code}")
+        # Traced separately: tracemalloc slows decoding, and in --local mode the
+        # server shares this process, so only the client-side decode is traced
+        tracemalloc.start()
         try:
-            # CREATE Category
-            category_data = {
-                'dealership_id': dealership_id,
-                'name': 'Motos Test',
-                'slug': 'motos-test',
-                'description': 'Categoría de prueba para motos'
-            }
-            
-            response = self.session.post(
-                f"{self.supabase_url}/rest/v1/categories",
-                headers=headers,
-                json=category_data,
-                timeout=10
+            json.loads(response.content)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {
+            'ms': round(statistics.median(timings), 2),
+            'bytes': len(response.content),
+            'peak_kb': round(peak / 1024, 1)
+        }, body
+    
+    def _benchmark_pagination_size(self, size, page_size):
+        """Fetch-all vs. first keyset page for one synthetic tenant of ``size`` products"""
+        generator = SyntheticDataGenerator(self, seed=size)
+        manifest = generator.generate(dealerships=1, products_per_dealership=size,
+                                      employees_per_dealership=1, images_per_product=2)
+        dealership_id = manifest['dealership_ids'][0]
+        headers = self.anon_headers()
+        try:
+            fetch_all, rows = self._measure_fetch(
+                f"{self.supabase_url}/rest/v1/" + CATALOG_READ_PATTERN[2][1].format(dealership_id=dealership_id),
+                headers
+            )
+            first_page, page = self._measure_fetch(
+                f"{self.api_url}/products?dealership_id={dealership_id}&limit={page_size}", headers
             )
             
-            print(f"Categories CREATE response: {response.status_code} - {response.text}")
+            # Walk every page: keyset pages must cover the tenant exactly once, in order
+            started = time.perf_counter()
+            seen, pages, cursor = [], 0, None
+            while True:
+                url = f"{self.api_url}/products?dealership_id={dealership_id}&limit=100"
+                response = self.session.get(url + (f"&cursor={cursor}" if cursor else ''), headers=headers)
+                if response.status_code != 200:
+                    raise RuntimeError(f"/api/products returned HTTP {response.status_code}")
+                body = response.json()
+                seen.extend(row['id'] for row in body['data'])
+                pages += 1
+                cursor = body['next_cursor']
+                if not cursor:
+                    break
+            walk_ms = (time.perf_counter() - started) * 1000
+        finally:
+            generator.teardown(manifest)
+        
+        return {
+            'products': size,
+            'fetch_all': fetch_all,
+            'first_page': first_page,
+            'first_page_rows': len(page['data']),
+            'full_walk_ms': round(walk_ms, 2),
+            'pages': pages,
+            'complete': seen == [row['id'] for row in rows] and len(set(seen)) == len(rows)
+        }
+    
+    def run_pagination_benchmark(self, sizes=(100, 1000, 10000), page_size=24):
+        """Time-to-first-page and client memory: keyset /api/products vs. the catalog's fetch-all"""
+        print("\n=== PAGINATION BENCHMARK ===")
+        report = {'page_size': page_size, 'sizes': {}}
+        print(f"{'products':>9}{'all ms':>10}{'all KB':>10}{'all mem':>10}"
+              f"{'page ms':>10}{'page KB':>10}{'page mem':>10}{'walk ms':>10}")
+        for size in sizes:
+            try:
+                result = self._benchmark_pagination_size(size, page_size)
+            except Exception as e:
+                self.log_test(f"Pagination - {size} products", False, f"Benchmark failed: {str(e)}",
+                              {'error': str(e)})
+                continue
+            report['sizes'][size] = result
+            fetch_all, first_page = result['fetch_all'], result['first_page']
+            print(f"{size:>9}{fetch_all['ms']:>10}{fetch_all['bytes'] // 1024:>10}{fetch_all['peak_kb']:>10}"
+                  f"{first_page['ms']:>10}{first_page['bytes'] // 1024:>10}{first_page['peak_kb']:>10}"
+                  f"{result['full_walk_ms']:>10}")
+            self.log_test(
+                f"Pagination - {size} products",
+                result['complete'],
+                f"first page {first_page['ms']}ms vs fetch-all {fetch_all['ms']}ms, "
+                f"{result['pages']} pages cover the tenant" if result['complete']
+                else "Keyset pages skipped or repeated products",
+                result
+            )
+        self.report_sections['pagination'] = report
+        return report
+    
+    def _run_fuse_search(self, products, queries):
+        """Fuse.js index build + per-query times, or None when node / fuse.js are not installed"""
+        if not shutil.which('node'):
+            print("Fuse.js timing skipped: node is not installed")
+            return None
+        try:
+            result = subprocess.run(
+                ['node', '-e', FUSE_BENCHMARK_JS],
+                input=json.dumps({'products': products, 'queries': queries}),
+                capture_output=True, text=True, timeout=300,
+                cwd=os.path.dirname(os.path.abspath(__file__))
+            )
+        except subprocess.TimeoutExpired:
+            print("Fuse.js timing skipped: node timed out")
+            return None
+        if result.returncode != 0:
+            lines = result.stderr.strip().splitlines() or ['node exited with an error']
+            reason = next((line for line in lines if 'Error' in line), lines[-1])
+            print(f"Fuse.js timing skipped (install the app dependencies first): {reason.strip()}")
+            return None
+        return json.loads(result.stdout)
+    
+    def run_search_benchmark(self, products=10000, queries=None):
+        """/api/search (indexed, server side) vs. the catalog's download-everything + Fuse.js search"""
+        print("\n=== SEARCH BENCHMARK ===")
+        queries = queries or SEARCH_BENCHMARK_QUERIES
+        generator = SyntheticDataGenerator(self, seed=products)
+        manifest = generator.generate(dealerships=1, products_per_dealership=products,
+                                      employees_per_dealership=1, images_per_product=1)
+        dealership_id = manifest['dealership_ids'][0]
+        headers = self.anon_headers()
+        report = {'products': products, 'queries': {}}
+        try:
+            download, rows = self._measure_fetch(
+                f"{self.supabase_url}/rest/v1/" + CATALOG_READ_PATTERN[2][1].format(dealership_id=dealership_id),
+                headers, repeat=1
+            )
+            fuse = self._run_fuse_search(rows, queries)
+            report['fuse_download'] = download
+            report['fuse_build_ms'] = round(fuse['build_ms'], 2) if fuse else None
             
-            if response.status_code == 201:
-                try:
-                    response_data = response.json()
-                    if isinstance(response_data, list) and len(response_data) > 0:
-                        created_category = response_data[0]
-                    else:
-                        created_category = response_data
-                except json.JSONDecodeError:
-                    self.log_test(
-                        "Categories CREATE",
-                        False,
-                        f"Invalid JSON response: {response.text}",
-                        {'status_code': response.status_code, 'response': response.text}
-                    )
-                    return
-                category_id = created_category['id']
-                
+            print(f"Fuse.js path: download {download['ms']}ms ({download['bytes'] // 1024} KB)"
+                  + (f", index build {report['fuse_build_ms']}ms" if fuse else ''))
+            print(f"\n{'query':<14}{'api ms':>9}{'api hits':>10}{'fuse ms':>10}{'fuse hits':>11}{'first result':>14}")
+            for query in queries:
+                timings = []
+                for _ in range(3):
+                    started = time.perf_counter()
+                    response = self.session.get(f"{self.api_url}/search",
+                                                params={'dealership_id': dealership_id, 'q': query}, headers=headers)
+                    timings.append((time.perf_counter() - started) * 1000)
+                body = response.json() if response.status_code == 200 else {}
+                row = {
+                    'api_ms': round(statistics.median(timings), 2),
+                    'api_total': body.get('total', 0),
+                    'api_top': [product['name'] for product in body.get('data', [])[:3]]
+                }
+                if fuse:
+                    row['fuse_ms'] = round(fuse['queries'][query]['ms'], 2)
+                    row['fuse_total'] = fuse['queries'][query]['total']
+                    # What a visitor waited for before: whole catalog, index build, then the search
+                    row['fuse_first_result_ms'] = round(download['ms'] + fuse['build_ms'] + row['fuse_ms'], 2)
+                report['queries'][query] = row
+                print(f"{query:<14}{row['api_ms']:>9}{row['api_total']:>10}{row.get('fuse_ms', '-'):>10}"
+                      f"{row.get('fuse_total', '-'):>11}{row.get('fuse_first_result_ms', download['ms']):>14}")
                 self.log_test(
-                    "Categories CREATE",
-                    True,
-                    "Successfully created test category",
-                    {'category_id': category_id, 'name': created_category['name']}
+                    f"Search - '{query}'",
+                    response.status_code == 200 and row['api_total'] > 0,
+                    (f"{row['api_total']} results in {row['api_ms']}ms vs "
+                     + (f"{row['fuse_first_result_ms']}ms to the first Fuse.js result" if fuse
+                        else f"{download['ms']}ms just to download the catalog for Fuse.js"))
+                    if response.status_code == 200 else f"/api/search returned status {response.status_code}",
+                    row
                 )
-                
-                # READ Categories
-                response = self.session.get(
-                    f"{self.supabase_url}/rest/v1/categories?dealership_id=eq.{dealership_id}",
-                    headers=headers,
-                    timeout=10
+        except Exception as e:
+            self.log_test("Search Benchmark", False, f"Benchmark failed: {str(e)}", {'error': str(e)})
+        finally:
+            generator.teardown(manifest)
+        self.report_sections['search'] = report
+        return report
+
+    def run_facet_benchmark(self, products=10000, filter_sets=None, repeat=3):
+        """/api/facets (GIN containment + server-side counts) vs. downloading the catalog and filtering it"""
+        print("\n=== SPEC FACET BENCHMARK ===")
+        filter_sets = FACET_BENCHMARK_FILTERS if filter_sets is None else filter_sets
+        generator = SyntheticDataGenerator(self, seed=products)
+        manifest = generator.generate(dealerships=1, products_per_dealership=products,
+                                      employees_per_dealership=1, images_per_product=1)
+        dealership_id = manifest['dealership_ids'][0]
+        headers = self.anon_headers()
+        report = {'products': products, 'filters': []}
+        try:
+            download, rows = self._measure_fetch(
+                f"{self.supabase_url}/rest/v1/" + CATALOG_READ_PATTERN[2][1].format(dealership_id=dealership_id),
+                headers, repeat=1
+            )
+            report['client_download'] = download
+            print(f"Client-side path: download {download['ms']}ms ({download['bytes'] // 1024} KB)")
+            print(f"\n{'filters':<44}{'total':>7}{'api ms':>9}{'api KB':>8}{'client ms':>11}")
+            for filters in filter_sets:
+                label = ' & '.join(f"{facet}={'|'.join(values)}" for facet, values in filters.items()) or '(none)'
+                params = [('dealership_id', dealership_id)] + [
+                    (facet, value) for facet, values in filters.items() for value in values
+                ]
+
+                def facets_request():
+                    response = self.session.get(f"{self.api_url}/facets", params=params, headers=headers)
+                    if response.status_code != 200:
+                        raise RuntimeError(f"/api/facets returned HTTP {response.status_code}")
+                    return response
+
+                api_ms, response = self._median_ms(facets_request, repeat)
+                body = response.json()
+                started = time.perf_counter()
+                total, page_ids, facets = facet_filter(rows, filters, page_size=body['limit'])
+                client_ms = download['ms'] + (time.perf_counter() - started) * 1000
+                row = {
+                    'filters': filters,
+                    'total': body['total'],
+                    'api_ms': api_ms,
+                    'api_bytes': len(response.content),
+                    'client_ms': round(client_ms, 2),
+                    'matches': {
+                        'total': body['total'] == total,
+                        'page': [product['id'] for product in body['data']] == page_ids,
+                        'facets': body['facets'] == facets
+                    }
+                }
+                report['filters'].append(row)
+                print(f"{label[:43]:<44}{row['total']:>7}{api_ms:>9}{row['api_bytes'] // 1024:>8}{row['client_ms']:>11}")
+                wrong = [name for name, ok in row['matches'].items() if not ok]
+                self.log_test(
+                    f"Spec Facets - {label}",
+                    not wrong,
+                    f"{row['total']} matches in {api_ms}ms ({row['api_bytes'] // 1024} KB) vs {row['client_ms']}ms "
+                    f"downloading and filtering {len(rows)} products" if not wrong
+                    else f"/api/facets disagrees with filtering the full catalog on: {', '.join(wrong)}",
+                    row
                 )
+        except Exception as e:
+            self.log_test("Spec Facet Benchmark", False, f"Benchmark failed: {str(e)}", {'error': str(e)})
+        finally:
+            generator.teardown(manifest)
+        self.report_sections['facets'] = report
+        return report
+
+    def run_spec_range_benchmark(self, products=10000, queries=None, repeat=3):
+        """/api/products/specs (typed columns + B-tree indexes) vs. downloading the catalog and parsing the specs"""
+        print("\n=== SPEC RANGE BENCHMARK ===")
+        queries = SPEC_RANGE_BENCHMARK_QUERIES if queries is None else queries
+        generator = SyntheticDataGenerator(self, seed=products)
+        manifest = generator.generate(dealerships=1, products_per_dealership=products,
+                                      employees_per_dealership=1, images_per_product=1)
+        dealership_id = manifest['dealership_ids'][0]
+        headers, service = self.anon_headers(), self.service_headers()
+        report = {'products': products, 'queries': []}
+        try:
+            fixtures = generator.crud.create('products', [
+                {'dealership_id': dealership_id, 'name': f"Ficha en otras unidades {index}",
+                 'slug': f"{manifest['run_tag']}-units-{index}", 'price': 1000 + index, 'specifications': specs}
+                for index, (specs, _) in enumerate(SPEC_PARSE_FIXTURES)
+            ], select='id')
+            
+            # Products written before supabase-spec-values.sql ran have no side row yet
+            response = self.session.request(
+                'DELETE', f"{self.supabase_url}/rest/v1/product_spec_values?dealership_id=eq.{dealership_id}",
+                headers=service
+            )
+            if response.status_code not in (200, 204):
+                raise RuntimeError(f"Clearing product_spec_values returned HTTP {response.status_code}")
+            backfill = self.backfill_spec_values()
+            if backfill is None:
+                raise RuntimeError("Backfill did not run")
+            report['backfill'] = {key: backfill[key] for key in ('processed', 'batches', 'rpc_ms')}
+            
+            response = self.session.get(
+                f"{self.supabase_url}/rest/v1/product_spec_values?select=product_id,{','.join(SPEC_RANGE_FIELDS)}"
+                f"&product_id=in.({','.join(row['id'] for row in fixtures)})", headers=service
+            )
+            parsed = {row['product_id']: row for row in response.json()} if response.status_code == 200 else {}
+            wrong = [
+                {'specifications': specs, 'expected': expected, 'stored': parsed.get(row['id'])}
+                for row, (specs, expected) in zip(fixtures, SPEC_PARSE_FIXTURES)
+                if {field: (parsed.get(row['id']) or {}).get(field) for field in expected} != expected
+            ]
+            self.log_test(
+                "Spec Values - Unit Normalization",
+                not wrong,
+                f"{len(fixtures)} spec sheets in kW/CV/lbs/gal/kgf·m normalized to HP/Nm/kg/litros" if not wrong
+                else f"{len(wrong)} of {len(fixtures)} spec sheets parsed differently than expected",
+                {'mismatches': wrong}
+            )
+            
+            download, rows = self._measure_fetch(
+                f"{self.supabase_url}/rest/v1/" + CATALOG_READ_PATTERN[2][1].format(dealership_id=dealership_id),
+                headers, repeat=1
+            )
+            report['client_download'] = download
+            print(f"Client-side path: download {download['ms']}ms ({download['bytes'] // 1024} KB)")
+            print(f"\n{'query':<58}{'total':>7}{'api ms':>9}{'client ms':>11}")
+            for query in queries:
+                label = ', '.join(f"{key}={value}" for key, value in query.items())
+                params = dict(query, dealership_id=dealership_id)
                 
-                if response.status_code == 200:
-                    categories = response.json()
-                    test_category = next((c for c in categories if c['id'] == category_id), None)
-                    
-                    if test_category:
-                        self.log_test(
-                            "Categories READ",
-                            True,
-                            f"Successfully retrieved categories, found test category",
-                            {'total_categories': len(categories)}
-                        )
-                    else:
-                        self.log_test(
-                            "Categories READ",
-                            False,
-                            "Test category not found in results",
-                            {'categories_count': len(categories)}
-                        )
-                else:
-                    self.log_test(
-                        "Categories READ",
-                        False,
-                        f"Failed to read categories, status {response.status_code}",
-                        {'status_code': response.status_code}
-                    )
+                def first_page():
+                    response = self.session.get(f"{self.api_url}/products/specs", params=params, headers=headers)
+                    if response.status_code != 200:
+                        raise RuntimeError(f"/api/products/specs returned HTTP {response.status_code}")
+                    return response
                 
-                # UPDATE Category
-                update_data = {'description': 'Categoría actualizada de prueba'}
-                response = self.session.patch(
-                    f"{self.supabase_url}/rest/v1/categories?id=eq.{category_id}",
-                    headers=headers,
-                    json=update_data,
-                    timeout=10
+                api_ms, response = self._median_ms(first_page, repeat)
+                body = response.json()
+                started = time.perf_counter()
+                expected = spec_range_filter(rows, query)
+                client_ms = download['ms'] + (time.perf_counter() - started) * 1000
+                # Follow the cursors to the end: every product exactly once, in order
+                walked, cursor = [], None
+                while True:
+                    page = self.session.get(f"{self.api_url}/products/specs", headers=headers,
+                                            params=dict(params, limit=100, **({'cursor': cursor} if cursor else {})))
+                    if page.status_code != 200:
+                        raise RuntimeError(f"/api/products/specs returned HTTP {page.status_code} while paging")
+                    walked.extend(product['id'] for product in page.json()['data'])
+                    cursor = page.json()['next_cursor']
+                    if not cursor:
+                        break
+                row = {
+                    'query': query,
+                    'total': len(walked),
+                    'api_ms': api_ms,
+                    'api_bytes': len(response.content),
+                    'client_ms': round(client_ms, 2),
+                    'matches': {
+                        'page': [product['id'] for product in body['data']] == expected[:body['limit']],
+                        'all_pages': walked == expected
+                    }
+                }
+                report['queries'].append(row)
+                print(f"{label[:57]:<58}{row['total']:>7}{api_ms:>9}{row['client_ms']:>11}")
+                wrong = [name for name, ok in row['matches'].items() if not ok]
+                self.log_test(
+                    f"Spec Ranges - {label}",
+                    not wrong and len(walked) > 0,
+                    f"{len(walked)} matches, first page in {api_ms}ms vs {row['client_ms']}ms downloading and "
+                    f"parsing {len(rows)} products" if not wrong
+                    else f"/api/products/specs disagrees with parsing the full catalog on: {', '.join(wrong)}",
+                    row
                 )
+            
+            # The trigger re-parses on write: a spec sheet switched to kW and a new price show up at once
+            product = next(row for row in rows if (row.get('specifications') or {}).get('motor'))
+            specifications = dict(product['specifications'], motor=dict(product['specifications']['motor'],
+                                                                        potencia_maxima='99 kW @ 9000 rpm'))
+            generator.crud.update('products', [product['id']], {'specifications': specifications, 'price': 4321.5})
+            response = self.session.get(
+                f"{self.supabase_url}/rest/v1/product_spec_values?select=power_hp,price&product_id=eq.{product['id']}",
+                headers=service
+            )
+            synced = response.json() if response.status_code == 200 else []
+            self.log_test(
+                "Spec Values - Trigger Sync",
+                synced == [{'power_hp': 132.8, 'price': 4321.5}],
+                "Editing specifications and price updated the parsed row" if synced == [
+                    {'power_hp': 132.8, 'price': 4321.5}] else f"Parsed row after the edit: {synced}",
+                {'product_id': product['id'], 'stored': synced}
+            )
+        except Exception as e:
+            self.log_test("Spec Range Benchmark", False, f"Benchmark failed: {str(e)}", {'error': str(e)})
+        finally:
+            generator.teardown(manifest)
+        self.report_sections['spec_ranges'] = report
+        return report
+    
+    def build_catalog_snapshot(self, slug):
+        """The snapshot document of ``slug`` built from live anon queries (what publishSnapshot() uploads)"""
+        headers = self.anon_headers()
+        rest = f"{self.supabase_url}/rest/v1/"
+        
+        def get(path):
+            response = self.session.get(rest + path, headers=headers)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path.split('?')[0]} returned HTTP {response.status_code}")
+            return response.json()
+        
+        dealerships = get(CATALOG_READ_PATTERN[0][1].format(slug=slug))
+        if not dealerships:
+            return None
+        dealership = dealerships[0]
+        tenant = f"dealership_id=eq.{dealership['id']}"
+        settings = get(f"site_settings?select=*&{tenant}")
+        # PostgREST caps a response at max-rows, so products are read in ranges like fetchAllProducts()
+        products = []
+        while True:
+            page = get(f"products?select={SNAPSHOT_PRODUCTS_SELECT}&{tenant}"
+                       f"&order=created_at.desc,id.desc&limit=1000&offset={len(products)}")
+            products.extend(page)
+            if len(page) < 1000:
+                break
+        return catalog_snapshot({
+            'dealership': dealership,
+            'settings': settings[0] if settings else None,
+            'products': products,
+            'categories': get(CATALOG_READ_PATTERN[3][1].format(dealership_id=dealership['id'])),
+            'employees': get(CATALOG_READ_PATTERN[4][1].format(dealership_id=dealership['id']))
+        })
+    
+    def fetch_catalog_snapshot(self, slug):
+        """The published pointer of ``slug`` and its compressed document, as a visitor reads them; (None, None) if absent"""
+        public = f"{self.supabase_url}/storage/v1/object/public/{SNAPSHOT_BUCKET}"
+        response = self.session.get(f"{public}/catalog/{slug}.json")
+        if response.status_code != 200:
+            return None, None
+        pointer = response.json()
+        document = self.session.get(f"{public}/{pointer['path']}")
+        if document.status_code != 200:
+            raise RuntimeError(f"{pointer['path']} returned HTTP {document.status_code}")
+        return pointer, document.content
+    
+    def _snapshot_object(self, method, path, body=None, content_type=None, cache_control=None):
+        """One service-role Storage request under site-assets (writes to catalog/ need the service role)"""
+        headers = {key: value for key, value in self.service_headers().items() if key != 'Content-Type'}
+        url = f"{self.supabase_url}/storage/v1/object/{SNAPSHOT_BUCKET}"
+        if method == 'DELETE':
+            return self.session.request('DELETE', url, headers={**headers, 'Content-Type': 'application/json'},
+                                        json={'prefixes': path})
+        if method == 'GET':
+            return self.session.get(f"{url}/{path}", headers=headers)
+        response = self.session.post(f"{url}/{path}", data=body, headers={
+            **headers, 'Content-Type': content_type, 'cache-control': cache_control, 'x-upsert': 'true'
+        })
+        if response.status_code != 200:
+            raise StorageUploadError(f"upload of {path} returned {response.status_code}: {response.text[:200]}")
+        return response
+    
+    def publish_catalog_snapshots(self, slugs=None):
+        """Build and publish the snapshot of every active tenant (or ``slugs``), like publishSnapshot()"""
+        print("\n=== PUBLISHING CATALOG SNAPSHOTS ===")
+        slugs = slugs or self.list_active_dealerships()
+        report = {}
+        for slug in slugs:
+            try:
+                document = self.build_catalog_snapshot(slug)
+                if document is None:
+                    self.log_test(f"Snapshot Publish - {slug}", False, "No active dealership with this slug", {})
+                    continue
+                dealership_id = document['dealership']['id']
+                found = self._snapshot_object('GET', f"catalog/{dealership_id}/index.json")
+                index = found.json() if found.status_code == 200 else None
+                body = json.dumps(document, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+                version = hashlib.sha256(body).hexdigest()[:16]
+                if index and index['version'] == version and index['slug'] == slug:
+                    report[slug] = dict(index, unchanged=True)
+                    self.log_test(f"Snapshot Publish - {slug}", True, f"Version {version} already published",
+                                  report[slug])
+                    continue
                 
-                if response.status_code == 204:
-                    self.log_test(
-                        "Categories UPDATE",
-                        True,
-                        "Successfully updated test category",
-                        {'category_id': category_id}
-                    )
-                else:
-                    self.log_test(
-                        "Categories UPDATE",
-                        False,
-                        f"Failed to update category, status {response.status_code}",
-                        {'status_code': response.status_code}
-                    )
-                
-                # DELETE Category
-                response = self.session.delete(
-                    f"{self.supabase_url}/rest/v1/categories?id=eq.{category_id}",
-                    headers=headers,
-                    timeout=10
+                compressed = gzip.compress(body, mtime=0)
+                path = f"catalog/{dealership_id}/{version}.json.gz"
+                self._snapshot_object('POST', path, compressed, 'application/gzip', '31536000')
+                pointer = {
+                    'format': SNAPSHOT_FORMAT,
+                    'dealership_id': dealership_id,
+                    'slug': slug,
+                    'version': version,
+                    'path': path,
+                    'bytes': len(compressed),
+                    'uncompressed_bytes': len(body),
+                    'sha256': hashlib.sha256(compressed).hexdigest(),
+                    'products': len(document['products']),
+                    'published_at': datetime.now().astimezone().isoformat()
+                }
+                self._snapshot_object('POST', f"catalog/{slug}.json", json.dumps(pointer).encode(),
+                                      'application/json', '60')
+                versions = [version] + [kept for kept in (index or {}).get('versions', []) if kept != version]
+                self._snapshot_object('POST', f"catalog/{dealership_id}/index.json",
+                                      json.dumps(dict(pointer, versions=versions[:SNAPSHOT_KEPT_VERSIONS])).encode(),
+                                      'application/json', '0')
+                stale = [f"catalog/{dealership_id}/{old}.json.gz" for old in versions[SNAPSHOT_KEPT_VERSIONS:]]
+                if index and index['slug'] != slug:
+                    stale.append(f"catalog/{index['slug']}.json")
+                if stale:
+                    self._snapshot_object('DELETE', stale)
+                report[slug] = pointer
+                self.log_test(
+                    f"Snapshot Publish - {slug}",
+                    True,
+                    f"Version {version}: {pointer['products']} products, {len(compressed) // 1024} KB gzip "
+                    f"({len(body) // 1024} KB JSON)",
+                    pointer
                 )
-                
-                if response.status_code == 204:
-                    self.log_test(
-                        "Categories DELETE",
-                        True,
-                        "Successfully deleted test category",
-                        {'category_id': category_id}
-                    )
-                else:
-                    self.log_test(
-                        "Categories DELETE",
-                        False,
-                        f"Failed to delete category, status {response.status_code}",
-                        {'status_code': response.status_code}
-                    )
-                    
-            else:
+            except Exception as e:
+                report[slug] = {'error': str(e)}
+                self.log_test(f"Snapshot Publish - {slug}", False, f"Error publishing: {str(e)}", {'error': str(e)})
+        self.report_sections['snapshot_publish'] = report
+        return report
+    
+    def verify_catalog_snapshots(self, slugs=None):
+        """Check each published snapshot: intact, self-consistent, and equal to a fresh build of the live data"""
+        print("\n=== VERIFYING CATALOG SNAPSHOTS ===")
+        slugs = slugs or self.list_active_dealerships()
+        report = {}
+        for slug in slugs:
+            try:
+                pointer, compressed = self.fetch_catalog_snapshot(slug)
+                if pointer is None:
+                    report[slug] = {'published': False}
+                    self.log_test(f"Snapshot Verify - {slug}", False,
+                                  "No snapshot published (is SUPABASE_SERVICE_ROLE_KEY set in the app?)", report[slug])
+                    continue
+                # Hash the stored bytes: JS and Python serialize numbers differently, so never re-serialize
+                body = gzip.decompress(compressed)
+                document = json.loads(body)
+                checks = {
+                    'sha256': hashlib.sha256(compressed).hexdigest() == pointer['sha256'],
+                    'version': hashlib.sha256(body).hexdigest()[:16] == pointer['version'],
+                    'format': document.get('format') == SNAPSHOT_FORMAT == pointer.get('format'),
+                    'slug': (document.get('dealership') or {}).get('slug') == slug
+                }
+                live = self.build_catalog_snapshot(slug)
+                diff = diff_catalog_snapshots(document, live) if live else None
+                checks['current'] = bool(diff and diff['identical'])
+                report[slug] = {
+                    'version': pointer['version'],
+                    'published_at': pointer['published_at'],
+                    'bytes': len(compressed),
+                    'uncompressed_bytes': len(body),
+                    'products': len(document.get('products') or []),
+                    'checks': checks,
+                    'diff': diff
+                }
+                wrong = [name for name, ok in checks.items() if not ok]
                 self.log_test(
-                    "Categories CREATE",
-                    False,
-                    f"Failed to create category, status {response.status_code}",
-                    {'status_code': response.status_code, 'response': response.text}
+                    f"Snapshot Verify - {slug}",
+                    not wrong,
+                    f"Version {pointer['version']} matches the live catalog ({report[slug]['products']} products, "
+                    f"{len(compressed) // 1024} KB)" if not wrong else f"Snapshot failed checks: {', '.join(wrong)}",
+                    report[slug]
                 )
-                
-        except Exception as e:
+            except Exception as e:
+                report[slug] = {'error': str(e)}
+                self.log_test(f"Snapshot Verify - {slug}", False, f"Error verifying: {str(e)}", {'error': str(e)})
+        self.report_sections['snapshot_verify'] = report
+        return report
+    
+    def _wait_for_snapshot(self, slug, ready, timeout=60.0):
+        """Poll the public pointer of ``slug`` until ``ready(pointer)``; (pointer, seconds waited)"""
+        started = time.perf_counter()
+        public = f"{self.supabase_url}/storage/v1/object/public/{SNAPSHOT_BUCKET}/catalog/{slug}.json"
+        while True:
+            response = self.session.get(public)
+            pointer = response.json() if response.status_code == 200 else None
+            waited = time.perf_counter() - started
+            if ready(pointer) or waited > timeout:
+                return pointer, round(waited * 1000, 2)
+            time.sleep(0.1)
+    
+    def run_snapshot_benchmark(self, products=5000, repeat=3):
+        """Published snapshot vs. the live catalog: read cost, publish delay, tenant isolation and unpublishing"""
+        print("\n=== CATALOG SNAPSHOT BENCHMARK ===")
+        generator = SyntheticDataGenerator(self, seed=products)
+        manifest = generator.generate(dealerships=1, products_per_dealership=products,
+                                      employees_per_dealership=8, images_per_product=2, admins=True)
+        admin = manifest['admins'][0]
+        slug, dealership_id = admin['dealership_slug'], admin['dealership_id']
+        report = {'products': products}
+        try:
+            pointer, waited_ms = self._wait_for_snapshot(
+                slug, lambda pointer: pointer is not None and pointer['products'] == products
+            )
+            if pointer is None or pointer['products'] != products:
+                raise RuntimeError(f"No snapshot with {products} products published after {waited_ms}ms")
+            print(f"Snapshot {pointer['version']} published {waited_ms}ms after the data was written")
+            verified = self.verify_catalog_snapshots([slug])[slug]
+            
+            def read_snapshot():
+                _, compressed = self.fetch_catalog_snapshot(slug)
+                return json.loads(gzip.decompress(compressed)), len(compressed)
+            
+            snapshot_ms, (document, snapshot_bytes) = self._median_ms(read_snapshot, repeat)
+            live, _ = self._measure_fetch(f"{self.api_url}/catalog/{slug}", self.anon_headers(), repeat=repeat)
+            report['read'] = {
+                'snapshot': {'ms': snapshot_ms, 'bytes': snapshot_bytes},
+                'api_catalog': {'ms': live['ms'], 'bytes': live['bytes']}
+            }
+            print(f"{'read':<16}{'ms':>9}{'KB':>9}")
+            for name, row in report['read'].items():
+                print(f"{name:<16}{row['ms']:>9}{row['bytes'] // 1024:>9}")
             self.log_test(
-                "Categories CRUD",
-                False,
-                f"Error in categories CRUD: {str(e)}",
-                {'error': str(e)}
+                "Catalog Snapshot - Read",
+                'error' not in verified and len(document['products']) == products,
+                f"{products} products in {snapshot_ms}ms / {snapshot_bytes // 1024} KB from Storage vs "
+                f"{live['ms']}ms / {live['bytes'] // 1024} KB from /api/catalog",
+                report['read']
+            )
+            
+            # One edit republishes, and the new version differs from the old in that product only
+            product = document['products'][len(document['products']) // 2]
+            previous = pointer['version']
+            generator.crud.update('products', [product['id']], {'price': (product.get('price') or 0) + 1})
+            pointer, publish_ms = self._wait_for_snapshot(
+                slug, lambda current: current is not None and current['version'] != previous
+            )
+            if pointer is None or pointer['version'] == previous:
+                raise RuntimeError(f"Editing a product did not publish a new version within {publish_ms}ms")
+            edited, _ = read_snapshot()
+            diff = diff_catalog_snapshots(document, edited)
+            expected = {'added': [], 'removed': [], 'changed': [product['id']]}
+            isolated = (diff['products'] == expected and not diff['dealership_changed'] and not diff['settings_changed']
+                        and not any(ids for section in ('categories', 'employees') for ids in diff[section].values()))
+            report['republish'] = {'publish_ms': publish_ms, 'version': pointer['version'], 'diff': diff}
+            self.log_test(
+                "Catalog Snapshot - Republish",
+                isolated,
+                f"Editing one product published version {pointer['version']} after {publish_ms}ms, "
+                f"differing in that product only" if isolated else "The new version differs in more than the edit",
+                report['republish']
+            )
+            
+            # Only the publisher writes catalog/: not even the tenant's own admin
+            forged = self.session.post(
+                f"{self.supabase_url}/storage/v1/object/{SNAPSHOT_BUCKET}/catalog/{slug}.json",
+                data=json.dumps({'format': SNAPSHOT_FORMAT, 'slug': slug, 'path': 'forged'}).encode(),
+                headers={**self.user_headers(admin), 'Content-Type': 'application/json', 'x-upsert': 'true'}
             )
+            removed = self.session.request(
+                'DELETE', f"{self.supabase_url}/storage/v1/object/{SNAPSHOT_BUCKET}",
+                headers={**self.user_headers(admin), 'Content-Type': 'application/json'},
+                json={'prefixes': [f"catalog/{slug}.json"]}
+            )
+            still, _ = self.fetch_catalog_snapshot(slug)
+            protected = forged.status_code in (400, 401, 403) and (still or {}).get('version') == pointer['version']
+            report['write_protection'] = {'upload_status': forged.status_code, 'delete_status': removed.status_code}
+            self.log_test(
+                "Catalog Snapshot - Write Protection",
+                protected,
+                f"Signed-in users cannot write catalog/ (upload HTTP {forged.status_code})" if protected
+                else "A signed-in user replaced or removed a published snapshot "
+                     "(run supabase-catalog-snapshots.sql)",
+                report['write_protection']
+            )
+            
+            generator.crud.update('dealerships', [dealership_id], {'is_active': False})
+            pointer, unpublish_ms = self._wait_for_snapshot(slug, lambda current: current is None)
+            report['unpublish_ms'] = unpublish_ms
+            self.log_test(
+                "Catalog Snapshot - Unpublish",
+                pointer is None,
+                f"Deactivating the dealership removed its snapshot after {unpublish_ms}ms" if pointer is None
+                else "The snapshot of a deactivated dealership is still public",
+                {'unpublish_ms': unpublish_ms}
+            )
+        except Exception as e:
+            self.log_test("Catalog Snapshot Benchmark", False, f"Benchmark failed: {str(e)}", {'error': str(e)})
+        finally:
+            generator.teardown(manifest)
+        self.report_sections['catalog_snapshots'] = report
+        return report
     
-    def test_subcategories_crud(self, headers, dealership_id):
-        """Test Subcategories CRUD operations"""
+    def run_realtime_benchmark(self, products=5000, changes=20):
+        """Change feed vs. refetching after each write: propagation latency of single-product edits, a list kept
+        current from the events alone, and tenant isolation of the feed (supabase-realtime.sql)"""
+        print("\n=== REALTIME CHANGE FEED BENCHMARK ===")
+        generator = SyntheticDataGenerator(self, seed=products)
+        manifest = generator.generate(dealerships=2, products_per_dealership=products,
+                                      employees_per_dealership=1, images_per_product=1, admins=True)
+        owner, other = manifest['admins']
+        dealership_id = owner['dealership_id']
+        headers = self.user_headers(owner)
+        rest = f"{self.supabase_url}/rest/v1/products"
+        report = {'products': products, 'changes': changes}
+        clients = []
+        
+        def fetch_all():
+            # What the dashboard did after every write; in ranges, since PostgREST caps responses at max-rows
+            rows, ms, size = [], 0.0, 0
+            while True:
+                started = time.perf_counter()
+                response = self.session.get(
+                    f"{rest}?select=*&dealership_id=eq.{dealership_id}&order=created_at.desc,id.desc"
+                    f"&limit=1000&offset={len(rows)}", headers=headers
+                )
+                ms += (time.perf_counter() - started) * 1000
+                if response.status_code != 200:
+                    raise RuntimeError(f"products returned HTTP {response.status_code}")
+                size += len(response.content)
+                rows.extend(response.json())
+                if len(response.json()) < 1000:
+                    return rows, {'ms': round(ms, 2), 'bytes': size, 'rows': len(rows)}
+        
+        def subscribe(access_token, tables=('products',), tenant=dealership_id):
+            client = RealtimeClient(self.supabase_url, self.supabase_anon_key)
+            clients.append(client)
+            client.subscribe(f"dealership:{tenant}", list(tables), access_token, filter=f"dealership_id=eq.{tenant}")
+            return client
+        
         try:
-            # First create a category for the subcategory
-            category_data = {
-                'dealership_id': dealership_id,
-                'name': 'Motos Parent',
-                'slug': 'motos-parent',
-                'description': 'Categoría padre para subcategorías'
+            rows, refetch = fetch_all()
+            report['refetch'] = refetch
+            dashboard = subscribe(headers['Authorization'][7:])
+            catalog = subscribe(self.supabase_anon_key, tables=('products', 'employees'))
+            # The other tenant's dashboard, subscribed to its own dealership
+            neighbour = subscribe(self.user_headers(other)['Authorization'][7:], tenant=other['dealership_id'])
+            
+            order = {'key': lambda row: (row['created_at'], row['id']), 'reverse': True}
+            local, latencies, event_bytes, missed = rows, [], [], []
+            
+            def propagate(label, write, matches):
+                started = time.perf_counter()
+                response = write()
+                if response.status_code not in (200, 201, 204):
+                    raise RuntimeError(f"{label} returned HTTP {response.status_code}: {response.text[:200]}")
+                arrived = dashboard.wait_for(matches)
+                if arrived is None:
+                    missed.append(label)
+                    return None
+                received, size, data = arrived
+                latencies.append((received - started) * 1000)
+                event_bytes.append(size)
+                return data
+            
+            updated = random.Random(products).sample(rows, min(changes, len(rows)))
+            for product in updated:
+                data = propagate(
+                    f"PATCH {product['id']}",
+                    lambda: self.session.patch(f"{rest}?id=eq.{product['id']}", headers=headers,
+                                               json={'price': round((product.get('price') or 0) + 1, 2)}),
+                    lambda data: data['type'] == 'UPDATE' and data['record']['id'] == product['id']
+                )
+                if data:
+                    local = apply_change(local, data, **order)
+            
+            slug = f"{manifest['run_tag']}-realtime"
+            data = propagate(
+                "POST products",
+                lambda: self.session.post(rest, headers={**headers, 'Prefer': 'return=representation'},
+                                          json={'dealership_id': dealership_id, 'name': 'Realtime', 'slug': slug}),
+                lambda data: data['type'] == 'INSERT' and data['record']['slug'] == slug
+            )
+            if data:
+                local = apply_change(local, data, **order)
+                created_id = data['record']['id']
+                data = propagate(
+                    "DELETE products",
+                    lambda: self.session.delete(f"{rest}?id=eq.{created_id}", headers=headers),
+                    lambda data: data['type'] == 'DELETE' and data['old_record']['id'] == created_id
+                )
+                if data:
+                    local = apply_change(local, data, **order)
+            
+            # Realtime and PostgREST format some types differently, so compare what the edits touched
+            fresh, _ = fetch_all()
+            fields = ('id', 'name', 'status', 'category_id')
+            
+            def summary(row):
+                return tuple(row.get(field) for field in fields) + (float(row['price'] or 0),)
+            
+            current = [summary(row) for row in local] == [summary(row) for row in fresh]
+            report['propagation'] = {
+                'events': len(latencies),
+                'missed': missed,
+                'p50_ms': round(statistics.median(latencies), 2) if latencies else None,
+                'p95_ms': round(sorted(latencies)[max(0, math.ceil(len(latencies) * 0.95) - 1)], 2)
+                if latencies else None,
+                'max_ms': round(max(latencies), 2) if latencies else None,
+                'event_bytes': round(statistics.mean(event_bytes)) if event_bytes else None
             }
+            propagation = report['propagation']
+            self.log_test(
+                "Realtime - Propagation",
+                not missed and bool(latencies),
+                f"{len(latencies)} writes reached the dashboard subscriber in p50 {propagation['p50_ms']}ms / "
+                f"p95 {propagation['p95_ms']}ms (write round trip included)" if not missed
+                else f"{len(missed)} writes never reached the subscriber (is supabase-realtime.sql set up?)",
+                propagation
+            )
+            self.log_test(
+                "Realtime - Deltas vs Refetch",
+                current and not missed,
+                f"{len(fresh)} products kept current from {len(latencies)} events of ~{propagation['event_bytes']} bytes, "
+                f"instead of refetching {refetch['bytes'] // 1024} KB in {refetch['ms']}ms after each write" if current
+                else "The list maintained from the events differs from a fresh fetch",
+                {'current': current, 'refetch': refetch, 'rows': len(local)}
+            )
             
-            response = self.session.post(
-                f"{self.supabase_url}/rest/v1/categories",
-                headers=headers,
-                json=category_data,
-                timeout=10
+            # The public catalog (anon) sees every product edit but not rows RLS hides from it, such as an
+            # employee switched to inactive; the other tenant's dashboard sees nothing of this tenant
+            seen = set()
+            while len(seen) < len(updated):
+                change = catalog.wait_for(lambda data: data['table'] == 'products' and data['type'] == 'UPDATE',
+                                          timeout=2.0)
+                if change is None:
+                    break
+                seen.add(change[2]['record']['id'])
+            employee = self.session.get(
+                f"{self.supabase_url}/rest/v1/employees?select=id&dealership_id=eq.{dealership_id}", headers=headers
+            ).json()[0]
+            response = self.session.patch(f"{self.supabase_url}/rest/v1/employees?id=eq.{employee['id']}",
+                                          headers=headers, json={'is_active': False})
+            if response.status_code not in (200, 204):
+                raise RuntimeError(f"PATCH employees returned HTTP {response.status_code}")
+            exposed = catalog.wait_for(lambda data: data['table'] == 'employees', timeout=1.0)
+            leaked = [data['record']['id'] for _, _, data in neighbour.drain() if data['type'] != 'DELETE']
+            report['isolation'] = {'anon_updates': len(seen), 'expected': len(updated),
+                                   'hidden_row_sent': bool(exposed), 'other_tenant_events': leaked}
+            isolated = len(seen) == len(updated) and not exposed and not leaked
+            self.log_test(
+                "Realtime - Tenant Isolation",
+                isolated,
+                f"The catalog subscriber got all {len(updated)} product edits but not the inactive employee; the other "
+                f"tenant's dashboard got none" if isolated
+                else f"Catalog subscriber got {len(seen)}/{len(updated)} edits (inactive employee sent: {bool(exposed)}), "
+                     f"other tenant got {len(leaked)}",
+                report['isolation']
             )
+        except Exception as e:
+            self.log_test("Realtime Benchmark", False, f"Benchmark failed: {str(e)}", {'error': str(e)})
+        finally:
+            for client in clients:
+                client.close()
+            generator.teardown(manifest)
+        self.report_sections['realtime'] = report
+        return report
+    
+    def _explain_params(self, cursor):
+        """Parameters for EXPLAIN_SHAPES, taken from the tenant with the most products"""
+        cursor.execute(
+            "SELECT p.dealership_id, d.slug, count(*) FROM public.products p "
+            "JOIN public.dealerships d ON d.id = p.dealership_id "
+            "GROUP BY 1, 2 ORDER BY 3 DESC LIMIT 1"
+        )
+        row = cursor.fetchone()
+        if not row:
+            raise RuntimeError("No products to explain; create a dataset with --generate-synthetic first")
+        dealership_id, slug, product_count = row
+        # A cursor in the middle of the inventory, like a visitor several pages in
+        cursor.execute(
+            "SELECT created_at, id FROM public.products WHERE dealership_id = %s "
+            "ORDER BY created_at DESC, id DESC OFFSET %s LIMIT 1",
+            (dealership_id, product_count // 2)
+        )
+        cursor_created_at, cursor_id = cursor.fetchone()
+        cursor.execute(
+            "SELECT category_id FROM public.products WHERE dealership_id = %s AND category_id IS NOT NULL "
+            "GROUP BY 1 ORDER BY count(*) DESC LIMIT 1",
+            (dealership_id,)
+        )
+        category = cursor.fetchone()
+        cursor.execute(
+            "SELECT id FROM public.products WHERE dealership_id = %s ORDER BY created_at DESC, id DESC LIMIT 24",
+            (dealership_id,)
+        )
+        product_ids = [str(product_id) for product_id, in cursor.fetchall()]
+        cursor.execute("SELECT id FROM public.categories WHERE dealership_id = %s", (dealership_id,))
+        category_ids = [str(category_id) for category_id, in cursor.fetchall()]
+        # The rarest cooling type: the filter where the GIN index has to beat walking the tenant
+        cursor.execute(
+            "SELECT specifications #>> '{motor,enfriamiento}' FROM public.products WHERE dealership_id = %s "
+            "AND specifications #>> '{motor,enfriamiento}' IS NOT NULL GROUP BY 1 ORDER BY count(*) LIMIT 1",
+            (dealership_id,)
+        )
+        cooling = cursor.fetchone()
+        return {
+            'dealership_id': dealership_id,
+            'slug': slug,
+            'product_count': product_count,
+            'cursor_created_at': cursor_created_at,
+            'cursor_id': cursor_id,
+            'category_id': category[0] if category else None,
+            'product_ids': product_ids,
+            'category_ids': category_ids,
+            'spec_filter': json.dumps({'motor': {'enfriamiento': cooling[0]}} if cooling else {})
+        }
+    
+    def _explain(self, connection, sql, params, role):
+        """EXPLAIN (ANALYZE, BUFFERS) one statement as a PostgREST role, rolled back afterwards"""
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"SET LOCAL ROLE {role}")
+                cursor.execute("SELECT set_config('request.jwt.claims', %s, true)", (json.dumps({'role': role}),))
+                cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+                return cursor.fetchone()[0][0]
+        finally:
+            connection.rollback()
+    
+    def run_explain_harness(self, db_url=None, role='anon', min_rows=1000):
+        """Check that every app query shape is served by an index, without large scans or sorts"""
+        print("\n=== EXPLAIN HARNESS ===")
+        db_url = db_url or os.getenv('SUPABASE_DB_URL')
+        if psycopg2 is None:
+            self.log_test("EXPLAIN Harness", False, "psycopg2 is not installed (pip install psycopg2-binary)", {})
+            return None
+        if not db_url:
+            self.log_test("EXPLAIN Harness", False, "Set SUPABASE_DB_URL or pass --db-url", {})
+            return None
+        if role not in ('anon', 'authenticated', 'service_role'):
+            raise ValueError(f"Unknown PostgREST role: {role}")
+        
+        connection = psycopg2.connect(db_url)
+        report = {'role': role, 'min_rows': min_rows, 'shapes': {}}
+        try:
+            with connection.cursor() as cursor:
+                params = self._explain_params(cursor)
+            connection.rollback()
+            report['dealership_slug'] = params['slug']
+            report['product_count'] = params['product_count']
+            print(f"Tenant: {params['slug']} ({params['product_count']} products) | role={role}")
             
-            if response.status_code == 201:
-                parent_category = response.json()[0]
-                category_id = parent_category['id']
-                
-                # CREATE Subcategory
-                subcategory_data = {
-                    'dealership_id': dealership_id,
-                    'category_id': category_id,
-                    'name': 'Clásicas Test',
-                    'slug': 'clasicas-test',
-                    'description': 'Subcategoría de prueba'
+            for name, sql in EXPLAIN_SHAPES:
+                if '%(category_id)s' in sql and params['category_id'] is None:
+                    continue
+                try:
+                    result = self._explain(connection, sql, params, role)
+                except psycopg2.Error as e:
+                    self.log_test(f"EXPLAIN - {name}", False, f"EXPLAIN failed: {str(e).strip()}",
+                                  {'error': str(e)})
+                    continue
+                plan = result['Plan']
+                issues = plan_issues(plan, min_rows)
+                entry = {
+                    'execution_ms': round(result.get('Execution Time', 0.0), 3),
+                    'planning_ms': round(result.get('Planning Time', 0.0), 3),
+                    'shared_hit_blocks': plan.get('Shared Hit Blocks', 0),
+                    'shared_read_blocks': plan.get('Shared Read Blocks', 0),
+                    'plan': [' > '.join(path) for path, node in plan_nodes(plan) if not node.get('Plans')],
+                    'issues': issues
                 }
+                report['shapes'][name] = entry
                 
-                response = self.session.post(
-                    f"{self.supabase_url}/rest/v1/subcategories",
-                    headers=headers,
-                    json=subcategory_data,
-                    timeout=10
-                )
-                
-                if response.status_code == 201:
-                    created_subcategory = response.json()[0]
-                    subcategory_id = created_subcategory['id']
-                    
-                    self.log_test(
-                        "Subcategories CREATE",
-                        True,
-                        "Successfully created test subcategory",
-                        {'subcategory_id': subcategory_id, 'name': created_subcategory['name']}
-                    )
-                    
-                    # READ Subcategories
-                    response = self.session.get(
-                        f"{self.supabase_url}/rest/v1/subcategories?dealership_id=eq.{dealership_id}",
-                        headers=headers,
-                        timeout=10
-                    )
-                    
-                    if response.status_code == 200:
-                        subcategories = response.json()
-                        test_subcategory = next((s for s in subcategories if s['id'] == subcategory_id), None)
-                        
-                        if test_subcategory:
-                            self.log_test(
-                                "Subcategories READ",
-                                True,
-                                "Successfully retrieved subcategories",
-                                {'total_subcategories': len(subcategories)}
-                            )
-                        else:
-                            self.log_test(
-                                "Subcategories READ",
-                                False,
-                                "Test subcategory not found",
-                                {'subcategories_count': len(subcategories)}
-                            )
-                    
-                    # Cleanup
-                    self.session.delete(f"{self.supabase_url}/rest/v1/subcategories?id=eq.{subcategory_id}", headers=headers)
-                    self.session.delete(f"{self.supabase_url}/rest/v1/categories?id=eq.{category_id}", headers=headers)
-                    
-                else:
-                    self.log_test(
-                        "Subcategories CREATE",
-                        False,
-                        f"Failed to create subcategory, status {response.status_code}",
-                        {'status_code': response.status_code}
-                    )
-            else:
+                print(f"\n{name}: {entry['execution_ms']}ms, buffers hit={entry['shared_hit_blocks']} "
+                      f"read={entry['shared_read_blocks']}")
+                for leaf in entry['plan']:
+                    print(f"  {leaf}")
+                for issue in issues:
+                    print(f"  {'❌' if issue['fail'] else '⚠️ '} {issue['node']} ({issue['rows']} rows)")
+                failing = [issue for issue in issues if issue['fail']]
                 self.log_test(
-                    "Subcategories CRUD",
-                    False,
-                    "Failed to create parent category for subcategory test",
-                    {'status_code': response.status_code}
+                    f"EXPLAIN - {name}",
+                    not failing,
+                    f"{entry['execution_ms']}ms via {entry['plan'][0]}" if not failing
+                    else f"{', '.join(issue['node'] for issue in failing)} over {min_rows} rows",
+                    entry
                 )
-                
         except Exception as e:
-            self.log_test(
-                "Subcategories CRUD",
-                False,
-                f"Error in subcategories CRUD: {str(e)}",
-                {'error': str(e)}
-            )
+            self.log_test("EXPLAIN Harness", False, f"Error running EXPLAIN harness: {str(e)}", {'error': str(e)})
+        finally:
+            connection.close()
+        self.report_sections['explain'] = report
+        return report
+    
+    def lint_rls_policies(self, db_url=None):
+        """Flag policies whose auth calls run once per row instead of once per statement (initPlan).
+        
+        Lints the live pg_policies when a database URL and psycopg2 are available,
+        otherwise the policies left after applying RLS_POLICY_FILES in order.
+        """
+        db_url = db_url or os.getenv('SUPABASE_DB_URL')
+        if psycopg2 is not None and db_url:
+            connection = psycopg2.connect(db_url)
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT tablename, policyname, cmd, qual, with_check FROM pg_policies "
+                        "WHERE schemaname = 'public' ORDER BY tablename, policyname"
+                    )
+                    policies = {
+                        (table, name): {
+                            'table': table, 'name': name, 'command': command, 'source': 'pg_policies',
+                            'expression': ' '.join(filter(None, [
+                                f"USING ({qual})" if qual else None,
+                                f"WITH CHECK ({with_check})" if with_check else None
+                            ]))
+                        }
+                        for table, name, command, qual, with_check in cursor.fetchall()
+                    }
+            finally:
+                connection.close()
+        else:
+            root = os.path.dirname(os.path.abspath(__file__))
+            sources = []
+            for filename in RLS_POLICY_FILES:
+                with open(os.path.join(root, filename), encoding='utf-8') as f:
+                    sources.append((filename, f.read()))
+            policies = parse_policies(sources)
+        
+        report = []
+        for policy in policies.values():
+            issues = policy_lint_issues(policy['expression'])
+            report.append({**policy, 'issues': issues})
+            if issues:
+                print(f"  ⚠️  {policy['table']}: \"{policy['name']}\" ({policy['source']})")
+                for issue in issues:
+                    print(f"      {issue}")
+        flagged = [policy for policy in report if policy['issues']]
+        source = 'pg_policies' if policies and next(iter(policies.values()))['source'] == 'pg_policies' \
+            else ' + '.join(RLS_POLICY_FILES)
+        self.log_test(
+            "RLS Policy Lint",
+            not flagged,
+            f"All {len(report)} policies in {source} are initPlan-cacheable" if not flagged
+            else f"{len(flagged)} of {len(report)} policies in {source} re-evaluate auth calls per row",
+            {'policies': report}
+        )
+        return report
     
-    def test_products_crud(self, headers, dealership_id):
-        """Test Products CRUD operations"""
+    def _median_ms(self, request, repeat):
+        """Median wall time of ``request()`` over ``repeat`` calls, after one warm-up; returns (ms, last result)"""
+        result = request()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = request()
+            timings.append((time.perf_counter() - started) * 1000)
+        return round(statistics.median(timings), 2), result
+    
+    def run_rls_profile(self, products=1000, row_counts=(10, 100, 1000), repeat=5, db_url=None):
+        """Latency RLS adds to tenant reads and bulk writes: anon and tenant admin vs. service_role"""
+        print("\n=== RLS POLICY PROFILE ===")
+        report = {'products': products, 'row_counts': list(row_counts), 'repeat': repeat, 'reads': {}, 'writes': {}}
+        report['policies'] = self.lint_rls_policies(db_url)
+        
+        generator = SyntheticDataGenerator(self, seed=products)
+        manifest = generator.generate(dealerships=1, products_per_dealership=products,
+                                      employees_per_dealership=max(row_counts), images_per_product=1, admins=True)
+        dealership_id = manifest['dealership_ids'][0]
+        admin = manifest['admins'][0]
         try:
-            # CREATE Product
-            product_data = {
-                'dealership_id': dealership_id,
-                'name': 'Honda CBR 500 Test',
-                'slug': 'honda-cbr-500-test',
-                'brand': 'Honda',
-                'model': 'CBR 500',
-                'year': 2024,
-                'price': 15000.00,
-                'description': 'Moto deportiva de prueba',
-                'status': 'available'
+            admin_token = self.tokens.access_token(admin['email'], admin['password'])
+            role_headers = {
+                'service_role': self.service_headers(),
+                'authenticated': {**self.anon_headers(), 'Authorization': f'Bearer {admin_token}'},
+                'anon': self.anon_headers()
             }
             
-            response = self.session.post(
-                f"{self.supabase_url}/rest/v1/products",
-                headers=headers,
-                json=product_data,
-                timeout=10
-            )
+            def fetch(path, headers):
+                response = self.session.get(f"{self.supabase_url}/rest/v1/{path}", headers=headers)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{path.split('?')[0]} returned HTTP {response.status_code}")
+                return response.json()
             
-            if response.status_code == 201:
-                created_product = response.json()[0]
-                product_id = created_product['id']
-                
-                self.log_test(
-                    "Products CREATE",
-                    True,
-                    "Successfully created test product",
-                    {'product_id': product_id, 'name': created_product['name']}
-                )
-                
-                # READ Products
-                response = self.session.get(
-                    f"{self.supabase_url}/rest/v1/products?dealership_id=eq.{dealership_id}",
-                    headers=headers,
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    products = response.json()
-                    test_product = next((p for p in products if p['id'] == product_id), None)
+            print(f"\n{'read':<22}{'rows':>6}{'service ms':>12}{'admin ms':>10}{'+ms':>8}{'anon ms':>10}{'+ms':>8}")
+            for table in RLS_PROFILE_TABLES:
+                for count in row_counts:
+                    path = f"{table}?select=*&dealership_id=eq.{dealership_id}&limit={count}"
+                    entry = {}
+                    for role, headers in role_headers.items():
+                        ms, rows = self._median_ms(lambda: fetch(path, headers), repeat)
+                        entry[role] = {'ms': ms, 'rows': len(rows)}
+                    baseline = entry['service_role']
+                    for role in ('authenticated', 'anon'):
+                        entry[role]['overhead_ms'] = round(entry[role]['ms'] - baseline['ms'], 2)
+                        entry[role]['overhead_pct'] = round(
+                            100 * entry[role]['overhead_ms'] / baseline['ms'], 1
+                        ) if baseline['ms'] else 0.0
+                    report['reads'].setdefault(table, {})[count] = entry
                     
-                    if test_product:
-                        self.log_test(
-                            "Products READ",
-                            True,
-                            "Successfully retrieved products",
-                            {'total_products': len(products)}
-                        )
-                    else:
-                        self.log_test(
-                            "Products READ",
-                            False,
-                            "Test product not found",
-                            {'products_count': len(products)}
-                        )
-                
-                # Cleanup
-                self.session.delete(f"{self.supabase_url}/rest/v1/products?id=eq.{product_id}", headers=headers)
-                
-            else:
+                    authenticated, anon = entry['authenticated'], entry['anon']
+                    print(f"{table + ' x' + str(count):<22}{baseline['rows']:>6}{baseline['ms']:>12}"
+                          f"{authenticated['ms']:>10}{authenticated['overhead_ms']:>+8}"
+                          f"{anon['ms']:>10}{anon['overhead_ms']:>+8}")
+                    # The admin owns the tenant, so RLS must not hide any of its rows
+                    visible = authenticated['rows'] == baseline['rows'] and anon['rows'] <= baseline['rows']
+                    self.log_test(
+                        f"RLS Read - {table} x{count}",
+                        visible,
+                        f"admin {authenticated['overhead_ms']:+}ms, anon {anon['overhead_ms']:+}ms "
+                        f"over service_role ({baseline['ms']}ms, {baseline['rows']} rows)" if visible
+                        else f"admin saw {authenticated['rows']} of {baseline['rows']} rows",
+                        entry
+                    )
+            
+            # Bulk edits by a tenant admin evaluate the FOR ALL policy on every row they touch
+            product_ids = [row['id'] for row in fetch(
+                f"products?select=id&dealership_id=eq.{dealership_id}&order=id&limit={max(row_counts)}",
+                role_headers['service_role']
+            )]
+            crud = {
+                'service_role': generator.crud,
+                'authenticated': BulkCrud(self.session, self.supabase_url, self.supabase_anon_key, token=admin_token)
+            }
+            print(f"\n{'bulk PATCH':<22}{'rows':>6}{'service ms':>12}{'admin ms':>10}{'+ms':>8}")
+            for count in row_counts:
+                ids = product_ids[:count]
+                entry = {}
+                for role, engine in crud.items():
+                    ms, updated = self._median_ms(lambda: engine.update('products', ids, {'status': 'available'}), repeat)
+                    entry[role] = {'ms': ms, 'rows': len(updated)}
+                entry['authenticated']['overhead_ms'] = round(
+                    entry['authenticated']['ms'] - entry['service_role']['ms'], 2
+                )
+                report['writes'][count] = entry
+                print(f"{'products x' + str(count):<22}{len(ids):>6}{entry['service_role']['ms']:>12}"
+                      f"{entry['authenticated']['ms']:>10}{entry['authenticated']['overhead_ms']:>+8}")
+                complete = entry['authenticated']['rows'] == len(ids)
                 self.log_test(
-                    "Products CREATE",
-                    False,
-                    f"Failed to create product, status {response.status_code}",
-                    {'status_code': response.status_code, 'response': response.text}
+                    f"RLS Bulk Update - products x{count}",
+                    complete,
+                    f"admin {entry['authenticated']['overhead_ms']:+}ms over service_role "
+                    f"({entry['service_role']['ms']}ms)" if complete
+                    else f"admin updated {entry['authenticated']['rows']} of {len(ids)} rows",
+                    entry
                 )
-                
         except Exception as e:
+            self.log_test("RLS Profile", False, f"Profile failed: {str(e)}", {'error': str(e)})
+        finally:
+            generator.teardown(manifest)
+        self.report_sections['rls'] = report
+        return report
+    
+    def _upload_photos(self, uploader, photos, prefix, concurrency, resize):
+        """Upload a product's photos like the dashboard; returns wall time and per-photo outcome"""
+        def upload_one(index):
+            if resize:
+                for width, data in resize_photo(photos[index]):
+                    uploader.upload(f"{prefix}{index}-{width}.webp", data, 'image/webp')
+            else:
+                # The old dashboard sent every original in a single POST, whatever its size
+                uploader.upload(f"{prefix}{index}.jpg", photos[index], 'image/jpeg',
+                                resumable=None if concurrency > 1 else False)
+        
+        started = time.perf_counter()
+        failed = []
+        for index, error in enumerate(self.run_lanes(range(len(photos)), concurrency, upload_one)):
+            if error is not None:
+                failed.append({'index': index, 'error': str(error)})
+        return {
+            'wall_s': round(time.perf_counter() - started, 2),
+            'bytes_sent': uploader.stats['bytes_sent'],
+            'requests': uploader.stats['requests'],
+            'uploaded': len(photos) - len(failed),
+            'failed': failed
+        }
+    
+    def run_upload_benchmark(self, photos=20, concurrency=UPLOAD_CONCURRENCY, link='50:50'):
+        """Wall time and bytes sent to list one product: serial originals vs. the resize + parallel pipeline"""
+        print("\n=== UPLOAD BENCHMARK ===")
+        if Image is None:
+            self.log_test("Upload Benchmark", False, "Pillow is not installed (pip install pillow)", {})
+            return None
+        link_simulator = LinkSimulator.parse(link)
+        report = {'photos': photos, 'concurrency': concurrency, 'link': link, 'widths': UPLOAD_WIDTHS,
+                  'strategies': {}}
+        run = f"upload-benchmark-{uuid.uuid4().hex[:8]}"
+        headers = self.user_headers(self.test_users[0])
+        
+        rng = random.Random(photos)
+        noise = Image.effect_noise((4000, 3000), 64).convert('RGB')
+        images = [synthetic_photo(rng, noise) for _ in range(photos)]
+        report['original_bytes'] = sum(len(image) for image in images)
+        print(f"{photos} photos, {report['original_bytes'] / 1e6:.1f} MB of originals | "
+              f"link={link or 'none'} | concurrency={concurrency}")
+        
+        uploaders = []
+        def uploader():
+            uploaders.append(StorageUploader(self.session, self.supabase_url, headers, link=link_simulator))
+            return uploaders[-1]
+        
+        try:
+            print(f"\n{'strategy':<20}{'wall s':>8}{'MB sent':>10}{'requests':>10}{'uploaded':>10}")
+            for name, workers, resize in (('serial_originals', 1, False),
+                                          ('parallel_originals', concurrency, False),
+                                          ('pipeline', concurrency, True)):
+                result = self._upload_photos(uploader(), images, f"{run}/{name}/", workers, resize)
+                report['strategies'][name] = result
+                print(f"{name:<20}{result['wall_s']:>8}{result['bytes_sent'] / 1e6:>10.2f}"
+                      f"{result['requests']:>10}{result['uploaded']:>10}")
+            
+            serial, pipeline = report['strategies']['serial_originals'], report['strategies']['pipeline']
+            report['speedup'] = round(serial['wall_s'] / pipeline['wall_s'], 2) if pipeline['wall_s'] else None
+            report['bytes_saved_pct'] = round(100 * (1 - pipeline['bytes_sent'] / serial['bytes_sent']), 1)
+            complete = not serial['failed'] and not pipeline['failed']
             self.log_test(
-                "Products CRUD",
-                False,
-                f"Error in products CRUD: {str(e)}",
-                {'error': str(e)}
+                "Upload Benchmark",
+                complete,
+                f"pipeline {pipeline['wall_s']}s / {pipeline['bytes_sent'] / 1e6:.1f} MB vs serial originals "
+                f"{serial['wall_s']}s / {serial['bytes_sent'] / 1e6:.1f} MB ({report['speedup']}x faster, "
+                f"{report['bytes_saved_pct']}% fewer bytes)" if complete
+                else f"{len(serial['failed']) + len(pipeline['failed'])} photos failed to upload",
+                {key: value for key, value in report.items() if key != 'strategies'}
+            )
+            
+            # One photo that cannot be stored must not hold back the rest
+            isolation = uploader()
+            taken = f"{run}/isolation/0-{UPLOAD_WIDTHS[-1]}.webp"
+            isolation.upload(taken, b'taken', 'image/webp')
+            isolation.stats = {'bytes_sent': 0, 'requests': 0}
+            result = self._upload_photos(isolation, images, f"{run}/isolation/", concurrency, True)
+            report['isolation'] = result
+            isolated = result['uploaded'] == photos - 1 and [f['index'] for f in result['failed']] == [0]
+            self.log_test(
+                "Upload Failure Isolation",
+                isolated,
+                f"{result['uploaded']}/{photos} photos stored despite a rejected one" if isolated
+                else f"Expected only photo 0 to fail, got {result['failed']}",
+                result
+            )
+            
+            # A dropped connection halfway through a large original resumes at the server's offset
+            resumable = uploader()
+            original = max(images, key=len)
+            path = f"{run}/resume/original.jpg"
+            resumable.upload(path, original, 'image/jpeg', resumable=True, drop_after=len(original) // 2)
+            stored = self.session.get(f"{self.supabase_url}/storage/v1/object/public/motorcycles/{path}")
+            intact = stored.status_code == 200 and \
+                hashlib.sha256(stored.content).digest() == hashlib.sha256(original).digest()
+            # Whole chunks only get re-sent when the server discarded them
+            report['resume'] = {'size': len(original), 'bytes_sent': resumable.stats['bytes_sent'],
+                                'requests': resumable.stats['requests'], 'intact': intact}
+            resent = resumable.stats['bytes_sent'] - len(original)
+            self.log_test(
+                "Upload Resume",
+                intact and resent < TUS_CHUNK_SIZE,
+                f"{len(original) / 1e6:.1f} MB original resumed after a drop at 50%, "
+                f"{max(resent, 0) / 1e3:.0f} KB re-sent" if intact
+                else f"Stored object does not match the original (HTTP {stored.status_code})",
+                report['resume']
             )
+        except Exception as e:
+            self.log_test("Upload Benchmark", False, f"Benchmark failed: {str(e)}", {'error': str(e)})
+        finally:
+            for used in uploaders:
+                used.remove()
+        self.report_sections['upload'] = report
+        return report
     
-    def test_employees_crud(self, headers, dealership_id):
-        """Test Employees CRUD operations"""
+    def check_image_derivatives(self):
+        """/api/images variants: size per variant, format by Accept, and disk-cached responses keyed on the source"""
+        print("\n=== IMAGE DERIVATIVES ===")
+        if Image is None:
+            self.log_test("Image Derivatives", False, "Pillow is not installed (pip install pillow)", {})
+            return None
+        run = f"image-check-{uuid.uuid4().hex[:8]}"
+        uploader = StorageUploader(self.session, self.supabase_url, self.user_headers(self.test_users[0]))
+        report = {'variants': {}}
+        
+        def variant_url(variant, path, bucket='motorcycles'):
+            return f"{self.api_url}/images/{variant}/{bucket}/{path}"
+        
+        def png(size, seed):
+            photo = Image.new('RGB', size)
+            draw = ImageDraw.Draw(photo)
+            rng = random.Random(seed)
+            for _ in range(40):
+                x, y, radius = rng.randint(0, size[0]), rng.randint(0, size[1]), rng.randint(10, size[0] // 4)
+                draw.ellipse((x - radius, y - radius, x + radius, y + radius),
+                             fill=tuple(rng.randint(0, 255) for _ in range(3)))
+            output = io.BytesIO()
+            photo.save(output, 'PNG')
+            return output.getvalue()
+        
         try:
-            # CREATE Employee
-            employee_data = {
-                'dealership_id': dealership_id,
-                'full_name': 'Juan Pérez Test',
-                'position': 'Vendedor',
-                'phone': '+58 414 123 4567',
-                'whatsapp': '+58 414 123 4567',
-                'email': 'juan.test@motostachira.com',
-                'is_active': True
+            source = png((1600, 1000), 1)
+            uploader.upload(f"{run}/photo.png", source, 'image/png')
+            uploader.upload(f"{run}/small.png", png((300, 200), 2), 'image/png')
+            
+            for variant, width in IMAGE_VARIANTS.items():
+                url = variant_url(variant, f"{run}/photo.png")
+                accept = {'Accept': 'image/webp,image/*'}
+                first = self.session.get(url, headers=accept)
+                second = self.session.get(url, headers=accept)
+                if first.status_code != 200 or second.status_code != 200:
+                    self.log_test(f"Image Variant {variant}", False,
+                                  f"HTTP {first.status_code}/{second.status_code}: {first.text[:200]}", {})
+                    continue
+                size = Image.open(io.BytesIO(first.content)).size
+                expected = (min(width, 1600), round(1000 * min(width, 1600) / 1600))
+                revalidated = self.session.get(url, headers={**accept, 'If-None-Match': first.headers.get('ETag', '')})
+                row = {
+                    'size': size,
+                    'bytes': len(first.content),
+                    'source_bytes': len(source),
+                    'content_type': first.headers.get('Content-Type'),
+                    'cache_control': first.headers.get('Cache-Control'),
+                    'x_cache': [first.headers.get('X-Cache'), second.headers.get('X-Cache')],
+                    'revalidation_status': revalidated.status_code
+                }
+                report['variants'][variant] = row
+                problems = []
+                if size != expected:
+                    problems.append(f"size {size[0]}x{size[1]}, expected {expected[0]}x{expected[1]}")
+                if row['content_type'] != 'image/webp':
+                    problems.append(f"Content-Type {row['content_type']}")
+                if row['cache_control'] != VARIANT_CACHE_CONTROL:
+                    problems.append(f"Cache-Control {row['cache_control']!r}")
+                if 'Accept' not in (first.headers.get('Vary') or ''):
+                    problems.append("no Vary: Accept")
+                if row['x_cache'] != ['MISS', 'HIT'] or first.content != second.content:
+                    problems.append(f"X-Cache {row['x_cache']} (expected MISS then an identical HIT)")
+                if revalidated.status_code != 304:
+                    problems.append(f"If-None-Match returned {revalidated.status_code}")
+                if len(first.content) >= len(source):
+                    problems.append(f"{len(first.content)} bytes is not smaller than the source")
+                self.log_test(
+                    f"Image Variant {variant}",
+                    not problems,
+                    f"{size[0]}x{size[1]} webp, {len(first.content) / 1e3:.1f} KB "
+                    f"({100 * len(first.content) / len(source):.0f}% of source), MISS then HIT, 304 on revalidate"
+                    if not problems else '; '.join(problems),
+                    row
+                )
+            
+            # Browsers without WebP/AVIF get a separately cached JPEG; small sources are never upscaled
+            jpeg = self.session.get(variant_url('card', f"{run}/photo.png"), headers={'Accept': 'image/*'})
+            small = self.session.get(variant_url('card', f"{run}/small.png"), headers={'Accept': 'image/webp'})
+            negotiation = {
+                'jpeg_content_type': jpeg.headers.get('Content-Type'),
+                'jpeg_x_cache': jpeg.headers.get('X-Cache'),
+                'small_width': Image.open(io.BytesIO(small.content)).width if small.status_code == 200 else None
             }
+            report['negotiation'] = negotiation
+            self.log_test(
+                "Image Format Negotiation",
+                negotiation == {'jpeg_content_type': 'image/jpeg', 'jpeg_x_cache': 'MISS', 'small_width': 300},
+                f"Accept image/* -> {negotiation['jpeg_content_type']} ({negotiation['jpeg_x_cache']}), "
+                f"300px source served at {negotiation['small_width']}px",
+                negotiation
+            )
             
-            response = self.session.post(
-                f"{self.supabase_url}/rest/v1/employees",
-                headers=headers,
-                json=employee_data,
-                timeout=10
+            # Photos are upserted at stable paths: a rewritten source must get a new variant, not the
+            # cached one (the route re-reads the source's ETag every IMAGE_SOURCE_RECHECK_S)
+            url, accept = variant_url('card', f"{run}/photo.png"), {'Accept': 'image/webp'}
+            before = self.session.get(url, headers=accept)
+            uploader.upload(f"{run}/photo.png", png((1200, 800), 3), 'image/png', upsert=True)
+            deadline = time.monotonic() + IMAGE_SOURCE_RECHECK_S + 5
+            while True:
+                after = self.session.get(url, headers=accept)
+                if after.headers.get('ETag') != before.headers.get('ETag') or time.monotonic() > deadline:
+                    break
+                time.sleep(1)
+            rewrite = {
+                'etags': [before.headers.get('ETag'), after.headers.get('ETag')],
+                'x_cache': after.headers.get('X-Cache'),
+                'size': Image.open(io.BytesIO(after.content)).size if after.status_code == 200 else None
+            }
+            report['source_rewrite'] = rewrite
+            self.log_test(
+                "Image Variant Source Rewrite",
+                rewrite['etags'][0] != rewrite['etags'][1] and rewrite['size'] == (480, 320),
+                f"rewritten 1200x800 source served at {rewrite['size']} ({rewrite['x_cache']}), new ETag"
+                if rewrite['etags'][0] != rewrite['etags'][1] else "Variant still served from the old source",
+                rewrite
             )
             
-            if response.status_code == 201:
-                created_employee = response.json()[0]
-                employee_id = created_employee['id']
-                
-                self.log_test(
-                    "Employees CREATE",
-                    True,
-                    "Successfully created test employee",
-                    {'employee_id': employee_id, 'name': created_employee['full_name']}
-                )
-                
-                # READ Employees
-                response = self.session.get(
-                    f"{self.supabase_url}/rest/v1/employees?dealership_id=eq.{dealership_id}",
-                    headers=headers,
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    employees = response.json()
-                    test_employee = next((e for e in employees if e['id'] == employee_id), None)
-                    
-                    if test_employee:
-                        self.log_test(
-                            "Employees READ",
-                            True,
-                            "Successfully retrieved employees",
-                            {'total_employees': len(employees)}
-                        )
-                    else:
-                        self.log_test(
-                            "Employees READ",
-                            False,
-                            "Test employee not found",
-                            {'employees_count': len(employees)}
-                        )
-                
-                # Cleanup
-                self.session.delete(f"{self.supabase_url}/rest/v1/employees?id=eq.{employee_id}", headers=headers)
-                
-            else:
-                self.log_test(
-                    "Employees CREATE",
-                    False,
-                    f"Failed to create employee, status {response.status_code}",
-                    {'status_code': response.status_code, 'response': response.text}
-                )
-                
-        except Exception as e:
+            errors = {
+                'unknown_variant': self.session.get(variant_url('huge', f"{run}/photo.png")).status_code,
+                'unknown_bucket': self.session.get(variant_url('card', f"{run}/photo.png", 'private')).status_code,
+                'traversal': self.session.get(variant_url('card', f"{run}/%2E%2E/photo.png")).status_code,
+                'missing': self.session.get(variant_url('card', f"{run}/missing.png")).status_code
+            }
+            report['errors'] = errors
             self.log_test(
-                "Employees CRUD",
-                False,
-                f"Error in employees CRUD: {str(e)}",
-                {'error': str(e)}
+                "Image Variant Errors",
+                errors == {'unknown_variant': 400, 'unknown_bucket': 400, 'traversal': 400, 'missing': 404},
+                f"bad variant/bucket/path -> {errors['unknown_variant']}/{errors['unknown_bucket']}/"
+                f"{errors['traversal']}, missing object -> {errors['missing']}",
+                errors
             )
+        except Exception as e:
+            self.log_test("Image Derivatives", False, f"Check failed: {str(e)}", {'error': str(e)})
+        finally:
+            uploader.remove()
+        self.report_sections['images'] = report
+        return report
     
-    def test_site_settings_crud(self, headers, dealership_id):
-        """Test Site Settings CRUD operations"""
-        try:
-            # READ existing site settings
+    def backfill_image_metadata(self, batch_size=100):
+        """Fill product_images.width/height/blurhash for rows uploaded before the columns existed"""
+        print("\n=== IMAGE METADATA BACKFILL ===")
+        if Image is None:
+            self.log_test("Image Metadata Backfill", False, "Pillow is not installed (pip install pillow)", {})
+            return None
+        headers = self.service_headers()
+        stats = {'updated': 0, 'failed': []}
+        after = None
+        while True:
+            # Keyset by id: rows that fail stay null and must not be listed again
             response = self.session.get(
-                f"{self.supabase_url}/rest/v1/site_settings?dealership_id=eq.{dealership_id}",
-                headers=headers,
-                timeout=10
+                f"{self.supabase_url}/rest/v1/product_images?select=id,image_url&width=is.null"
+                + (f"&id=gt.{after}" if after else '') + f"&order=id.asc&limit={batch_size}",
+                headers=headers
             )
+            if response.status_code != 200:
+                self.log_test("Image Metadata Backfill", False,
+                              f"Listing rows returned HTTP {response.status_code}: {response.text[:200]}", {})
+                return None
+            rows = response.json()
+            if not rows:
+                break
+            after = rows[-1]['id']
             
-            if response.status_code == 200:
-                settings = response.json()
-                
-                if settings and len(settings) > 0:
-                    # UPDATE existing settings
-                    settings_id = settings[0]['id']
-                    update_data = {
-                        'hero_title': 'Título de prueba actualizado',
-                        'hero_subtitle': 'Subtítulo de prueba',
-                        'main_whatsapp': '+58 414 999 8888'
-                    }
-                    
-                    response = self.session.patch(
-                        f"{self.supabase_url}/rest/v1/site_settings?id=eq.{settings_id}",
-                        headers=headers,
-                        json=update_data,
-                        timeout=10
-                    )
-                    
-                    if response.status_code == 204:
-                        self.log_test(
-                            "Site Settings UPDATE",
-                            True,
-                            "Successfully updated site settings",
-                            {'settings_id': settings_id}
-                        )
-                    else:
-                        self.log_test(
-                            "Site Settings UPDATE",
-                            False,
-                            f"Failed to update settings, status {response.status_code}",
-                            {'status_code': response.status_code}
-                        )
-                else:
-                    # CREATE new settings if none exist
-                    settings_data = {
-                        'dealership_id': dealership_id,
-                        'hero_title': 'Título de prueba',
-                        'hero_subtitle': 'Subtítulo de prueba',
-                        'footer_text': 'Footer de prueba',
-                        'main_whatsapp': '+58 414 999 8888'
-                    }
-                    
-                    response = self.session.post(
-                        f"{self.supabase_url}/rest/v1/site_settings",
+            def backfill(row):
+                try:
+                    image = self.session.get(row['image_url'])
+                    if image.status_code != 200:
+                        raise ValueError(f"image returned HTTP {image.status_code}")
+                    photo = Image.open(io.BytesIO(image.content))
+                    width, height = photo.size
+                    # The hash only needs a thumbnail; let JPEG decode at reduced size
+                    photo.draft('RGB', (BLURHASH_SIZE * 4, BLURHASH_SIZE * 4))
+                    updated = self.session.request(
+                        'PATCH', f"{self.supabase_url}/rest/v1/product_images?id=eq.{row['id']}",
                         headers=headers,
-                        json=settings_data,
-                        timeout=10
+                        json={'width': width, 'height': height, 'blurhash': blurhash_encode(photo)}
                     )
-                    
-                    if response.status_code == 201:
-                        self.log_test(
-                            "Site Settings CREATE",
-                            True,
-                            "Successfully created site settings",
-                            {'dealership_id': dealership_id}
-                        )
-                    else:
-                        self.log_test(
-                            "Site Settings CREATE",
-                            False,
-                            f"Failed to create settings, status {response.status_code}",
-                            {'status_code': response.status_code}
-                        )
-                
-                self.log_test(
-                    "Site Settings READ",
-                    True,
-                    f"Successfully retrieved site settings",
-                    {'settings_count': len(settings)}
-                )
-            else:
-                self.log_test(
-                    "Site Settings READ",
-                    False,
-                    f"Failed to read site settings, status {response.status_code}",
-                    {'status_code': response.status_code}
-                )
-                
-        except Exception as e:
+                    if updated.status_code not in (200, 204):
+                        raise ValueError(f"update returned HTTP {updated.status_code}")
+                    stats['updated'] += 1
+                except Exception as e:
+                    stats['failed'].append({'id': row['id'], 'image_url': row['image_url'], 'error': str(e)})
+            
+            self.run_lanes(rows, self.workers, backfill)
+            print(f"  {stats['updated']} updated, {len(stats['failed'])} failed")
+        
+        self.log_test(
+            "Image Metadata Backfill",
+            not stats['failed'],
+            f"{stats['updated']} images updated" + (f", {len(stats['failed'])} failed" if stats['failed'] else ''),
+            stats
+        )
+        self.report_sections['image_backfill'] = stats
+        return stats
+    
+    def backfill_spec_values(self, batch_size=1000):
+        """Parse specifications into product_spec_values for products written before the trigger existed.
+        
+        Calls refresh_product_spec_values() in keyset batches by id and checks each batch
+        against parse_spec_values().
+        """
+        print("\n=== SPEC VALUES BACKFILL ===")
+        headers = self.service_headers()
+        stats = {'processed': 0, 'batches': 0, 'rpc_ms': 0.0, 'mismatches': []}
+        columns = ','.join(('product_id', 'dealership_id') + SPEC_RANGE_FIELDS)
+        after = None
+        while True:
+            started = time.perf_counter()
+            response = self.session.post(f"{self.supabase_url}/rest/v1/rpc/refresh_product_spec_values",
+                                         headers=headers, json={'p_after': after, 'p_limit': batch_size})
+            stats['rpc_ms'] += (time.perf_counter() - started) * 1000
+            if response.status_code != 200:
+                self.log_test("Spec Values Backfill", False,
+                              f"refresh_product_spec_values returned HTTP {response.status_code}: "
+                              f"{response.text[:200]}", {})
+                return None
+            result = response.json()
+            if not result['processed']:
+                break
+            # The same id range from both tables
+            id_range = (f"gt.{after}", f"lte.{result['last_id']}") if after else (f"lte.{result['last_id']}",)
+            products = self.session.get(
+                f"{self.supabase_url}/rest/v1/products?select=id,dealership_id,price,specifications"
+                f"&dealership_id=not.is.null&" + '&'.join(f"id={bound}" for bound in id_range), headers=headers
+            ).json()
+            parsed = {row['product_id']: row for row in self.session.get(
+                f"{self.supabase_url}/rest/v1/product_spec_values?select={columns}&"
+                + '&'.join(f"product_id={bound}" for bound in id_range), headers=headers
+            ).json()}
+            for product in products:
+                expected = dict(parse_spec_values(product['specifications']), product_id=product['id'],
+                                dealership_id=product['dealership_id'], price=product['price'])
+                if parsed.get(product['id']) != expected and len(stats['mismatches']) < 20:
+                    stats['mismatches'].append({'expected': expected, 'stored': parsed.get(product['id'])})
+            stats['processed'] += result['processed']
+            stats['batches'] += 1
+            after = result['last_id']
+            print(f"  {stats['processed']} products parsed")
+            if result['processed'] < batch_size:
+                break
+        
+        stats['rpc_ms'] = round(stats['rpc_ms'], 2)
+        self.log_test(
+            "Spec Values Backfill",
+            not stats['mismatches'],
+            f"{stats['processed']} products parsed in {stats['batches']} batches ({stats['rpc_ms']}ms in the database)"
+            if not stats['mismatches'] else f"{len(stats['mismatches'])}+ parsed rows differ from parse_spec_values()",
+            stats
+        )
+        self.report_sections['spec_backfill'] = stats
+        return stats
+    
+    def _stress_row(self, table, dealership_id, slug, state, rng):
+        stamp = f"{state['marker']}:{dealership_id}"
+        if table == 'products':
+            return {'dealership_id': dealership_id, 'name': f"{state['marker']} {slug}", 'slug': slug,
+                    'brand': 'Stress', 'model': slug, 'year': 2024, 'price': rng.randint(1000, 9000),
+                    'description': stamp}
+        if table == 'categories':
+            return {'dealership_id': dealership_id, 'name': f"{state['marker']} {slug}", 'slug': slug,
+                    'description': stamp}
+        # Inactive employees are only visible to their own tenant, which private_read relies on
+        return {'dealership_id': dealership_id, 'full_name': f"{state['marker']} {slug}", 'position': stamp,
+                'is_active': rng.random() < 0.5, 'display_order': 0}
+    
+    def _stress_pick(self, state, table, dealership_id, rng):
+        with state['lock']:
+            ids = state['registry'][table].get(dealership_id)
+            return rng.choice(tuple(ids)) if ids else None
+    
+    def _stress_operation(self, state, admin, operation, table, rng):
+        """Run one stress operation as ``admin``; returns its outcome"""
+        own = admin['dealership_id']
+        rest = f"{self.supabase_url}/rest/v1"
+        headers = {**self.user_headers(admin), 'Prefer': 'return=representation'}
+        stamp = {STRESS_TABLES[table]: f"{state['marker']}:{own}"}
+        
+        if operation == 'create':
+            # A small slug pool shared by every worker and tenant: same-tenant collisions must
+            # conflict, cross-tenant reuse must not
+            slug = f"stress-{rng.randrange(state['slug_pool'])}"
+            response = self.session.post(f"{rest}/{table}?select=id,dealership_id", headers=headers,
+                                         json=self._stress_row(table, own, slug, state, rng))
+            if response.status_code == 201:
+                row = response.json()[0]
+                with state['lock']:
+                    state['registry'][table].setdefault(own, set()).add(row['id'])
+                    state['owners'][row['id']] = own
+                return 'ok' if row['dealership_id'] == own else 'violation'
+            return 'conflict' if response.status_code == 409 else 'error'
+        
+        if operation in ('update', 'delete'):
+            row_id = self._stress_pick(state, table, own, rng)
+            if row_id is None:
+                return 'skipped'
+            url = f"{rest}/{table}?id=eq.{row_id}&select=id"
+            response = (self.session.patch(url, headers=headers, json=stamp) if operation == 'update'
+                        else self.session.delete(url, headers=headers))
+            if response.status_code != 200:
+                return 'error'
+            if not response.json():
+                # Another worker of the same tenant deleted it first
+                return 'missed'
+            if operation == 'delete':
+                with state['lock']:
+                    state['registry'][table][own].discard(row_id)
+            return 'ok'
+        
+        if operation in ('foreign_update', 'foreign_delete', 'spoofed_insert'):
+            other = rng.choice([tenant for tenant in state['tenants'] if tenant != own])
+            if operation == 'spoofed_insert':
+                row = self._stress_row(table, other, f"{state['marker']}-spoof-{uuid.uuid4().hex[:8]}", state, rng)
+                response = self.session.post(f"{rest}/{table}?select=id", headers=headers, json=row)
+                if response.status_code == 201:
+                    with state['lock']:
+                        state['owners'][response.json()[0]['id']] = other
+                    return 'violation'
+                return 'blocked' if response.status_code in (401, 403) else 'error'
+            row_id = self._stress_pick(state, table, other, rng)
+            if row_id is None:
+                return 'skipped'
+            url = f"{rest}/{table}?id=eq.{row_id}&select=id"
+            response = (self.session.patch(url, headers=headers, json=stamp) if operation == 'foreign_update'
+                        else self.session.delete(url, headers=headers))
+            if response.status_code == 200 and response.json():
+                return 'violation'
+            return 'blocked' if response.status_code in (200, 401, 403, 404) else 'error'
+        
+        # private_read: rows RLS hides from everyone but their own tenant
+        leaked = []
+        users = self.session.get(f"{rest}/users?select=id,dealership_id", headers=headers)
+        leaked += [row for row in (users.json() if users.status_code == 200 else []) if row['id'] != admin['id']]
+        employees = self.session.get(
+            f"{rest}/employees?select=id,dealership_id&is_active=eq.false&dealership_id=neq.{own}", headers=headers
+        )
+        leaked += employees.json() if employees.status_code == 200 else []
+        if state['inactive'] and state['inactive'] != own:
+            hidden = self.session.get(f"{rest}/products?select=id,dealership_id&dealership_id=eq.{state['inactive']}",
+                                      headers=headers)
+            leaked += hidden.json() if hidden.status_code == 200 else []
+        if leaked:
+            with state['lock']:
+                state['leaks'].extend(leaked[:5])
+            return 'violation'
+        return 'ok' if users.status_code == 200 and employees.status_code == 200 else 'error'
+    
+    def run_isolation_stress(self, tenants=6, workers_per_tenant=4, operations=50, slug_pool=8,
+                             max_error_rate=0.01):
+        """Concurrent admins of many tenants writing at once; then prove no tenant read or changed another's rows"""
+        print("\n=== TENANT ISOLATION STRESS ===")
+        if tenants < 2:
+            self.log_test("Isolation Stress", False, "Needs at least 2 tenants", {'tenants': tenants})
+            return None
+        generator = SyntheticDataGenerator(self, seed=tenants)
+        manifest = generator.generate(dealerships=tenants, products_per_dealership=20, employees_per_dealership=4,
+                                      images_per_product=0, admins=True)
+        report = {'tenants': tenants, 'workers_per_tenant': workers_per_tenant, 'operations_per_worker': operations,
+                  'slug_pool': slug_pool}
+        state = {
+            'marker': f"stress-{uuid.uuid4().hex[:8]}",
+            'slug_pool': slug_pool,
+            'tenants': manifest['dealership_ids'],
+            # One tenant is deactivated: its catalog must disappear for everyone else
+            'inactive': manifest['dealership_ids'][-1] if tenants >= 3 else None,
+            'lock': threading.Lock(),
+            'registry': {table: {} for table in STRESS_TABLES},
+            'owners': {},
+            'leaks': [],
+            'stats': defaultdict(lambda: {'latencies': Histogram(), 'outcomes': defaultdict(int)})
+        }
+        service = self.service_headers()
+        rest = f"{self.supabase_url}/rest/v1"
+        id_list = ','.join(manifest['dealership_ids'])
+        try:
+            if state['inactive']:
+                self.session.patch(f"{rest}/dealerships?id=eq.{state['inactive']}", headers=service,
+                                   json={'is_active': False})
+            # The generated rows are targets for cross-tenant attempts too
+            for table in STRESS_TABLES:
+                rows = self.session.get(f"{rest}/{table}?select=id,dealership_id&dealership_id=in.({id_list})",
+                                        headers=service).json()
+                for row in rows:
+                    state['registry'][table].setdefault(row['dealership_id'], set()).add(row['id'])
+                    state['owners'][row['id']] = row['dealership_id']
+            for admin in manifest['admins']:
+                self.user_headers(admin)
+            
+            kinds, weights = zip(*STRESS_OPERATIONS.items())
+            
+            def worker(admin, seed):
+                rng = random.Random(seed)
+                for _ in range(operations):
+                    operation, table = rng.choices(kinds, weights)[0], rng.choice(tuple(STRESS_TABLES))
+                    started = time.perf_counter()
+                    try:
+                        outcome = self._stress_operation(state, admin, operation, table, rng)
+                    except Exception:
+                        outcome = 'error'
+                    with state['lock']:
+                        stats = state['stats'][operation]
+                        stats['latencies'].record((time.perf_counter() - started) * 1_000_000)
+                        stats['outcomes'][outcome] += 1
+            
+            print(f"{tenants} tenants x {workers_per_tenant} workers x {operations} operations, "
+                  f"slug pool {slug_pool}" + (" (1 tenant inactive)" if state['inactive'] else ''))
+            started = time.perf_counter()
+            writers = [(admin, index * workers_per_tenant + lane)
+                       for index, admin in enumerate(manifest['admins']) for lane in range(workers_per_tenant)]
+            for error in self.run_lanes(writers, len(writers), lambda writer: worker(*writer)):
+                if error is not None:
+                    raise error
+            elapsed = time.perf_counter() - started
+            
+            report['operations'] = {}
+            print(f"\n{'operation':<16}{'count':>7}{'p95 ms':>9}  outcomes")
+            for operation, stats in sorted(state['stats'].items()):
+                outcomes = dict(stats['outcomes'])
+                report['operations'][operation] = {
+                    'count': sum(outcomes.values()),
+                    'p50_ms': round(stats['latencies'].percentile(50) / 1000, 2),
+                    'p95_ms': round(stats['latencies'].percentile(95) / 1000, 2),
+                    'outcomes': outcomes
+                }
+                print(f"{operation:<16}{sum(outcomes.values()):>7}{report['operations'][operation]['p95_ms']:>9}  "
+                      + ', '.join(f"{outcome}={count}" for outcome, count in sorted(outcomes.items())))
+            totals = defaultdict(int)
+            for row in report['operations'].values():
+                for outcome, count in row['outcomes'].items():
+                    totals[outcome] += count
+            total = sum(totals.values())
+            creates = report['operations'].get('create', {}).get('outcomes', {})
+            report.update({
+                'elapsed_s': round(elapsed, 2),
+                'throughput_ops': round(total / elapsed, 1) if elapsed else 0.0,
+                'outcomes': dict(totals),
+                'conflict_rate': round(creates.get('conflict', 0) / sum(creates.values()), 3) if creates else 0.0,
+                'error_rate': round(totals['error'] / total, 4) if total else 0.0
+            })
+            
+            # Final state, read past RLS: every row still belongs to its creator, no foreign stamps,
+            # and no duplicate slug inside a tenant
+            tampered, moved, duplicates, shared_slugs = [], [], [], 0
+            for table, column in STRESS_TABLES.items():
+                columns = 'id,dealership_id,slug' if table in STRESS_SLUG_TABLES else 'id,dealership_id'
+                rows = self.session.get(f"{rest}/{table}?select={columns},{column}&dealership_id=in.({id_list})",
+                                        headers=service).json()
+                for row in rows:
+                    stamp = row.get(column) or ''
+                    if stamp.startswith(f"{state['marker']}:") and stamp.split(':', 1)[1] != row['dealership_id']:
+                        tampered.append({'table': table, **row})
+                    owner = state['owners'].get(row['id'])
+                    if owner and owner != row['dealership_id']:
+                        moved.append({'table': table, 'owner': owner, **row})
+                if table in STRESS_SLUG_TABLES:
+                    slug_owners = defaultdict(list)
+                    for row in rows:
+                        slug_owners[row['slug']].append(row['dealership_id'])
+                    for slug, owners in slug_owners.items():
+                        if len(owners) != len(set(owners)):
+                            duplicates.append({'table': table, 'slug': slug, 'dealership_ids': owners})
+                        shared_slugs += len(set(owners)) > 1
+            report['final_state'] = {'tampered': tampered[:20], 'moved': moved[:20], 'duplicates': duplicates[:20],
+                                     'slugs_shared_across_tenants': shared_slugs, 'leaked_rows': state['leaks'][:20]}
+            
+            attempts = {operation: report['operations'].get(operation, {}).get('outcomes', {})
+                        for operation in ('foreign_update', 'foreign_delete', 'spoofed_insert')}
+            attempted = sum(sum(outcomes.values()) for outcomes in attempts.values())
+            breaches = sum(outcomes.get('violation', 0) for outcomes in attempts.values())
             self.log_test(
-                "Site Settings CRUD",
-                False,
-                f"Error in site settings CRUD: {str(e)}",
-                {'error': str(e)}
+                "Isolation Stress - Cross-tenant Writes",
+                breaches == 0 and not tampered and not moved and creates.get('violation', 0) == 0,
+                f"{attempted} foreign updates/deletes/spoofed inserts, {breaches} got through; "
+                f"{len(tampered)} rows stamped by another tenant, {len(moved)} rows changed tenant",
+                {'attempts': attempts, 'tampered': tampered[:5], 'moved': moved[:5]}
+            )
+            reads = report['operations'].get('private_read', {}).get('outcomes', {})
+            self.log_test(
+                "Isolation Stress - Private Reads",
+                not reads.get('violation') and not state['leaks'],
+                f"{sum(reads.values())} reads of users / inactive employees / an inactive tenant's catalog, "
+                f"{reads.get('violation', 0)} saw another tenant's rows",
+                {'outcomes': reads, 'leaked_rows': state['leaks'][:5]}
+            )
+            self.log_test(
+                "Isolation Stress - Unique Slugs",
+                not duplicates,
+                f"{creates.get('conflict', 0)} of {sum(creates.values())} creates rejected as duplicates "
+                f"({report['conflict_rate'] * 100:.1f}%), {len(duplicates)} duplicate (dealership_id, slug) pairs, "
+                f"{shared_slugs} slugs reused across tenants",
+                {'duplicates': duplicates[:5], 'conflict_rate': report['conflict_rate'],
+                 'slugs_shared_across_tenants': shared_slugs}
+            )
+            self.log_test(
+                "Isolation Stress - Throughput",
+                report['error_rate'] <= max_error_rate,
+                f"{total} operations in {report['elapsed_s']}s ({report['throughput_ops']} ops/s), "
+                f"{report['error_rate'] * 100:.2f}% errors, {totals['missed']} lost same-tenant races",
+                {key: report[key] for key in ('elapsed_s', 'throughput_ops', 'outcomes', 'conflict_rate', 'error_rate')}
             )
+        except Exception as e:
+            self.log_test("Isolation Stress", False, f"Stress run failed: {str(e)}", {'error': str(e)})
+        finally:
+            generator.teardown(manifest)
+        self.report_sections['isolation'] = report
+        return report
     
-    def test_public_landing_page(self):
-        """Test 6: Test public landing page access"""
-        print("\n=== TESTING PUBLIC LANDING PAGE ===")
+    def _dashboard_stats_mismatches(self, dealership_id, headers):
+        """Counters where get_dashboard_stats disagrees with counting every row: {counter: (rpc, counted)}"""
+        fetched = {}
+        for name, template in DASHBOARD_FETCH_ALL:
+            response = self.session.get(
+                f"{self.supabase_url}/rest/v1/" + template.format(dealership_id=dealership_id), headers=headers
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f"{name} returned HTTP {response.status_code}")
+            fetched[name] = response.json()
+        counted = dashboard_stats_from_rows(**fetched)
+        response = self.session.post(f"{self.supabase_url}/rest/v1/rpc/get_dashboard_stats", headers=headers,
+                                     json={'p_dealership_id': dealership_id})
+        body = response.json() if response.status_code == 200 else None
+        if not isinstance(body, dict):
+            raise RuntimeError(f"get_dashboard_stats returned HTTP {response.status_code} with no stats")
+        return {
+            counter: (body[counter], counted[counter]) for counter in DASHBOARD_COUNTERS
+            if abs(float(body[counter]) - counted[counter]) > 0.005
+        }
+    
+    def _benchmark_dashboard_size(self, size, repeat):
+        """Fetch-everything vs. get_dashboard_stats for one synthetic tenant of ``size`` products"""
+        generator = SyntheticDataGenerator(self, seed=size)
+        manifest = generator.generate(dealerships=1, products_per_dealership=size,
+                                      employees_per_dealership=8, images_per_product=2, admins=True)
+        dealership_id = manifest['dealership_ids'][0]
+        try:
+            headers = self.user_headers(manifest['admins'][0])
+            
+            def fetch_all():
+                total = 0
+                for name, template in DASHBOARD_FETCH_ALL:
+                    response = self.session.get(
+                        f"{self.supabase_url}/rest/v1/" + template.format(dealership_id=dealership_id), headers=headers
+                    )
+                    if response.status_code != 200:
+                        raise RuntimeError(f"{name} returned HTTP {response.status_code}")
+                    response.json()
+                    total += len(response.content)
+                return total
+            
+            def stats_rpc():
+                response = self.session.post(f"{self.supabase_url}/rest/v1/rpc/get_dashboard_stats", headers=headers,
+                                             json={'p_dealership_id': dealership_id})
+                if response.status_code != 200:
+                    raise RuntimeError(f"get_dashboard_stats returned HTTP {response.status_code}")
+                response.json()
+                return len(response.content)
+            
+            fetch_ms, fetch_bytes = self._median_ms(fetch_all, repeat)
+            rpc_ms, rpc_bytes = self._median_ms(stats_rpc, repeat)
+            # The bulk-inserted dataset went through the INSERT triggers
+            before = self._dashboard_stats_mismatches(dealership_id, headers)
+            
+            # One write of every kind the triggers must follow: status and price edits, deletions,
+            # an employee deactivation and a category delete that cascades to its subcategories
+            def ids(table, order='id'):
+                response = self.session.get(
+                    f"{self.supabase_url}/rest/v1/{table}?select=id&dealership_id=eq.{dealership_id}&order={order}",
+                    headers=self.service_headers()
+                )
+                return [row['id'] for row in response.json()]
+            products, employees, categories = ids('products'), ids('employees'), ids('categories')
+            crud = generator.crud
+            sold = min(size // 3, 100)
+            crud.update('products', products[:sold], {'status': 'sold'})
+            crud.update('products', products[sold:sold + 5], {'status': 'reserved', 'price': 12345.67})
+            crud.delete('products', products[-3:])
+            crud.update('employees', employees[:2], {'is_active': False})
+            crud.delete('employees', employees[-1:])
+            crud.delete('categories', categories[:1])
+            created = self.session.post(
+                f"{self.supabase_url}/rest/v1/products", headers=headers,
+                json=[{'dealership_id': dealership_id, 'name': f"Stats {index}", 'slug': f"stats-{uuid.uuid4().hex[:12]}",
+                       'price': 999.99, 'status': 'available'} for index in range(3)]
+            )
+            if created.status_code != 201:
+                raise RuntimeError(f"admin insert returned HTTP {created.status_code}")
+            after = self._dashboard_stats_mismatches(dealership_id, headers)
+        finally:
+            generator.teardown(manifest)
         
-        for user in self.test_users:
+        return {
+            'products': size,
+            'fetch_all': {'ms': fetch_ms, 'bytes': fetch_bytes},
+            'rpc': {'ms': rpc_ms, 'bytes': rpc_bytes},
+            'speedup': round(fetch_ms / rpc_ms, 1) if rpc_ms else None,
+            'mismatches_after_load': before,
+            'mismatches_after_writes': after
+        }
+    
+    def run_dashboard_stats_benchmark(self, sizes=(100, 1000, 10000), repeat=5):
+        """Dashboard home: the old fetch-everything-and-count vs. the get_dashboard_stats counters"""
+        print("\n=== DASHBOARD STATS BENCHMARK ===")
+        report = {'repeat': repeat, 'sizes': {}}
+        print(f"{'products':>9}{'fetch ms':>10}{'fetch KB':>10}{'rpc ms':>10}{'rpc B':>10}{'speedup':>9}")
+        for size in sizes:
             try:
-                # Test public catalog page
-                catalog_url = f"{self.base_url}/catalogo/{user['dealership_slug']}"
-                response = self.session.get(catalog_url, timeout=15)
-                
-                if response.status_code == 200:
-                    # Check if page contains expected content
-                    content = response.text
-                    if 'MotoDealer' in content or user['dealership_slug'] in content:
-                        self.log_test(
-                            f"Public Landing Page - {user['dealership_slug']}",
-                            True,
-                            "Landing page loads successfully",
-                            {'url': catalog_url, 'status_code': response.status_code}
-                        )
-                    else:
-                        self.log_test(
-                            f"Public Landing Page - {user['dealership_slug']}",
-                            False,
-                            "Landing page loads but missing expected content",
-                            {'url': catalog_url, 'content_length': len(content)}
-                        )
-                else:
-                    self.log_test(
-                        f"Public Landing Page - {user['dealership_slug']}",
-                        False,
-                        f"Landing page returned status {response.status_code}",
-                        {'url': catalog_url, 'status_code': response.status_code}
-                    )
-                    
+                result = self._benchmark_dashboard_size(size, repeat)
             except Exception as e:
-                self.log_test(
-                    f"Public Landing Page - {user['dealership_slug']}",
-                    False,
-                    f"Error accessing landing page: {str(e)}",
-                    {'error': str(e), 'url': catalog_url}
-                )
+                self.log_test(f"Dashboard Stats - {size} products", False, f"Benchmark failed: {str(e)}",
+                              {'error': str(e)})
+                continue
+            report['sizes'][size] = result
+            fetch_all, stats_rpc = result['fetch_all'], result['rpc']
+            print(f"{size:>9}{fetch_all['ms']:>10}{fetch_all['bytes'] // 1024:>10}{stats_rpc['ms']:>10}"
+                  f"{stats_rpc['bytes']:>10}{result['speedup']:>8}x")
+            drift = {**result['mismatches_after_load'], **result['mismatches_after_writes']}
+            self.log_test(
+                f"Dashboard Stats - {size} products",
+                not drift,
+                f"rpc {stats_rpc['ms']}ms / {stats_rpc['bytes']}B vs fetch-all {fetch_all['ms']}ms / "
+                f"{fetch_all['bytes'] // 1024}KB, counters match after bulk load and writes" if not drift
+                else "Counters drifted from the rows: " + ', '.join(
+                    f"{counter} {rpc} != {counted}" for counter, (rpc, counted) in drift.items()
+                ),
+                result
+            )
+        
+        # O(1): the RPC response must not grow with the inventory
+        measured = [result['rpc']['bytes'] for result in report['sizes'].values()]
+        if len(measured) > 1:
+            flat = max(measured) <= 2 * min(measured)
+            self.log_test(
+                "Dashboard Stats - Constant Size",
+                flat,
+                f"rpc response {min(measured)}-{max(measured)} bytes across "
+                f"{min(report['sizes'])}-{max(report['sizes'])} products",
+                {'rpc_bytes': {size: result['rpc']['bytes'] for size, result in report['sizes'].items()}}
+            )
+        self.report_sections['dashboard_stats'] = report
+        return report
+    
+    def endpoint_stats(self):
+        """Per-endpoint p50/p95/p99 and mean payload of this run, plus load-mode page views"""
+        stats = {}
+        for endpoint, entry in self.session.recorder.to_dict().items():
+            total = entry['latency_ms'].get('total')
+            if not total:
+                continue
+            stats[endpoint] = {
+                'requests': total['count'],
+                'p50_ms': total['p50'],
+                'p95_ms': total['p95'],
+                'p99_ms': total['p99'],
+                'bytes_mean': entry['bytes']['mean']
+            }
+        load = self.report_sections.get('load')
+        if load:
+            for name, row in load['queries'].items():
+                stats[f"LOAD {name}"] = {
+                    'requests': row['requests'],
+                    'p50_ms': row['p50_ms'],
+                    'p95_ms': row['p95_ms'],
+                    'p99_ms': row['p99_ms'],
+                    'bytes_mean': 0.0
+                }
+        return stats
+    
+    def check_regressions(self):
+        """Compare this run against the stored baseline, then add it to the window"""
+        print("\n=== PERFORMANCE REGRESSION GATE ===")
+        current = self.endpoint_stats()
+        baseline = self.baseline_store.baseline()
+        diff = compare_to_baseline(
+            current, baseline,
+            threshold=self.regression_threshold,
+            min_delta_ms=self.regression_min_delta_ms
+        )
+        self.regressions = [endpoint for endpoint, row in diff.items() if row['status'] == 'regressed']
+        
+        print(f"{'endpoint':<70}{'p95':>10}{'base':>10}{'change':>9}{'bytes':>9}")
+        for endpoint, row in diff.items():
+            if row['status'] == 'new':
+                print(f"{endpoint[:69]:<70}{row['p95_ms']:>10}{'new':>10}")
+                continue
+            marker = '  ⚠️' if row['status'] == 'regressed' else ''
+            print(f"{endpoint[:69]:<70}{row['p95_ms']:>10}{row['baseline_p95_ms']:>10}"
+                  f"{row['p95_change'] * 100:>+8.1f}%{row['bytes_change'] * 100:>+8.1f}%{marker}")
+        
+        for endpoint in self.regressions:
+            row = diff[endpoint]
+            self.log_test(
+                f"Performance Regression - {endpoint}",
+                False,
+                f"p95 {row['baseline_p95_ms']}ms -> {row['p95_ms']}ms ({row['p95_change'] * 100:+.1f}%)",
+                row
+            )
+        if not self.regressions:
+            self.log_test(
+                "Performance Regression Gate",
+                True,
+                f"No endpoint p95 regressed more than {self.regression_threshold * 100:.0f}% "
+                f"against {max((row.get('baseline_runs', 0) for row in diff.values()), default=0)} baseline run(s)",
+                {'endpoints_compared': len(diff)}
+            )
+        
+        # A regressed run must not drag the baseline along with it
+        if self.record_baseline and not self.regressions:
+            self.baseline_store.record_run(current, label=self.base_url)
+        self.report_sections['regression'] = {
+            'threshold': self.regression_threshold,
+            'min_delta_ms': self.regression_min_delta_ms,
+            'regressed': self.regressions,
+            'endpoints': diff
+        }
+        return not self.regressions
     
     def run_all_tests(self):
         """Run all backend tests"""
         print("🚀 Starting MotoDealer SaaS Backend Testing Suite")
         print("=" * 60)
         
-        # Run all tests
+        print(f"Workers: {self.workers}")
+        
+        # Environment check runs first, everything after it is independent
         self.test_environment_variables()
-        self.test_api_health()
-        self.test_supabase_connection()
-        self.test_supabase_auth()
-        self.test_crud_operations()
-        self.test_public_landing_page()
+        self.run_parallel([
+            (self.test_api_health, ()),
+            (self.test_supabase_connection, ()),
+            (self.test_supabase_auth, ()),
+            (self.test_crud_operations, ()),
+            (self.test_public_landing_page, ()),
+            (self.test_catalog_cache, ()),
+        ])
         
         # Generate summary
         self.generate_summary()
     
-    def generate_summary(self):
+    def generate_summary(self, interrupted=False):
         """Generate test summary"""
+        if self.baseline_store is not None and not interrupted:
+            self.check_regressions()
+        
         print("\n" + "=" * 60)
         print("🏁 TESTING SUMMARY")
         print("=" * 60)
         
-        total_tests = len(self.test_results)
-        passed_tests = len([t for t in self.test_results if t['success']])
-        failed_tests = total_tests - passed_tests
-        
-        print(f"Total Tests: {total_tests}")
-        print(f"✅ Passed: {passed_tests}")
-        print(f"❌ Failed: {failed_tests}")
-        print(f"Success Rate: {(passed_tests/total_tests)*100:.1f}%")
-        
-        if failed_tests > 0:
-            print("\n❌ FAILED TESTS:")
-            for test in self.test_results:
-                if not test['success']:
-                    print(f"  • {test['test']}: {test['message']}")
-        
-        print("\n✅ PASSED TESTS:")
-        for test in self.test_results:
-            if test['success']:
-                print(f"  • {test['test']}: {test['message']}")
+        if self.sink is not None:
+            # The stream already holds every test and sample; add the sections and derive the summary from it
+            for name, data in self.report_sections.items():
+                self.sink.write('section', {'name': name, 'data': data})
+            self.sink.write('end', {'interrupted': interrupted}, flush=True)
+            self.sink.close()
+            document = summarize_stream(self.sink.path)
+        else:
+            self.report_sections['latency'] = self.session.recorder.to_dict()
+            document = results_document(self.ordered_results(), self.report_sections, not interrupted)
+        print_summary(document)
         
         # Save detailed results to file
-        with open('/app/backend_test_results.json', 'w') as f:
-            json.dump({
-                'summary': {
-                    'total_tests': total_tests,
-                    'passed_tests': passed_tests,
-                    'failed_tests': failed_tests,
-                    'success_rate': (passed_tests/total_tests)*100
-                },
-                'test_results': self.test_results,
-                'timestamp': datetime.now().isoformat()
-            }, f, indent=2)
+        with open(RESULTS_PATH, 'w') as f:
+            json.dump(document, f, indent=2)
         
-        print(f"\n📄 Detailed results saved to: /app/backend_test_results.json")
+        print(f"\n📄 Detailed results saved to: {RESULTS_PATH}"
+              + (f" (stream: {self.sink.path}, {self.sink.records} records)" if self.sink is not None else ''))
 
 if __name__ == "__main__":
-    tester = MotoDealer_Backend_Tester()
-    tester.run_all_tests()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="MotoDealer SaaS backend testing suite")
+    parser.add_argument(
+        '--workers', type=int, default=None,
+        help="Threads shared by every parallel step (default: $BACKEND_TEST_WORKERS or 8)"
+    )
+    parser.add_argument('--pool-size', type=int, default=None, help="Max requests in flight across all hosts")
+    parser.add_argument('--pool-per-host', type=int, default=None, help="Max keep-alive connections per host")
+    parser.add_argument('--timeout', type=float, default=None, help="Per-request timeout in seconds")
+    parser.add_argument('--page-timeout', type=float, default=None, help="Timeout for server-rendered pages")
+    parser.add_argument('--http2', action='store_true', default=None, help="Use HTTP/2 for async requests (needs httpx[http2])")
+    parser.add_argument('--local', action='store_true',
+                        help="Run against the bundled in-process Supabase stand-in (local_supabase.py)")
+    parser.add_argument('--app-url', default=None,
+                        help="With --local, test the app routes on this Next.js server instead of the stand-in's "
+                             "Python copies (configure it with local_supabase.py --print-env)")
+    parser.add_argument('--local-port', type=int, default=0,
+                        help="Port of the --local stand-in (fixed, so an --app-url server can reach it)")
+    parser.add_argument('--token-cache', metavar='PATH', default=None,
+                        help="Persist auth sessions between runs (default: $BACKEND_TEST_TOKEN_CACHE, memory only)")
+    parser.add_argument('--analyze-payload', action='store_true',
+                        help='Measure response bytes vs. rendered fields for every page query, per tenant')
+    parser.add_argument('--max-overfetch', type=float, default=None,
+                        help='With --analyze-payload, fail queries whose unrendered share exceeds this (0-1)')
+    parser.add_argument('--benchmark-pagination', action='store_true',
+                        help='Compare /api/products keyset pages with the fetch-all catalog query')
+    parser.add_argument('--pagination-sizes', default='100,1000,10000',
+                        help='Products per synthetic tenant for --benchmark-pagination (comma-separated)')
+    parser.add_argument('--page-size', type=int, default=24)
+    parser.add_argument('--benchmark-search', action='store_true',
+                        help='Compare /api/search with downloading the catalog and searching it with Fuse.js')
+    parser.add_argument('--search-products', type=int, default=10000,
+                        help='Products in the synthetic tenant for --benchmark-search')
+    parser.add_argument('--benchmark-facets', action='store_true',
+                        help='Compare /api/facets spec filters and counts with downloading the catalog and filtering it')
+    parser.add_argument('--facet-products', type=int, default=10000,
+                        help='Products in the synthetic tenant for --benchmark-facets')
+    parser.add_argument('--benchmark-spec-ranges', action='store_true',
+                        help='Backfill product_spec_values, then compare /api/products/specs range filters and sorts '
+                             'with downloading the catalog and parsing the specs')
+    parser.add_argument('--spec-range-products', type=int, default=10000,
+                        help='Products in the synthetic tenant for --benchmark-spec-ranges')
+    parser.add_argument('--explain', action='store_true',
+                        help='EXPLAIN (ANALYZE, BUFFERS) every app query shape and flag seq scans / sorts')
+    parser.add_argument('--db-url', default=None,
+                        help='Postgres connection string for --explain (default: $SUPABASE_DB_URL)')
+    parser.add_argument('--explain-role', default='anon', choices=['anon', 'authenticated', 'service_role'])
+    parser.add_argument('--explain-min-rows', type=int, default=1000,
+                        help='Seq scans / sorts touching at least this many rows fail --explain')
+    parser.add_argument('--rls-profile', action='store_true',
+                        help='Time tenant reads/bulk updates as anon, tenant admin and service_role, '
+                             'and lint policies for per-row auth calls')
+    parser.add_argument('--rls-products', type=int, default=1000,
+                        help='Products in the synthetic tenant for --rls-profile')
+    parser.add_argument('--rls-rows', default='10,100,1000',
+                        help='Row counts read / updated per query for --rls-profile (comma-separated)')
+    parser.add_argument('--rls-repeat', type=int, default=5, help='Timed repetitions per query for --rls-profile')
+    parser.add_argument('--benchmark-upload', action='store_true',
+                        help='Upload a product\'s photos serially at full size vs. resized WebP in parallel (needs Pillow)')
+    parser.add_argument('--upload-photos', type=int, default=20, help='Photos per product for --benchmark-upload')
+    parser.add_argument('--upload-concurrency', type=int, default=UPLOAD_CONCURRENCY)
+    parser.add_argument('--upload-link', default='50:50',
+                        help="Simulated uplink for --benchmark-upload as MBPS:RTT_MS, or 'none'")
+    parser.add_argument('--check-images', action='store_true',
+                        help='Check /api/images variants: sizes, format negotiation and cache headers (needs Pillow)')
+    parser.add_argument('--backfill-image-metadata', action='store_true',
+                        help='Fill product_images width/height/blurhash where missing (needs Pillow)')
+    parser.add_argument('--backfill-spec-values', action='store_true',
+                        help='Parse every product\'s specifications into product_spec_values, in batches')
+    parser.add_argument('--backfill-batch-size', type=int, default=1000,
+                        help='Products per refresh_product_spec_values call for --backfill-spec-values')
+    parser.add_argument('--benchmark-realtime', action='store_true',
+                        help='Subscribe to the change feed, time how long single-product writes take to arrive and '
+                             'check a list kept current from the events against refetching')
+    parser.add_argument('--realtime-products', type=int, default=5000,
+                        help='Products per synthetic tenant for --benchmark-realtime')
+    parser.add_argument('--realtime-changes', type=int, default=20,
+                        help='Products edited one at a time for --benchmark-realtime')
+    parser.add_argument('--benchmark-snapshots', action='store_true',
+                        help='Publish a synthetic tenant\'s catalog snapshot, then compare reading it from Storage '
+                             'with /api/catalog and time republishing after an edit')
+    parser.add_argument('--snapshot-products', type=int, default=5000,
+                        help='Products in the synthetic tenant for --benchmark-snapshots')
+    parser.add_argument('--build-snapshot', metavar='SLUG', default=None,
+                        help='Build the catalog snapshot of SLUG from the live data and print (or save) it')
+    parser.add_argument('--snapshot-out', metavar='PATH', default=None,
+                        help="Where --build-snapshot writes the document ('.gz' to compress)")
+    parser.add_argument('--publish-snapshots', action='store_true',
+                        help='Build and publish the catalog snapshot of every active tenant (needs the service key)')
+    parser.add_argument('--verify-snapshots', action='store_true',
+                        help='Check every published catalog snapshot against its hashes and the live data')
+    parser.add_argument('--snapshot-slugs', default=None,
+                        help='Tenants for --publish-snapshots / --verify-snapshots (comma-separated, default: all)')
+    parser.add_argument('--diff-snapshots', nargs=2, metavar=('OLD', 'NEW'), default=None,
+                        help='Print what changed between two snapshot files (.json or .json.gz) and exit')
+    parser.add_argument('--benchmark-dashboard-stats', action='store_true',
+                        help='Compare the get_dashboard_stats counters with fetching and counting every row')
+    parser.add_argument('--dashboard-sizes', default='100,1000,10000',
+                        help='Products per synthetic tenant for --benchmark-dashboard-stats (comma-separated)')
+    parser.add_argument('--isolation-stress', action='store_true',
+                        help="Admins of many synthetic tenants writing concurrently, then check RLS isolation "
+                             "and per-tenant unique slugs")
+    parser.add_argument('--stress-tenants', type=int, default=6, help="Isolation stress: synthetic tenants")
+    parser.add_argument('--stress-workers', type=int, default=4, help="Isolation stress: concurrent writers per tenant")
+    parser.add_argument('--stress-ops', type=int, default=50, help="Isolation stress: operations per writer")
+    parser.add_argument('--stress-slugs', type=int, default=8,
+                        help="Isolation stress: size of the slug pool every writer draws from (smaller = more conflicts)")
+    parser.add_argument('--load', action='store_true', help="Replay the public catalog read pattern instead of the functional suite")
+    parser.add_argument('--load-replay', choices=('page', 'queries'), default='page',
+                        help="Load mode: replay page views (page, snapshot or /api/catalog) or the five "
+                             "catalog queries with per-query percentiles")
+    parser.add_argument('--rate', type=float, default=5.0,
+                        help="Load/soak mode: catalog page views (soak: operations) started per second")
+    parser.add_argument('--concurrency', type=int, default=20, help="Load/soak mode: max operations in flight")
+    parser.add_argument('--duration', type=float, default=30.0, help="Load mode: seconds to generate traffic for")
+    parser.add_argument('--max-error-rate', type=float, default=0.01,
+                        help="Load/soak mode: error rate that fails a query")
+    parser.add_argument('--soak', action='store_true',
+                        help="Mixed catalog/dashboard/write traffic for hours, reporting latency and memory per window")
+    parser.add_argument('--soak-duration', type=float, default=3600.0, help="Soak mode: seconds to run")
+    parser.add_argument('--soak-window', type=float, default=60.0, help="Soak mode: seconds per reporting window")
+    parser.add_argument('--soak-mix', default=','.join(f"{kind}:{weight}" for kind, weight in SOAK_MIX.items()),
+                        help="Soak mode: relative weights of catalog, dashboard and write operations")
+    parser.add_argument('--soak-pid', type=int, default=None,
+                        help="Soak mode: app server pid to sample from /proc (default: find next-server)")
+    parser.add_argument('--soak-max-drift', type=float, default=0.5,
+                        help="Soak mode: p95 growth (last vs. first third of the run) that fails an operation")
+    parser.add_argument('--soak-max-rss-growth', type=float, default=32.0,
+                        help="Soak mode: server RSS growth in MB/hour that fails the run")
+    parser.add_argument('--baseline', metavar='PATH', default=None,
+                        help="SQLite baseline store; enables the p95 regression gate")
+    parser.add_argument('--baseline-window', type=int, default=10, help="Number of past runs kept in the baseline")
+    parser.add_argument('--regression-threshold', type=float, default=0.2,
+                        help="Relative p95 increase that fails the gate (0.2 = +20%%)")
+    parser.add_argument('--regression-min-ms', type=float, default=5.0,
+                        help="Ignore p95 increases smaller than this many milliseconds")
+    parser.add_argument('--no-record-baseline', action='store_true', help="Compare only, don't add this run to the baseline")
+    parser.add_argument('--generate-synthetic', type=int, metavar='N', default=0,
+                        help="Create N synthetic dealerships for scale testing and write a manifest")
+    parser.add_argument('--synthetic-products', type=int, default=1000, help="Products per synthetic dealership")
+    parser.add_argument('--synthetic-employees', type=int, default=8, help="Employees per synthetic dealership")
+    parser.add_argument('--synthetic-images', type=int, default=3, help="Images per synthetic product")
+    parser.add_argument('--synthetic-chunk', type=int, default=500, help="Rows per bulk insert request")
+    parser.add_argument('--synthetic-seed', type=int, default=None, help="Random seed for reproducible datasets")
+    parser.add_argument('--synthetic-manifest', default='/app/synthetic_dataset.json',
+                        help="Where the synthetic dataset manifest is written / read")
+    parser.add_argument('--teardown-synthetic', action='store_true',
+                        help="Delete the dataset recorded in --synthetic-manifest and exit")
+    parser.add_argument('--results-stream', default=RESULTS_STREAM_PATH, metavar='PATH',
+                        help="NDJSON log of tests and request samples, written during the run "
+                             "('.gz' to compress, 'none' to keep results in memory only)")
+    parser.add_argument('--summarize-stream', metavar='PATH', default=None,
+                        help="Rebuild the results JSON from a (possibly interrupted) results stream and exit")
+    args = parser.parse_args()
+    
+    if args.summarize_stream:
+        document = summarize_stream(args.summarize_stream)
+        print_summary(document)
+        with open(RESULTS_PATH, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f"\n📄 Detailed results saved to: {RESULTS_PATH}"
+              + ('' if document['summary']['complete'] else ' (the run did not finish)'))
+        sys.exit(1 if document['summary']['failed_tests'] else 0)
+    
+    if args.diff_snapshots:
+        diff = diff_catalog_snapshots(*(read_snapshot_file(path) for path in args.diff_snapshots))
+        print(json.dumps(diff, indent=2))
+        sys.exit(0 if diff['identical'] else 1)
+    
+    transport_config = TransportConfig(
+        pool_size=args.pool_size,
+        per_host=args.pool_per_host,
+        timeout=args.timeout,
+        page_timeout=args.page_timeout,
+        http2=args.http2
+    )
+    
+    workers = args.workers
+    if workers is None and args.isolation_stress:
+        # Every concurrent writer is a pool thread; size the default pool to fit them
+        workers = max(int(os.getenv('BACKEND_TEST_WORKERS', '8')), args.stress_tenants * args.stress_workers)
+    tester = MotoDealer_Backend_Tester(workers=workers, transport_config=transport_config)
+    if args.token_cache:
+        tester.tokens = TokenCache(tester, path=args.token_cache)
+    if args.app_url and not args.local:
+        parser.error("--app-url needs --local (without it the suite already tests $NEXT_PUBLIC_BASE_URL)")
+    if args.local:
+        tester.use_local_supabase(app_url=args.app_url, port=args.local_port)
+    if args.baseline:
+        tester.baseline_store = BaselineStore(args.baseline, window=args.baseline_window)
+        tester.regression_threshold = args.regression_threshold
+        tester.regression_min_delta_ms = args.regression_min_ms
+        tester.record_baseline = not args.no_record_baseline
+    if args.teardown_synthetic:
+        with open(args.synthetic_manifest) as f:
+            manifest = json.load(f)
+        ok = SyntheticDataGenerator(tester).teardown(manifest)
+        if ok:
+            os.remove(args.synthetic_manifest)
+        sys.exit(0 if ok else 1)
+    if args.generate_synthetic:
+        generator = SyntheticDataGenerator(tester, chunk_size=args.synthetic_chunk, seed=args.synthetic_seed)
+        manifest = generator.generate(
+            dealerships=args.generate_synthetic,
+            products_per_dealership=args.synthetic_products,
+            employees_per_dealership=args.synthetic_employees,
+            images_per_product=args.synthetic_images
+        )
+        with open(args.synthetic_manifest, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        print(f"📄 Manifest saved to: {args.synthetic_manifest} (remove with --teardown-synthetic)")
+        sys.exit(0)
+    if args.build_snapshot:
+        document = tester.build_catalog_snapshot(args.build_snapshot)
+        if document is None:
+            print(f"No active dealership with slug {args.build_snapshot}")
+            sys.exit(1)
+        body = json.dumps(document, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        if not args.snapshot_out:
+            print(body.decode('utf-8'))
+        else:
+            with open(args.snapshot_out, 'wb') as f:
+                f.write(gzip.compress(body, mtime=0) if args.snapshot_out.endswith('.gz') else body)
+            print(f"Snapshot of {args.build_snapshot} ({len(document['products'])} products, "
+                  f"version {hashlib.sha256(body).hexdigest()[:16]}) written to {args.snapshot_out}")
+        sys.exit(0)
+    
+    if args.results_stream != 'none':
+        tester.use_result_sink(args.results_stream)
+    try:
+        if args.analyze_payload:
+            tester.test_environment_variables()
+            tester.analyze_payloads(max_overfetch=args.max_overfetch)
+            tester.generate_summary()
+        elif args.benchmark_pagination:
+            tester.test_environment_variables()
+            tester.run_pagination_benchmark(
+                sizes=[int(size) for size in args.pagination_sizes.split(',')],
+                page_size=args.page_size
+            )
+            tester.generate_summary()
+        elif args.benchmark_search:
+            tester.test_environment_variables()
+            tester.run_search_benchmark(products=args.search_products)
+            tester.generate_summary()
+        elif args.benchmark_facets:
+            tester.test_environment_variables()
+            tester.run_facet_benchmark(products=args.facet_products)
+            tester.generate_summary()
+        elif args.benchmark_spec_ranges:
+            tester.test_environment_variables()
+            tester.run_spec_range_benchmark(products=args.spec_range_products)
+            tester.generate_summary()
+        elif args.explain:
+            tester.run_explain_harness(db_url=args.db_url, role=args.explain_role, min_rows=args.explain_min_rows)
+            tester.generate_summary()
+        elif args.rls_profile:
+            tester.test_environment_variables()
+            tester.run_rls_profile(
+                products=args.rls_products,
+                row_counts=[int(count) for count in args.rls_rows.split(',')],
+                repeat=args.rls_repeat,
+                db_url=args.db_url
+            )
+            tester.generate_summary()
+        elif args.benchmark_upload:
+            tester.test_environment_variables()
+            tester.run_upload_benchmark(photos=args.upload_photos, concurrency=args.upload_concurrency,
+                                        link=args.upload_link)
+            tester.generate_summary()
+        elif args.check_images:
+            tester.test_environment_variables()
+            tester.check_image_derivatives()
+            tester.generate_summary()
+        elif args.backfill_image_metadata:
+            tester.test_environment_variables()
+            tester.backfill_image_metadata()
+            tester.generate_summary()
+        elif args.backfill_spec_values:
+            tester.test_environment_variables()
+            tester.backfill_spec_values(batch_size=args.backfill_batch_size)
+            tester.generate_summary()
+        elif args.benchmark_realtime:
+            tester.test_environment_variables()
+            tester.run_realtime_benchmark(products=args.realtime_products, changes=args.realtime_changes)
+            tester.generate_summary()
+        elif args.benchmark_snapshots:
+            tester.test_environment_variables()
+            tester.run_snapshot_benchmark(products=args.snapshot_products)
+            tester.generate_summary()
+        elif args.publish_snapshots:
+            tester.test_environment_variables()
+            tester.publish_catalog_snapshots(args.snapshot_slugs.split(',') if args.snapshot_slugs else None)
+            tester.generate_summary()
+        elif args.verify_snapshots:
+            tester.test_environment_variables()
+            tester.verify_catalog_snapshots(args.snapshot_slugs.split(',') if args.snapshot_slugs else None)
+            tester.generate_summary()
+        elif args.benchmark_dashboard_stats:
+            tester.test_environment_variables()
+            tester.run_dashboard_stats_benchmark(sizes=[int(size) for size in args.dashboard_sizes.split(',')])
+            tester.generate_summary()
+        elif args.isolation_stress:
+            tester.test_environment_variables()
+            tester.run_isolation_stress(
+                tenants=args.stress_tenants,
+                workers_per_tenant=args.stress_workers,
+                operations=args.stress_ops,
+                slug_pool=args.stress_slugs,
+                max_error_rate=args.max_error_rate
+            )
+            tester.generate_summary()
+        elif args.soak:
+            tester.test_environment_variables()
+            tester.run_soak_test(
+                duration=args.soak_duration,
+                rate=args.rate,
+                window=args.soak_window,
+                mix={kind: float(weight) for kind, _, weight in
+                     (part.partition(':') for part in args.soak_mix.split(','))},
+                concurrency=args.concurrency,
+                pid=args.soak_pid,
+                max_error_rate=args.max_error_rate,
+                max_drift=args.soak_max_drift,
+                max_rss_growth_mb=args.soak_max_rss_growth
+            )
+            tester.generate_summary()
+        elif args.load:
+            tester.test_environment_variables()
+            tester.run_load_test(
+                rate=args.rate,
+                concurrency=args.concurrency,
+                duration=args.duration,
+                max_error_rate=args.max_error_rate,
+                replay=args.load_replay
+            )
+            tester.generate_summary()
+        else:
+            tester.run_all_tests()
+    except KeyboardInterrupt:
+        # Everything logged so far is already in the stream; summarize it instead of losing it
+        print("\n⏹️ Interrupted, summarizing the results recorded so far")
+        tester.generate_summary(interrupted=True)
+        sys.exit(130)
+    
+    if tester.regressions:
+        sys.exit(1)
@@ -14,6 +14,7 @@ import {
 } from '@/components/ui/sheet'
 import { ShoppingCart, Plus, Minus, Trash2, MessageCircle } from 'lucide-react'
 import Image from 'next/image'
+import { imageVariantUrl } from '@/lib/images'
 import { ScrollArea } from '@/components/ui/scroll-area'
 
 export function CartDrawer() {
@@ -84,7 +85,7 @@ export function CartDrawer() {
                       <div className="relative h-20 w-20 rounded-md overflow-hidden bg-muted flex-shrink-0">
                         {primaryImage ? (
                           <Image
-                            src={primaryImage.image_url}
+                            src={imageVariantUrl(primaryImage.image_url, 'thumb')}
                             alt={item.name}
                             fill
                             className="object-cover"
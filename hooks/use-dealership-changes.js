@@ -0,0 +1,19 @@
+'use client'
+
+import { useEffect, useRef } from 'react'
+import { createClient } from '@/lib/supabase/client'
+import { subscribeToDealershipChanges } from '@/lib/realtime'
+
+// Subscribe for as long as the component is mounted. The latest onChange always runs, so it can read
+// current state without resubscribing on every render.
+export function useDealershipChanges(dealershipId, tables, onChange) {
+  const handler = useRef(onChange)
+  handler.current = onChange
+  const key = tables.join(',')
+
+  useEffect(() => {
+    if (!dealershipId) return undefined
+    return subscribeToDealershipChanges(createClient(), dealershipId, key.split(','), (change) =>
+      handler.current(change))
+  }, [dealershipId, key])
+}
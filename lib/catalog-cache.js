@@ -0,0 +1,187 @@
+import { createClient } from '@supabase/supabase-js'
+
+// Server-side cache for the public catalog payload of each dealership.
+// Entries are keyed by slug, expire after a TTL and are dropped as soon as
+// the tenant's data changes (POST /api/catalog/invalidate, see
+// supabase-catalog-cache.sql). The TTL only bounds staleness on server
+// instances that did not receive the invalidation.
+
+const TTL_MS = parseInt(process.env.CATALOG_CACHE_TTL_SECONDS || '300', 10) * 1000
+const MAX_ENTRIES = parseInt(process.env.CATALOG_CACHE_MAX_ENTRIES || '500', 10)
+
+// Tables whose changes invalidate a tenant's cached catalog
+export const CATALOG_TABLES = [
+  'dealerships', 'site_settings', 'products', 'product_images', 'categories', 'subcategories', 'employees'
+]
+
+class CatalogCache {
+  constructor(ttlMs, maxEntries) {
+    this.ttlMs = ttlMs
+    this.maxEntries = maxEntries
+    // Map iteration order is insertion order, so the first key is the least recently used
+    this.entries = new Map()
+    // slug -> { request, dealershipId }; the id is known once the fetch has resolved the slug
+    this.inflight = new Map()
+    // Bumped on invalidation so a fetch that started before a write is not cached
+    this.generations = new Map()
+    this.stats = { hits: 0, misses: 0, invalidations: 0 }
+  }
+
+  get(slug) {
+    const entry = this.entries.get(slug)
+    if (!entry) return null
+    if (entry.expiresAt <= Date.now()) {
+      this.entries.delete(slug)
+      return null
+    }
+    this.entries.delete(slug)
+    this.entries.set(slug, entry)
+    return entry.value
+  }
+
+  set(slug, value) {
+    this.entries.delete(slug)
+    this.entries.set(slug, { value, expiresAt: Date.now() + this.ttlMs })
+    while (this.entries.size > this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value)
+    }
+  }
+
+  generation(dealershipId) {
+    return this.generations.get(dealershipId) || 0
+  }
+
+  invalidateDealership(dealershipId) {
+    this.generations.set(dealershipId, this.generation(dealershipId) + 1)
+    // Reads after this point must not join a fetch that may predate the write. A fetch that
+    // hasn't resolved its slug yet could be for any dealership, so it goes too.
+    for (const [slug, fetch] of this.inflight) {
+      if (fetch.dealershipId === null || fetch.dealershipId === dealershipId) {
+        this.inflight.delete(slug)
+      }
+    }
+    let removed = 0
+    for (const [slug, entry] of this.entries) {
+      if (entry.value.dealership.id === dealershipId) {
+        this.entries.delete(slug)
+        removed++
+      }
+    }
+    this.stats.invalidations++
+    return removed
+  }
+
+  // Cached payload for a slug; concurrent misses share one set of queries
+  async load(slug, fetcher) {
+    const cached = this.get(slug)
+    if (cached) {
+      this.stats.hits++
+      return { payload: cached, hit: true }
+    }
+    this.stats.misses++
+    if (!this.inflight.has(slug)) {
+      const fetch = { request: null, dealershipId: null }
+      fetch.request = fetcher(slug, (dealershipId) => { fetch.dealershipId = dealershipId })
+        .then(({ payload, generation }) => {
+          if (payload && this.generation(payload.dealership.id) === generation) {
+            this.set(slug, payload)
+          }
+          return payload
+        })
+        .finally(() => {
+          if (this.inflight.get(slug) === fetch) this.inflight.delete(slug)
+        })
+      this.inflight.set(slug, fetch)
+    }
+    return { payload: await this.inflight.get(slug).request, hit: false }
+  }
+}
+
+// Survives module reloads in development
+export const catalogCache = globalThis.__catalogCache || (globalThis.__catalogCache = new CatalogCache(TTL_MS, MAX_ENTRIES))
+
+// The catalog is public data: query as anon without the visitor's cookies so
+// every visitor can share one cached payload
+function publicClient() {
+  return createClient(process.env.NEXT_PUBLIC_SUPABASE_URL, process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY, {
+    auth: { persistSession: false, autoRefreshToken: false }
+  })
+}
+
+// PostgREST caps a response at max-rows (1000 on Supabase), so large inventories are read in ranges
+const PRODUCTS_RANGE = 1000
+
+async function fetchAllProducts(supabase, dealershipId) {
+  const rows = []
+  for (let from = 0; ; from += PRODUCTS_RANGE) {
+    const { data, error } = await supabase
+      .from('products')
+      .select(`*,
+        categories (id, name, slug),
+        subcategories (id, name, slug),
+        product_images (id, image_url, is_primary, display_order, width, height, blurhash)
+      `)
+      .eq('dealership_id', dealershipId)
+      .order('created_at', { ascending: false })
+      .order('id', { ascending: false })
+      .range(from, from + PRODUCTS_RANGE - 1)
+    if (error) return { data: null, error }
+    rows.push(...data)
+    if (data.length < PRODUCTS_RANGE) return { data: rows, error: null }
+  }
+}
+
+// onDealership(id) is called as soon as the slug resolves, before the rest of the queries
+export async function fetchCatalog(slug, onDealership = () => {}) {
+  const supabase = publicClient()
+  const { data: dealership, error } = await supabase
+    .from('dealerships')
+    .select('*')
+    .eq('slug', slug)
+    .eq('is_active', true)
+    .maybeSingle()
+
+  if (error) throw error
+  if (!dealership) return { payload: null, generation: 0 }
+  onDealership(dealership.id)
+  const generation = catalogCache.generation(dealership.id)
+
+  // Everything else only depends on the dealership id, so it runs concurrently
+  const [settings, products, categories, employees] = await Promise.all([
+    supabase.from('site_settings').select('*').eq('dealership_id', dealership.id).maybeSingle(),
+    fetchAllProducts(supabase, dealership.id),
+    supabase
+      .from('categories')
+      .select(`*,
+        subcategories (*)
+      `)
+      .eq('dealership_id', dealership.id)
+      .order('name'),
+    supabase
+      .from('employees')
+      .select('*')
+      .eq('dealership_id', dealership.id)
+      .eq('is_active', true)
+      .order('display_order'),
+  ])
+
+  for (const result of [settings, products, categories, employees]) {
+    if (result.error) throw result.error
+  }
+
+  return {
+    payload: {
+      dealership,
+      settings: settings.data,
+      products: products.data || [],
+      categories: categories.data || [],
+      employees: employees.data || [],
+      cached_at: new Date().toISOString()
+    },
+    generation
+  }
+}
+
+export function getCatalog(slug) {
+  return catalogCache.load(slug, fetchCatalog)
+}
@@ -0,0 +1,136 @@
+import { createClient } from '@supabase/supabase-js'
+import { createHash } from 'crypto'
+import { gzipSync } from 'zlib'
+import { fetchCatalog } from '@/lib/catalog-cache'
+import {
+  SNAPSHOT_FORMAT, SNAPSHOT_BUCKET, snapshotPointerPath, snapshotDocumentPath, snapshotIndexPath
+} from '@/lib/catalog-snapshot'
+
+// Publishes each dealership's catalog to Storage (lib/catalog-snapshot.js) after its data changes.
+// POST /api/catalog/invalidate schedules a publish. The triggers of supabase-catalog-cache.sql post once
+// per dealership per statement, and an edit session is many statements in a row (a product, then its
+// images, then the next product), so the publishes are coalesced into one per dealership after DEBOUNCE_MS.
+
+const DEBOUNCE_MS = parseInt(process.env.CATALOG_SNAPSHOT_DEBOUNCE_MS || '2000', 10)
+// The pointer is the only mutable object; it bounds how long a CDN serves the previous version
+const POINTER_MAX_AGE = '60'
+const DOCUMENT_MAX_AGE = '31536000'
+// Older versions stay readable for visitors who fetched the previous pointer
+const KEPT_VERSIONS = 3
+
+// Writes to catalog/ are reserved to the service role (supabase-catalog-snapshots.sql)
+function serviceClient() {
+  if (!process.env.SUPABASE_SERVICE_ROLE_KEY) return null
+  return createClient(process.env.NEXT_PUBLIC_SUPABASE_URL, process.env.SUPABASE_SERVICE_ROLE_KEY, {
+    auth: { persistSession: false, autoRefreshToken: false }
+  })
+}
+
+function primaryImage(images = []) {
+  const sorted = [...images].sort((a, b) =>
+    (b.is_primary - a.is_primary) || ((a.display_order || 0) - (b.display_order || 0)))
+  return sorted.slice(0, 1)
+}
+
+// What /catalogo/<slug> renders: the fetchCatalog() payload with one image per product
+export function toSnapshot(payload) {
+  return {
+    format: SNAPSHOT_FORMAT,
+    dealership: payload.dealership,
+    settings: payload.settings,
+    categories: payload.categories,
+    products: payload.products.map((product) => ({ ...product, product_images: primaryImage(product.product_images) })),
+    employees: payload.employees
+  }
+}
+
+async function readIndex(storage, dealershipId) {
+  const { data, error } = await storage.download(snapshotIndexPath(dealershipId))
+  if (error || !data) return null
+  return JSON.parse(await data.text())
+}
+
+async function upload(storage, path, body, contentType, cacheControl) {
+  const { error } = await storage.upload(path, body, { contentType, cacheControl, upsert: true })
+  if (error) throw error
+}
+
+// Build and publish one dealership's snapshot; an inactive or deleted dealership is unpublished
+export async function publishSnapshot(dealershipId) {
+  const service = serviceClient()
+  if (!service) return { skipped: 'SUPABASE_SERVICE_ROLE_KEY is not set' }
+  const storage = service.storage.from(SNAPSHOT_BUCKET)
+
+  const { data: dealership, error } = await service
+    .from('dealerships')
+    .select('id, slug, is_active')
+    .eq('id', dealershipId)
+    .maybeSingle()
+  if (error) throw error
+  const index = await readIndex(storage, dealershipId)
+
+  if (!dealership?.is_active) {
+    const doomed = [
+      ...(index ? [snapshotPointerPath(index.slug)] : []),
+      ...(index?.versions || []).map((version) => snapshotDocumentPath(dealershipId, version)),
+      snapshotIndexPath(dealershipId)
+    ]
+    await storage.remove(doomed)
+    return { unpublished: true }
+  }
+
+  // Built as anon, so only rows the public catalog may show end up in the file
+  const { payload } = await fetchCatalog(dealership.slug)
+  if (!payload) return { skipped: 'Dealership not visible' }
+  const body = Buffer.from(JSON.stringify(toSnapshot(payload)))
+  const version = createHash('sha256').update(body).digest('hex').slice(0, 16)
+  if (index?.version === version && index.slug === dealership.slug) {
+    return { ...index, unchanged: true }
+  }
+
+  const compressed = gzipSync(body)
+  const path = snapshotDocumentPath(dealershipId, version)
+  await upload(storage, path, compressed, 'application/gzip', DOCUMENT_MAX_AGE)
+  const pointer = {
+    format: SNAPSHOT_FORMAT,
+    dealership_id: dealershipId,
+    slug: dealership.slug,
+    version,
+    path,
+    bytes: compressed.length,
+    uncompressed_bytes: body.length,
+    sha256: createHash('sha256').update(compressed).digest('hex'),
+    products: payload.products.length,
+    published_at: new Date().toISOString()
+  }
+  await upload(storage, snapshotPointerPath(dealership.slug), JSON.stringify(pointer), 'application/json',
+    POINTER_MAX_AGE)
+
+  const versions = [version, ...(index?.versions || []).filter((kept) => kept !== version)]
+  const nextIndex = { ...pointer, versions: versions.slice(0, KEPT_VERSIONS) }
+  await upload(storage, snapshotIndexPath(dealershipId), JSON.stringify(nextIndex), 'application/json', '0')
+  const stale = versions.slice(KEPT_VERSIONS).map((old) => snapshotDocumentPath(dealershipId, old))
+  if (index && index.slug !== dealership.slug) stale.push(snapshotPointerPath(index.slug))
+  if (stale.length) await storage.remove(stale)
+  return pointer
+}
+
+// Survive module reloads in development
+const timers = globalThis.__catalogSnapshotTimers || (globalThis.__catalogSnapshotTimers = new Map())
+const running = globalThis.__catalogSnapshotRuns || (globalThis.__catalogSnapshotRuns = new Map())
+
+// Publish a dealership's snapshot once its writes settle. Publishes of one dealership run one at a
+// time, so an older build can never overwrite the pointer after a newer one.
+export function scheduleSnapshot(dealershipId) {
+  clearTimeout(timers.get(dealershipId))
+  timers.set(dealershipId, setTimeout(() => {
+    timers.delete(dealershipId)
+    const run = (running.get(dealershipId) || Promise.resolve())
+      .then(() => publishSnapshot(dealershipId))
+      .catch((error) => console.error('Catalog snapshot error:', error))
+      .finally(() => {
+        if (running.get(dealershipId) === run) running.delete(dealershipId)
+      })
+    running.set(dealershipId, run)
+  }, DEBOUNCE_MS))
+}
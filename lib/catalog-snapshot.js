@@ -0,0 +1,47 @@
+// Published catalog snapshots (see lib/catalog-publisher.js and supabase-catalog-snapshots.sql).
+// Storage layout in the public site-assets bucket:
+//   catalog/<slug>.json                        small pointer to the current version (short cache)
+//   catalog/<dealership_id>/<version>.json.gz  gzip-compressed document, immutable
+//   catalog/<dealership_id>/index.json         published versions, read by the publisher only
+// The version is the first 16 hex chars of the sha256 of the uncompressed document.
+
+export const SNAPSHOT_FORMAT = 1
+export const SNAPSHOT_BUCKET = 'site-assets'
+const SNAPSHOT_PREFIX = 'catalog'
+
+export function snapshotPointerPath(slug) {
+  return `${SNAPSHOT_PREFIX}/${slug}.json`
+}
+
+export function snapshotDocumentPath(dealershipId, version) {
+  return `${SNAPSHOT_PREFIX}/${dealershipId}/${version}.json.gz`
+}
+
+export function snapshotIndexPath(dealershipId) {
+  return `${SNAPSHOT_PREFIX}/${dealershipId}/index.json`
+}
+
+function publicUrl(path) {
+  return `${process.env.NEXT_PUBLIC_SUPABASE_URL}/storage/v1/object/public/${SNAPSHOT_BUCKET}/${path}`
+}
+
+// The published catalog of a slug, straight from Storage/CDN. Null when there is none or it
+// can't be read, in which case the caller falls back to the live queries.
+export async function fetchCatalogSnapshot(slug) {
+  if (typeof DecompressionStream === 'undefined') return null
+  try {
+    const pointerResponse = await fetch(publicUrl(snapshotPointerPath(encodeURIComponent(slug))))
+    if (!pointerResponse.ok) return null
+    const pointer = await pointerResponse.json()
+    if (pointer.format !== SNAPSHOT_FORMAT || pointer.slug !== slug) return null
+
+    const response = await fetch(publicUrl(pointer.path))
+    if (!response.ok) return null
+    const snapshot = await new Response(response.body.pipeThrough(new DecompressionStream('gzip'))).json()
+    if (snapshot.format !== SNAPSHOT_FORMAT || snapshot.dealership?.slug !== slug) return null
+    return { ...snapshot, version: pointer.version, published_at: pointer.published_at }
+  } catch (error) {
+    console.error('Catalog snapshot unavailable:', error)
+    return null
+  }
+}
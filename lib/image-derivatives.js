@@ -0,0 +1,159 @@
+import sharp from 'sharp'
+import { createHash } from 'crypto'
+import { mkdir, readdir, readFile, rename, stat, unlink, writeFile } from 'fs/promises'
+import os from 'os'
+import path from 'path'
+import { IMAGE_VARIANTS } from '@/lib/images'
+import { IMAGE_WIDTHS } from '@/lib/image-upload'
+
+// Resized variants of Storage images, generated on first request and kept on
+// disk. Product photos are upserted at stable paths (fileKey in lib/image-upload.js),
+// so the same URL can get new bytes: variants are keyed on the ETag of the source
+// they were resized from, and clients revalidate with If-None-Match instead of
+// caching them as immutable.
+
+const CACHE_DIR = process.env.IMAGE_CACHE_DIR || path.join(os.tmpdir(), 'motodealer-image-cache')
+// Least recently used variants are deleted once the cache grows past this
+const CACHE_MAX_BYTES = Number(process.env.IMAGE_CACHE_MAX_BYTES) || 512 * 1024 * 1024
+// How long a source's ETag is trusted before Storage is asked again
+const SOURCE_RECHECK_MS = (Number(process.env.IMAGE_SOURCE_RECHECK_SECONDS) || 60) * 1000
+const BUCKETS = ['motorcycles', 'site-assets']
+const QUALITY = { avif: 55, webp: 78, jpeg: 80 }
+export const VARIANT_CACHE_CONTROL = 'public, max-age=86400, stale-while-revalidate=604800'
+
+const inflight = new Map()
+const sources = new Map()
+const SOURCES_REMEMBERED = 10000
+
+// Best format the client accepts; every browser accepts JPEG
+export function negotiateFormat(accept = '') {
+  if (accept.includes('image/avif')) return 'avif'
+  if (accept.includes('image/webp')) return 'webp'
+  return 'jpeg'
+}
+
+function validObjectPath(segments) {
+  return segments.length >= 2 && BUCKETS.includes(segments[0]) &&
+    segments.every((segment) => segment && segment !== '.' && segment !== '..' && !segment.includes('\\'))
+}
+
+// Photos uploaded by the dashboard already exist at IMAGE_WIDTHS (`<base>-<width>.webp`);
+// start from the smallest one that is still at least as wide as the variant
+function sourceCandidates(objectPath, width) {
+  const match = objectPath.match(/^(.*)-(\d+)\.(webp|avif|jpg)$/)
+  if (!match || !IMAGE_WIDTHS.includes(Number(match[2]))) return [objectPath]
+  const closest = IMAGE_WIDTHS.find((candidate) => candidate >= width) || IMAGE_WIDTHS[IMAGE_WIDTHS.length - 1]
+  const candidate = `${match[1]}-${closest}.${match[3]}`
+  return candidate === objectPath ? [objectPath] : [candidate, objectPath]
+}
+
+const sourceUrl = (objectPath) => `${process.env.NEXT_PUBLIC_SUPABASE_URL}/storage/v1/object/public/${objectPath}`
+
+// { path, version } of the object a variant is resized from, or null when there is none.
+// Found sources are remembered for SOURCE_RECHECK_MS, so a cache hit usually costs no
+// request to Storage; misses aren't, so a photo shows up as soon as its upload finishes.
+async function resolveSource(objectPath, width) {
+  const cacheKey = `${objectPath}|${width}`
+  const known = sources.get(cacheKey)
+  if (known && Date.now() - known.checkedAt < SOURCE_RECHECK_MS) return known.source
+  for (const candidate of sourceCandidates(objectPath, width)) {
+    const response = await fetch(sourceUrl(candidate), { method: 'HEAD', cache: 'no-store' })
+    if (response.ok) {
+      const source = { path: candidate, version: response.headers.get('etag') || response.headers.get('last-modified') || '' }
+      sources.delete(cacheKey)
+      sources.set(cacheKey, { source, checkedAt: Date.now() })
+      if (sources.size > SOURCES_REMEMBERED) sources.delete(sources.keys().next().value)
+      return source
+    }
+  }
+  return null
+}
+
+// Files in the cache with their sizes, least recently used first (a Map keeps insertion
+// order). Built from the directory on first use, so files left by a previous run count too.
+let diskIndex = null
+
+async function loadDiskIndex() {
+  const found = []
+  for (const shard of await readdir(CACHE_DIR).catch(() => [])) {
+    for (const name of await readdir(path.join(CACHE_DIR, shard)).catch(() => [])) {
+      if (name.endsWith('.tmp')) continue
+      const file = path.join(CACHE_DIR, shard, name)
+      const info = await stat(file).catch(() => null)
+      if (info) found.push({ file, size: info.size, used: info.atimeMs })
+    }
+  }
+  const files = new Map()
+  found.sort((a, b) => a.used - b.used).forEach(({ file, size }) => files.set(file, size))
+  return { files, bytes: found.reduce((total, { size }) => total + size, 0) }
+}
+
+// Mark a variant as just used, then delete the least recently used ones past CACHE_MAX_BYTES
+async function touch(file, size) {
+  diskIndex ||= loadDiskIndex()
+  const cache = await diskIndex
+  cache.bytes += size - (cache.files.get(file) ?? 0)
+  cache.files.delete(file)
+  cache.files.set(file, size)
+  for (const [victim, bytes] of cache.files) {
+    if (cache.bytes <= CACHE_MAX_BYTES || victim === file) break
+    cache.files.delete(victim)
+    cache.bytes -= bytes
+    await unlink(victim).catch(() => {})
+  }
+}
+
+async function generate(file, source, width, format) {
+  const response = await fetch(sourceUrl(source.path), { cache: 'no-store' })
+  if (!response.ok) return null
+  const body = await sharp(Buffer.from(await response.arrayBuffer()))
+    .rotate()
+    .resize({ width, withoutEnlargement: true })
+    .toFormat(format, { quality: QUALITY[format] })
+    .toBuffer()
+  await mkdir(path.dirname(file), { recursive: true })
+  // Write-then-rename so a concurrent reader never sees a partial file
+  const temporary = `${file}.${process.pid}.${Date.now()}.tmp`
+  await writeFile(temporary, body)
+  await rename(temporary, file)
+  await touch(file, body.length)
+  return body
+}
+
+// { status, body, headers } for GET /api/images/<variant>/<bucket>/<path>
+export async function getImageVariant(variant, segments, { accept, ifNoneMatch } = {}) {
+  const width = IMAGE_VARIANTS[variant]
+  if (!width || !validObjectPath(segments)) {
+    return { status: 400, error: 'Unknown variant or image path' }
+  }
+  const objectPath = segments.join('/')
+  const format = negotiateFormat(accept)
+  const source = await resolveSource(objectPath, width)
+  if (!source) return { status: 404, error: 'Image not found' }
+  // A rewritten source has a new ETag, hence a new key: the old variant is never served again
+  // and ages out of the disk cache
+  const key = createHash('sha256').update(`${variant}|${format}|${source.path}|${source.version}`).digest('hex')
+  const etag = `"${key.slice(0, 32)}"`
+  const headers = {
+    'Content-Type': `image/${format}`,
+    'Cache-Control': VARIANT_CACHE_CONTROL,
+    'Vary': 'Accept',
+    'ETag': etag,
+  }
+  const file = path.join(CACHE_DIR, key.slice(0, 2), `${key}.${format}`)
+
+  let body = await readFile(file).catch(() => null)
+  if (body) {
+    await touch(file, body.length)
+    if (ifNoneMatch === etag) return { status: 304, headers: { ...headers, 'X-Cache': 'HIT' } }
+    return { status: 200, body, headers: { ...headers, 'X-Cache': 'HIT' } }
+  }
+
+  // Concurrent requests for the same variant share one resize
+  if (!inflight.has(key)) {
+    inflight.set(key, generate(file, source, width, format).finally(() => inflight.delete(key)))
+  }
+  body = await inflight.get(key)
+  if (!body) return { status: 404, error: 'Image not found' }
+  return { status: 200, body, headers: { ...headers, 'X-Cache': 'MISS' } }
+}
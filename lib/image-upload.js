@@ -0,0 +1,251 @@
+import { encode } from 'blurhash'
+
+// Product photo upload pipeline: resize + re-encode in the browser, then upload
+// several files at once. Each photo is stored at IMAGE_WIDTHS as
+// `<base>-<width>.<ext>`; product_images.image_url points at the largest one,
+// and its width/height/blurhash let the catalog lay out before it loads.
+
+export const IMAGE_WIDTHS = [480, 1024, 1600]
+export const UPLOAD_CONCURRENCY = 3
+// Supabase Storage recommends TUS above 6 MB, and its TUS chunks must be exactly 6 MB
+export const RESUMABLE_THRESHOLD = 6 * 1024 * 1024
+const TUS_CHUNK_SIZE = 6 * 1024 * 1024
+const TUS_RETRY_DELAYS = [0, 1000, 3000, 5000]
+const ENCODE_QUALITY = 0.8
+const CACHE_CONTROL = '31536000'
+const OUTPUT_TYPES = ['image/avif', 'image/webp', 'image/jpeg']
+const EXTENSIONS = { 'image/avif': 'avif', 'image/webp': 'webp', 'image/jpeg': 'jpg' }
+const BLURHASH_SIZE = 32
+
+let outputTypePromise = null
+
+function makeCanvas(width, height) {
+  if (typeof OffscreenCanvas !== 'undefined') return new OffscreenCanvas(width, height)
+  const canvas = document.createElement('canvas')
+  canvas.width = width
+  canvas.height = height
+  return canvas
+}
+
+function canvasToBlob(canvas, type) {
+  if (canvas.convertToBlob) return canvas.convertToBlob({ type, quality: ENCODE_QUALITY })
+  return new Promise((resolve, reject) => {
+    canvas.toBlob((blob) => (blob ? resolve(blob) : reject(new Error('No se pudo codificar la imagen'))),
+      type, ENCODE_QUALITY)
+  })
+}
+
+// Browsers silently fall back to PNG for types they can't encode, so probe once
+function outputType() {
+  if (!outputTypePromise) {
+    outputTypePromise = (async () => {
+      for (const type of OUTPUT_TYPES) {
+        try {
+          const blob = await canvasToBlob(makeCanvas(2, 2), type)
+          if (blob.type === type) return type
+        } catch {}
+      }
+      return 'image/jpeg'
+    })()
+  }
+  return outputTypePromise
+}
+
+function blurhashOf(bitmap) {
+  const height = Math.max(1, Math.round((BLURHASH_SIZE * bitmap.height) / bitmap.width))
+  const canvas = makeCanvas(BLURHASH_SIZE, height)
+  const context = canvas.getContext('2d')
+  context.drawImage(bitmap, 0, 0, BLURHASH_SIZE, height)
+  return encode(context.getImageData(0, 0, BLURHASH_SIZE, height).data, BLURHASH_SIZE, height, 4, 3)
+}
+
+// { variants: one encoded blob per width (never upscaled), blurhash }; null when the
+// browser can't decode the file (e.g. HEIC on desktop), in which case the original is uploaded as-is
+export async function resizeImage(file, widths = IMAGE_WIDTHS) {
+  let bitmap
+  try {
+    bitmap = await createImageBitmap(file, { imageOrientation: 'from-image' })
+  } catch {
+    return null
+  }
+  try {
+    const type = await outputType()
+    const targets = [...new Set(widths.map((width) => Math.min(width, bitmap.width)))]
+    const variants = []
+    for (const width of targets) {
+      const height = Math.round((bitmap.height * width) / bitmap.width)
+      const canvas = makeCanvas(width, height)
+      const context = canvas.getContext('2d')
+      context.imageSmoothingQuality = 'high'
+      context.drawImage(bitmap, 0, 0, width, height)
+      variants.push({ width, height, type, blob: await canvasToBlob(canvas, type) })
+    }
+    return { variants, blurhash: blurhashOf(bitmap) }
+  } finally {
+    bitmap.close()
+  }
+}
+
+// Runs worker(item, index) with at most `limit` in flight; one failure doesn't stop the rest
+export async function runWithConcurrency(items, limit, worker) {
+  const results = new Array(items.length)
+  let next = 0
+  const lanes = Array.from({ length: Math.min(limit, items.length) }, async () => {
+    while (next < items.length) {
+      const index = next++
+      try {
+        results[index] = { status: 'fulfilled', value: await worker(items[index], index) }
+      } catch (reason) {
+        results[index] = { status: 'rejected', reason }
+      }
+    }
+  })
+  await Promise.all(lanes)
+  return results
+}
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms))
+
+function tusMetadata(fields) {
+  return Object.entries(fields)
+    .map(([key, value]) => `${key} ${btoa(unescape(encodeURIComponent(value)))}`)
+    .join(',')
+}
+
+// TUS upload to Supabase Storage in 6 MB chunks. The upload URL is kept in
+// localStorage under the object path, so a dropped connection (or a reload that
+// uploads the same file to the same path, see fileKey) resumes at the last
+// acknowledged offset instead of starting over.
+export async function resumableUpload({ supabaseUrl, accessToken, bucket, path, blob, onProgress }) {
+  const endpoint = `${supabaseUrl}/storage/v1/upload/resumable`
+  const headers = { authorization: `Bearer ${accessToken}`, 'tus-resumable': '1.0.0' }
+  const storageKey = `tus:${bucket}/${path}:${blob.size}`
+  let uploadUrl = typeof localStorage !== 'undefined' ? localStorage.getItem(storageKey) : null
+  let offset = 0
+
+  for (let attempt = 0; ; attempt++) {
+    try {
+      if (uploadUrl) {
+        const head = await fetch(uploadUrl, { method: 'HEAD', headers })
+        if (head.ok) {
+          offset = parseInt(head.headers.get('upload-offset'), 10) || 0
+        } else {
+          uploadUrl = null
+        }
+      }
+      if (!uploadUrl) {
+        const created = await fetch(endpoint, {
+          method: 'POST',
+          headers: {
+            ...headers,
+            'x-upsert': 'true',
+            'upload-length': String(blob.size),
+            'upload-metadata': tusMetadata({
+              bucketName: bucket, objectName: path, contentType: blob.type || 'application/octet-stream',
+              cacheControl: CACHE_CONTROL
+            })
+          }
+        })
+        if (created.status !== 201) throw new Error(`TUS create returned ${created.status}`)
+        uploadUrl = new URL(created.headers.get('location'), endpoint).toString()
+        offset = 0
+        if (typeof localStorage !== 'undefined') localStorage.setItem(storageKey, uploadUrl)
+      }
+      while (offset < blob.size) {
+        const chunk = blob.slice(offset, offset + TUS_CHUNK_SIZE)
+        const patched = await fetch(uploadUrl, {
+          method: 'PATCH',
+          headers: { ...headers, 'upload-offset': String(offset), 'content-type': 'application/offset+octet-stream' },
+          body: chunk
+        })
+        if (patched.status !== 204) throw new Error(`TUS chunk returned ${patched.status}`)
+        offset = parseInt(patched.headers.get('upload-offset'), 10)
+        onProgress?.(offset, blob.size)
+      }
+      if (typeof localStorage !== 'undefined') localStorage.removeItem(storageKey)
+      return { bytes: blob.size }
+    } catch (error) {
+      if (attempt + 1 >= TUS_RETRY_DELAYS.length) throw error
+      await sleep(TUS_RETRY_DELAYS[attempt + 1])
+    }
+  }
+}
+
+async function uploadBlob(supabase, { bucket, path, blob, accessToken, onProgress }) {
+  if (blob.size > RESUMABLE_THRESHOLD) {
+    return resumableUpload({
+      supabaseUrl: process.env.NEXT_PUBLIC_SUPABASE_URL, accessToken, bucket, path, blob, onProgress
+    })
+  }
+  const { error } = await supabase.storage.from(bucket).upload(path, blob, {
+    contentType: blob.type || undefined,
+    cacheControl: CACHE_CONTROL,
+    // Paths are stable per file (fileKey), so a retry after a reload rewrites the same object
+    upsert: true
+  })
+  if (error) throw error
+  onProgress?.(blob.size, blob.size)
+  return { bytes: blob.size }
+}
+
+// Stable name for a picked file: the same photo picked again after a reload maps to
+// the same Storage paths, which is what lets resumableUpload() find its upload URL
+async function fileKey(file, productId) {
+  const identity = new TextEncoder().encode(`${productId}:${file.name}:${file.size}:${file.lastModified}`)
+  const digest = new Uint8Array(await crypto.subtle.digest('SHA-256', identity))
+  return Array.from(digest.slice(0, 8), (byte) => byte.toString(16).padStart(2, '0')).join('')
+}
+
+// Resizes and uploads every file (UPLOAD_CONCURRENCY at a time). Returns the
+// uploaded photos in their original order plus the files that failed, so the
+// caller can save what worked and report the rest.
+export async function uploadProductImages({
+  supabase, files, dealershipId, productId, bucket = 'motorcycles',
+  concurrency = UPLOAD_CONCURRENCY, onProgress
+}) {
+  const { data: { session } } = await supabase.auth.getSession()
+  const accessToken = session?.access_token
+
+  const results = await runWithConcurrency(files, concurrency, async (file, index) => {
+    const base = `${dealershipId}/${productId}/${await fileKey(file, productId)}`
+    const resized = await resizeImage(file)
+    const uploads = resized
+      ? resized.variants.map((variant) => ({ ...variant, path: `${base}-${variant.width}.${EXTENSIONS[variant.type]}` }))
+      : [{ blob: file, path: `${base}.${file.name.split('.').pop().toLowerCase()}` }]
+
+    let bytes = 0
+    const stored = []
+    try {
+      for (const upload of uploads) {
+        const result = await uploadBlob(supabase, {
+          bucket, path: upload.path, blob: upload.blob, accessToken,
+          onProgress: (sent, total) => onProgress?.(index, bytes + sent, total)
+        })
+        stored.push(upload.path)
+        bytes += result.bytes
+      }
+    } catch (error) {
+      // No product_images row will point at a partial set of variants; don't leave them behind
+      if (stored.length) await supabase.storage.from(bucket).remove(stored)
+      throw error
+    }
+    const largest = uploads[uploads.length - 1]
+    const { data: { publicUrl } } = supabase.storage.from(bucket).getPublicUrl(largest.path)
+    return {
+      index,
+      url: publicUrl,
+      width: largest.width ?? null,
+      height: largest.height ?? null,
+      blurhash: resized?.blurhash ?? null,
+      bytes,
+    }
+  })
+
+  return {
+    uploaded: results.filter((result) => result.status === 'fulfilled').map((result) => result.value),
+    failed: results
+      .map((result, index) => ({ result, index }))
+      .filter(({ result }) => result.status === 'rejected')
+      .map(({ result, index }) => ({ index, name: files[index].name, error: result.reason }))
+  }
+}
@@ -0,0 +1,45 @@
+import { decode } from 'blurhash'
+
+// Sizes served by /api/images/<variant>/<bucket>/<path> (see lib/image-derivatives.js)
+export const IMAGE_VARIANTS = { thumb: 160, card: 480, detail: 1200 }
+
+const PUBLIC_PREFIX = '/storage/v1/object/public/'
+
+// Derivative URL for a Storage public URL; anything else (placeholders, external URLs) is returned as-is
+export function imageVariantUrl(url, variant) {
+  if (!url) return url
+  const index = url.indexOf(PUBLIC_PREFIX)
+  if (index === -1) return url
+  return `/api/images/${variant}/${url.slice(index + PUBLIC_PREFIX.length)}`
+}
+
+const blurDataUrls = new Map()
+
+// Tiny data: URL rendered from a product_images.blurhash, for next/image's blur placeholder
+export function blurDataURL(hash) {
+  if (!hash || typeof document === 'undefined') return undefined
+  if (!blurDataUrls.has(hash)) {
+    try {
+      const canvas = document.createElement('canvas')
+      canvas.width = 32
+      canvas.height = 32
+      const context = canvas.getContext('2d')
+      const imageData = context.createImageData(32, 32)
+      imageData.data.set(decode(hash, 32, 32))
+      context.putImageData(imageData, 0, 0)
+      blurDataUrls.set(hash, canvas.toDataURL())
+    } catch {
+      blurDataUrls.set(hash, undefined)
+    }
+  }
+  return blurDataUrls.get(hash)
+}
+
+// src + blur placeholder props for a product_images row
+export function productImageProps(image, variant) {
+  const placeholder = blurDataURL(image?.blurhash)
+  return {
+    src: imageVariantUrl(image?.image_url, variant) || '/placeholder.svg',
+    ...(placeholder ? { placeholder: 'blur', blurDataURL: placeholder } : {}),
+  }
+}
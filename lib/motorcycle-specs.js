@@ -110,3 +110,26 @@ export const SPECS_LABELS = {
     }
   }
 }
+
+// Specs the catalog can filter by (GET /api/facets) and their path inside specifications.
+// Keep in sync with product_spec_facets() in supabase-spec-filters.sql.
+// cilindrada lives at the top level, where the product page reads it.
+export const SPEC_FACETS = {
+  cilindrada: ['cilindrada'],
+  motor: ['motor', 'motor'],
+  enfriamiento: ['motor', 'enfriamiento'],
+  sistema_combustible: ['motor', 'sistema_combustible'],
+  transmision: ['transmision', 'tipo'],
+  unidad_final: ['transmision', 'unidad_final']
+}
+
+// Numeric columns of product_spec_values (supabase-spec-values.sql) the catalog can range-filter
+// and sort by (GET /api/products/specs), parsed from the free-text specs in fixed units.
+export const SPEC_RANGE_FIELDS = {
+  cc: 'Cilindrada (cc)',
+  power_hp: 'Potencia (HP)',
+  torque_nm: 'Torque (Nm)',
+  weight_kg: 'Peso (kg)',
+  fuel_capacity_l: 'Capacidad de Combustible (litros)',
+  price: 'Precio'
+}
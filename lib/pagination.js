@@ -0,0 +1,67 @@
+// Keyset pagination helpers for product listings ordered by (created_at DESC, id DESC)
+
+export const DEFAULT_PAGE_SIZE = 24
+export const MAX_PAGE_SIZE = 100
+
+const UUID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i
+
+export function parsePageSize(value) {
+  const size = parseInt(value, 10)
+  if (!Number.isFinite(size) || size <= 0) return DEFAULT_PAGE_SIZE
+  return Math.min(size, MAX_PAGE_SIZE)
+}
+
+// Opaque cursor pointing at the last row of a page
+export function encodeCursor(row) {
+  return Buffer.from(JSON.stringify([row.created_at, row.id])).toString('base64url')
+}
+
+// Returns null for anything that is not a cursor we issued, so it can't be used to inject filters
+export function decodeCursor(cursor) {
+  try {
+    const [createdAt, id] = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'))
+    if (typeof createdAt !== 'string' || Number.isNaN(Date.parse(createdAt)) || !UUID_PATTERN.test(id)) {
+      return null
+    }
+    return { createdAt, id }
+  } catch {
+    return null
+  }
+}
+
+// PostgREST `or` filter selecting the rows strictly after the cursor
+export function keysetFilter({ createdAt, id }) {
+  return `created_at.lt."${createdAt}",and(created_at.eq."${createdAt}",id.lt.${id})`
+}
+
+// Cursor for listings sorted by a numeric column, then id (GET /api/products/specs)
+export function encodeSortCursor(value, id) {
+  return Buffer.from(JSON.stringify([value, id])).toString('base64url')
+}
+
+export function decodeSortCursor(cursor) {
+  try {
+    const [value, id] = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'))
+    if (typeof value !== 'number' || !Number.isFinite(value) || !UUID_PATTERN.test(id)) return null
+    return { value, id }
+  } catch {
+    return null
+  }
+}
+
+// PostgREST `or` filter selecting the rows strictly after the cursor in (column, idColumn) order
+export function sortKeysetFilter(column, ascending, { value, id }, idColumn = 'id') {
+  const op = ascending ? 'gt' : 'lt'
+  return `${column}.${op}.${value},and(${column}.eq.${value},${idColumn}.${op}.${id})`
+}
+
+// Same keyset page over rows already sorted by (created_at DESC, id DESC), e.g. a cached catalog
+export function slicePage(rows, cursor, limit) {
+  const start = cursor
+    ? rows.findIndex((row) => row.created_at < cursor.createdAt ||
+        (row.created_at === cursor.createdAt && row.id < cursor.id))
+    : 0
+  if (start === -1) return { data: [], next_cursor: null }
+  const data = rows.slice(start, start + limit)
+  return { data, next_cursor: start + limit < rows.length ? encodeCursor(data[data.length - 1]) : null }
+}
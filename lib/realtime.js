@@ -0,0 +1,46 @@
+// Per-dealership change feed (supabase-realtime.sql). Pages keep their lists in memory and apply each
+// change with applyChange() instead of refetching the whole table after every write.
+
+export const REALTIME_TABLES = ['products', 'product_images', 'categories', 'subcategories', 'employees', 'site_settings']
+
+// Calls onChange({ table, eventType, new, old, commit_timestamp }) for every change to the dealership's rows
+// of `tables`. RLS decides which INSERT/UPDATE rows arrive; DELETEs carry only the id and are not filtered.
+export function subscribeToDealershipChanges(supabase, dealershipId, tables, onChange) {
+  const channel = supabase.channel(`dealership:${dealershipId}:${tables.join(',')}`)
+  for (const table of tables) {
+    channel.on(
+      'postgres_changes',
+      { event: '*', schema: 'public', table, filter: `dealership_id=eq.${dealershipId}` },
+      (payload) => onChange({ ...payload, table })
+    )
+  }
+  channel.subscribe((status, error) => {
+    if (error) console.error('Realtime subscription error:', error)
+  })
+  return () => supabase.removeChannel(channel)
+}
+
+// The list after one change, or the same array when the change doesn't concern it (so React skips the render).
+// Realtime rows only have the table's own columns: `decorate(record, previous)` rebuilds embeds such as
+// `categories (name)`; `compare` keeps the list in its query order.
+export function applyChange(rows, change, { decorate, compare } = {}) {
+  const id = change.eventType === 'DELETE' ? change.old?.id : change.new?.id
+  const index = rows.findIndex((row) => row.id === id)
+  if (change.eventType === 'DELETE') {
+    return index === -1 ? rows : rows.filter((_, position) => position !== index)
+  }
+
+  const previous = index === -1 ? undefined : rows[index]
+  const next = decorate ? decorate(change.new, previous) : { ...previous, ...change.new }
+  const rest = index === -1 ? rows : rows.filter((_, position) => position !== index)
+  if (!compare) {
+    return index === -1 ? [...rows, next] : rows.map((row, position) => (position === index ? next : row))
+  }
+  const at = rest.findIndex((row) => compare(next, row) < 0)
+  return at === -1 ? [...rest, next] : [...rest.slice(0, at), next, ...rest.slice(at)]
+}
+
+// Comparators matching the pages' .order() calls
+export const newestFirst = (a, b) => (b.created_at || '').localeCompare(a.created_at || '')
+export const byName = (a, b) => (a.name || '').localeCompare(b.name || '')
+export const byDisplayOrder = (a, b) => (a.display_order ?? 0) - (b.display_order ?? 0)
@@ -0,0 +1,2650 @@
+#!/usr/bin/env python3
+"""
+Local Supabase stand-in for hermetic backend test runs.
+
+Implements, in-process and in memory, the subset of Supabase the backend
+suite talks to:
+
+- PostgREST (/rest/v1): select with embeds, eq/neq/gt/gte/lt/lte/in/is/
+  like/ilike/cs filters, or/and groups, order, limit/offset, single-object
+  responses, Prefer: return=representation / count=exact, unique and
+  foreign-key constraints with ON DELETE CASCADE / SET NULL
+- RPC (/rest/v1/rpc/<name>): the SQL functions of the migration files,
+  re-implemented in Python (RPC_FUNCTIONS)
+- The dealership_stats counters of supabase-dashboard-stats.sql, kept
+  current by a write listener in place of the triggers
+- The product_spec_values rows of supabase-spec-values.sql, parsed by a
+  write listener in place of the sync trigger
+- Realtime (/realtime/v1/websocket): postgres_changes of the tables in
+  supabase-realtime.sql over Phoenix channels, filtered by binding and RLS
+- The catalog snapshots of lib/catalog-publisher.js, published to
+  site-assets/catalog/ after each catalog change (writes there are
+  reserved to the service role, as in supabase-catalog-snapshots.sql)
+- GoTrue (/auth/v1): password and refresh_token grants, /user, and the
+  admin API for creating/deleting users
+- Storage (/storage/v1): object upload/download/remove on the public
+  buckets, and TUS resumable uploads (/storage/v1/upload/resumable)
+- The Next.js routes the suite probes (/api, /api/health, /api/products, /api/products/specs,
+  /api/search, /api/facets, /api/catalog/<slug> with its cache,
+  /api/images/<variant>/<bucket>/<path> (needs Pillow), /catalogo/<slug>, /dashboard),
+  authenticated by bearer token or the @supabase/ssr session cookie. These are
+  Python copies of app code, so results against them say nothing about the app
+  itself. Given ``app_url`` (a running `next dev`/`next start` configured with
+  --print-env), the stand-in serves only the Supabase services: these routes
+  answer 404, and catalog writes reach the app's /api/catalog/invalidate the
+  way the supabase-catalog-cache.sql triggers do, so it also publishes the
+  snapshots
+
+Tables, defaults, constraints and seed rows are read from
+supabase-schema.sql, and the multi-tenant RLS policies of that file are
+mirrored per role (anon / authenticated / service_role).
+
+Usage:
+    python local_supabase.py --port 54321
+    LOCAL_SUPABASE_JWT_SECRET=dev python local_supabase.py --port 54321 --app-url http://localhost:3000 \
+        --print-env > .env.local   # then start Next.js, and run backend_test.py --local --app-url
+or from Python:
+    with LocalSupabase() as local:
+        requests.get(f"{local.url}/rest/v1/dealerships", headers=local.anon_headers())
+"""
+
+import io
+import os
+import re
+import sys
+import gzip
+import json
+import hmac
+import queue
+import struct
+import time
+import uuid
+import base64
+import shutil
+import socket
+import hashlib
+import argparse
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from decimal import Decimal, ROUND_HALF_UP
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl, unquote
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    # /api/images answers 501 without Pillow; everything else works
+    Image = ImageOps = None
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'supabase-schema.sql')
+# Migrations whose CREATE TABLE / ALTER TABLE ... ADD COLUMN statements are applied on top of the schema
+MIGRATIONS = [
+    os.path.join(os.path.dirname(SCHEMA_PATH), name)
+    for name in ('supabase-image-metadata.sql', 'supabase-dashboard-stats.sql', 'supabase-spec-values.sql')
+]
+
+# Password every seeded auth user gets (the suite's test users use it too)
+DEFAULT_PASSWORD = os.getenv('LOCAL_SUPABASE_PASSWORD', 'password123')
+
+
+class PostgrestError(Exception):
+    """Error rendered as a PostgREST JSON error body"""
+
+    def __init__(self, status, code, message, details=None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+        self.details = details
+
+    def body(self):
+        return {'code': self.code, 'message': self.message, 'details': self.details, 'hint': None}
+
+
+# ============================================
+# SCHEMA
+# ============================================
+
+def _split_top_level(text, separator=',', quote="'"):
+    """Split on ``separator`` outside parentheses and quotes"""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == quote:
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        if char == separator and depth == 0 and not quoted:
+            parts.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    if ''.join(current).strip():
+        parts.append(''.join(current))
+    return parts
+
+
+def _strip_sql_comments(sql):
+    sql = re.sub(r'/\*.*?\*/', '', sql, flags=re.S)
+    return re.sub(r'--[^\n]*', '', sql)
+
+
+def _literal(token):
+    """Python value of a SQL literal"""
+    token = token.strip()
+    upper = token.upper()
+    if upper == 'NULL':
+        return None
+    if upper in ('TRUE', 'FALSE'):
+        return upper == 'TRUE'
+    if token.startswith("'") and token.endswith("'"):
+        return token[1:-1].replace("''", "'")
+    try:
+        return int(token)
+    except ValueError:
+        try:
+            return float(token)
+        except ValueError:
+            return token
+
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Table:
+    """Columns, defaults and constraints of one table"""
+
+    def __init__(self, name):
+        self.name = name
+        self.columns = []
+        self.types = {}
+        self.defaults = {}
+        self.not_null = set()
+        self.unique = []
+        self.foreign_keys = {}
+
+    def add_column(self, definition):
+        match = re.match(r'\s*(\w+)\s+([\w]+(?:\s*\([\d,\s]+\))?)(.*)$', definition, flags=re.S)
+        if not match:
+            return
+        name, column_type, rest = match.groups()
+        self.columns.append(name)
+        self.types[name] = column_type.split('(')[0].upper()
+        default = re.search(r"DEFAULT\s+('(?:[^']|'')*'|[\w.]+\(\)|[\w.#-]+)", rest, flags=re.I)
+        if default:
+            self.defaults[name] = default.group(1)
+        if re.search(r'NOT NULL|PRIMARY KEY', rest, flags=re.I):
+            self.not_null.add(name)
+        if re.search(r'\bUNIQUE\b|PRIMARY KEY', rest, flags=re.I):
+            self.unique.append((name,))
+        reference = re.search(
+            r'REFERENCES\s+(?:public\.)?(\w+)\s*\((\w+)\)(?:\s+ON DELETE\s+(CASCADE|SET NULL))?',
+            rest, flags=re.I
+        )
+        if reference:
+            self.foreign_keys[name] = (reference.group(1), (reference.group(3) or 'NO ACTION').upper())
+
+    def default_for(self, column):
+        expression = self.defaults.get(column)
+        if expression is None:
+            return None
+        lowered = expression.lower()
+        if lowered == 'gen_random_uuid()':
+            return str(uuid.uuid4())
+        if lowered == 'now()':
+            return now_iso()
+        return _literal(expression)
+
+    def coerce(self, column, value):
+        """Normalize an incoming JSON value to the column type"""
+        if value is None:
+            return None
+        column_type = self.types.get(column, 'TEXT')
+        if column_type in ('DECIMAL', 'NUMERIC', 'REAL', 'FLOAT'):
+            return float(value)
+        if column_type in ('INTEGER', 'INT', 'BIGINT', 'SMALLINT'):
+            return int(value)
+        return value
+
+
+def parse_schema(sql):
+    """Tables and seed rows from a Supabase SQL file"""
+    sql = _strip_sql_comments(sql)
+    tables = {}
+    for name, body in re.findall(
+        r'CREATE TABLE IF NOT EXISTS\s+(?:public\.)?(\w+)\s*\((.*?)\);', sql, flags=re.S | re.I
+    ):
+        table = Table(name)
+        for definition in _split_top_level(body):
+            definition = definition.strip()
+            constraint = re.match(r'UNIQUE\s*\(([^)]*)\)', definition, flags=re.I)
+            if constraint:
+                table.unique.append(tuple(column.strip() for column in constraint.group(1).split(',')))
+            elif definition:
+                table.add_column(definition)
+        tables[name] = table
+
+    for name, changes in re.findall(
+        r'ALTER TABLE\s+(?:IF EXISTS\s+)?(?:public\.)?(\w+)\s+(ADD COLUMN\b.*?);', sql, flags=re.S | re.I
+    ):
+        for change in _split_top_level(changes):
+            definition = re.sub(r'^\s*ADD COLUMN\s+(?:IF NOT EXISTS\s+)?', '', change, flags=re.I)
+            if name in tables and definition.split()[0] not in tables[name].columns:
+                tables[name].add_column(definition)
+
+    seeds = []
+    for name, columns, values in re.findall(
+        r'INSERT INTO\s+(?:public\.)?(\w+)\s*\(([^)]*)\)\s*VALUES\s*(.*?)(?:ON CONFLICT[^;]*)?;',
+        sql, flags=re.S | re.I
+    ):
+        column_names = [column.strip() for column in columns.split(',')]
+        for tuple_text in _split_top_level(values):
+            tuple_text = tuple_text.strip()
+            if not tuple_text.startswith('('):
+                continue
+            literals = [_literal(token) for token in _split_top_level(tuple_text[1:-1])]
+            seeds.append((name, dict(zip(column_names, literals))))
+    return tables, seeds
+
+
+# ============================================
+# QUERY PARSING
+# ============================================
+
+def parse_select(text):
+    """``*,categories(id,name),product_images(*)`` -> (columns, {embed: sub-select})"""
+    text = re.sub(r'\s+', '', text or '*')
+    columns, embeds = [], {}
+    for item in _split_top_level(text):
+        if not item:
+            continue
+        if '(' in item:
+            name = item[:item.index('(')]
+            # alias:relation!hint(...) -> relation
+            alias, _, relation = name.rpartition(':')
+            relation = relation.split('!')[0]
+            embeds[alias or relation] = (relation, parse_select(item[item.index('(') + 1:-1]))
+        else:
+            columns.append(item)
+    return columns, embeds
+
+
+def _typed(sample, raw):
+    """Coerce a filter operand to the type of the stored value it is compared with"""
+    if isinstance(sample, bool):
+        return raw.lower() == 'true'
+    if isinstance(sample, (int, float)) and not isinstance(sample, bool):
+        try:
+            return float(raw)
+        except ValueError:
+            return raw
+    return raw
+
+
+def _like(pattern, value, insensitive):
+    regex = '^' + re.escape(pattern).replace(r'\*', '.*').replace('%', '.*').replace('_', '.') + '$'
+    return re.match(regex, str(value), flags=re.I if insensitive else 0) is not None
+
+
+def _contains(container, contained):
+    """JSONB @> semantics"""
+    if isinstance(contained, dict):
+        return isinstance(container, dict) and all(
+            key in container and _contains(container[key], value) for key, value in contained.items()
+        )
+    if isinstance(contained, list):
+        return isinstance(container, list) and all(
+            any(_contains(item, wanted) for item in container) for wanted in contained
+        )
+    return container == contained
+
+
+def _compare(operator, value, operand):
+    """Evaluate one PostgREST operator against a stored value"""
+    if operator == 'is':
+        lowered = operand.lower()
+        if lowered == 'null':
+            return value is None
+        return value is (lowered == 'true')
+    if operator == 'in':
+        if value is None:
+            return False
+        options = [option.strip().strip('"') for option in _split_top_level(operand.strip('()'))]
+        return any(value == _typed(value, option) for option in options)
+    if operator == 'cs':
+        try:
+            return _contains(value, json.loads(operand))
+        except json.JSONDecodeError:
+            return False
+    if value is None:
+        return False
+    if operator in ('like', 'ilike'):
+        return _like(operand, value, operator == 'ilike')
+    operand = _typed(value, operand)
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and isinstance(operand, str):
+        return False
+    return {
+        'eq': lambda: value == operand,
+        'neq': lambda: value != operand,
+        'gt': lambda: value > operand,
+        'gte': lambda: value >= operand,
+        'lt': lambda: value < operand,
+        'lte': lambda: value <= operand,
+    }.get(operator, lambda: False)()
+
+
+def _condition(column, expression):
+    """Predicate for ``column=op.value`` (with optional ``not.`` prefix)"""
+    negate = False
+    if expression.startswith('not.'):
+        negate, expression = True, expression[4:]
+    operator, _, operand = expression.partition('.')
+
+    operand = unquote(operand)
+    if operator == 'in':
+        # Parse the list once rather than per row (id=in.(...) lookups over big tables)
+        options = [option.strip().strip('"') for option in _split_top_level(operand.strip('()'))]
+        option_set = set(options)
+
+        def predicate(row):
+            value = row.get(column)
+            if isinstance(value, str):
+                result = value in option_set
+            else:
+                result = value is not None and any(value == _typed(value, option) for option in options)
+            return not result if negate else result
+        return predicate
+    if len(operand) >= 2 and operand[0] == operand[-1] == '"':
+        # Double-quoted values (reserved characters inside or=/and= groups)
+        operand = operand[1:-1]
+
+    def predicate(row):
+        result = _compare(operator, row.get(column), operand)
+        return not result if negate else result
+    return predicate
+
+
+def _logic_tree(operator, body):
+    """Predicate for ``or=(a.eq.1,and(b.gt.2,c.is.null))``"""
+    predicates = []
+    for part in _split_top_level(body, quote='"'):
+        part = part.strip()
+        group = re.match(r'^(not\.)?(and|or)\((.*)\)$', part)
+        if group:
+            inner = _logic_tree(group.group(2), group.group(3))
+            predicates.append((lambda inner: lambda row: not inner(row))(inner) if group.group(1) else inner)
+        else:
+            column, _, expression = part.partition('.')
+            predicates.append(_condition(column, expression))
+    if operator == 'and':
+        return lambda row: all(predicate(row) for predicate in predicates)
+    return lambda row: any(predicate(row) for predicate in predicates)
+
+
+def parse_filters(params):
+    """Row predicates plus order/limit/offset/select from query params"""
+    predicates, options = [], {}
+    for key, value in params:
+        if key in ('select', 'order', 'limit', 'offset', 'on_conflict', 'columns'):
+            options[key] = value
+        elif key in ('or', 'and', 'not.or', 'not.and'):
+            tree = _logic_tree(key.split('.')[-1], value.strip()[1:-1])
+            predicates.append((lambda tree: lambda row: not tree(row))(tree) if key.startswith('not.') else tree)
+        elif '.' not in key:
+            predicates.append(_condition(key, value))
+    return predicates, options
+
+
+def _sort_key(value):
+    # None sorts last ascending, like Postgres' default NULLS LAST
+    return (value is None, value if value is not None else 0)
+
+
+def apply_order(rows, order):
+    for term in reversed([term for term in (order or '').split(',') if term]):
+        parts = term.split('.')
+        descending = len(parts) > 1 and parts[1] == 'desc'
+        rows = sorted(rows, key=lambda row: _sort_key(row.get(parts[0])), reverse=descending)
+    return rows
+
+
+# ============================================
+# PAGINATION (lib/pagination.js)
+# ============================================
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+PRODUCT_LIST_SELECT = (
+    'id,name,brand,model,year,price,status,description,specifications,category_id,subcategory_id,created_at,'
+    'categories(id,name,slug),subcategories(id,name,slug),'
+    'product_images(id,image_url,is_primary,display_order,width,height,blurhash)'
+)
+
+def slice_page(rows, cursor, limit):
+    """slicePage(): a keyset page over rows already sorted by (created_at DESC, id DESC)"""
+    start = 0
+    if cursor:
+        created_at, row_id = cursor
+        start = next((index for index, row in enumerate(rows)
+                      if row['created_at'] < created_at or (row['created_at'] == created_at and row['id'] < row_id)),
+                      len(rows))
+    page = rows[start:start + limit]
+    return page, encode_cursor(page[-1]) if start + limit < len(rows) else None
+
+
+UUID_RE = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.I)
+
+
+def encode_cursor(row):
+    return _b64url(json.dumps([row['created_at'], row['id']], separators=(',', ':')).encode())
+
+
+def decode_cursor(cursor):
+    """(created_at, id) of a cursor we issued, or None"""
+    try:
+        created_at, row_id = json.loads(_b64url_decode(cursor))
+        datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+    except (ValueError, TypeError, AttributeError):
+        return None
+    return (created_at, row_id) if UUID_RE.match(str(row_id)) else None
+
+
+# ============================================
+# RPC FUNCTIONS (/rest/v1/rpc/<name>)
+# ============================================
+
+# name -> fn(store, args, claims); SQL functions of the migration files, re-implemented
+RPC_FUNCTIONS = {}
+
+
+def rpc(name):
+    def register(fn):
+        RPC_FUNCTIONS[name] = fn
+        return fn
+    return register
+
+
+def _words(text):
+    return [word for word in re.split(r'[\W_]+', (text or '').lower()) if word]
+
+
+def trigrams(text):
+    """pg_trgm trigrams: each word padded with two leading spaces and one trailing"""
+    grams = set()
+    for word in _words(text):
+        padded = f"  {word} "
+        grams.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return grams
+
+
+# pg_trgm.word_similarity_threshold
+WORD_SIMILARITY_THRESHOLD = 0.6
+# ts_rank_cd weights for A/B/C lexemes
+SEARCH_WEIGHTS = (1.0, 0.4, 0.2)
+
+
+# product id -> (source text, weighted words, trigrams); plays the role of the GIN indexes
+_SEARCH_DOCUMENTS = {}
+
+
+def _search_document(row):
+    """(weighted words, trigrams) of a product, recomputed only when its text changes"""
+    source = (row['name'], row['brand'], row['model'], row['description'])
+    cached = _SEARCH_DOCUMENTS.get(row['id'])
+    if cached is None or cached[0] != source:
+        name, brand, model, description = source
+        fields = (_words(name), _words(f"{brand or ''} {model or ''}"), _words(description))
+        text = ' '.join(part for part in (name, brand, model) if part).lower()
+        cached = _SEARCH_DOCUMENTS[row['id']] = (source, fields, trigrams(text))
+    return cached[1], cached[2]
+
+
+@rpc('search_products')
+def search_products(store, args, claims):
+    """supabase-search.sql: prefix full-text match OR trigram word similarity, ranked.
+    
+    ts_rank_cd and word_similarity are approximated (weighted prefix hits and
+    the share of query trigrams found), which is enough to order test data.
+    """
+    tokens = _words(args.get('p_query'))
+    query_grams = trigrams(args.get('p_query'))
+    limit = min(max(int(args.get('p_limit') or 24), 1), 100)
+    offset = max(int(args.get('p_offset') or 0), 0)
+    filters = [(column, args.get(f'p_{column}')) for column in ('dealership_id', 'category_id', 'subcategory_id')]
+    matches = []
+    with store.lock:
+        visible = store._visible('products', claims)
+        for row in store.rows['products']:
+            if not visible(row) or any(value and row[column] != value for column, value in filters):
+                continue
+            fields, grams = _search_document(row)
+            text_rank = 0.0
+            if tokens and all(any(word.startswith(token) for words in fields for word in words) for token in tokens):
+                text_rank = sum(
+                    max((weight for weight, words in zip(SEARCH_WEIGHTS, fields)
+                         if any(word.startswith(token) for word in words)), default=0.0)
+                    for token in tokens
+                ) / len(tokens)
+            similarity = len(query_grams & grams) / len(query_grams) if query_grams else 0.0
+            if text_rank or similarity >= WORD_SIMILARITY_THRESHOLD:
+                matches.append((text_rank * 2 + similarity, row['id']))
+    matches.sort(key=lambda match: (-match[0], match[1]))
+    return [
+        {'id': row_id, 'rank': round(rank, 6), 'total_count': len(matches)}
+        for rank, row_id in matches[offset:offset + limit]
+    ]
+
+
+# product_spec_facets() of supabase-spec-filters.sql (SPEC_FACETS in lib/motorcycle-specs.js)
+SPEC_FACETS = {
+    'cilindrada': ('cilindrada',),
+    'motor': ('motor', 'motor'),
+    'enfriamiento': ('motor', 'enfriamiento'),
+    'sistema_combustible': ('motor', 'sistema_combustible'),
+    'transmision': ('transmision', 'tipo'),
+    'unidad_final': ('transmision', 'unidad_final'),
+}
+
+
+def _spec_value(specifications, path):
+    """``specifications #> path``: the JSON value at ``path``, or None"""
+    value = specifications
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+@rpc('filter_products_by_specs')
+def filter_products_by_specs(store, args, claims):
+    """supabase-spec-filters.sql: a page of ids, the total and per-facet value counts.
+
+    Values of one facet are OR'ed and facets AND'ed, each value matching like
+    ``specifications @> {path: value}`` (equal JSON strings). A filtered
+    facet is counted without its own filter.
+    """
+    filters = {
+        facet: values for facet, values in (args.get('p_filters') or {}).items()
+        if facet in SPEC_FACETS and isinstance(values, list) and values
+    }
+    limit = min(max(int(args.get('p_limit') or 24), 1), 100)
+    offset = max(int(args.get('p_offset') or 0), 0)
+    scope = [(column, args.get(f'p_{column}')) for column in ('dealership_id', 'category_id', 'subcategory_id')]
+    with store.lock:
+        visible = store._visible('products', claims)
+        rows = [row for row in store.rows['products']
+                if visible(row) and all(value is None or row[column] == value for column, value in scope)]
+
+    def matches(row, skip=None):
+        return all(_spec_value(row['specifications'], SPEC_FACETS[facet]) in values
+                   for facet, values in filters.items() if facet != skip)
+
+    selected = [row for row in rows if matches(row)]
+    selected.sort(key=lambda row: (row['created_at'], row['id']), reverse=True)
+    facets = {}
+    for facet, path in SPEC_FACETS.items():
+        counts = {}
+        for row in selected if facet not in filters else (row for row in rows if matches(row, facet)):
+            value = _spec_value(row['specifications'], path)
+            if value is not None and value != '':
+                # #>> renders non-string JSON as its text
+                value = value if isinstance(value, str) else json.dumps(value)
+                counts[value] = counts.get(value, 0) + 1
+        if counts:
+            facets[facet] = counts
+    return {'total': len(selected), 'ids': [row['id'] for row in selected[offset:offset + limit]], 'facets': facets}
+
+
+# ============================================
+# SPEC VALUES (supabase-spec-values.sql)
+# ============================================
+
+# Range-filterable / sortable columns of product_spec_values
+SPEC_RANGE_FIELDS = ('cc', 'power_hp', 'torque_nm', 'weight_kg', 'fuel_capacity_l', 'price')
+
+_SPEC_NUMBER_RE = re.compile(r'(\d+(?:[.,]\d+)?)')
+
+
+def _spec_number(text):
+    """spec_number(): first number of the text, decimal comma accepted, as a Decimal"""
+    match = _SPEC_NUMBER_RE.search(text) if isinstance(text, str) else None
+    return Decimal(match.group(1).replace(',', '.')) if match else None
+
+
+def _spec_bounded(value, maximum, places=Decimal('0.1')):
+    """spec_bounded(): rounded half away from zero like numeric round(); out of range -> None"""
+    if value is None or not 0 < value < maximum:
+        return None
+    return value.quantize(places, rounding=ROUND_HALF_UP)
+
+
+def parse_spec_values(specifications):
+    """parse_spec_values(): cc, power_hp, torque_nm, weight_kg, fuel_capacity_l in fixed units"""
+    specs = specifications if isinstance(specifications, dict) else {}
+
+    def text(*path):
+        value = _spec_value(specs, path)
+        return value if isinstance(value, str) else None
+
+    def converted(value, rules, maximum):
+        for pattern, factor in rules:
+            if value is not None and re.search(pattern, value, flags=re.I):
+                number = _spec_number(value)
+                return _spec_bounded(number * Decimal(factor) if number is not None else None, maximum)
+        return _spec_bounded(_spec_number(value), maximum)
+
+    engine = re.search(r'(\d+(?:[.,]\d+)?)\s*cc', text('motor', 'motor') or '', flags=re.I)
+    cc = _spec_number(text('cilindrada'))
+    if cc is None and engine:
+        cc = _spec_number(engine.group(1))
+    cc = _spec_bounded(cc, 10000)
+    values = {
+        'cc': int(cc.quantize(Decimal('1'), rounding=ROUND_HALF_UP)) if cc is not None else None,
+        'power_hp': converted(text('motor', 'potencia_maxima'),
+                              [(r'\d\s*kw', '1.341'), (r'\d\s*(cv|ps)\b', '0.9863')], 10000),
+        'torque_nm': converted(text('motor', 'torque_maximo'),
+                               [(r'\d\s*kg', '9.80665'), (r'\d\s*(lb|ft)', '1.35582')], 10000),
+        'weight_kg': converted(text('dimension', 'peso'), [(r'\d\s*lb', '0.45359')], 10000),
+        'fuel_capacity_l': converted(text('chasis', 'capacidad_combustible'), [(r'\d\s*gal', '3.78541')], 1000),
+    }
+    return {field: float(value) if isinstance(value, Decimal) else value for field, value in values.items()}
+
+
+class SpecValues:
+    """The product_spec_values_sync trigger: parsed spec columns kept in step with products.
+
+    Product deletes need nothing here: the side rows go with ON DELETE CASCADE.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def _upsert(self, products):
+        """INSERT ... ON CONFLICT (product_id) DO UPDATE for a batch of products"""
+        index = self.store.unique_index['product_spec_values'][('product_id',)]
+        created, stamp = [], now_iso()
+        for product in products:
+            if not product.get('dealership_id'):
+                continue
+            values = dict(parse_spec_values(product.get('specifications')), dealership_id=product['dealership_id'],
+                          price=float(product['price']) if product.get('price') is not None else None)
+            row = index.get((product['id'],))
+            if row is None:
+                created.append(dict(values, product_id=product['id'], parsed_at=stamp))
+            elif any(row[column] != value for column, value in values.items()):
+                row.update(values, parsed_at=stamp)
+        if created:
+            self.store.insert('product_spec_values', created, {'role': 'service_role'})
+
+    def on_write(self, table, rows):
+        if table != 'products':
+            return
+        with self.store.lock:
+            self._upsert([row for row in rows if self.store.find_by_id('products', row['id']) is row])
+
+
+@rpc('refresh_product_spec_values')
+def refresh_product_spec_values(store, args, claims):
+    """supabase-spec-values.sql: re-parse one keyset batch of products (by id); service_role only"""
+    if claims.get('role') != 'service_role':
+        raise PostgrestError(403, '42501', 'permission denied for function refresh_product_spec_values')
+    after = args.get('p_after')
+    limit = min(max(int(args.get('p_limit') or 1000), 1), 10000)
+    with store.lock:
+        batch = sorted((row for row in store.rows['products']
+                        if row.get('dealership_id') and (after is None or row['id'] > after)),
+                       key=lambda row: row['id'])[:limit]
+        SpecValues(store)._upsert(batch)
+    return {'processed': len(batch), 'last_id': batch[-1]['id'] if batch else None}
+
+
+def encode_sort_cursor(value, row_id):
+    return _b64url(json.dumps([value, row_id], separators=(',', ':')).encode())
+
+
+def decode_sort_cursor(cursor):
+    """(value, product_id) of a /api/products/specs cursor we issued, or None"""
+    try:
+        value, row_id = json.loads(_b64url_decode(cursor))
+    except (ValueError, TypeError, AttributeError):
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not UUID_RE.match(str(row_id)):
+        return None
+    return value, row_id
+
+
+# ============================================
+# CATALOG CACHE (lib/catalog-cache.js)
+# ============================================
+
+CATALOG_TABLES = ('dealerships', 'site_settings', 'products', 'product_images', 'categories', 'subcategories',
+                  'employees')
+
+
+class CatalogCache:
+    """LRU + TTL cache of /api/catalog/<slug> payloads, invalidated per dealership"""
+
+    def __init__(self, ttl=300.0, max_entries=500):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.generations = {}
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def get(self, slug):
+        with self.lock:
+            entry = self.entries.get(slug)
+            if entry is None or entry[1] <= time.monotonic():
+                self.entries.pop(slug, None)
+                self.stats['misses'] += 1
+                return None
+            self.entries.move_to_end(slug)
+            self.stats['hits'] += 1
+            return entry[0]
+
+    def generation(self, dealership_id):
+        with self.lock:
+            return self.generations.get(dealership_id, 0)
+
+    def set(self, slug, payload, generation):
+        with self.lock:
+            # A write landed while the payload was being built; don't cache it
+            if self.generations.get(payload['dealership']['id'], 0) != generation:
+                return
+            self.entries[slug] = (payload, time.monotonic() + self.ttl)
+            self.entries.move_to_end(slug)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate_dealership(self, dealership_id):
+        with self.lock:
+            self.generations[dealership_id] = self.generations.get(dealership_id, 0) + 1
+            doomed = [slug for slug, (payload, _) in self.entries.items()
+                      if payload['dealership']['id'] == dealership_id]
+            for slug in doomed:
+                del self.entries[slug]
+            self.stats['invalidations'] += 1
+            return len(doomed)
+
+
+# ============================================
+# CATALOG SNAPSHOTS (lib/catalog-publisher.js)
+# ============================================
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_BUCKET = 'site-assets'
+SNAPSHOT_KEPT_VERSIONS = 3
+
+
+def snapshot_pointer_path(slug):
+    return f"catalog/{slug}.json"
+
+
+def snapshot_document_path(dealership_id, version):
+    return f"catalog/{dealership_id}/{version}.json.gz"
+
+
+def snapshot_index_path(dealership_id):
+    return f"catalog/{dealership_id}/index.json"
+
+
+def snapshot_document(payload):
+    """toSnapshot(): the catalog payload with one image per product"""
+    def primary(images):
+        return sorted(images or [],
+                      key=lambda image: (not image.get('is_primary'), image.get('display_order') or 0))[:1]
+    return {
+        'format': SNAPSHOT_FORMAT,
+        'dealership': payload['dealership'],
+        'settings': payload['settings'],
+        'categories': payload['categories'],
+        'products': [dict(product, product_images=primary(product.get('product_images')))
+                     for product in payload['products']],
+        'employees': payload['employees'],
+    }
+
+
+class CatalogSnapshots:
+    """scheduleSnapshot() / publishSnapshot(): each dealership's catalog published to site-assets/catalog/.
+
+    Scheduled by the same write listener that invalidates the catalog cache (the
+    invalidation webhook in the app), debounced per dealership; publishes of one
+    dealership run one at a time.
+    """
+
+    def __init__(self, local, debounce=0.2):
+        self.local = local
+        self.debounce = debounce
+        self.timers = {}
+        self.publishing = {}
+        self.lock = threading.Lock()
+        self.stats = {'scheduled': 0, 'published': 0, 'unchanged': 0, 'unpublished': 0, 'errors': 0}
+
+    def schedule(self, dealership_id):
+        with self.lock:
+            previous = self.timers.get(dealership_id)
+            if previous is not None:
+                previous.cancel()
+            timer = self.timers[dealership_id] = threading.Timer(self.debounce, self._run, (dealership_id,))
+            timer.daemon = True
+            self.stats['scheduled'] += 1
+        timer.start()
+
+    def _run(self, dealership_id):
+        with self.lock:
+            if self.timers.get(dealership_id) is threading.current_thread():
+                del self.timers[dealership_id]
+            publishing = self.publishing.setdefault(dealership_id, threading.Lock())
+        with publishing:
+            try:
+                self.publish(dealership_id)
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"Catalog snapshot error for {dealership_id}: {e}", file=sys.stderr)
+
+    def cancel(self):
+        with self.lock:
+            for timer in self.timers.values():
+                timer.cancel()
+            self.timers.clear()
+
+    def publish(self, dealership_id):
+        """Build and publish one dealership's snapshot; an inactive or deleted dealership is unpublished"""
+        storage = self.local.storage
+        dealership = self.local.store.find_by_id('dealerships', dealership_id)
+        found = storage.get(SNAPSHOT_BUCKET, snapshot_index_path(dealership_id))
+        index = json.loads(found['data']) if found else None
+
+        if dealership is None or not dealership.get('is_active'):
+            if index:
+                storage.remove(SNAPSHOT_BUCKET, [
+                    snapshot_pointer_path(index['slug']), snapshot_index_path(dealership_id),
+                    *(snapshot_document_path(dealership_id, version) for version in index['versions'])
+                ])
+                self.stats['unpublished'] += 1
+            return {'unpublished': True}
+
+        payload, _ = self.local.catalog_payload(dealership['slug'])
+        if payload is None:
+            return {'skipped': 'Dealership not visible'}
+        body = json.dumps(snapshot_document(payload), separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        version = hashlib.sha256(body).hexdigest()[:16]
+        if index and index['version'] == version and index['slug'] == dealership['slug']:
+            self.stats['unchanged'] += 1
+            return dict(index, unchanged=True)
+
+        compressed = gzip.compress(body, mtime=0)
+        path = snapshot_document_path(dealership_id, version)
+        storage.put(SNAPSHOT_BUCKET, path, compressed, 'application/gzip', '31536000', True)
+        pointer = {
+            'format': SNAPSHOT_FORMAT,
+            'dealership_id': dealership_id,
+            'slug': dealership['slug'],
+            'version': version,
+            'path': path,
+            'bytes': len(compressed),
+            'uncompressed_bytes': len(body),
+            'sha256': hashlib.sha256(compressed).hexdigest(),
+            'products': len(payload['products']),
+            'published_at': now_iso()
+        }
+        storage.put(SNAPSHOT_BUCKET, snapshot_pointer_path(dealership['slug']), json.dumps(pointer).encode(),
+                    'application/json', '60', True)
+        versions = [version] + [kept for kept in (index or {}).get('versions', []) if kept != version]
+        storage.put(SNAPSHOT_BUCKET, snapshot_index_path(dealership_id),
+                    json.dumps(dict(pointer, versions=versions[:SNAPSHOT_KEPT_VERSIONS])).encode(),
+                    'application/json', '0', True)
+        stale = [snapshot_document_path(dealership_id, old) for old in versions[SNAPSHOT_KEPT_VERSIONS:]]
+        if index and index['slug'] != dealership['slug']:
+            stale.append(snapshot_pointer_path(index['slug']))
+        storage.remove(SNAPSHOT_BUCKET, stale)
+        self.stats['published'] += 1
+        return pointer
+
+
+# ============================================
+# REALTIME (supabase-realtime.sql)
+# ============================================
+
+REALTIME_TABLES = ('products', 'product_images', 'categories', 'subcategories', 'employees', 'site_settings')
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+REALTIME_COLUMN_TYPES = {'UUID': 'uuid', 'TEXT': 'text', 'VARCHAR': 'varchar', 'INTEGER': 'int4', 'BOOLEAN': 'bool',
+                         'DECIMAL': 'numeric', 'NUMERIC': 'numeric', 'JSONB': 'jsonb', 'TIMESTAMPTZ': 'timestamptz',
+                         'TIMESTAMP': 'timestamptz'}
+
+
+def read_websocket_message(stream):
+    """(opcode, payload) of the next client message, continuation frames joined; None once the peer is gone"""
+    opcode, payload = None, b''
+    while True:
+        header = stream.read(2)
+        if len(header) < 2:
+            return None
+        length = header[1] & 0x7F
+        if length == 126:
+            length, = struct.unpack('>H', stream.read(2))
+        elif length == 127:
+            length, = struct.unpack('>Q', stream.read(8))
+        mask = stream.read(4) if header[1] & 0x80 else b''
+        data = stream.read(length)
+        if len(data) < length:
+            return None
+        if mask:
+            key = (mask * (length // 4 + 1))[:length]
+            data = (int.from_bytes(data, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+        opcode = opcode if header[0] & 0x0F == 0 else header[0] & 0x0F
+        payload += data
+        if header[0] & 0x80:
+            return opcode, payload
+
+
+def websocket_frame(opcode, payload):
+    """One unmasked (server to client) frame"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('>BB', 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack('>BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('>BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+class RealtimeConnection:
+    """One websocket client: its joined channels, and an outbox drained by its own thread so a slow
+    client never holds up the writes that produce its messages"""
+
+    def __init__(self, sock, wfile, claims):
+        self.socket = sock
+        self.claims = claims
+        self.channels = {}
+        self.outbox = queue.Queue()
+        self.sender = threading.Thread(target=self._drain, args=(wfile,), daemon=True)
+        self.sender.start()
+
+    def send(self, message):
+        self.outbox.put(websocket_frame(0x1, json.dumps(message, default=str, separators=(',', ':')).encode()))
+
+    def send_frame(self, opcode, payload):
+        self.outbox.put(websocket_frame(opcode, payload))
+
+    def _drain(self, wfile):
+        while True:
+            frame = self.outbox.get()
+            if frame is None:
+                return
+            try:
+                wfile.write(frame)
+            except OSError:
+                return
+
+    def close(self):
+        self.outbox.put(None)
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class RealtimeFeed:
+    """Supabase Realtime postgres_changes for the tables of the supabase_realtime publication.
+
+    Fed by the store's change feed. INSERT and UPDATE reach the channels with a
+    matching binding whose claims can SELECT the new row (RLS). DELETE carries
+    only the primary key and skips filters and RLS, as in Supabase.
+    """
+
+    def __init__(self, local):
+        self.local = local
+        self.lock = threading.Lock()
+        self.connections = set()
+        self.next_binding = 0
+        self.stats = {'connections': 0, 'messages': 0}
+
+    def on_change(self, event, table, rows):
+        if table not in REALTIME_TABLES:
+            return
+        schema = self.local.store.tables[table]
+        columns = [
+            {'name': column, 'type': REALTIME_COLUMN_TYPES.get(schema.types[column], schema.types[column].lower())}
+            for column in schema.columns
+        ]
+        stamp = now_iso()
+        with self.lock:
+            channels = [(connection, topic, channel) for connection in self.connections
+                        for topic, channel in connection.channels.items()]
+        for connection, topic, channel in channels:
+            bindings = [binding for binding in channel['bindings']
+                        if binding['table'] == table and binding['event'] in ('*', event)]
+            if not bindings:
+                continue
+            visible = self.local.store._visible(table, channel['claims']) if event != 'DELETE' else None
+            for row in rows:
+                if event == 'DELETE':
+                    ids = [binding['id'] for binding in bindings]
+                elif visible(row):
+                    ids = [binding['id'] for binding in bindings if binding['match'] is None or binding['match'](row)]
+                else:
+                    continue
+                if not ids:
+                    continue
+                data = {'schema': 'public', 'table': table, 'commit_timestamp': stamp, 'type': event,
+                        'columns': columns, 'errors': None}
+                if event != 'DELETE':
+                    data['record'] = row
+                if event != 'INSERT':
+                    data['old_record'] = {'id': row['id']}
+                connection.send({'topic': topic, 'event': 'postgres_changes',
+                                 'payload': {'data': data, 'ids': ids}, 'ref': None})
+                self.stats['messages'] += 1
+
+    def serve(self, rfile, wfile, sock, claims):
+        """Run one websocket connection until the client leaves"""
+        connection = RealtimeConnection(sock, wfile, claims)
+        with self.lock:
+            self.connections.add(connection)
+            self.stats['connections'] += 1
+        try:
+            while True:
+                message = read_websocket_message(rfile)
+                if message is None:
+                    break
+                opcode, payload = message
+                if opcode == 0x8:
+                    connection.send_frame(0x8, payload[:2])
+                    break
+                if opcode == 0x9:
+                    connection.send_frame(0xA, payload)
+                elif opcode == 0x1:
+                    self._handle(connection, json.loads(payload))
+        except (OSError, ValueError):
+            pass
+        finally:
+            with self.lock:
+                self.connections.discard(connection)
+            connection.close()
+
+    def _handle(self, connection, message):
+        """Phoenix channel messages (serializer 1.0.0): heartbeat, phx_join, access_token, phx_leave"""
+        topic, event, payload = message.get('topic'), message.get('event'), message.get('payload') or {}
+
+        def reply(status, response):
+            connection.send({'topic': topic, 'event': 'phx_reply', 'payload': {'status': status, 'response': response},
+                             'ref': message.get('ref'), 'join_ref': message.get('join_ref')})
+
+        if topic == 'phoenix':
+            return reply('ok', {})
+        if event == 'phx_join':
+            claims = connection.claims
+            if payload.get('access_token'):
+                claims = verify_jwt(payload['access_token'], self.local.secret)
+                if claims is None:
+                    return reply('error', {'reason': 'Invalid JWT'})
+            bindings = []
+            for requested in (payload.get('config') or {}).get('postgres_changes') or []:
+                table, condition = requested.get('table'), requested.get('filter')
+                if requested.get('schema', 'public') != 'public' or table not in REALTIME_TABLES:
+                    return reply('error', {'reason': f"Unable to subscribe to changes with given parameters: "
+                                                     f"public.{table} is not in the supabase_realtime publication"})
+                column, _, expression = (condition or '').partition('=')
+                with self.lock:
+                    self.next_binding += 1
+                    binding_id = self.next_binding
+                bindings.append({'id': binding_id, 'event': requested.get('event', '*'), 'schema': 'public',
+                                 'table': table, 'filter': condition,
+                                 'match': _condition(column, expression) if condition else None})
+            with self.lock:
+                connection.channels[topic] = {'claims': claims, 'bindings': bindings}
+            reply('ok', {'postgres_changes': [
+                {key: binding[key] for key in ('id', 'event', 'schema', 'table', 'filter') if binding[key] is not None}
+                for binding in bindings
+            ]})
+            if bindings:
+                connection.send({'topic': topic, 'event': 'system', 'ref': None, 'payload': {
+                    'channel': topic.partition(':')[2], 'extension': 'postgres_changes', 'status': 'ok',
+                    'message': 'Subscribed to PostgreSQL'
+                }})
+            return
+        if event == 'access_token':
+            claims = verify_jwt(payload.get('access_token', ''), self.local.secret)
+            with self.lock:
+                if claims is not None and topic in connection.channels:
+                    connection.channels[topic]['claims'] = claims
+            return
+        if event == 'phx_leave':
+            with self.lock:
+                connection.channels.pop(topic, None)
+            return reply('ok', {})
+        return reply('ok', {})
+
+    def close(self):
+        with self.lock:
+            connections = list(self.connections)
+        for connection in connections:
+            connection.close()
+
+
+# ============================================
+# DASHBOARD STATS (supabase-dashboard-stats.sql)
+# ============================================
+
+STATS_COUNTERS = ('total_products', 'available_products', 'sold_products', 'reserved_products', 'inventory_value',
+                  'total_categories', 'total_subcategories', 'total_employees', 'active_employees')
+
+
+def stats_contribution(table, row):
+    """What one row adds to its dealership's counters (the track_*_stats() aggregates)"""
+    if table == 'products':
+        status = row.get('status')
+        return {'total_products': 1, 'available_products': int(status == 'available'),
+                'sold_products': int(status == 'sold'), 'reserved_products': int(status == 'reserved'),
+                'inventory_value': row.get('price') or 0}
+    if table == 'employees':
+        return {'total_employees': 1, 'active_employees': int(row.get('is_active') is True)}
+    if table == 'categories':
+        return {'total_categories': 1}
+    return {'total_subcategories': 1}
+
+
+class DealershipStats:
+    """The dealership_stats triggers: incremental counters fed by the store's write listeners.
+
+    The store only reports the rows a write touched, so the contribution each
+    row last made is kept to subtract it on update/delete (the OLD TABLE).
+    """
+
+    TABLES = ('products', 'employees', 'categories', 'subcategories')
+
+    def __init__(self, store):
+        self.store = store
+        self.contributions = {}
+        # SELECT refresh_dealership_stats();
+        for table in self.TABLES:
+            self.on_write(table, store.rows[table])
+
+    def _add(self, dealership_id, deltas, sign):
+        """add_dealership_stats(): upsert, skipping dealerships that no longer exist"""
+        if self.store.find_by_id('dealerships', dealership_id) is None:
+            return
+        row = self.store.unique_index['dealership_stats'][('dealership_id',)].get((dealership_id,))
+        if row is None:
+            row, = self.store.insert('dealership_stats', [{'dealership_id': dealership_id}], {'role': 'service_role'})
+        for counter, delta in deltas.items():
+            row[counter] += sign * delta
+        row['inventory_value'] = round(row['inventory_value'], 2)
+        row['updated_at'] = now_iso()
+
+    def _forget(self, key):
+        previous = self.contributions.pop(key, None)
+        if previous is not None:
+            self._add(*previous, -1)
+
+    def on_write(self, table, rows):
+        with self.store.lock:
+            for row in rows if table in self.TABLES else ():
+                key = (table, row['id'])
+                self._forget(key)
+                if self.store.find_by_id(table, row['id']) is row and row.get('dealership_id'):
+                    current = (row['dealership_id'], stats_contribution(table, row))
+                    self._add(*current, 1)
+                    self.contributions[key] = current
+            # ON DELETE CASCADE removes children without notifying; their DELETE triggers still fire in Postgres
+            children = [child for child in self.TABLES if any(
+                target == table and action == 'CASCADE'
+                for target, action in self.store.tables[child].foreign_keys.values()
+            )]
+            if children and any(self.store.find_by_id(table, row['id']) is None for row in rows):
+                for key in [key for key in self.contributions if key[0] in children]:
+                    if self.store.find_by_id(*key) is None:
+                        self._forget(key)
+
+
+@rpc('get_dashboard_stats')
+def get_dashboard_stats(store, args, claims):
+    """supabase-dashboard-stats.sql: counters plus the five newest products, own dealership only.
+
+    The stand-in scans the tenant's products for the newest five; Postgres
+    reads them off idx_products_dealership_created.
+    """
+    dealership_id = args.get('p_dealership_id')
+    with store.lock:
+        dealership = store.find_by_id('dealerships', dealership_id)
+        if dealership is None or claims.get('role') != 'authenticated' or store.dealership_of(claims) != dealership_id:
+            return None
+        row = store.unique_index['dealership_stats'][('dealership_id',)].get((dealership_id,)) or {}
+        result = {counter: row.get(counter) or 0 for counter in STATS_COUNTERS}
+        result['inventory_value'] = float(result['inventory_value'])
+        result['updated_at'] = row.get('updated_at')
+        newest = sorted((product for product in store.rows['products'] if product['dealership_id'] == dealership_id),
+                        key=lambda product: product['created_at'], reverse=True)[:5]
+        images = {product['id']: [] for product in newest}
+        for image in store.rows['product_images']:
+            if image['product_id'] in images:
+                images[image['product_id']].append(image)
+        result['recent_products'] = [
+            {
+                'id': product['id'], 'name': product['name'], 'price': product['price'],
+                'status': product['status'], 'created_at': product['created_at'],
+                'product_images': [
+                    {'image_url': image['image_url'], 'is_primary': image['is_primary']}
+                    for image in sorted(images[product['id']],
+                                        key=lambda image: (not image['is_primary'], image['display_order'] or 0))[:1]
+                ]
+            }
+            for product in newest
+        ]
+    return result
+
+
+# ============================================
+# TOKENS
+# ============================================
+
+def _b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _b64url_decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def sign_jwt(claims, secret):
+    header = _b64url(json.dumps({'alg': 'HS256', 'typ': 'JWT'}).encode())
+    payload = _b64url(json.dumps(claims).encode())
+    signature = hmac.new(secret, f"{header}.{payload}".encode(), hashlib.sha256).digest()
+    return f"{header}.{payload}.{_b64url(signature)}"
+
+
+def verify_jwt(token, secret):
+    try:
+        header, payload, signature = token.split('.')
+    except (AttributeError, ValueError):
+        return None
+    expected = hmac.new(secret, f"{header}.{payload}".encode(), hashlib.sha256).digest()
+    if not hmac.compare_digest(expected, _b64url_decode(signature)):
+        return None
+    claims = json.loads(_b64url_decode(payload))
+    if claims.get('exp') and claims['exp'] < time.time():
+        return None
+    return claims
+
+
+def ssr_session(cookie_header):
+    """The session @supabase/ssr keeps in the sb-<ref>-auth-token cookie (maybe chunked), or None"""
+    chunks = {}
+    for part in (cookie_header or '').split(';'):
+        name, _, value = part.strip().partition('=')
+        match = re.match(r'^(sb-[^.]+-auth-token)(?:\.(\d+))?$', name)
+        if match:
+            chunks.setdefault(match.group(1), {})[int(match.group(2) or -1)] = unquote(value)
+    for parts in chunks.values():
+        value = parts[-1] if -1 in parts else ''.join(parts[index] for index in sorted(parts))
+        try:
+            if value.startswith('base64-'):
+                value = _b64url_decode(value[len('base64-'):]).decode()
+            return json.loads(value)
+        except ValueError:
+            continue
+    return None
+
+
+# ============================================
+# DATA STORE
+# ============================================
+
+class Store:
+    """In-memory tables with PostgREST semantics and the schema's RLS rules"""
+
+    def __init__(self, tables, seeds):
+        self.tables = tables
+        self.rows = {name: [] for name in tables}
+        # Unique constraints (including primary keys) as key -> row maps
+        self.unique_index = {name: {columns: {} for columns in table.unique} for name, table in tables.items()}
+        self.lock = threading.RLock()
+        self.auth_users = {}
+        # Callables (table, rows) run after every committed write, like AFTER ... FOR EACH ROW triggers
+        self.listeners = []
+        # Callables (event, table, rows) for every row change, cascades included, like logical replication
+        self.change_feeds = []
+        for table, row in seeds:
+            if table in self.tables:
+                self.insert(table, [row], {'role': 'service_role'})
+
+    # ---- indexes ----
+
+    @staticmethod
+    def _key(row, columns):
+        return tuple(row.get(column) for column in columns)
+
+    def _index_add(self, table, row):
+        for columns, index in self.unique_index[table].items():
+            key = self._key(row, columns)
+            if None not in key:
+                index[key] = row
+
+    def _index_remove(self, table, row):
+        for columns, index in self.unique_index[table].items():
+            key = self._key(row, columns)
+            if index.get(key) is row:
+                del index[key]
+
+    def find_by_id(self, table, row_id):
+        return self.unique_index[table].get(('id',), {}).get((row_id,))
+
+    def _notify(self, table, rows, event):
+        if rows:
+            for listener in self.listeners:
+                listener(table, rows)
+            self._publish(event, table, rows)
+
+    def _publish(self, event, table, rows):
+        for feed in self.change_feeds:
+            feed(event, table, rows)
+
+    # ---- relationships ----
+
+    def _relationship(self, table, embed):
+        """('one', fk column) for many-to-one, ('many', fk column) for one-to-many"""
+        if embed not in self.tables:
+            raise PostgrestError(
+                400, 'PGRST200',
+                f"Could not find a relationship between '{table}' and '{embed}' in the schema cache"
+            )
+        for column, (target, _) in self.tables[table].foreign_keys.items():
+            if target == embed:
+                return 'one', column
+        for column, (target, _) in self.tables[embed].foreign_keys.items():
+            if target == table:
+                return 'many', column
+        raise PostgrestError(
+            400, 'PGRST200',
+            f"Could not find a relationship between '{table}' and '{embed}' in the schema cache"
+        )
+
+    # ---- row level security ----
+
+    def dealership_of(self, claims):
+        user = self.find_by_id('users', claims.get('sub'))
+        return user['dealership_id'] if user else None
+
+    def _visible(self, table, claims):
+        """Row filter equivalent to the SELECT policies of supabase-schema.sql"""
+        role = claims.get('role', 'anon')
+        if role == 'service_role':
+            return lambda row: True
+        active = {d['id'] for d in self.rows['dealerships'] if d.get('is_active')}
+        own = self.dealership_of(claims) if role == 'authenticated' else None
+        if table == 'dealerships':
+            return lambda row: row.get('is_active') is True
+        if table == 'users':
+            return lambda row: role == 'authenticated' and row['id'] == claims.get('sub')
+        if table == 'dealership_stats':
+            return lambda row: own is not None and row['dealership_id'] == own
+        if table == 'employees':
+            return lambda row: (row.get('is_active') is True and row.get('dealership_id') in active) or (
+                own is not None and row.get('dealership_id') == own
+            )
+        if 'dealership_id' not in self.tables[table].columns:
+            return lambda row: True
+        return lambda row: row.get('dealership_id') in active or (
+            own is not None and row.get('dealership_id') == own
+        )
+
+    def _writable(self, table, claims):
+        """Row filter equivalent to the admin FOR ALL / UPDATE policies"""
+        role = claims.get('role', 'anon')
+        if role == 'service_role':
+            return lambda row: True
+        if role != 'authenticated':
+            return lambda row: False
+        if table in ('dealership_stats', 'product_spec_values'):
+            # Only the triggers of supabase-dashboard-stats.sql / supabase-spec-values.sql write them
+            return lambda row: False
+        own = self.dealership_of(claims)
+        if table == 'dealerships':
+            return lambda row: row['id'] == own
+        if table == 'users':
+            return lambda row: row['id'] == claims.get('sub')
+        return lambda row: own is not None and row.get('dealership_id') == own
+
+    # ---- reads ----
+
+    def project(self, table, row, select, claims, cache=None):
+        """Apply a parsed select (columns + embeds) to one row"""
+        cache = {} if cache is None else cache
+        columns, embeds = select
+        if not columns and not embeds:
+            columns = ['*']
+        result = {}
+        for column in columns:
+            if column == '*':
+                result.update({name: row.get(name) for name in self.tables[table].columns})
+            else:
+                alias, _, name = column.rpartition(':')
+                name = name.split('::')[0]
+                if '->' in name:
+                    result[alias or re.split(r'->>?', name)[-1]] = _json_path(row, name)
+                else:
+                    result[alias or name] = row.get(name)
+        for alias, (relation, sub_select) in embeds.items():
+            kind, column = self._relationship(table, relation)
+            if ('visible', relation) not in cache:
+                cache[('visible', relation)] = self._visible(relation, claims)
+            visible = cache[('visible', relation)]
+            if kind == 'one':
+                target = self.find_by_id(relation, row.get(column))
+                result[alias] = (
+                    self.project(relation, target, sub_select, claims, cache)
+                    if target is not None and visible(target) else None
+                )
+            else:
+                if ('children', relation, column) not in cache:
+                    grouped = {}
+                    for other in self.rows[relation]:
+                        grouped.setdefault(other.get(column), []).append(other)
+                    cache[('children', relation, column)] = grouped
+                children = cache[('children', relation, column)].get(row['id'], [])
+                result[alias] = [
+                    self.project(relation, other, sub_select, claims, cache)
+                    for other in children if visible(other)
+                ]
+        return result
+
+    def select(self, table, params, claims):
+        """(projected rows, total matching rows, offset) for a GET"""
+        predicates, options = parse_filters(params)
+        with self.lock:
+            visible = self._visible(table, claims)
+            rows = [row for row in self.rows[table] if visible(row) and all(p(row) for p in predicates)]
+            rows = apply_order(rows, options.get('order'))
+            total = len(rows)
+            offset = int(options.get('offset', 0))
+            if 'limit' in options:
+                rows = rows[offset:offset + int(options['limit'])]
+            elif offset:
+                rows = rows[offset:]
+            select = parse_select(options.get('select'))
+            cache = {}
+            result = [self.project(table, row, select, claims, cache) for row in rows]
+        return result, total, offset
+
+    # ---- writes ----
+
+    def _check_constraints(self, table, row, ignore=None):
+        schema = self.tables[table]
+        for column in schema.not_null:
+            if row.get(column) is None:
+                raise PostgrestError(
+                    400, '23502', f'null value in column "{column}" of relation "{table}" violates not-null constraint'
+                )
+        for columns, index in self.unique_index[table].items():
+            key = self._key(row, columns)
+            existing = index.get(key)
+            if None not in key and existing is not None and existing is not ignore:
+                raise PostgrestError(
+                    409, '23505',
+                    f'duplicate key value violates unique constraint "{table}_{"_".join(columns)}_key"',
+                    f"Key ({', '.join(columns)})=({', '.join(str(value) for value in key)}) already exists."
+                )
+        for column, (target, _) in schema.foreign_keys.items():
+            value = row.get(column)
+            if value is not None and target in self.tables and self.find_by_id(target, value) is None:
+                raise PostgrestError(
+                    409, '23503',
+                    f'insert or update on table "{table}" violates foreign key constraint "{table}_{column}_fkey"'
+                )
+
+    def insert(self, table, payload, claims):
+        """Insert a batch atomically: either every row is stored or none is"""
+        schema = self.tables[table]
+        with self.lock:
+            writable = self._writable(table, claims)
+            created = []
+            try:
+                for item in payload:
+                    unknown = [key for key in item if key not in schema.columns]
+                    if unknown:
+                        raise PostgrestError(
+                            400, 'PGRST204',
+                            f"Could not find the '{unknown[0]}' column of '{table}' in the schema cache"
+                        )
+                    row = {
+                        column: schema.coerce(column, item[column]) if column in item else schema.default_for(column)
+                        for column in schema.columns
+                    }
+                    if not writable(row):
+                        raise PostgrestError(
+                            403, '42501', f'new row violates row-level security policy for table "{table}"'
+                        )
+                    self._check_constraints(table, row)
+                    self._index_add(table, row)
+                    created.append(row)
+            except PostgrestError:
+                for row in created:
+                    self._index_remove(table, row)
+                raise
+            self.rows[table].extend(created)
+            self._notify(table, created, 'INSERT')
+            return created
+
+    def update(self, table, params, changes, claims):
+        predicates, _ = parse_filters(params)
+        schema = self.tables[table]
+        unknown = [key for key in changes if key not in schema.columns]
+        if unknown:
+            raise PostgrestError(
+                400, 'PGRST204', f"Could not find the '{unknown[0]}' column of '{table}' in the schema cache"
+            )
+        with self.lock:
+            visible, writable = self._visible(table, claims), self._writable(table, claims)
+            targets = [
+                row for row in self.rows[table]
+                if visible(row) and writable(row) and all(p(row) for p in predicates)
+            ]
+            stamp = now_iso()
+            candidates = []
+            for row in targets:
+                self._index_remove(table, row)
+            try:
+                for row in targets:
+                    candidate = dict(row)
+                    candidate.update({column: schema.coerce(column, value) for column, value in changes.items()})
+                    # update_updated_at_column() trigger
+                    if 'updated_at' in schema.columns and 'updated_at' not in changes:
+                        candidate['updated_at'] = stamp
+                    if not writable(candidate):
+                        raise PostgrestError(
+                            403, '42501', f'new row violates row-level security policy for table "{table}"'
+                        )
+                    self._check_constraints(table, candidate)
+                    self._index_add(table, candidate)
+                    candidates.append(candidate)
+            except PostgrestError:
+                for candidate in candidates:
+                    self._index_remove(table, candidate)
+                for row in targets:
+                    self._index_add(table, row)
+                raise
+            for row, candidate in zip(targets, candidates):
+                self._index_remove(table, candidate)
+                row.update(candidate)
+                self._index_add(table, row)
+            self._notify(table, targets, 'UPDATE')
+            return targets
+
+    def _cascade(self, table, removed_ids):
+        for child, schema in self.tables.items():
+            for column, (target, action) in schema.foreign_keys.items():
+                if target != table:
+                    continue
+                affected = [row for row in self.rows[child] if row.get(column) in removed_ids]
+                if not affected:
+                    continue
+                if action == 'CASCADE':
+                    doomed = {id(row) for row in affected}
+                    self.rows[child] = [row for row in self.rows[child] if id(row) not in doomed]
+                    for row in affected:
+                        self._index_remove(child, row)
+                    self._cascade(child, {row['id'] for row in affected if 'id' in row})
+                    self._publish('DELETE', child, affected)
+                elif action == 'SET NULL':
+                    for row in affected:
+                        self._index_remove(child, row)
+                        row[column] = None
+                        self._index_add(child, row)
+                    self._publish('UPDATE', child, affected)
+
+    def delete(self, table, params, claims):
+        predicates, _ = parse_filters(params)
+        with self.lock:
+            visible, writable = self._visible(table, claims), self._writable(table, claims)
+            doomed = [
+                row for row in self.rows[table]
+                if visible(row) and writable(row) and all(p(row) for p in predicates)
+            ]
+            doomed_ids = {id(row) for row in doomed}
+            self.rows[table] = [row for row in self.rows[table] if id(row) not in doomed_ids]
+            for row in doomed:
+                self._index_remove(table, row)
+            self._cascade(table, {row['id'] for row in doomed if 'id' in row})
+            self._notify(table, doomed, 'DELETE')
+            return doomed
+
+
+def _json_path(row, expression):
+    """Value of ``specifications->motor->>enfriamiento`` style selectors"""
+    parts = re.split(r'->>?', expression)
+    value = row.get(parts[0])
+    for key in parts[1:]:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+# ============================================
+# STORAGE
+# ============================================
+
+# Buckets created by hand in the Supabase UI (see supabase-storage-policies.sql)
+STORAGE_BUCKETS = ('motorcycles', 'site-assets')
+STORAGE_MAX_FILE_SIZE = 50 * 1024 * 1024
+
+
+class ObjectStorage:
+    """Objects of the public buckets, plus the state of in-progress TUS uploads"""
+
+    def __init__(self, buckets=STORAGE_BUCKETS, max_file_size=STORAGE_MAX_FILE_SIZE):
+        self.buckets = set(buckets)
+        self.max_file_size = max_file_size
+        self.objects = {}
+        self.uploads = {}
+        self.lock = threading.Lock()
+        self.stats = {'objects_written': 0, 'bytes_stored': 0}
+
+    def _check(self, bucket, size):
+        if bucket not in self.buckets:
+            raise PostgrestError(404, '404', 'Bucket not found')
+        if size > self.max_file_size:
+            raise PostgrestError(413, '413', 'The object exceeded the maximum allowed size')
+
+    def put(self, bucket, path, data, content_type, cache_control, upsert):
+        self._check(bucket, len(data))
+        with self.lock:
+            if (bucket, path) in self.objects and not upsert:
+                raise PostgrestError(409, 'Duplicate', 'The resource already exists')
+            self.objects[(bucket, path)] = {
+                'data': bytes(data),
+                'etag': f'"{hashlib.md5(data).hexdigest()}"',
+                'content_type': content_type or 'application/octet-stream',
+                'cache_control': cache_control or '3600',
+                'created_at': now_iso()
+            }
+            self.stats['objects_written'] += 1
+            self.stats['bytes_stored'] += len(data)
+
+    def get(self, bucket, path):
+        with self.lock:
+            return self.objects.get((bucket, path))
+
+    def remove(self, bucket, paths):
+        with self.lock:
+            return [path for path in paths if self.objects.pop((bucket, path), None) is not None]
+
+    def create_upload(self, bucket, path, length, content_type, cache_control, upsert):
+        self._check(bucket, length)
+        with self.lock:
+            if (bucket, path) in self.objects and not upsert:
+                raise PostgrestError(409, 'Duplicate', 'The resource already exists')
+            upload_id = uuid.uuid4().hex
+            self.uploads[upload_id] = {
+                'bucket': bucket, 'path': path, 'length': length, 'data': bytearray(),
+                'content_type': content_type, 'cache_control': cache_control, 'upsert': upsert
+            }
+        return upload_id
+
+    def append(self, upload_id, offset, chunk):
+        """Add a PATCH body at ``offset``; a partial body (dropped connection) is kept, as in tusd"""
+        with self.lock:
+            upload = self.uploads.get(upload_id)
+            if upload is None:
+                raise PostgrestError(404, '404', 'Upload not found')
+            if offset != len(upload['data']):
+                raise PostgrestError(409, '409', 'Upload-Offset does not match the current offset')
+            if offset + len(chunk) > upload['length']:
+                raise PostgrestError(413, '413', 'Chunk exceeds Upload-Length')
+            upload['data'] += chunk
+            if len(upload['data']) < upload['length']:
+                return len(upload['data'])
+            del self.uploads[upload_id]
+        self.put(upload['bucket'], upload['path'], upload['data'], upload['content_type'],
+                 upload['cache_control'], upload['upsert'])
+        return upload['length']
+
+
+# ============================================
+# IMAGE DERIVATIVES (lib/image-derivatives.js)
+# ============================================
+
+IMAGE_VARIANTS = {'thumb': 160, 'card': 480, 'detail': 1200}
+# Widths the dashboard uploads (lib/image-upload.js)
+IMAGE_WIDTHS = (480, 1024, 1600)
+IMAGE_QUALITY = {'avif': 55, 'webp': 78, 'jpeg': 80}
+VARIANT_CACHE_CONTROL = 'public, max-age=86400, stale-while-revalidate=604800'
+IMAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def negotiate_format(accept):
+    if 'image/avif' in accept:
+        return 'avif'
+    if 'image/webp' in accept:
+        return 'webp'
+    return 'jpeg'
+
+
+def source_candidates(object_path, width):
+    """The smallest uploaded width that still covers ``width``, then the object itself"""
+    match = re.match(r'^(.*)-(\d+)\.(webp|avif|jpg)$', object_path)
+    if not match or int(match.group(2)) not in IMAGE_WIDTHS:
+        return [object_path]
+    closest = next((candidate for candidate in IMAGE_WIDTHS if candidate >= width), IMAGE_WIDTHS[-1])
+    candidate = f"{match.group(1)}-{closest}.{match.group(3)}"
+    return [object_path] if candidate == object_path else [candidate, object_path]
+
+
+class ImageDerivatives:
+    """Resized variants of stored objects, cached on disk under ``cache_dir``.
+
+    Variants are keyed on the source's ETag, so an upserted photo gets new
+    ones; the least recently used files go once the cache passes ``max_bytes``.
+    """
+
+    def __init__(self, storage, cache_dir, max_bytes=IMAGE_CACHE_MAX_BYTES):
+        self.storage = storage
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.files = OrderedDict()
+        self.bytes = 0
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _touch(self, path, size):
+        """Mark a variant as just used and evict past ``max_bytes``"""
+        with self._lock:
+            self.bytes += size - self.files.pop(path, 0)
+            self.files[path] = size
+            while self.bytes > self.max_bytes and next(iter(self.files)) != path:
+                victim, victim_size = self.files.popitem(last=False)
+                self.bytes -= victim_size
+                try:
+                    os.remove(victim)
+                except OSError:
+                    pass
+
+    def get(self, variant, segments, accept, if_none_match=None):
+        """(status, body, headers)"""
+        width = IMAGE_VARIANTS.get(variant)
+        if not width or len(segments) < 2 or segments[0] not in self.storage.buckets or any(
+            segment in ('', '.', '..') or '\\' in segment for segment in segments
+        ):
+            return 400, {'error': 'Unknown variant or image path'}, {}
+        if Image is None:
+            return 501, {'error': 'Image processing needs Pillow (pip install pillow)'}, {}
+        bucket, object_path = segments[0], '/'.join(segments[1:])
+        image_format = negotiate_format(accept)
+        source_path, source = next(((candidate, found) for candidate, found in (
+            (candidate, self.storage.get(bucket, candidate)) for candidate in source_candidates(object_path, width)
+        ) if found), (None, None))
+        if source is None:
+            return 404, {'error': 'Image not found'}, {}
+        key = hashlib.sha256(f"{variant}|{image_format}|{bucket}/{source_path}|{source['etag']}".encode()).hexdigest()
+        etag = f'"{key[:32]}"'
+        headers = {'Cache-Control': VARIANT_CACHE_CONTROL, 'Vary': 'Accept', 'ETag': etag}
+        path = os.path.join(self.cache_dir, key[:2], f"{key}.{image_format}")
+
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        # One resize per variant; later requests for it wait and then read the file
+        with lock:
+            try:
+                with open(path, 'rb') as f:
+                    cached = f.read()
+            except FileNotFoundError:
+                # Never generated, or evicted by another variant's write
+                cached = None
+            if cached is not None:
+                self._touch(path, len(cached))
+                if if_none_match == etag:
+                    return 304, None, {**headers, 'X-Cache': 'HIT'}
+                return 200, cached, {**headers, 'X-Cache': 'HIT'}
+            image = ImageOps.exif_transpose(Image.open(io.BytesIO(source['data'])))
+            if image.width > width:
+                image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+            if image_format == 'jpeg' and image.mode != 'RGB':
+                image = image.convert('RGB')
+            output = io.BytesIO()
+            image.save(output, image_format.upper(), quality=IMAGE_QUALITY[image_format])
+            body = output.getvalue()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f"{path}.{threading.get_ident()}.tmp"
+            with open(temporary, 'wb') as f:
+                f.write(body)
+            os.replace(temporary, path)
+            self._touch(path, len(body))
+        return 200, body, {**headers, 'X-Cache': 'MISS'}
+
+
+# ============================================
+# HTTP SERVER
+# ============================================
+
+class LocalSupabase:
+    """Runs the stand-in on a background thread; use as a context manager"""
+
+    def __init__(self, schema_path=SCHEMA_PATH, host='127.0.0.1', port=0, password=DEFAULT_PASSWORD, app_url=None):
+        # A fixed secret gives the same keys in every process, so a Next.js server can be configured ahead of time
+        secret = os.getenv('LOCAL_SUPABASE_JWT_SECRET')
+        self.secret = secret.encode() if secret else os.urandom(32)
+        # The real Next.js app, when it serves the app routes instead of the Python copies below
+        self.app_url = app_url.rstrip('/') if app_url else None
+        sql = []
+        for path in [schema_path] + MIGRATIONS:
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    sql.append(f.read())
+        tables, seeds = parse_schema('\n'.join(sql))
+        self.store = Store(tables, seeds)
+        self._seed_auth_users(password)
+        self.anon_key = sign_jwt({'role': 'anon', 'iss': 'local-supabase'}, self.secret)
+        self.service_key = sign_jwt({'role': 'service_role', 'iss': 'local-supabase'}, self.secret)
+        self.refresh_tokens = {}
+        # /api/catalog cache plus the database-trigger invalidation of supabase-catalog-cache.sql
+        self.catalog_cache = CatalogCache()
+        self.catalog_webhook_secret = os.getenv('CATALOG_WEBHOOK_SECRET') or (
+            hmac.new(self.secret, b'catalog-webhook', hashlib.sha256).hexdigest()[:32] if secret else uuid.uuid4().hex
+        )
+        self.store.listeners.append(self._invalidate_catalog)
+        # Storage snapshots of lib/catalog-publisher.js, republished on the same writes
+        self.catalog_snapshots = CatalogSnapshots(self)
+        self.dealership_stats = DealershipStats(self.store)
+        self.store.listeners.append(self.dealership_stats.on_write)
+        self.spec_values = SpecValues(self.store)
+        self.store.listeners.append(self.spec_values.on_write)
+        self.realtime = RealtimeFeed(self)
+        self.store.change_feeds.append(self.realtime.on_change)
+        self.storage = ObjectStorage()
+        self.image_cache_dir = tempfile.mkdtemp(prefix='local-supabase-images-')
+        self.images = ImageDerivatives(self.storage, self.image_cache_dir,
+                                       int(os.getenv('IMAGE_CACHE_MAX_BYTES') or IMAGE_CACHE_MAX_BYTES))
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _seed_auth_users(self, password):
+        """One auth account per public.users row, using its dealership's email"""
+        dealerships = {d['id']: d for d in self.store.rows['dealerships']}
+        for user in self.store.rows['users']:
+            dealership = dealerships.get(user['dealership_id'])
+            if dealership and dealership.get('email'):
+                self.add_auth_user(dealership['email'], password, user_id=user['id'])
+
+    def add_auth_user(self, email, password, user_id=None):
+        user_id = user_id or str(uuid.uuid4())
+        with self.store.lock:
+            self.store.auth_users[email.lower()] = {
+                'id': user_id,
+                'email': email,
+                'password_hash': hashlib.sha256(password.encode()).hexdigest(),
+                'created_at': now_iso()
+            }
+        return user_id
+
+    def _invalidate_catalog(self, table, rows):
+        """notify_catalog_change(): drop the cached catalog of every dealership the write touched"""
+        if table not in CATALOG_TABLES:
+            return
+        dealership_ids = set()
+        for row in rows:
+            if table == 'dealerships':
+                dealership_ids.add(row['id'])
+            elif table == 'product_images':
+                product = self.store.find_by_id('products', row.get('product_id'))
+                if product:
+                    dealership_ids.add(product['dealership_id'])
+            elif row.get('dealership_id'):
+                dealership_ids.add(row['dealership_id'])
+        for dealership_id in dealership_ids:
+            if self.app_url:
+                # net.http_post(): after the write, without blocking it
+                threading.Thread(target=self._notify_app, args=(dealership_id, table), daemon=True).start()
+                continue
+            self.catalog_cache.invalidate_dealership(dealership_id)
+            self.catalog_snapshots.schedule(dealership_id)
+
+    def _notify_app(self, dealership_id, table):
+        request = urllib.request.Request(
+            f"{self.app_url}/api/catalog/invalidate",
+            data=json.dumps({'dealership_id': dealership_id, 'table': table}).encode(),
+            headers={'Content-Type': 'application/json', 'X-Catalog-Webhook-Secret': self.catalog_webhook_secret},
+            method='POST'
+        )
+        try:
+            urllib.request.urlopen(request, timeout=10).close()
+        except (OSError, urllib.error.URLError) as e:
+            print(f"Catalog invalidation webhook to {self.app_url} failed: {e}", file=sys.stderr)
+
+    def app_env(self):
+        """Environment for a Next.js server that uses this stand-in"""
+        return {
+            'NEXT_PUBLIC_SUPABASE_URL': self.url,
+            'NEXT_PUBLIC_SUPABASE_ANON_KEY': self.anon_key,
+            'SUPABASE_SERVICE_ROLE_KEY': self.service_key,
+            'CATALOG_WEBHOOK_SECRET': self.catalog_webhook_secret,
+            **({'NEXT_PUBLIC_BASE_URL': self.app_url} if self.app_url else {})
+        }
+
+    def catalog_payload(self, slug):
+        """fetchCatalog(): the five catalog queries as anon"""
+        store, anon = self.store, {'role': 'anon'}
+        dealerships, _, _ = store.select('dealerships', [('slug', f'eq.{slug}'), ('is_active', 'eq.true')], anon)
+        if not dealerships:
+            return None, 0
+        dealership = dealerships[0]
+        generation = self.catalog_cache.generation(dealership['id'])
+        tenant = ('dealership_id', f"eq.{dealership['id']}")
+        settings, _, _ = store.select('site_settings', [tenant], anon)
+        products, _, _ = store.select('products', [
+            ('select', '*,categories(id,name,slug),subcategories(id,name,slug),'
+                       'product_images(id,image_url,is_primary,display_order,width,height,blurhash)'),
+            tenant, ('order', 'created_at.desc,id.desc')
+        ], anon)
+        categories, _, _ = store.select('categories', [('select', '*,subcategories(*)'), tenant, ('order', 'name')],
+                                        anon)
+        employees, _, _ = store.select('employees', [tenant, ('is_active', 'eq.true'), ('order', 'display_order')],
+                                       anon)
+        return {
+            'dealership': dealership,
+            'settings': settings[0] if settings else None,
+            'products': products,
+            'categories': categories,
+            'employees': employees,
+            'cached_at': now_iso()
+        }, generation
+
+    def anon_headers(self):
+        return {'apikey': self.anon_key, 'Authorization': f'Bearer {self.anon_key}'}
+
+    def service_headers(self):
+        return {'apikey': self.service_key, 'Authorization': f'Bearer {self.service_key}'}
+
+    def issue_session(self, user, expires_in=3600):
+        claims = {
+            'sub': user['id'],
+            'email': user['email'],
+            'role': 'authenticated',
+            'aud': 'authenticated',
+            'exp': int(time.time()) + expires_in
+        }
+        refresh_token = uuid.uuid4().hex
+        with self.store.lock:
+            self.refresh_tokens[refresh_token] = user['email'].lower()
+        return {
+            'access_token': sign_jwt(claims, self.secret),
+            'token_type': 'bearer',
+            'expires_in': expires_in,
+            'expires_at': claims['exp'],
+            'refresh_token': refresh_token,
+            'user': {'id': user['id'], 'email': user['email'], 'role': 'authenticated', 'aud': 'authenticated'}
+        }
+
+    def claims_for(self, headers):
+        """JWT claims of the request, or None when the key/token is not valid"""
+        authorization = headers.get('Authorization', '')
+        token = authorization[7:] if authorization.lower().startswith('bearer ') else headers.get('apikey')
+        if not token:
+            return None
+        return verify_jwt(token, self.secret)
+
+    def app_claims(self, headers):
+        """Claims a Next.js route acts with: the bearer token, else the session cookie (lib/supabase/server.js)"""
+        if headers.get('Authorization'):
+            return self.claims_for(headers)
+        session = ssr_session(headers.get('Cookie'))
+        if not isinstance(session, dict) or not session.get('access_token'):
+            return None
+        return verify_jwt(session['access_token'], self.secret)
+
+    def _handler_class(self):
+        local = self
+
+        class Handler(LocalSupabaseHandler):
+            pass
+        Handler.local = local
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name='local-supabase', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.catalog_snapshots.cancel()
+        self.realtime.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.image_cache_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class LocalSupabaseHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    local = None
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out as separate writes; don't let Nagle hold the body back
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    # ---- plumbing ----
+
+    def _read_body(self):
+        """Raw request body (Content-Length or chunked); short if the client hung up mid-body"""
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body = bytearray()
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip() or b'0', 16)
+                if not size:
+                    self.rfile.readline()
+                    return bytes(body)
+                body += self.rfile.read(size)
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length))
+        except json.JSONDecodeError as e:
+            raise PostgrestError(400, 'PGRST102', f"Empty or invalid json: {e}")
+
+    def _send(self, status, body=None, content_type='application/json; charset=utf-8', headers=None):
+        payload = b''
+        if body is not None:
+            payload = body if isinstance(body, bytes) else (
+                body.encode() if isinstance(body, str) else json.dumps(body, default=str, separators=(',', ':')).encode()
+            )
+        self.send_response(status)
+        if payload:
+            self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if payload and self.command != 'HEAD':
+            self.wfile.write(payload)
+
+    def _prefer(self):
+        return {
+            part.split('=')[0].strip(): part.split('=')[-1].strip()
+            for part in self.headers.get('Prefer', '').split(',') if part.strip()
+        }
+
+    def _dispatch(self):
+        parts = urlsplit(self.path)
+        params = parse_qsl(parts.query, keep_blank_values=True)
+        try:
+            if parts.path.startswith('/rest/v1/'):
+                return self._rest(parts.path[len('/rest/v1/'):].strip('/'), params)
+            if parts.path.startswith('/auth/v1/'):
+                return self._auth(parts.path[len('/auth/v1/'):].strip('/'), params)
+            if parts.path.startswith('/storage/v1/'):
+                return self._storage(unquote(parts.path[len('/storage/v1/'):]).strip('/'))
+            if parts.path == '/realtime/v1/websocket':
+                return self._realtime(dict(params))
+            return self._app(parts.path, params)
+        except PostgrestError as e:
+            self._send(e.status, e.body())
+        except Exception as e:
+            self._send(500, {'code': 'XX000', 'message': str(e), 'details': None, 'hint': None})
+
+    do_GET = do_POST = do_PATCH = do_DELETE = do_PUT = do_HEAD = lambda self: self._dispatch()
+
+    # ---- PostgREST ----
+
+    def _rest(self, table, params):
+        store = self.local.store
+        claims = self.local.claims_for(self.headers)
+        if claims is None:
+            raise PostgrestError(401, 'PGRST301', 'JWT invalid or missing apikey')
+        if table.startswith('rpc/'):
+            function = RPC_FUNCTIONS.get(table[4:])
+            if function is None or self.command != 'POST':
+                raise PostgrestError(404, 'PGRST202', f'Could not find the function public.{table[4:]}')
+            return self._send(200, function(store, self._read_json() or {}, claims))
+        if table not in store.tables:
+            raise PostgrestError(404, '42P01', f'relation "public.{table}" does not exist')
+        prefer = self._prefer()
+        select = dict(params).get('select', '*')
+        single = 'vnd.pgrst.object' in self.headers.get('Accept', '')
+
+        if self.command in ('GET', 'HEAD'):
+            rows, total, offset = store.select(table, params, claims)
+            headers = {}
+            if prefer.get('count') in ('exact', 'planned', 'estimated'):
+                end = offset + len(rows) - 1
+                headers['Content-Range'] = f"{offset}-{end}/{total}" if rows else f"*/{total}"
+            if single:
+                if len(rows) != 1:
+                    raise PostgrestError(
+                        406, 'PGRST116', 'JSON object requested, multiple (or no) rows returned',
+                        f"The result contains {len(rows)} rows"
+                    )
+                return self._send(200, rows[0], headers=headers)
+            return self._send(200, rows, headers=headers)
+
+        if self.command == 'POST':
+            payload = self._read_json()
+            items = payload if isinstance(payload, list) else [payload]
+            if prefer.get('resolution') == 'merge-duplicates':
+                created = self._upsert(table, items, dict(params).get('on_conflict'), claims)
+            else:
+                created = store.insert(table, items, claims)
+            return self._write_response(table, created, select, claims, 201, single)
+
+        if self.command == 'PATCH':
+            changes = self._read_json() or {}
+            updated = store.update(table, params, changes, claims)
+            return self._write_response(table, updated, select, claims, 204, single)
+
+        if self.command == 'DELETE':
+            deleted = store.delete(table, params, claims)
+            return self._write_response(table, deleted, select, claims, 204, single)
+
+        raise PostgrestError(405, 'PGRST117', f"Unsupported HTTP method: {self.command}")
+
+    def _upsert(self, table, items, on_conflict, claims):
+        store = self.local.store
+        keys = [key.strip() for key in (on_conflict or 'id').split(',')]
+        written = []
+        with store.lock:
+            for item in items:
+                params = [(key, f"eq.{item[key]}") for key in keys if key in item]
+                existing = store.update(table, params, item, claims) if len(params) == len(keys) else []
+                written.extend(existing or store.insert(table, [item], claims))
+        return written
+
+    def _write_response(self, table, rows, select, claims, minimal_status, single):
+        if self._prefer().get('return') != 'representation':
+            return self._send(minimal_status)
+        store = self.local.store
+        with store.lock:
+            cache = {}
+            body = [store.project(table, row, parse_select(select), claims, cache) for row in rows]
+        status = 201 if minimal_status == 201 else 200
+        if single:
+            return self._send(status, body[0] if body else None)
+        return self._send(status, body)
+
+    # ---- GoTrue ----
+
+    def _auth(self, path, params):
+        local = self.local
+        if path == 'token' and self.command == 'POST':
+            grant_type = dict(params).get('grant_type')
+            payload = self._read_json() or {}
+            if grant_type == 'password':
+                user = local.store.auth_users.get((payload.get('email') or '').lower())
+                password_hash = hashlib.sha256((payload.get('password') or '').encode()).hexdigest()
+                if not user or not hmac.compare_digest(user['password_hash'], password_hash):
+                    return self._send(400, {'error': 'invalid_grant', 'error_description': 'Invalid login credentials'})
+                return self._send(200, local.issue_session(user))
+            if grant_type == 'refresh_token':
+                with local.store.lock:
+                    email = local.refresh_tokens.pop(payload.get('refresh_token'), None)
+                if email is None:
+                    return self._send(400, {'error': 'invalid_grant', 'error_description': 'Invalid Refresh Token'})
+                return self._send(200, local.issue_session(local.store.auth_users[email]))
+            return self._send(400, {'error': 'unsupported_grant_type'})
+        if path.startswith('admin/users'):
+            return self._auth_admin(path[len('admin/users'):].strip('/'))
+        if path == 'user' and self.command == 'GET':
+            claims = local.claims_for(self.headers)
+            if not claims or claims.get('role') != 'authenticated':
+                return self._send(401, {'msg': 'invalid JWT'})
+            return self._send(200, {'id': claims['sub'], 'email': claims.get('email'), 'role': 'authenticated'})
+        return self._send(404, {'msg': f'{path} not found'})
+
+    def _auth_admin(self, user_id):
+        """GoTrue admin API (service_role only): create and delete users"""
+        local = self.local
+        claims = local.claims_for(self.headers)
+        if not claims or claims.get('role') != 'service_role':
+            return self._send(403, {'msg': 'User not allowed'})
+        if not user_id and self.command == 'POST':
+            payload = self._read_json() or {}
+            email = (payload.get('email') or '').strip()
+            if not email or not payload.get('password'):
+                return self._send(400, {'msg': 'email and password are required'})
+            if email.lower() in local.store.auth_users:
+                return self._send(422, {'msg': 'A user with this email address has already been registered'})
+            created = local.add_auth_user(email, payload['password'], user_id=payload.get('id'))
+            return self._send(200, {'id': created, 'email': email, 'role': 'authenticated', 'aud': 'authenticated'})
+        if user_id and self.command == 'DELETE':
+            with local.store.lock:
+                email = next((key for key, user in local.store.auth_users.items() if user['id'] == user_id), None)
+                if email is None:
+                    return self._send(404, {'msg': 'User not found'})
+                del local.store.auth_users[email]
+                # public.users.id REFERENCES auth.users(id) ON DELETE CASCADE
+                local.store.delete('users', [('id', f'eq.{user_id}')], {'role': 'service_role'})
+            return self._send(200, {})
+        return self._send(405, {'msg': 'Method not allowed'})
+
+    # ---- Storage ----
+
+    def _storage(self, path):
+        local = self.local
+        storage = local.storage
+        if path.startswith('object/public/') and self.command in ('GET', 'HEAD'):
+            bucket, _, key = path[len('object/public/'):].partition('/')
+            found = storage.get(bucket, key)
+            if found is None:
+                return self._send(404, {'statusCode': '404', 'error': 'not_found', 'message': 'Object not found'})
+            return self._send(200, found['data'], content_type=found['content_type'],
+                              headers={'Cache-Control': f"max-age={found['cache_control']}", 'ETag': found['etag']})
+        
+        claims = local.claims_for(self.headers)
+        if not claims or claims.get('role') not in ('authenticated', 'service_role'):
+            # Storage policies: only signed-in users (and the service role) write
+            return self._send(403, {'statusCode': '403', 'error': 'Unauthorized',
+                                    'message': 'new row violates row-level security policy'})
+        upsert = self.headers.get('x-upsert', 'false').lower() == 'true'
+
+        def published_snapshot(bucket, keys):
+            # supabase-catalog-snapshots.sql: only the service role writes site-assets/catalog/
+            return claims.get('role') != 'service_role' and bucket == SNAPSHOT_BUCKET and any(
+                key.startswith('catalog/') for key in keys
+            )
+
+        try:
+            if path.startswith('object/'):
+                bucket, _, key = path[len('object/'):].partition('/')
+                if self.command in ('POST', 'PUT') and key:
+                    if published_snapshot(bucket, [key]):
+                        return self._send(403, {'statusCode': '403', 'error': 'Unauthorized',
+                                                'message': 'new row violates row-level security policy'})
+                    storage.put(bucket, key, self._read_body(), self.headers.get('Content-Type'),
+                                self.headers.get('cache-control'), upsert or self.command == 'PUT')
+                    return self._send(200, {'Key': f'{bucket}/{key}', 'Id': str(uuid.uuid4())})
+                if self.command == 'DELETE' and not key:
+                    prefixes = (self._read_json() or {}).get('prefixes', [])
+                    if published_snapshot(bucket, prefixes):
+                        return self._send(403, {'statusCode': '403', 'error': 'Unauthorized',
+                                                'message': 'new row violates row-level security policy'})
+                    removed = storage.remove(bucket, prefixes)
+                    return self._send(200, [{'name': name, 'bucket_id': bucket} for name in removed])
+                if self.command == 'GET' and key:
+                    found = storage.get(bucket, key)
+                    if found is None:
+                        return self._send(404, {'statusCode': '404', 'error': 'not_found',
+                                                'message': 'Object not found'})
+                    return self._send(200, found['data'], content_type=found['content_type'])
+            if path == 'upload/resumable' and self.command == 'POST':
+                metadata = {}
+                for pair in self.headers.get('Upload-Metadata', '').split(','):
+                    if pair.strip():
+                        key, _, value = pair.strip().partition(' ')
+                        metadata[key] = base64.b64decode(value).decode()
+                if published_snapshot(metadata.get('bucketName'), [metadata.get('objectName', '')]):
+                    return self._send(403, {'statusCode': '403', 'error': 'Unauthorized',
+                                            'message': 'new row violates row-level security policy'})
+                upload_id = storage.create_upload(
+                    metadata.get('bucketName'), metadata.get('objectName', ''),
+                    int(self.headers.get('Upload-Length') or 0), metadata.get('contentType'),
+                    metadata.get('cacheControl'), upsert
+                )
+                return self._send(201, headers={
+                    'Location': f"{local.url}/storage/v1/upload/resumable/{upload_id}", 'Tus-Resumable': '1.0.0'
+                })
+            if path.startswith('upload/resumable/'):
+                upload_id = path[len('upload/resumable/'):]
+                if self.command == 'HEAD':
+                    with storage.lock:
+                        upload = storage.uploads.get(upload_id)
+                    if upload is None:
+                        return self._send(404)
+                    return self._send(200, headers={
+                        'Upload-Offset': str(len(upload['data'])), 'Upload-Length': str(upload['length']),
+                        'Tus-Resumable': '1.0.0', 'Cache-Control': 'no-store'
+                    })
+                if self.command == 'PATCH':
+                    offset = storage.append(upload_id, int(self.headers.get('Upload-Offset', -1)), self._read_body())
+                    return self._send(204, headers={'Upload-Offset': str(offset), 'Tus-Resumable': '1.0.0'})
+                if self.command == 'DELETE':
+                    with storage.lock:
+                        storage.uploads.pop(upload_id, None)
+                    return self._send(204, headers={'Tus-Resumable': '1.0.0'})
+        except PostgrestError as e:
+            return self._send(e.status, {'statusCode': str(e.status), 'error': e.code, 'message': e.message})
+        return self._send(400, {'statusCode': '400', 'error': 'invalid_request', 'message': f'{path} not supported'})
+
+    # ---- Realtime ----
+
+    def _realtime(self, params):
+        """Upgrade to the Realtime websocket; the connection's default claims come from its apikey"""
+        key = self.headers.get('Sec-WebSocket-Key')
+        if self.headers.get('Upgrade', '').lower() != 'websocket' or not key:
+            return self._send(400, {'message': 'Expected a websocket upgrade'})
+        claims = verify_jwt(params.get('apikey') or self.headers.get('apikey', ''), self.local.secret)
+        if claims is None:
+            return self._send(403, {'message': 'Invalid apikey'})
+        self.send_response(101)
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        self.send_header('Sec-WebSocket-Accept',
+                         base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode())
+        self.end_headers()
+        self.wfile.flush()
+        self.local.realtime.serve(self.rfile, self.wfile, self.request, claims)
+        self.close_connection = True
+
+    # ---- Next.js routes the suite probes ----
+
+    def _app(self, path, params):
+        if self.local.app_url:
+            return self._send(404, {'error': f"App routes are served by the Next.js app at {self.local.app_url}"})
+        if path in ('/api', '/api/', '/api/root') and self.command == 'GET':
+            return self._send(200, {'message': 'MotoDealer SaaS API', 'status': 'running', 'database': 'Supabase'})
+        if path == '/api/health' and self.command == 'GET':
+            return self._send(200, {'status': 'healthy', 'timestamp': now_iso()})
+        if path == '/api/products' and self.command == 'GET':
+            return self._api_products(dict(params))
+        if path == '/api/products/specs' and self.command == 'GET':
+            return self._api_product_specs(dict(params))
+        if path == '/api/search' and self.command == 'GET':
+            return self._api_search(dict(params))
+        if path == '/api/facets' and self.command == 'GET':
+            return self._api_facets(params)
+        if path == '/api/catalog/invalidate' and self.command == 'POST':
+            return self._api_catalog_invalidate()
+        match = re.match(r'^/api/catalog/([^/]+)$', path)
+        if match and self.command == 'GET':
+            return self._api_catalog(unquote(match.group(1)), dict(params))
+        match = re.match(r'^/api/images/([^/]+)/(.+)$', path)
+        if match and self.command in ('GET', 'HEAD'):
+            accept = self.headers.get('Accept', '')
+            status, body, headers = self.local.images.get(
+                match.group(1), unquote(match.group(2)).split('/'), accept, self.headers.get('If-None-Match')
+            )
+            if status != 200:
+                return self._send(status, body, headers=headers)
+            return self._send(status, body, f"image/{negotiate_format(accept)}", headers)
+        if re.match(r'^/dashboard(/|$)', path) and self.command == 'GET':
+            # lib/supabase/middleware.js sends visitors without a session to /login
+            claims = self.local.app_claims(self.headers)
+            if not claims or claims.get('role') != 'authenticated':
+                return self._send(307, headers={'Location': '/login'})
+            return self._send(
+                200,
+                f"<!DOCTYPE html><html><head><title>Dashboard | MotoDealer</title></head>"
+                f"<body data-user=\"{claims['sub']}\"><h1>Dashboard</h1></body></html>",
+                content_type='text/html; charset=utf-8'
+            )
+        match = re.match(r'^/catalogo/([^/]+)/?$', path)
+        if match and self.command == 'GET':
+            slug = unquote(match.group(1))
+            dealerships, _, _ = self.local.store.select(
+                'dealerships', [('slug', f'eq.{slug}'), ('is_active', 'eq.true')], {'role': 'anon'}
+            )
+            name = dealerships[0]['name'] if dealerships else 'Concesionario no encontrado'
+            return self._send(
+                200,
+                f"<!DOCTYPE html><html><head><title>{name} | MotoDealer</title></head>"
+                f"<body data-slug=\"{slug}\"><h1>{name}</h1></body></html>",
+                content_type='text/html; charset=utf-8'
+            )
+        return self._send(404, {'error': f"Route {path} not found"})
+
+    def _api_products(self, query):
+        """Mirror of GET /api/products in app/api/[[...path]]/route.js"""
+        store = self.local.store
+        claims = self.local.app_claims(self.headers) or {'role': 'anon'}
+        limit = min(int(query['limit']), MAX_PAGE_SIZE) if query.get('limit', '').isdigit() and int(query['limit']) > 0 \
+            else DEFAULT_PAGE_SIZE
+        dealership_id = query.get('dealership_id')
+        if not dealership_id and query.get('slug'):
+            dealerships, _, _ = store.select(
+                'dealerships', [('slug', f"eq.{query['slug']}"), ('is_active', 'eq.true')], claims
+            )
+            if not dealerships:
+                return self._send(404, {'error': 'Dealership not found'})
+            dealership_id = dealerships[0]['id']
+        if not dealership_id:
+            return self._send(400, {'error': 'dealership_id or slug is required'})
+
+        params = [('select', PRODUCT_LIST_SELECT), ('dealership_id', f'eq.{dealership_id}')]
+        params += [(column, f'eq.{query[column]}') for column in ('category_id', 'subcategory_id', 'status')
+                   if query.get(column)]
+        if query.get('cursor'):
+            cursor = decode_cursor(query['cursor'])
+            if cursor is None:
+                return self._send(400, {'error': 'Invalid cursor'})
+            created_at, row_id = cursor
+            params.append(('created_at', f'lte.{created_at}'))
+            params.append(('or', f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id}))'))
+        params += [('order', 'created_at.desc,id.desc'), ('limit', str(limit + 1))]
+
+        rows, _, _ = store.select('products', params, claims)
+        page = rows[:limit]
+        return self._send(200, {
+            'data': page,
+            'next_cursor': encode_cursor(page[-1]) if len(rows) > limit else None,
+            'limit': limit
+        })
+
+    def _api_product_specs(self, query):
+        """Mirror of GET /api/products/specs"""
+        store = self.local.store
+        claims = self.local.app_claims(self.headers) or {'role': 'anon'}
+        sort = query.get('sort') or 'price'
+        if sort not in SPEC_RANGE_FIELDS:
+            return self._send(400, {'error': f"sort must be one of {', '.join(SPEC_RANGE_FIELDS)}"})
+        ascending = query.get('order') != 'desc'
+        limit = min(int(query['limit']), MAX_PAGE_SIZE) if query.get('limit', '').isdigit() and int(query['limit']) > 0 \
+            else DEFAULT_PAGE_SIZE
+        dealership_id = query.get('dealership_id')
+        if not dealership_id and query.get('slug'):
+            dealerships, _, _ = store.select(
+                'dealerships', [('slug', f"eq.{query['slug']}"), ('is_active', 'eq.true')], claims
+            )
+            if not dealerships:
+                return self._send(404, {'error': 'Dealership not found'})
+            dealership_id = dealerships[0]['id']
+        if not dealership_id:
+            return self._send(400, {'error': 'dealership_id or slug is required'})
+
+        params = [('select', f"product_id,{','.join(SPEC_RANGE_FIELDS)},product:products({PRODUCT_LIST_SELECT})"),
+                  ('dealership_id', f'eq.{dealership_id}'), (sort, 'not.is.null')]
+        for field in SPEC_RANGE_FIELDS:
+            for bound, operator in (('min', 'gte'), ('max', 'lte')):
+                raw = (query.get(f'{bound}_{field}') or '').strip()
+                if not raw:
+                    continue
+                try:
+                    value = float(raw)
+                except ValueError:
+                    value = float('nan')
+                if value != value or value in (float('inf'), float('-inf')):
+                    return self._send(400, {'error': f'{bound}_{field} must be a number'})
+                params.append((field, f'{operator}.{raw}'))
+        if query.get('cursor'):
+            cursor = decode_sort_cursor(query['cursor'])
+            if cursor is None:
+                return self._send(400, {'error': 'Invalid cursor'})
+            value, row_id = cursor
+            operator = 'gt' if ascending else 'lt'
+            params.append((sort, f"{'gte' if ascending else 'lte'}.{value}"))
+            params.append(('or', f'({sort}.{operator}.{value},and({sort}.eq.{value},product_id.{operator}.{row_id}))'))
+        direction = 'asc' if ascending else 'desc'
+        params += [('order', f'{sort}.{direction},product_id.{direction}'), ('limit', str(limit + 1))]
+
+        rows, _, _ = store.select('product_spec_values', params, claims)
+        page = rows[:limit]
+        return self._send(200, {
+            'data': [
+                dict(row['product'], specs={field: row[field] for field in SPEC_RANGE_FIELDS})
+                for row in page if row['product']
+            ],
+            'next_cursor': encode_sort_cursor(page[-1][sort], page[-1]['product_id']) if len(rows) > limit else None,
+            'limit': limit,
+            'sort': sort,
+            'order': direction
+        })
+
+    def _api_search(self, query):
+        """Mirror of GET /api/search"""
+        store = self.local.store
+        claims = self.local.app_claims(self.headers) or {'role': 'anon'}
+        text = (query.get('q') or '').strip()[:100]
+        if not text:
+            return self._send(400, {'error': 'q is required'})
+        dealership_id = query.get('dealership_id')
+        if not dealership_id and query.get('slug'):
+            dealerships, _, _ = store.select(
+                'dealerships', [('slug', f"eq.{query['slug']}"), ('is_active', 'eq.true')], claims
+            )
+            if not dealerships:
+                return self._send(404, {'error': 'Dealership not found'})
+            dealership_id = dealerships[0]['id']
+        if not dealership_id:
+            return self._send(400, {'error': 'dealership_id or slug is required'})
+        limit = min(int(query['limit']), MAX_PAGE_SIZE) if query.get('limit', '').isdigit() and int(query['limit']) > 0 \
+            else DEFAULT_PAGE_SIZE
+        offset = int(query['offset']) if query.get('offset', '').isdigit() else 0
+
+        ranked = search_products(store, {
+            'p_dealership_id': dealership_id, 'p_query': text, 'p_category_id': query.get('category_id'),
+            'p_subcategory_id': query.get('subcategory_id'), 'p_limit': limit, 'p_offset': offset
+        }, claims)
+        if not ranked:
+            return self._send(200, {'data': [], 'total': 0, 'limit': limit, 'offset': offset})
+        products, _, _ = store.select('products', [
+            ('select', PRODUCT_LIST_SELECT), ('id', f"in.({','.join(row['id'] for row in ranked)})")
+        ], claims)
+        by_id = {product['id']: product for product in products}
+        return self._send(200, {
+            'data': [dict(by_id[row['id']], rank=row['rank']) for row in ranked if row['id'] in by_id],
+            'total': ranked[0]['total_count'],
+            'limit': limit,
+            'offset': offset
+        })
+
+    def _api_facets(self, params):
+        """Mirror of GET /api/facets (spec filters repeat, so ``params`` is the raw pair list)"""
+        store = self.local.store
+        claims = self.local.app_claims(self.headers) or {'role': 'anon'}
+        query = dict(params)
+        dealership_id = query.get('dealership_id')
+        if not dealership_id and query.get('slug'):
+            dealerships, _, _ = store.select(
+                'dealerships', [('slug', f"eq.{query['slug']}"), ('is_active', 'eq.true')], claims
+            )
+            if not dealerships:
+                return self._send(404, {'error': 'Dealership not found'})
+            dealership_id = dealerships[0]['id']
+        if not dealership_id:
+            return self._send(400, {'error': 'dealership_id or slug is required'})
+        filters = {}
+        for facet in SPEC_FACETS:
+            values = [value.strip()[:100] for key, value in params if key == facet and value.strip()]
+            if values:
+                filters[facet] = values[:20]
+        limit = min(int(query['limit']), MAX_PAGE_SIZE) if query.get('limit', '').isdigit() and int(query['limit']) > 0 \
+            else DEFAULT_PAGE_SIZE
+        offset = int(query['offset']) if query.get('offset', '').isdigit() else 0
+
+        result = filter_products_by_specs(store, {
+            'p_dealership_id': dealership_id, 'p_filters': filters, 'p_category_id': query.get('category_id'),
+            'p_subcategory_id': query.get('subcategory_id'), 'p_limit': limit, 'p_offset': offset
+        }, claims)
+        body = {'data': [], 'total': result['total'], 'facets': result['facets'], 'filters': filters,
+                'limit': limit, 'offset': offset}
+        if result['ids']:
+            products, _, _ = store.select('products', [
+                ('select', PRODUCT_LIST_SELECT), ('id', f"in.({','.join(result['ids'])})")
+            ], claims)
+            by_id = {product['id']: product for product in products}
+            body['data'] = [by_id[product_id] for product_id in result['ids'] if product_id in by_id]
+        return self._send(200, body)
+
+    def _api_catalog(self, slug, query):
+        """Mirror of GET /api/catalog/<slug>"""
+        cache = self.local.catalog_cache
+        payload = cache.get(slug)
+        hit = payload is not None
+        if not hit:
+            payload, generation = self.local.catalog_payload(slug)
+            if payload is None:
+                return self._send(404, {'error': 'Dealership not found'})
+            cache.set(slug, payload, generation)
+        headers = {'X-Cache': 'HIT' if hit else 'MISS'}
+        if not query.get('limit') and not query.get('cursor'):
+            return self._send(200, payload, headers=headers)
+
+        cursor = None
+        if query.get('cursor'):
+            cursor = decode_cursor(query['cursor'])
+            if cursor is None:
+                return self._send(400, {'error': 'Invalid cursor'})
+        limit = min(int(query['limit']), MAX_PAGE_SIZE) if query.get('limit', '').isdigit() and int(query['limit']) > 0 \
+            else DEFAULT_PAGE_SIZE
+        page, next_cursor = slice_page(payload['products'], cursor, limit)
+        if cursor:
+            return self._send(200, {'products': page, 'next_cursor': next_cursor}, headers=headers)
+        return self._send(200, dict(payload, products=page, next_cursor=next_cursor), headers=headers)
+
+    def _api_catalog_invalidate(self):
+        """Mirror of POST /api/catalog/invalidate"""
+        local = self.local
+        dealership_id = (self._read_json() or {}).get('dealership_id')
+        if not dealership_id:
+            return self._send(400, {'error': 'dealership_id is required'})
+        if not hmac.compare_digest(self.headers.get('X-Catalog-Webhook-Secret', ''), local.catalog_webhook_secret):
+            claims = local.app_claims(self.headers)
+            if not claims or claims.get('role') != 'authenticated':
+                return self._send(401, {'error': 'Unauthorized'})
+            if local.store.dealership_of(claims) != dealership_id:
+                return self._send(403, {'error': 'Forbidden'})
+        removed = local.catalog_cache.invalidate_dealership(dealership_id)
+        local.catalog_snapshots.schedule(dealership_id)
+        return self._send(200, {'invalidated': removed, 'stats': local.catalog_cache.stats, 'snapshot_scheduled': True})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Supabase stand-in for the backend suite")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=54321)
+    parser.add_argument('--schema', default=SCHEMA_PATH)
+    parser.add_argument('--app-url', default=None,
+                        help="Next.js server that serves the app routes (see the module docstring)")
+    parser.add_argument('--print-env', action='store_true',
+                        help="Print the Next.js environment for this stand-in and exit "
+                             "(set LOCAL_SUPABASE_JWT_SECRET so the keys match the suite's)")
+    args = parser.parse_args()
+
+    local = LocalSupabase(schema_path=args.schema, host=args.host, port=args.port, app_url=args.app_url)
+    if args.print_env:
+        for name, value in local.app_env().items():
+            print(f"{name}={value}")
+        local.server.server_close()
+        shutil.rmtree(local.image_cache_dir, ignore_errors=True)
+        sys.exit(0)
+    local.start()
+    print(f"Local Supabase running at {local.url}")
+    for name, value in local.app_env().items():
+        print(f"{name}={value}")
+    try:
+        local.thread.join()
+    except KeyboardInterrupt:
+        local.stop()
+        sys.exit(0)
@@ -0,0 +1,186 @@
+-- ============================================
+-- INVALIDACIÓN DEL CACHÉ DEL CATÁLOGO (/api/catalog/<slug>)
+-- ============================================
+-- IMPORTANTE: Ejecuta esto en el SQL Editor de Supabase después de supabase-schema.sql
+-- Requiere la extensión pg_net (Database > Extensions)
+-- ============================================
+
+CREATE EXTENSION IF NOT EXISTS pg_net;
+
+-- Configura la URL del endpoint y el secreto compartido (CATALOG_WEBHOOK_SECRET en la app):
+-- ALTER DATABASE postgres SET app.catalog_invalidate_url = 'https://tu-dominio.com/api/catalog/invalidate';
+-- ALTER DATABASE postgres SET app.catalog_webhook_secret = 'un-secreto-largo';
+-- Si no están configurados, los triggers no hacen nada y el caché expira por TTL.
+
+-- Dealership al que pertenece una fila (como JSONB) de cualquiera de las tablas del catálogo
+CREATE OR REPLACE FUNCTION catalog_row_dealership(p_table TEXT, p_row JSONB)
+RETURNS UUID AS $$
+  SELECT CASE p_table
+    WHEN 'dealerships' THEN (p_row->>'id')::UUID
+    WHEN 'product_images' THEN COALESCE(
+      (p_row->>'dealership_id')::UUID,
+      (SELECT dealership_id FROM public.products WHERE id = (p_row->>'product_id')::UUID)
+    )
+    ELSE (p_row->>'dealership_id')::UUID
+  END;
+$$ LANGUAGE sql STABLE SET search_path = public;
+
+-- Función que avisa a la app que el catálogo de uno o más dealerships cambió.
+-- Triggers por sentencia con tablas de transición: una carga masiva de 5.000 productos
+-- envía un aviso por dealership, no 5.000.
+CREATE OR REPLACE FUNCTION notify_catalog_change()
+RETURNS TRIGGER AS $$
+DECLARE
+  target_url TEXT := current_setting('app.catalog_invalidate_url', true);
+  dealership_ids UUID[] := '{}';
+  target_dealership UUID;
+BEGIN
+  IF target_url IS NULL OR target_url = '' THEN
+    RETURN NULL;
+  END IF;
+
+  IF TG_OP <> 'DELETE' THEN
+    dealership_ids := dealership_ids || ARRAY(
+      SELECT DISTINCT catalog_row_dealership(TG_TABLE_NAME, to_jsonb(r)) FROM new_rows r
+    );
+  END IF;
+  IF TG_OP <> 'INSERT' THEN
+    dealership_ids := dealership_ids || ARRAY(
+      SELECT DISTINCT catalog_row_dealership(TG_TABLE_NAME, to_jsonb(r)) FROM old_rows r
+    );
+  END IF;
+
+  FOR target_dealership IN
+    SELECT DISTINCT id FROM unnest(dealership_ids) AS id WHERE id IS NOT NULL
+  LOOP
+    -- Asíncrono: la petición sale después del commit y no bloquea la escritura
+    PERFORM net.http_post(
+      url := target_url,
+      body := jsonb_build_object('dealership_id', target_dealership, 'table', TG_TABLE_NAME),
+      headers := jsonb_build_object(
+        'Content-Type', 'application/json',
+        'X-Catalog-Webhook-Secret', COALESCE(current_setting('app.catalog_webhook_secret', true), '')
+      )
+    );
+  END LOOP;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Tres triggers por tabla (las tablas de transición dependen del evento), todos con la misma función.
+-- El primer DROP de cada tabla borra el trigger por fila de versiones anteriores de este archivo.
+DROP TRIGGER IF EXISTS catalog_cache_dealerships ON public.dealerships;
+DROP TRIGGER IF EXISTS catalog_cache_dealerships_insert ON public.dealerships;
+CREATE TRIGGER catalog_cache_dealerships_insert
+  AFTER INSERT ON public.dealerships REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_dealerships_update ON public.dealerships;
+CREATE TRIGGER catalog_cache_dealerships_update
+  AFTER UPDATE ON public.dealerships REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_dealerships_delete ON public.dealerships;
+CREATE TRIGGER catalog_cache_dealerships_delete
+  AFTER DELETE ON public.dealerships REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_site_settings ON public.site_settings;
+DROP TRIGGER IF EXISTS catalog_cache_site_settings_insert ON public.site_settings;
+CREATE TRIGGER catalog_cache_site_settings_insert
+  AFTER INSERT ON public.site_settings REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_site_settings_update ON public.site_settings;
+CREATE TRIGGER catalog_cache_site_settings_update
+  AFTER UPDATE ON public.site_settings REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_site_settings_delete ON public.site_settings;
+CREATE TRIGGER catalog_cache_site_settings_delete
+  AFTER DELETE ON public.site_settings REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_products ON public.products;
+DROP TRIGGER IF EXISTS catalog_cache_products_insert ON public.products;
+CREATE TRIGGER catalog_cache_products_insert
+  AFTER INSERT ON public.products REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_products_update ON public.products;
+CREATE TRIGGER catalog_cache_products_update
+  AFTER UPDATE ON public.products REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_products_delete ON public.products;
+CREATE TRIGGER catalog_cache_products_delete
+  AFTER DELETE ON public.products REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_product_images ON public.product_images;
+DROP TRIGGER IF EXISTS catalog_cache_product_images_insert ON public.product_images;
+CREATE TRIGGER catalog_cache_product_images_insert
+  AFTER INSERT ON public.product_images REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_product_images_update ON public.product_images;
+CREATE TRIGGER catalog_cache_product_images_update
+  AFTER UPDATE ON public.product_images REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_product_images_delete ON public.product_images;
+CREATE TRIGGER catalog_cache_product_images_delete
+  AFTER DELETE ON public.product_images REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_categories ON public.categories;
+DROP TRIGGER IF EXISTS catalog_cache_categories_insert ON public.categories;
+CREATE TRIGGER catalog_cache_categories_insert
+  AFTER INSERT ON public.categories REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_categories_update ON public.categories;
+CREATE TRIGGER catalog_cache_categories_update
+  AFTER UPDATE ON public.categories REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_categories_delete ON public.categories;
+CREATE TRIGGER catalog_cache_categories_delete
+  AFTER DELETE ON public.categories REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_subcategories ON public.subcategories;
+DROP TRIGGER IF EXISTS catalog_cache_subcategories_insert ON public.subcategories;
+CREATE TRIGGER catalog_cache_subcategories_insert
+  AFTER INSERT ON public.subcategories REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_subcategories_update ON public.subcategories;
+CREATE TRIGGER catalog_cache_subcategories_update
+  AFTER UPDATE ON public.subcategories REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_subcategories_delete ON public.subcategories;
+CREATE TRIGGER catalog_cache_subcategories_delete
+  AFTER DELETE ON public.subcategories REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_employees ON public.employees;
+DROP TRIGGER IF EXISTS catalog_cache_employees_insert ON public.employees;
+CREATE TRIGGER catalog_cache_employees_insert
+  AFTER INSERT ON public.employees REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_employees_update ON public.employees;
+CREATE TRIGGER catalog_cache_employees_update
+  AFTER UPDATE ON public.employees REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+DROP TRIGGER IF EXISTS catalog_cache_employees_delete ON public.employees;
+CREATE TRIGGER catalog_cache_employees_delete
+  AFTER DELETE ON public.employees REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change();
+
+-- ============================================
+-- ¡LISTO! Cada cambio del dashboard invalida el catálogo cacheado de ese dealership
+-- ============================================
@@ -0,0 +1,37 @@
+-- ============================================
+-- SNAPSHOTS DEL CATÁLOGO PUBLICADOS EN STORAGE (site-assets/catalog/)
+-- ============================================
+-- IMPORTANTE: Ejecuta esto en el SQL Editor de Supabase después de supabase-catalog-cache.sql
+-- Cada vez que los triggers de supabase-catalog-cache.sql avisan un cambio, la app (lib/catalog-publisher.js)
+-- arma el catálogo del concesionario y lo publica en el bucket site-assets:
+--   catalog/<slug>.json                       puntero chico (cache 60 s) a la versión vigente
+--   catalog/<dealership_id>/<version>.json.gz documento comprimido e inmutable (cache 1 año)
+--   catalog/<dealership_id>/index.json        versiones publicadas, para reemplazar y limpiar
+-- /catalogo/<slug> lee el snapshot directo de Storage/CDN y solo consulta la base si no hay uno.
+-- La app publica con la service role: configura SUPABASE_SERVICE_ROLE_KEY en el servidor.
+-- Publicar o verificar a mano:
+--   python backend_test.py --publish-snapshots
+--   python backend_test.py --verify-snapshots
+-- ============================================
+
+-- site-assets acepta escrituras de cualquier usuario autenticado (supabase-storage-policies.sql).
+-- Sin estas políticas restrictivas, el administrador de un concesionario podría reemplazar el
+-- catálogo publicado de otro. Solo la service role (que no pasa por RLS) escribe en catalog/.
+DROP POLICY IF EXISTS "Only the publisher writes catalog snapshots" ON storage.objects;
+CREATE POLICY "Only the publisher writes catalog snapshots" ON storage.objects
+  AS RESTRICTIVE FOR INSERT TO authenticated
+  WITH CHECK (bucket_id <> 'site-assets' OR name NOT LIKE 'catalog/%');
+
+DROP POLICY IF EXISTS "Only the publisher updates catalog snapshots" ON storage.objects;
+CREATE POLICY "Only the publisher updates catalog snapshots" ON storage.objects
+  AS RESTRICTIVE FOR UPDATE TO authenticated
+  USING (bucket_id <> 'site-assets' OR name NOT LIKE 'catalog/%');
+
+DROP POLICY IF EXISTS "Only the publisher deletes catalog snapshots" ON storage.objects;
+CREATE POLICY "Only the publisher deletes catalog snapshots" ON storage.objects
+  AS RESTRICTIVE FOR DELETE TO authenticated
+  USING (bucket_id <> 'site-assets' OR name NOT LIKE 'catalog/%');
+
+-- ============================================
+-- ¡LISTO! Las visitas al catálogo público ya no consultan Postgres
+-- ============================================
@@ -0,0 +1,322 @@
+-- ============================================
+-- ESTADÍSTICAS DEL DASHBOARD (contadores por dealership)
+-- ============================================
+-- IMPORTANTE: Ejecuta esto en el SQL Editor de Supabase después de supabase-schema.sql
+-- El inicio del dashboard descargaba todos los productos (con imágenes), categorías,
+-- subcategorías y empleados solo para contarlos. Ahora lee una fila por dealership,
+-- que los triggers mantienen al día: abrir el dashboard cuesta lo mismo con 10 o 10.000 productos.
+-- Comparación con el enfoque anterior:
+--   python backend_test.py --benchmark-dashboard-stats
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.dealership_stats (
+  dealership_id UUID PRIMARY KEY REFERENCES public.dealerships(id) ON DELETE CASCADE,
+  total_products INTEGER NOT NULL DEFAULT 0,
+  available_products INTEGER NOT NULL DEFAULT 0,
+  sold_products INTEGER NOT NULL DEFAULT 0,
+  reserved_products INTEGER NOT NULL DEFAULT 0,
+  inventory_value NUMERIC(14, 2) NOT NULL DEFAULT 0,
+  total_categories INTEGER NOT NULL DEFAULT 0,
+  total_subcategories INTEGER NOT NULL DEFAULT 0,
+  total_employees INTEGER NOT NULL DEFAULT 0,
+  active_employees INTEGER NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ DEFAULT now()
+);
+
+ALTER TABLE public.dealership_stats ENABLE ROW LEVEL SECURITY;
+
+-- Solo el admin del dealership ve sus números; nadie escribe directamente (solo los triggers)
+DROP POLICY IF EXISTS "Admins can view own stats" ON public.dealership_stats;
+CREATE POLICY "Admins can view own stats" ON public.dealership_stats
+  FOR SELECT USING (dealership_id = (SELECT get_user_dealership_id()));
+
+-- ============================================
+-- CONTADORES INCREMENTALES
+-- ============================================
+
+-- Suma deltas a la fila del dealership (la crea si no existe).
+-- Ignora dealerships que ya no existen: al borrar un dealership, el DELETE en cascada
+-- de sus productos dispara los triggers cuando su fila de stats ya se borró.
+CREATE OR REPLACE FUNCTION add_dealership_stats(
+  p_dealership_id UUID,
+  p_products INTEGER DEFAULT 0,
+  p_available INTEGER DEFAULT 0,
+  p_sold INTEGER DEFAULT 0,
+  p_reserved INTEGER DEFAULT 0,
+  p_inventory_value NUMERIC DEFAULT 0,
+  p_categories INTEGER DEFAULT 0,
+  p_subcategories INTEGER DEFAULT 0,
+  p_employees INTEGER DEFAULT 0,
+  p_active_employees INTEGER DEFAULT 0
+)
+RETURNS VOID AS $$
+  INSERT INTO public.dealership_stats AS s (
+    dealership_id, total_products, available_products, sold_products, reserved_products, inventory_value,
+    total_categories, total_subcategories, total_employees, active_employees
+  )
+  SELECT p_dealership_id, p_products, p_available, p_sold, p_reserved, p_inventory_value,
+         p_categories, p_subcategories, p_employees, p_active_employees
+  WHERE EXISTS (SELECT 1 FROM public.dealerships WHERE id = p_dealership_id)
+  ON CONFLICT (dealership_id) DO UPDATE SET
+    total_products = s.total_products + EXCLUDED.total_products,
+    available_products = s.available_products + EXCLUDED.available_products,
+    sold_products = s.sold_products + EXCLUDED.sold_products,
+    reserved_products = s.reserved_products + EXCLUDED.reserved_products,
+    inventory_value = s.inventory_value + EXCLUDED.inventory_value,
+    total_categories = s.total_categories + EXCLUDED.total_categories,
+    total_subcategories = s.total_subcategories + EXCLUDED.total_subcategories,
+    total_employees = s.total_employees + EXCLUDED.total_employees,
+    active_employees = s.active_employees + EXCLUDED.active_employees,
+    updated_at = now();
+$$ LANGUAGE sql SECURITY DEFINER SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION add_dealership_stats(UUID, INTEGER, INTEGER, INTEGER, INTEGER, NUMERIC, INTEGER, INTEGER, INTEGER, INTEGER)
+  FROM PUBLIC, anon, authenticated;
+
+-- Triggers por sentencia con tablas de transición: una carga masiva de 500 productos
+-- hace un UPDATE de la fila de stats por dealership, no 500.
+-- Un UPDATE resta las filas viejas y suma las nuevas (cubre cambios de estado, precio o dealership).
+CREATE OR REPLACE FUNCTION track_product_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP <> 'DELETE' THEN
+    PERFORM add_dealership_stats(
+      dealership_id,
+      p_products => count(*)::INTEGER,
+      p_available => (count(*) FILTER (WHERE status = 'available'))::INTEGER,
+      p_sold => (count(*) FILTER (WHERE status = 'sold'))::INTEGER,
+      p_reserved => (count(*) FILTER (WHERE status = 'reserved'))::INTEGER,
+      p_inventory_value => COALESCE(sum(price), 0)
+    )
+    FROM new_rows WHERE dealership_id IS NOT NULL GROUP BY dealership_id;
+  END IF;
+  IF TG_OP <> 'INSERT' THEN
+    PERFORM add_dealership_stats(
+      dealership_id,
+      p_products => -count(*)::INTEGER,
+      p_available => -(count(*) FILTER (WHERE status = 'available'))::INTEGER,
+      p_sold => -(count(*) FILTER (WHERE status = 'sold'))::INTEGER,
+      p_reserved => -(count(*) FILTER (WHERE status = 'reserved'))::INTEGER,
+      p_inventory_value => -COALESCE(sum(price), 0)
+    )
+    FROM old_rows WHERE dealership_id IS NOT NULL GROUP BY dealership_id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION track_employee_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP <> 'DELETE' THEN
+    PERFORM add_dealership_stats(
+      dealership_id,
+      p_employees => count(*)::INTEGER,
+      p_active_employees => (count(*) FILTER (WHERE is_active))::INTEGER
+    )
+    FROM new_rows WHERE dealership_id IS NOT NULL GROUP BY dealership_id;
+  END IF;
+  IF TG_OP <> 'INSERT' THEN
+    PERFORM add_dealership_stats(
+      dealership_id,
+      p_employees => -count(*)::INTEGER,
+      p_active_employees => -(count(*) FILTER (WHERE is_active))::INTEGER
+    )
+    FROM old_rows WHERE dealership_id IS NOT NULL GROUP BY dealership_id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION track_category_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP <> 'DELETE' THEN
+    PERFORM add_dealership_stats(dealership_id, p_categories => count(*)::INTEGER)
+    FROM new_rows WHERE dealership_id IS NOT NULL GROUP BY dealership_id;
+  END IF;
+  IF TG_OP <> 'INSERT' THEN
+    PERFORM add_dealership_stats(dealership_id, p_categories => -count(*)::INTEGER)
+    FROM old_rows WHERE dealership_id IS NOT NULL GROUP BY dealership_id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION track_subcategory_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP <> 'DELETE' THEN
+    PERFORM add_dealership_stats(dealership_id, p_subcategories => count(*)::INTEGER)
+    FROM new_rows WHERE dealership_id IS NOT NULL GROUP BY dealership_id;
+  END IF;
+  IF TG_OP <> 'INSERT' THEN
+    PERFORM add_dealership_stats(dealership_id, p_subcategories => -count(*)::INTEGER)
+    FROM old_rows WHERE dealership_id IS NOT NULL GROUP BY dealership_id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Las tablas de transición no admiten INSERT OR UPDATE OR DELETE en un solo trigger:
+-- uno por evento, todos con la misma función
+DROP TRIGGER IF EXISTS dealership_stats_products_insert ON public.products;
+CREATE TRIGGER dealership_stats_products_insert
+  AFTER INSERT ON public.products REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION track_product_stats();
+
+DROP TRIGGER IF EXISTS dealership_stats_products_update ON public.products;
+CREATE TRIGGER dealership_stats_products_update
+  AFTER UPDATE ON public.products REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION track_product_stats();
+
+DROP TRIGGER IF EXISTS dealership_stats_products_delete ON public.products;
+CREATE TRIGGER dealership_stats_products_delete
+  AFTER DELETE ON public.products REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION track_product_stats();
+
+DROP TRIGGER IF EXISTS dealership_stats_employees_insert ON public.employees;
+CREATE TRIGGER dealership_stats_employees_insert
+  AFTER INSERT ON public.employees REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION track_employee_stats();
+
+DROP TRIGGER IF EXISTS dealership_stats_employees_update ON public.employees;
+CREATE TRIGGER dealership_stats_employees_update
+  AFTER UPDATE ON public.employees REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION track_employee_stats();
+
+DROP TRIGGER IF EXISTS dealership_stats_employees_delete ON public.employees;
+CREATE TRIGGER dealership_stats_employees_delete
+  AFTER DELETE ON public.employees REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION track_employee_stats();
+
+DROP TRIGGER IF EXISTS dealership_stats_categories_insert ON public.categories;
+CREATE TRIGGER dealership_stats_categories_insert
+  AFTER INSERT ON public.categories REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION track_category_stats();
+
+DROP TRIGGER IF EXISTS dealership_stats_categories_update ON public.categories;
+CREATE TRIGGER dealership_stats_categories_update
+  AFTER UPDATE ON public.categories REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION track_category_stats();
+
+DROP TRIGGER IF EXISTS dealership_stats_categories_delete ON public.categories;
+CREATE TRIGGER dealership_stats_categories_delete
+  AFTER DELETE ON public.categories REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION track_category_stats();
+
+DROP TRIGGER IF EXISTS dealership_stats_subcategories_insert ON public.subcategories;
+CREATE TRIGGER dealership_stats_subcategories_insert
+  AFTER INSERT ON public.subcategories REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION track_subcategory_stats();
+
+DROP TRIGGER IF EXISTS dealership_stats_subcategories_update ON public.subcategories;
+CREATE TRIGGER dealership_stats_subcategories_update
+  AFTER UPDATE ON public.subcategories REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION track_subcategory_stats();
+
+DROP TRIGGER IF EXISTS dealership_stats_subcategories_delete ON public.subcategories;
+CREATE TRIGGER dealership_stats_subcategories_delete
+  AFTER DELETE ON public.subcategories REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION track_subcategory_stats();
+
+-- ============================================
+-- RECÁLCULO COMPLETO (carga inicial y reparación)
+-- ============================================
+-- SELECT refresh_dealership_stats();            -- todos los dealerships
+-- SELECT refresh_dealership_stats('<uuid>');    -- uno solo
+CREATE OR REPLACE FUNCTION refresh_dealership_stats(p_dealership_id UUID DEFAULT NULL)
+RETURNS VOID AS $$
+  INSERT INTO public.dealership_stats (
+    dealership_id, total_products, available_products, sold_products, reserved_products, inventory_value,
+    total_categories, total_subcategories, total_employees, active_employees, updated_at
+  )
+  SELECT
+    d.id,
+    COALESCE(p.total, 0), COALESCE(p.available, 0), COALESCE(p.sold, 0), COALESCE(p.reserved, 0),
+    COALESCE(p.value, 0),
+    (SELECT count(*) FROM public.categories c WHERE c.dealership_id = d.id),
+    (SELECT count(*) FROM public.subcategories sc WHERE sc.dealership_id = d.id),
+    COALESCE(e.total, 0), COALESCE(e.active, 0),
+    now()
+  FROM public.dealerships d
+  LEFT JOIN LATERAL (
+    SELECT count(*) AS total,
+           count(*) FILTER (WHERE status = 'available') AS available,
+           count(*) FILTER (WHERE status = 'sold') AS sold,
+           count(*) FILTER (WHERE status = 'reserved') AS reserved,
+           sum(price) AS value
+    FROM public.products WHERE dealership_id = d.id
+  ) p ON true
+  LEFT JOIN LATERAL (
+    SELECT count(*) AS total, count(*) FILTER (WHERE is_active) AS active
+    FROM public.employees WHERE dealership_id = d.id
+  ) e ON true
+  WHERE p_dealership_id IS NULL OR d.id = p_dealership_id
+  ON CONFLICT (dealership_id) DO UPDATE SET
+    total_products = EXCLUDED.total_products,
+    available_products = EXCLUDED.available_products,
+    sold_products = EXCLUDED.sold_products,
+    reserved_products = EXCLUDED.reserved_products,
+    inventory_value = EXCLUDED.inventory_value,
+    total_categories = EXCLUDED.total_categories,
+    total_subcategories = EXCLUDED.total_subcategories,
+    total_employees = EXCLUDED.total_employees,
+    active_employees = EXCLUDED.active_employees,
+    updated_at = EXCLUDED.updated_at;
+$$ LANGUAGE sql SECURITY DEFINER SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION refresh_dealership_stats(UUID) FROM PUBLIC, anon, authenticated;
+
+SELECT refresh_dealership_stats();
+
+-- ============================================
+-- RPC: get_dashboard_stats
+-- ============================================
+-- Los contadores más los 5 productos más recientes (con su imagen principal) en una llamada.
+-- SECURITY INVOKER: devuelve NULL si p_dealership_id no es el dealership del usuario.
+-- Los recientes usan idx_products_dealership_created (supabase-indexes.sql).
+CREATE OR REPLACE FUNCTION get_dashboard_stats(p_dealership_id UUID)
+RETURNS JSONB AS $$
+  SELECT jsonb_build_object(
+    'total_products', COALESCE(s.total_products, 0),
+    'available_products', COALESCE(s.available_products, 0),
+    'sold_products', COALESCE(s.sold_products, 0),
+    'reserved_products', COALESCE(s.reserved_products, 0),
+    'inventory_value', COALESCE(s.inventory_value, 0),
+    'total_categories', COALESCE(s.total_categories, 0),
+    'total_subcategories', COALESCE(s.total_subcategories, 0),
+    'total_employees', COALESCE(s.total_employees, 0),
+    'active_employees', COALESCE(s.active_employees, 0),
+    'updated_at', s.updated_at,
+    'recent_products', COALESCE((
+      SELECT jsonb_agg(to_jsonb(r) ORDER BY r.created_at DESC)
+      FROM (
+        SELECT p.id, p.name, p.price, p.status, p.created_at,
+               COALESCE((
+                 SELECT jsonb_agg(jsonb_build_object('image_url', i.image_url, 'is_primary', i.is_primary))
+                 FROM (
+                   SELECT image_url, is_primary FROM public.product_images
+                   WHERE product_id = p.id
+                   ORDER BY is_primary DESC, display_order
+                   LIMIT 1
+                 ) i
+               ), '[]'::jsonb) AS product_images
+        FROM public.products p
+        WHERE p.dealership_id = d.id
+        ORDER BY p.created_at DESC
+        LIMIT 5
+      ) r
+    ), '[]'::jsonb)
+  )
+  FROM public.dealerships d
+  LEFT JOIN public.dealership_stats s ON s.dealership_id = d.id
+  WHERE d.id = p_dealership_id
+    AND d.id = (SELECT get_user_dealership_id())
+$$ LANGUAGE sql STABLE SECURITY INVOKER;
+
+GRANT EXECUTE ON FUNCTION get_dashboard_stats(UUID) TO authenticated;
+
+-- ============================================
+-- ¡LISTO! El dashboard carga sus números con una sola consulta
+-- ============================================
@@ -0,0 +1,18 @@
+-- ============================================
+-- METADATOS DE IMÁGENES (ancho, alto, blurhash)
+-- ============================================
+-- IMPORTANTE: Ejecuta esto en el SQL Editor de Supabase después de supabase-schema.sql
+-- El dashboard los guarda al subir fotos; las existentes se completan con:
+--   python backend_test.py --backfill-image-metadata
+-- ============================================
+
+-- Dimensiones de la imagen guardada en image_url y un blurhash (~30 caracteres):
+-- el catálogo reserva el espacio correcto y muestra un borroso mientras carga
+ALTER TABLE public.product_images
+  ADD COLUMN IF NOT EXISTS width INTEGER CHECK (width > 0),
+  ADD COLUMN IF NOT EXISTS height INTEGER CHECK (height > 0),
+  ADD COLUMN IF NOT EXISTS blurhash TEXT;
+
+-- ============================================
+-- ¡LISTO! Las tarjetas del catálogo ya no saltan al cargar las fotos
+-- ============================================
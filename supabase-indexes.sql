@@ -0,0 +1,50 @@
+-- ============================================
+-- ÍNDICES COMPUESTOS PARA LAS CONSULTAS REALES DE LA APP
+-- ============================================
+-- IMPORTANTE: Ejecuta esto en el SQL Editor de Supabase después de supabase-schema.sql
+-- Verifica los planes con: python backend_test.py --explain (requiere SUPABASE_DB_URL)
+-- ============================================
+
+-- Productos de un tenant, más recientes primero (catálogo, dashboard, /api/products y su cursor)
+CREATE INDEX IF NOT EXISTS idx_products_dealership_created
+  ON public.products (dealership_id, created_at DESC, id DESC);
+
+-- Mismo orden con filtro de categoría / subcategoría (/api/products?category_id=...)
+CREATE INDEX IF NOT EXISTS idx_products_dealership_category_created
+  ON public.products (dealership_id, category_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_products_dealership_subcategory_created
+  ON public.products (dealership_id, subcategory_id, created_at DESC, id DESC);
+
+-- Empleados visibles en el landing: solo activos, ordenados
+CREATE INDEX IF NOT EXISTS idx_employees_dealership_active_order
+  ON public.employees (dealership_id, display_order)
+  WHERE is_active = true;
+
+-- Imágenes de cada producto en orden de galería (embed product_images)
+CREATE INDEX IF NOT EXISTS idx_product_images_product_order
+  ON public.product_images (product_id, display_order);
+
+-- Categorías del tenant ordenadas por nombre
+CREATE INDEX IF NOT EXISTS idx_categories_dealership_name
+  ON public.categories (dealership_id, name);
+
+-- ============================================
+-- ÍNDICES REDUNDANTES
+-- ============================================
+-- Son prefijos de los índices anteriores: solo encarecen las escrituras.
+-- idx_products_category / idx_products_subcategory se mantienen: los usa el
+-- ON DELETE SET NULL al borrar una categoría. idx_employees_dealership también:
+-- el dashboard lista empleados inactivos.
+DROP INDEX IF EXISTS public.idx_products_dealership;
+DROP INDEX IF EXISTS public.idx_product_images_product;
+DROP INDEX IF EXISTS public.idx_categories_dealership;
+
+ANALYZE public.products;
+ANALYZE public.product_images;
+ANALYZE public.employees;
+ANALYZE public.categories;
+
+-- ============================================
+-- ¡LISTO! Cada consulta del catálogo usa un índice sin paso de ordenamiento
+-- ============================================
@@ -0,0 +1,31 @@
+-- ============================================
+-- FEED DE CAMBIOS EN TIEMPO REAL (Supabase Realtime)
+-- ============================================
+-- IMPORTANTE: Ejecuta esto en el SQL Editor de Supabase después de supabase-schema.sql
+-- Agrega las tablas del dashboard y del catálogo a la publicación supabase_realtime. Las páginas
+-- (lib/realtime.js) se suscriben a los cambios de su concesionario y aplican cada fila que llega a la
+-- lista que ya tienen en memoria, en vez de volver a descargar la tabla entera.
+-- Realtime respeta RLS: cada suscriptor solo recibe los INSERT/UPDATE de filas que puede leer.
+-- Los DELETE traen solo el id y no se filtran por concesionario; el cliente los ignora si no tiene esa fila.
+-- Medir cuánto tarda un cambio en llegar:
+--   python backend_test.py --benchmark-realtime
+-- ============================================
+
+DO $$
+DECLARE
+  t TEXT;
+BEGIN
+  FOREACH t IN ARRAY ARRAY['products', 'product_images', 'categories', 'subcategories', 'employees', 'site_settings']
+  LOOP
+    IF NOT EXISTS (
+      SELECT 1 FROM pg_publication_tables
+      WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = t
+    ) THEN
+      EXECUTE format('ALTER PUBLICATION supabase_realtime ADD TABLE public.%I', t);
+    END IF;
+  END LOOP;
+END $$;
+
+-- ============================================
+-- ¡LISTO! El dashboard y el catálogo se actualizan sin recargar tablas completas
+-- ============================================
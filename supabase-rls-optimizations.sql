@@ -0,0 +1,64 @@
+-- ============================================
+-- POLÍTICAS RLS EN FORMA CACHEABLE (initPlan)
+-- ============================================
+-- IMPORTANTE: Ejecuta esto en el SQL Editor de Supabase después de supabase-schema.sql
+-- Mide el efecto con: python backend_test.py --rls-profile
+-- ============================================
+
+-- auth.uid() y get_user_dealership_id() dentro de (SELECT ...) se evalúan una vez por
+-- consulta (initPlan) en lugar de una vez por fila. La comparación por igualdad contra
+-- dealership_id además permite usar los índices del tenant.
+
+-- STABLE: el resultado no cambia dentro de una misma consulta
+CREATE OR REPLACE FUNCTION get_user_dealership_id()
+RETURNS UUID AS $$
+  SELECT dealership_id FROM public.users WHERE id = (SELECT auth.uid());
+$$ LANGUAGE SQL STABLE SECURITY DEFINER SET search_path = public;
+
+-- DEALERSHIPS
+DROP POLICY IF EXISTS "Solo admins pueden actualizar su dealership" ON public.dealerships;
+CREATE POLICY "Solo admins pueden actualizar su dealership" ON public.dealerships
+  FOR UPDATE USING (id = (SELECT get_user_dealership_id()));
+
+-- USERS
+DROP POLICY IF EXISTS "Usuarios pueden ver su propia info" ON public.users;
+CREATE POLICY "Usuarios pueden ver su propia info" ON public.users
+  FOR SELECT USING (id = (SELECT auth.uid()));
+
+DROP POLICY IF EXISTS "Usuarios pueden actualizar su propia info" ON public.users;
+CREATE POLICY "Usuarios pueden actualizar su propia info" ON public.users
+  FOR UPDATE USING (id = (SELECT auth.uid()));
+
+-- CATEGORIES
+DROP POLICY IF EXISTS "Admin puede gestionar categorías de su dealership" ON public.categories;
+CREATE POLICY "Admin puede gestionar categorías de su dealership" ON public.categories
+  FOR ALL USING (dealership_id = (SELECT get_user_dealership_id()));
+
+-- SUBCATEGORIES
+DROP POLICY IF EXISTS "Admin puede gestionar subcategorías de su dealership" ON public.subcategories;
+CREATE POLICY "Admin puede gestionar subcategorías de su dealership" ON public.subcategories
+  FOR ALL USING (dealership_id = (SELECT get_user_dealership_id()));
+
+-- PRODUCTS
+DROP POLICY IF EXISTS "Admin puede gestionar productos de su dealership" ON public.products;
+CREATE POLICY "Admin puede gestionar productos de su dealership" ON public.products
+  FOR ALL USING (dealership_id = (SELECT get_user_dealership_id()));
+
+-- PRODUCT_IMAGES
+DROP POLICY IF EXISTS "Admin puede gestionar imágenes de su dealership" ON public.product_images;
+CREATE POLICY "Admin puede gestionar imágenes de su dealership" ON public.product_images
+  FOR ALL USING (dealership_id = (SELECT get_user_dealership_id()));
+
+-- EMPLOYEES
+DROP POLICY IF EXISTS "Admin puede gestionar empleados de su dealership" ON public.employees;
+CREATE POLICY "Admin puede gestionar empleados de su dealership" ON public.employees
+  FOR ALL USING (dealership_id = (SELECT get_user_dealership_id()));
+
+-- SITE_SETTINGS
+DROP POLICY IF EXISTS "Admin puede gestionar configuración de su dealership" ON public.site_settings;
+CREATE POLICY "Admin puede gestionar configuración de su dealership" ON public.site_settings
+  FOR ALL USING (dealership_id = (SELECT get_user_dealership_id()));
+
+-- ============================================
+-- ¡LISTO! Mismas reglas de aislamiento, evaluadas una sola vez por consulta
+-- ============================================
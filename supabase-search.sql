@@ -0,0 +1,84 @@
+-- ============================================
+-- BÚSQUEDA DE PRODUCTOS EN EL SERVIDOR (/api/search)
+-- ============================================
+-- IMPORTANTE: Ejecuta esto en el SQL Editor de Supabase después de supabase-schema.sql
+-- Reemplaza la búsqueda Fuse.js del catálogo, que necesitaba descargar todo el inventario
+-- ============================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+-- Documento de texto completo: nombre (peso A), marca/modelo (B), descripción (C).
+-- Configuración 'simple' (sin stemming) para que las búsquedas por prefijo funcionen con nombres propios.
+-- Es una expresión indexada en vez de una columna para no agregar bytes a los select('*') del catálogo.
+CREATE OR REPLACE FUNCTION product_search_vector(p_name TEXT, p_brand TEXT, p_model TEXT, p_description TEXT)
+RETURNS tsvector AS $$
+  SELECT setweight(to_tsvector('simple', coalesce(p_name, '')), 'A') ||
+         setweight(to_tsvector('simple', coalesce(p_brand, '') || ' ' || coalesce(p_model, '')), 'B') ||
+         setweight(to_tsvector('simple', coalesce(p_description, '')), 'C')
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- Texto corto para coincidencias aproximadas (errores de tipeo) con trigramas
+CREATE OR REPLACE FUNCTION product_search_text(p_name TEXT, p_brand TEXT, p_model TEXT)
+RETURNS TEXT AS $$
+  SELECT lower(concat_ws(' ', p_name, p_brand, p_model))
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- "kawa nin" -> 'kawa':* & 'nin':* (búsqueda mientras se escribe)
+CREATE OR REPLACE FUNCTION product_search_query(p_query TEXT)
+RETURNS tsquery AS $$
+  SELECT to_tsquery('simple', string_agg(quote_literal(token) || ':*', ' & '))
+  FROM regexp_split_to_table(lower(trim(p_query)), '[^[:alnum:]]+') AS token
+  WHERE token <> ''
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- dealership_id va en el mismo índice GIN (btree_gin) para que cada búsqueda quede dentro del tenant
+CREATE INDEX IF NOT EXISTS idx_products_search_vector ON public.products
+  USING gin (dealership_id, product_search_vector(name, brand, model, description));
+
+CREATE INDEX IF NOT EXISTS idx_products_search_trgm ON public.products
+  USING gin (dealership_id, product_search_text(name, brand, model) gin_trgm_ops);
+
+-- ============================================
+-- RPC: search_products
+-- ============================================
+-- Ids ordenados por relevancia más el total de coincidencias (para paginar).
+-- SECURITY INVOKER: las políticas RLS de products se aplican normalmente.
+CREATE OR REPLACE FUNCTION search_products(
+  p_dealership_id UUID,
+  p_query TEXT,
+  p_category_id UUID DEFAULT NULL,
+  p_subcategory_id UUID DEFAULT NULL,
+  p_limit INTEGER DEFAULT 24,
+  p_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE (id UUID, rank REAL, total_count BIGINT) AS $$
+  WITH q AS (
+    SELECT product_search_query(p_query) AS tsq, lower(trim(p_query)) AS text
+  ),
+  matches AS (
+    SELECT
+      p.id,
+      (coalesce(ts_rank_cd(product_search_vector(p.name, p.brand, p.model, p.description), q.tsq), 0) * 2
+        + word_similarity(q.text, product_search_text(p.name, p.brand, p.model)))::REAL AS rank
+    FROM public.products p, q
+    WHERE p.dealership_id = p_dealership_id
+      AND (p_category_id IS NULL OR p.category_id = p_category_id)
+      AND (p_subcategory_id IS NULL OR p.subcategory_id = p_subcategory_id)
+      AND (
+        product_search_vector(p.name, p.brand, p.model, p.description) @@ q.tsq
+        OR q.text <% product_search_text(p.name, p.brand, p.model)
+      )
+  )
+  SELECT matches.id, matches.rank, count(*) OVER () AS total_count
+  FROM matches
+  ORDER BY matches.rank DESC, matches.id
+  LIMIT least(greatest(p_limit, 1), 100)
+  OFFSET greatest(p_offset, 0)
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION search_products(UUID, TEXT, UUID, UUID, INTEGER, INTEGER) TO anon, authenticated;
+
+-- ============================================
+-- ¡LISTO! Búsquedas rankeadas en milisegundos sin descargar el catálogo
+-- ============================================
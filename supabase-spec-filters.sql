@@ -0,0 +1,156 @@
+-- ============================================
+-- FILTROS POR ESPECIFICACIONES CON FACETAS (/api/facets)
+-- ============================================
+-- IMPORTANTE: Ejecuta esto en el SQL Editor de Supabase después de supabase-schema.sql
+-- Filtrar por cilindrada, enfriamiento o sistema de combustible ya no requiere descargar
+-- el inventario completo: cada filtro es un specifications @> '{...}' que resuelve el índice GIN,
+-- y los conteos por valor se calculan en el servidor.
+-- Comparación con filtrar en el navegador:
+--   python backend_test.py --benchmark-facets
+-- ============================================
+
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+-- dealership_id en el mismo índice GIN (btree_gin) para que cada filtro quede dentro del tenant.
+-- jsonb_path_ops: más chico y rápido que el operator class por defecto, y solo soporta @> (lo único que usamos)
+CREATE INDEX IF NOT EXISTS idx_products_dealership_specifications ON public.products
+  USING gin (dealership_id, specifications jsonb_path_ops);
+
+-- Reemplazado por el índice anterior (supabase-categories-automation.sql); mantener ambos duplica el costo de escribir
+DROP INDEX IF EXISTS public.idx_products_specifications;
+
+-- ============================================
+-- FACETAS
+-- ============================================
+-- Especificaciones por las que se puede filtrar y su ruta dentro del JSONB.
+-- Mantener en sincronía con SPEC_FACETS en lib/motorcycle-specs.js.
+CREATE OR REPLACE FUNCTION product_spec_facets()
+RETURNS TABLE (facet TEXT, path TEXT[]) AS $$
+  VALUES
+    ('cilindrada', ARRAY['cilindrada']),
+    ('motor', ARRAY['motor', 'motor']),
+    ('enfriamiento', ARRAY['motor', 'enfriamiento']),
+    ('sistema_combustible', ARRAY['motor', 'sistema_combustible']),
+    ('transmision', ARRAY['transmision', 'tipo']),
+    ('unidad_final', ARRAY['transmision', 'unidad_final'])
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- {motor,enfriamiento} + 'Refrigerado por aire' -> {"motor": {"enfriamiento": "Refrigerado por aire"}}
+CREATE OR REPLACE FUNCTION spec_document(p_path TEXT[], p_value TEXT)
+RETURNS JSONB AS $$
+DECLARE
+  doc JSONB := to_jsonb(p_value);
+BEGIN
+  FOR i IN REVERSE array_length(p_path, 1)..1 LOOP
+    doc := jsonb_build_object(p_path[i], doc);
+  END LOOP;
+  RETURN doc;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE;
+
+-- Condición SQL de los filtros: los valores de una misma faceta con OR, las facetas entre sí con AND.
+-- {"enfriamiento": ["A"], "cilindrada": ["125", "150"]} ->
+--   (p.specifications @> '{"motor": {"enfriamiento": "A"}}'::jsonb) AND
+--   (p.specifications @> '{"cilindrada": "125"}'::jsonb OR p.specifications @> '{"cilindrada": "150"}'::jsonb)
+-- Cada @> es una búsqueda en el índice GIN (un OR se resuelve con BitmapOr).
+-- p_skip deja afuera una faceta: sus conteos se calculan sin su propio filtro.
+CREATE OR REPLACE FUNCTION spec_filter_sql(p_filters JSONB, p_skip TEXT DEFAULT NULL)
+RETURNS TEXT AS $$
+  SELECT COALESCE(string_agg('(' || c.conditions || ')', ' AND '), 'true')
+  FROM product_spec_facets() f
+  CROSS JOIN LATERAL (
+    SELECT string_agg(format('p.specifications @> %L::jsonb', spec_document(f.path, v)), ' OR ') AS conditions
+    FROM jsonb_array_elements_text(
+      CASE WHEN jsonb_typeof(p_filters->f.facet) = 'array' THEN p_filters->f.facet ELSE '[]'::jsonb END
+    ) AS v
+  ) c
+  WHERE f.facet IS DISTINCT FROM p_skip
+    AND c.conditions IS NOT NULL
+$$ LANGUAGE sql IMMUTABLE;
+
+-- ============================================
+-- RPC: filter_products_by_specs
+-- ============================================
+-- Una página de ids (más nuevos primero), el total y los conteos por valor de cada faceta:
+-- {"total": 37, "ids": [...], "facets": {"enfriamiento": {"Refrigerado por aire": 20, ...}, ...}}
+-- Las facetas sin filtro se cuentan sobre el resultado actual en una sola pasada; cada faceta
+-- filtrada se cuenta sin su propio filtro, para que sus otros valores sigan siendo elegibles.
+-- SECURITY INVOKER: las políticas RLS de products se aplican normalmente.
+CREATE OR REPLACE FUNCTION filter_products_by_specs(
+  p_dealership_id UUID,
+  p_filters JSONB DEFAULT '{}'::jsonb,
+  p_category_id UUID DEFAULT NULL,
+  p_subcategory_id UUID DEFAULT NULL,
+  p_limit INTEGER DEFAULT 24,
+  p_offset INTEGER DEFAULT 0
+)
+RETURNS JSONB AS $$
+DECLARE
+  base TEXT := format('p.dealership_id = %L', p_dealership_id)
+    || CASE WHEN p_category_id IS NOT NULL THEN format(' AND p.category_id = %L', p_category_id) ELSE '' END
+    || CASE WHEN p_subcategory_id IS NOT NULL THEN format(' AND p.subcategory_id = %L', p_subcategory_id) ELSE '' END;
+  selected TEXT[];
+  result JSONB;
+  facets JSONB := '{}'::jsonb;
+  counts JSONB;
+  pass RECORD;
+BEGIN
+  p_filters := COALESCE(p_filters, '{}'::jsonb);
+  SELECT COALESCE(array_agg(f.facet), '{}') INTO selected
+  FROM product_spec_facets() f
+  WHERE jsonb_typeof(p_filters->f.facet) = 'array' AND jsonb_array_length(p_filters->f.facet) > 0;
+
+  EXECUTE format(
+    $q$
+    SELECT jsonb_build_object(
+      'total', (SELECT count(*) FROM public.products p WHERE %1$s AND %2$s),
+      'ids', COALESCE((
+        SELECT jsonb_agg(page.id ORDER BY page.created_at DESC, page.id DESC)
+        FROM (
+          SELECT p.id, p.created_at FROM public.products p
+          WHERE %1$s AND %2$s
+          ORDER BY p.created_at DESC, p.id DESC
+          LIMIT %3$s OFFSET %4$s
+        ) page
+      ), '[]'::jsonb)
+    )
+    $q$,
+    base, spec_filter_sql(p_filters), least(greatest(p_limit, 1), 100), greatest(p_offset, 0)
+  ) INTO result;
+
+  FOR pass IN
+    SELECT NULL::TEXT AS skip, array_agg(f.facet) AS facet_keys
+    FROM product_spec_facets() f WHERE NOT (f.facet = ANY(selected))
+    UNION ALL
+    SELECT f.facet, ARRAY[f.facet] FROM product_spec_facets() f WHERE f.facet = ANY(selected)
+  LOOP
+    CONTINUE WHEN pass.facet_keys IS NULL;
+    EXECUTE format(
+      $q$
+      SELECT COALESCE(jsonb_object_agg(v.facet, v.counts), '{}'::jsonb)
+      FROM (
+        SELECT c.facet, jsonb_object_agg(c.value, c.n) AS counts
+        FROM (
+          SELECT f.facet, p.specifications #>> f.path AS value, count(*) AS n
+          FROM public.products p
+          JOIN product_spec_facets() f ON f.facet = ANY($1)
+          WHERE %1$s AND %2$s AND COALESCE(p.specifications #>> f.path, '') <> ''
+          GROUP BY 1, 2
+        ) c
+        GROUP BY c.facet
+      ) v
+      $q$,
+      base, spec_filter_sql(p_filters, pass.skip)
+    ) INTO counts USING pass.facet_keys;
+    facets := facets || counts;
+  END LOOP;
+
+  RETURN result || jsonb_build_object('facets', facets);
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+GRANT EXECUTE ON FUNCTION filter_products_by_specs(UUID, JSONB, UUID, UUID, INTEGER, INTEGER) TO anon, authenticated;
+
+-- ============================================
+-- ¡LISTO! Filtros por especificación sin descargar el catálogo
+-- ============================================
@@ -0,0 +1,177 @@
+-- ============================================
+-- VALORES NUMÉRICOS DE LAS ESPECIFICACIONES (/api/products/specs)
+-- ============================================
+-- IMPORTANTE: Ejecuta esto en el SQL Editor de Supabase después de supabase-schema.sql
+-- Las especificaciones son texto libre ('15.4 HP @ 8500 rpm', '135 kg', '12 litros'):
+-- aquí se convierten a números en unidades fijas (cc, HP, Nm, kg, litros) en una tabla aparte,
+-- sincronizada por un trigger, con índices B-tree para filtrar por rango y ordenar.
+-- Tabla aparte (no columnas en products) para no agregar bytes a los select('*') del catálogo.
+-- Los productos que ya existían se completan con:
+--   python backend_test.py --backfill-spec-values
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.product_spec_values (
+  product_id UUID PRIMARY KEY REFERENCES public.products(id) ON DELETE CASCADE,
+  dealership_id UUID NOT NULL REFERENCES public.dealerships(id) ON DELETE CASCADE,
+  cc INTEGER,
+  power_hp NUMERIC(6, 1),
+  torque_nm NUMERIC(6, 1),
+  weight_kg NUMERIC(6, 1),
+  fuel_capacity_l NUMERIC(5, 1),
+  price DECIMAL(10, 2),
+  parsed_at TIMESTAMPTZ DEFAULT now()
+);
+
+ALTER TABLE public.product_spec_values ENABLE ROW LEVEL SECURITY;
+
+-- Misma visibilidad que products; solo el trigger (SECURITY DEFINER) escribe
+DROP POLICY IF EXISTS "Public can view spec values of active dealerships" ON public.product_spec_values;
+CREATE POLICY "Public can view spec values of active dealerships" ON public.product_spec_values
+  FOR SELECT USING (
+    dealership_id IN (SELECT id FROM public.dealerships WHERE is_active = true)
+    OR dealership_id = (SELECT get_user_dealership_id())
+  );
+
+-- Un índice por campo: filtro por rango + orden (en ambos sentidos) + cursor por product_id
+CREATE INDEX IF NOT EXISTS idx_product_spec_values_cc
+  ON public.product_spec_values (dealership_id, cc, product_id) WHERE cc IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_product_spec_values_power
+  ON public.product_spec_values (dealership_id, power_hp, product_id) WHERE power_hp IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_product_spec_values_torque
+  ON public.product_spec_values (dealership_id, torque_nm, product_id) WHERE torque_nm IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_product_spec_values_weight
+  ON public.product_spec_values (dealership_id, weight_kg, product_id) WHERE weight_kg IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_product_spec_values_fuel
+  ON public.product_spec_values (dealership_id, fuel_capacity_l, product_id) WHERE fuel_capacity_l IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_product_spec_values_price
+  ON public.product_spec_values (dealership_id, price, product_id) WHERE price IS NOT NULL;
+
+-- ============================================
+-- PARSEO
+-- ============================================
+-- Mantener en sincronía con parse_spec_values() en backend_test.py y local_supabase.py
+
+-- Primer número del texto, con coma decimal: '12,5 litros' -> 12.5
+CREATE OR REPLACE FUNCTION spec_number(p_text TEXT)
+RETURNS NUMERIC AS $$
+  SELECT replace((regexp_match(p_text, '(\d+(?:[.,]\d+)?)'))[1], ',', '.')::NUMERIC
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- Valores fuera de rango quedan en NULL en vez de hacer fallar el INSERT del producto
+CREATE OR REPLACE FUNCTION spec_bounded(p_value NUMERIC, p_max NUMERIC)
+RETURNS NUMERIC AS $$
+  SELECT CASE WHEN p_value > 0 AND p_value < p_max THEN round(p_value, 1) END
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+CREATE OR REPLACE FUNCTION parse_spec_values(p_specs JSONB)
+RETURNS TABLE (cc INTEGER, power_hp NUMERIC, torque_nm NUMERIC, weight_kg NUMERIC, fuel_capacity_l NUMERIC) AS $$
+  SELECT
+    -- cilindrada ('150', '150cc') o un '149 cc' dentro del tipo de motor
+    round(spec_bounded(COALESCE(
+      spec_number(p_specs->>'cilindrada'),
+      spec_number((regexp_match(p_specs#>>'{motor,motor}', '(\d+(?:[.,]\d+)?)\s*cc', 'i'))[1])
+    ), 10000))::INTEGER,
+    -- '15.4 HP @ 8500 rpm', '11.3 kW', '15 CV'
+    spec_bounded(CASE
+      WHEN p.power ~* '\d\s*kw' THEN spec_number(p.power) * 1.341
+      WHEN p.power ~* '\d\s*(cv|ps)\M' THEN spec_number(p.power) * 0.9863
+      ELSE spec_number(p.power)
+    END, 10000),
+    -- '13.8 Nm @ 7000 rpm', '1.4 kgf·m', '10 lb-ft'
+    spec_bounded(CASE
+      WHEN p.torque ~* '\d\s*kg' THEN spec_number(p.torque) * 9.80665
+      WHEN p.torque ~* '\d\s*(lb|ft)' THEN spec_number(p.torque) * 1.35582
+      ELSE spec_number(p.torque)
+    END, 10000),
+    -- '135 kg', '298 lbs'
+    spec_bounded(CASE
+      WHEN p.weight ~* '\d\s*lb' THEN spec_number(p.weight) * 0.45359
+      ELSE spec_number(p.weight)
+    END, 10000),
+    -- '12 litros', '3.2 gal'
+    spec_bounded(CASE
+      WHEN p.fuel ~* '\d\s*gal' THEN spec_number(p.fuel) * 3.78541
+      ELSE spec_number(p.fuel)
+    END, 1000)
+  FROM (
+    SELECT p_specs#>>'{motor,potencia_maxima}' AS power,
+           p_specs#>>'{motor,torque_maximo}' AS torque,
+           p_specs#>>'{dimension,peso}' AS weight,
+           p_specs#>>'{chasis,capacidad_combustible}' AS fuel
+  ) p
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- ============================================
+-- SINCRONIZACIÓN
+-- ============================================
+
+CREATE OR REPLACE FUNCTION sync_product_spec_values()
+RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO public.product_spec_values AS v (
+    product_id, dealership_id, cc, power_hp, torque_nm, weight_kg, fuel_capacity_l, price, parsed_at
+  )
+  SELECT NEW.id, NEW.dealership_id, s.cc, s.power_hp, s.torque_nm, s.weight_kg, s.fuel_capacity_l, NEW.price, now()
+  FROM parse_spec_values(NEW.specifications) s
+  WHERE NEW.dealership_id IS NOT NULL
+  ON CONFLICT (product_id) DO UPDATE SET
+    dealership_id = EXCLUDED.dealership_id,
+    cc = EXCLUDED.cc,
+    power_hp = EXCLUDED.power_hp,
+    torque_nm = EXCLUDED.torque_nm,
+    weight_kg = EXCLUDED.weight_kg,
+    fuel_capacity_l = EXCLUDED.fuel_capacity_l,
+    price = EXCLUDED.price,
+    parsed_at = EXCLUDED.parsed_at;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Solo cuando cambia algo que se parsea: editar el nombre o el estado no reescribe la fila
+DROP TRIGGER IF EXISTS product_spec_values_sync ON public.products;
+CREATE TRIGGER product_spec_values_sync
+  AFTER INSERT OR UPDATE OF specifications, price, dealership_id ON public.products
+  FOR EACH ROW EXECUTE FUNCTION sync_product_spec_values();
+
+-- Carga por lotes de los productos existentes (o re-parseo tras cambiar las reglas), ordenada por id:
+-- SELECT refresh_product_spec_values(NULL, 1000);  -> {"processed": 1000, "last_id": "..."}
+-- SELECT refresh_product_spec_values('<last_id>', 1000);  ... hasta processed < 1000
+-- Lotes cortos: cada llamada es una transacción breve que no bloquea las ediciones del dashboard.
+CREATE OR REPLACE FUNCTION refresh_product_spec_values(p_after UUID DEFAULT NULL, p_limit INTEGER DEFAULT 1000)
+RETURNS JSONB AS $$
+  WITH batch AS (
+    SELECT id, dealership_id, specifications, price
+    FROM public.products
+    WHERE (p_after IS NULL OR id > p_after) AND dealership_id IS NOT NULL
+    ORDER BY id
+    LIMIT least(greatest(p_limit, 1), 10000)
+  ),
+  written AS (
+    INSERT INTO public.product_spec_values AS v (
+      product_id, dealership_id, cc, power_hp, torque_nm, weight_kg, fuel_capacity_l, price, parsed_at
+    )
+    SELECT b.id, b.dealership_id, s.cc, s.power_hp, s.torque_nm, s.weight_kg, s.fuel_capacity_l, b.price, now()
+    FROM batch b
+    CROSS JOIN LATERAL parse_spec_values(b.specifications) s
+    ON CONFLICT (product_id) DO UPDATE SET
+      dealership_id = EXCLUDED.dealership_id,
+      cc = EXCLUDED.cc,
+      power_hp = EXCLUDED.power_hp,
+      torque_nm = EXCLUDED.torque_nm,
+      weight_kg = EXCLUDED.weight_kg,
+      fuel_capacity_l = EXCLUDED.fuel_capacity_l,
+      price = EXCLUDED.price,
+      parsed_at = EXCLUDED.parsed_at
+    RETURNING product_id
+  )
+  SELECT jsonb_build_object(
+    'processed', (SELECT count(*) FROM written),
+    'last_id', (SELECT id FROM batch ORDER BY id DESC LIMIT 1)
+  )
+$$ LANGUAGE sql VOLATILE SECURITY DEFINER SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION refresh_product_spec_values(UUID, INTEGER) FROM PUBLIC, anon, authenticated;
+
+-- ============================================
+-- ¡LISTO! Filtros por rango y "ordenar por potencia" con índices
+-- ============================================